@@ -2,16 +2,26 @@
 Streamlit Web UI
 """
 import streamlit as st
-import asyncio
+import time
+import hashlib
 from pathlib import Path
+from typing import Optional
 import sys
 
 # 添加项目根目录到路径
 sys.path.insert(0, str(Path(__file__).parent))
 
-from src.scrapers.company_scraper import CompanyScraper
-from src.parsers.resume_parser import ResumeParser
-from src.ai.matcher import OfferMatcher
+from src.pipeline import AnalysisPipeline
+from src.utils.async_runner import BackgroundLoop
+from src.utils.job_queue import Job, JobQueue
+from src.utils.metrics import gauge, registry, start_http_server
+from config import settings
+
+# 有任务进行中时的页面轮询间隔（秒）
+POLL_INTERVAL = 1.0
+
+JOBS_QUEUED = gauge("analysis_jobs_queued", "排队中的分析任务数")
+JOBS_RUNNING = gauge("analysis_jobs_running", "执行中的分析任务数")
 
 
 # 页面配置
@@ -22,6 +32,38 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+
+class Runtime:
+    """
+    进程级共享资源
+    
+    Streamlit每次交互都会重新执行整个脚本，这里的对象只在首次创建，
+    之后所有会话、所有rerun共用同一个后台事件循环、任务队列、HTTP会话和结果缓存
+    """
+    
+    def __init__(self):
+        self.loop = BackgroundLoop(name="analysis-loop")
+        self.pipeline = AnalysisPipeline()
+        self.jobs = JobQueue(self.loop, self._run_job, workers=settings.ANALYSIS_WORKERS)
+        
+        registry.add_collector(self._collect_metrics)
+        self.metrics_server = None
+        if settings.METRICS_PORT:
+            self.metrics_server = start_http_server(settings.METRICS_PORT, settings.METRICS_HOST)
+    
+    def _collect_metrics(self):
+        JOBS_QUEUED.set(self.jobs.depth)
+        JOBS_RUNNING.set(self.jobs.running)
+    
+    async def _run_job(self, job: Job):
+        await self.pipeline.run(**job.params, on_stage=job.set_stage)
+
+
+@st.cache_resource
+def get_runtime() -> Runtime:
+    return Runtime()
+
+
 # 自定义CSS
 st.markdown("""
 <style>
@@ -77,6 +119,18 @@ def main():
         
         st.divider()
         
+        # 任务队列状态
+        st.subheader("任务队列")
+        jobs = get_runtime().jobs
+        col1, col2 = st.columns(2)
+        col1.metric("排队中", jobs.depth)
+        col2.metric("运行中", jobs.running)
+        
+        # 历史分析（来自数据库，跨会话保留）
+        render_history()
+        
+        st.divider()
+        
         # 关于
         st.subheader("关于")
         st.info("""
@@ -115,16 +169,11 @@ def main():
         if upload_method == "上传文件":
             uploaded_file = st.file_uploader(
                 "上传简历",
-                type=["pdf", "docx", "txt"],
-                help="支持PDF、Word和TXT格式"
+                type=["pdf", "docx", "txt", "png", "jpg", "jpeg"],
+                help="支持PDF、Word、TXT和图片格式（扫描件自动OCR识别）"
             )
             if uploaded_file:
-                # 保存临时文件
-                temp_path = Path("cache") / uploaded_file.name
-                temp_path.parent.mkdir(exist_ok=True)
-                with open(temp_path, "wb") as f:
-                    f.write(uploaded_file.getbuffer())
-                resume_data = {"type": "file", "path": str(temp_path)}
+                resume_data = store_upload(uploaded_file)
         else:
             resume_text = st.text_area(
                 "粘贴简历内容",
@@ -153,87 +202,41 @@ def main():
             elif not job_description:
                 st.error("请输入岗位描述")
             else:
-                # 执行分析
-                with st.spinner("分析中，请稍候..."):
-                    result = asyncio.run(run_analysis(
-                        company_name=company_name,
-                        company_url=company_url,
-                        resume_data=resume_data,
-                        job_description=job_description,
-                        user_preferences={
+                # 提交到后台任务队列，不阻塞页面
+                job = get_runtime().jobs.submit(
+                    params={
+                        "company_name": company_name,
+                        "company_url": company_url,
+                        "resume_data": resume_data,
+                        "job_description": job_description,
+                        "user_preferences": {
                             "expected_salary": expected_salary,
                             "location": location,
                             "overtime_acceptable": overtime_acceptable
                         }
-                    ))
-                    
-                    # 保存到session state
-                    st.session_state["analysis_result"] = result
-                    
-                    st.success("✅ 分析完成！请查看【分析结果】和【报告】标签页")
+                    },
+                    label=company_name
+                )
+                st.session_state.setdefault("job_ids", []).append(job.id)
+                st.session_state["selected_job"] = job.id
+                st.success("✅ 已提交分析任务！结果会在【分析结果】和【报告】标签页中逐步显示")
+    
+    my_jobs = get_my_jobs()
+    current_job = select_job(my_jobs)
     
     with tab2:
         st.markdown('<div class="step-header">匹配分析结果</div>', unsafe_allow_html=True)
         
-        if "analysis_result" in st.session_state:
-            result = st.session_state["analysis_result"]
-            
-            # 显示匹配度
-            match_score = result.get("match_result", {}).get("overall_score", 0)
-            
-            col1, col2, col3 = st.columns(3)
-            with col1:
-                st.metric("综合匹配度", f"{match_score}/100")
-            with col2:
-                status = "推荐" if match_score >= 70 else "谨慎" if match_score >= 50 else "不推荐"
-                st.metric("决策建议", status)
-            with col3:
-                st.metric("推荐岗位", len(result.get("recommendations", {}).get("recommendations", [])))
-            
-            st.divider()
-            
-            # 详细分析
-            col1, col2 = st.columns(2)
-            
-            with col1:
-                st.subheader("✅ 优势项")
-                strengths = result.get("match_result", {}).get("strengths", [])
-                if strengths:
-                    for strength in strengths:
-                        st.success(strength)
-                else:
-                    st.info("暂无数据")
-            
-            with col2:
-                st.subheader("⚠️ 风险项")
-                weaknesses = result.get("match_result", {}).get("weaknesses", [])
-                if weaknesses:
-                    for weakness in weaknesses:
-                        st.warning(weakness)
-                else:
-                    st.info("暂无数据")
-            
-            st.divider()
-            
-            # 推荐岗位
-            st.subheader("🎯 推荐其他岗位")
-            recommendations = result.get("recommendations", {}).get("recommendations", [])
-            
-            if recommendations:
-                for i, rec in enumerate(recommendations, 1):
-                    with st.expander(f"{i}. {rec['title']} - 匹配度: {rec['match_score']}/100"):
-                        st.write(f"**推荐理由：** {rec['reason']}")
-            else:
-                st.info("该公司暂无其他合适岗位")
+        if current_job is not None:
+            render_results(current_job)
         else:
             st.info("请先在【输入信息】标签页完成分析")
     
     with tab3:
         st.markdown('<div class="step-header">完整分析报告</div>', unsafe_allow_html=True)
         
-        if "analysis_result" in st.session_state:
-            result = st.session_state["analysis_result"]
-            report = result.get("report", {}).get("content", "")
+        if current_job is not None:
+            report = current_job.stages.get("report", {}).get("content", "")
             
             if report:
                 st.markdown(report)
@@ -245,66 +248,188 @@ def main():
                     file_name="offer_analysis_report.md",
                     mime="text/markdown"
                 )
+            elif current_job.status == Job.FAILED:
+                st.error(f"分析失败: {current_job.error}")
             else:
                 st.info("报告生成中...")
         else:
             st.info("请先在【输入信息】标签页完成分析")
+    
+    # 有任务未完成时定时刷新页面，已完成的阶段会立即显示出来
+    if any(job.active for job in my_jobs):
+        time.sleep(POLL_INTERVAL)
+        st.rerun()
+
 
+def get_my_jobs() -> list[Job]:
+    """当前会话提交过的任务（最新的在前）"""
+    jobs = get_runtime().jobs
+    my_jobs = [jobs.get(job_id) for job_id in st.session_state.get("job_ids", [])]
+    return [job for job in reversed(my_jobs) if job is not None]
 
-async def run_analysis(
-    company_name: str,
-    company_url: str,
-    resume_data: dict,
-    job_description: str,
-    user_preferences: dict
-) -> dict:
-    """执行完整分析流程"""
+
+def select_job(my_jobs: list[Job]) -> Optional[Job]:
+    """在侧边栏列出本会话的任务，返回当前查看的任务"""
+    if not my_jobs:
+        return None
     
-    result = {}
+    status_labels = {
+        Job.QUEUED: "⏳ 排队中",
+        Job.RUNNING: "🔄 分析中",
+        Job.DONE: "✅ 已完成",
+        Job.FAILED: "❌ 失败",
+    }
+    job_ids = [job.id for job in my_jobs]
+    selected = st.session_state.get("selected_job")
     
-    # 1. 爬取公司信息
-    scraper = CompanyScraper()
-    company_info = await scraper.scrape(
-        company_name=company_name,
-        url=company_url,
-        include_recruitment=True
-    )
-    result["company_info"] = company_info
+    with st.sidebar:
+        st.subheader("我的分析")
+        selected = st.radio(
+            "选择查看的任务",
+            job_ids,
+            index=job_ids.index(selected) if selected in job_ids else 0,
+            format_func=lambda job_id: next(
+                f"{status_labels[job.status]} {job.label} ({job.elapsed:.0f}s)"
+                for job in my_jobs if job.id == job_id
+            ),
+            label_visibility="collapsed"
+        )
+    
+    st.session_state["selected_job"] = selected
+    return next(job for job in my_jobs if job.id == selected)
+
+
+def render_history(limit: int = 10):
+    """在侧边栏列出数据库中最近的分析记录"""
+    runtime = get_runtime()
+    if runtime.pipeline.db is None:
+        return
+    try:
+        history = runtime.loop.run(runtime.pipeline.history(limit), timeout=2)
+    except Exception:
+        return
+    if not history:
+        return
+    
+    with st.expander(f"历史分析（最近 {len(history)} 条）"):
+        for record in history:
+            created = time.strftime("%m-%d %H:%M", time.localtime(record["created_at"]))
+            score = "-" if record["overall_score"] is None else f"{record['overall_score']:.0f}"
+            st.caption(f"{created} · {record['company_name']} · 匹配度 {score}")
+
+
+def render_results(job: Job):
+    """按阶段渲染分析结果，尚未完成的阶段显示占位提示"""
+    stages = job.stages
     
-    # 2. 解析简历
-    parser = ResumeParser()
-    if resume_data["type"] == "file":
-        parsed_resume = await parser.parse_file(resume_data["path"])
+    if job.status == Job.FAILED:
+        st.error(f"分析失败: {job.error}")
+    elif job.status == Job.QUEUED:
+        st.info(f"任务排队中，前方还有 {get_runtime().jobs.position(job.id)} 个任务...")
+    
+    # 公司信息与简历解析
+    col1, col2 = st.columns(2)
+    with col1:
+        st.subheader("🏢 公司信息")
+        company_info = stages.get("company_info")
+        if company_info is None:
+            st.info("爬取中...")
+        elif "error" in company_info:
+            st.warning(f"爬取失败: {company_info['error']}")
+        else:
+            st.write(f"**{company_info.get('company_name', '')}** {company_info.get('url') or ''}")
+            st.write(f"岗位数量: {len(company_info.get('positions', []))}")
+    with col2:
+        st.subheader("📄 简历解析")
+        parsed_resume = stages.get("resume_data")
+        if parsed_resume is None:
+            st.info("解析中...")
+        elif "error" in parsed_resume:
+            st.warning(f"解析失败: {parsed_resume['error']}")
+        else:
+            st.write(f"技能: {', '.join(parsed_resume.get('skills', [])) or '未识别'}")
+            st.write(f"教育背景: {len(parsed_resume.get('education', []))} 条")
+    
+    st.divider()
+    
+    match_result = stages.get("match_result")
+    recommendations = stages.get("recommendations", {}).get("recommendations", [])
+    
+    # 显示匹配度
+    col1, col2, col3 = st.columns(3)
+    if match_result is None:
+        with col1:
+            st.info("AI匹配分析中...")
     else:
-        parsed_resume = await parser.parse_text(resume_data["content"])
-    result["resume_data"] = parsed_resume
+        match_score = match_result.get("overall_score", 0)
+        with col1:
+            st.metric("综合匹配度", f"{match_score}/100")
+        with col2:
+            status = "推荐" if match_score >= 70 else "谨慎" if match_score >= 50 else "不推荐"
+            st.metric("决策建议", status)
+    with col3:
+        if "recommendations" in stages:
+            st.metric("推荐岗位", len(recommendations))
     
-    # 3. 匹配分析
-    matcher = OfferMatcher()
-    match_result = await matcher.analyze_match(
-        resume_data=parsed_resume,
-        job_description=job_description,
-        company_info=company_info,
-        user_preferences=user_preferences
-    )
-    result["match_result"] = match_result
+    st.divider()
     
-    # 4. 岗位推荐
-    recommendations = await matcher.recommend_positions(
-        resume_data=parsed_resume,
-        company_info=company_info,
-        top_k=3
-    )
-    result["recommendations"] = recommendations
+    # 详细分析
+    if match_result is not None:
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            st.subheader("✅ 优势项")
+            strengths = match_result.get("strengths", [])
+            if strengths:
+                for strength in strengths:
+                    st.success(strength)
+            else:
+                st.info("暂无数据")
+        
+        with col2:
+            st.subheader("⚠️ 风险项")
+            weaknesses = match_result.get("weaknesses", [])
+            if weaknesses:
+                for weakness in weaknesses:
+                    st.warning(weakness)
+            else:
+                st.info("暂无数据")
+        
+        st.divider()
     
-    # 5. 生成报告
-    report = await matcher.generate_report(
-        match_result=match_result,
-        format_type="markdown"
-    )
-    result["report"] = report
+    # 推荐岗位
+    st.subheader("🎯 推荐其他岗位")
+    if "recommendations" not in stages:
+        st.info("岗位推荐中...")
+    elif recommendations:
+        for i, rec in enumerate(recommendations, 1):
+            with st.expander(f"{i}. {rec['title']} - 匹配度: {rec['match_score']}/100"):
+                st.write(f"**推荐理由：** {rec['reason']}")
+    else:
+        st.info("该公司暂无其他合适岗位")
+
+
+def store_upload(uploaded_file) -> dict:
+    """
+    上传的简历内容
     
-    return result
+    每次rerun都会执行到这里，因此同一上传只在首次计算哈希，之后复用session state中的结果。
+    任务参数直接引用上传内容的内存缓冲区（getbuffer()返回memoryview，不复制），
+    由解析器在内存中解析，不再经过磁盘，也就不受上传缓存淘汰的影响
+    """
+    upload_key = getattr(uploaded_file, "file_id", None) or f"{uploaded_file.name}:{uploaded_file.size}"
+    digests = st.session_state.setdefault("upload_digests", {})
+    
+    buffer = uploaded_file.getbuffer()
+    if upload_key not in digests:
+        digests[upload_key] = hashlib.sha256(buffer).hexdigest()
+    
+    return {
+        "type": "bytes",
+        "data": buffer,
+        "filename": uploaded_file.name,
+        "digest": digests[upload_key]
+    }
 
 
 if __name__ == "__main__":
@@ -0,0 +1,134 @@
+"""
+分析流程压测
+
+用本地测试站点（虚构公司官网）和模拟Ollama服务代替真实网站和模型，并发执行完整分析流程，
+测量编排层（爬取、解析、缓存、并发控制）在给定模型速度和并行槽位下的吞吐量和延迟，
+用于容量规划：例如模型只有2个并行槽位时，多少个并发分析会开始排队。
+
+用法:
+    python benchmarks/bench_analysis_load.py
+    python benchmarks/bench_analysis_load.py --analyses 200 --concurrency 16 --parallel 4 --tokens-per-second 30
+    python benchmarks/bench_analysis_load.py --stream --error-rate 0.05
+"""
+import sys
+import time
+import asyncio
+import argparse
+import tempfile
+import statistics
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from config import settings
+from src.ai.fake_ollama import FakeOllamaServer
+from src.ai.ollama_client import OLLAMA_FIRST_TOKEN, OLLAMA_SECONDS
+from src.scrapers.fixture_server import FixtureServer
+
+RESUME_TEXT = """张三 | 高级后端工程师 | 138-0000-0000 | zhangsan@example.com
+工作经历
+2019-2024 某科技公司 后端工程师 负责订单和支付系统，使用Python、Go、MySQL、Redis、Kafka
+教育经历
+2012-2016 某大学 计算机科学与技术 本科
+技能: Python, Go, MySQL, Redis, Kafka, Docker, Kubernetes, Linux
+"""
+
+
+def percentile(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+
+async def run(args) -> dict:
+    from src.pipeline import AnalysisPipeline
+    
+    ollama = FakeOllamaServer(
+        port=args.ollama_port,
+        latency=args.latency,
+        tokens_per_second=args.tokens_per_second,
+        parallel=args.parallel,
+        error_rate=args.error_rate,
+        max_tokens=args.max_tokens
+    )
+    site = FixtureServer(port=args.site_port, companies=args.companies)
+    await ollama.start()
+    await site.start()
+    settings.OLLAMA_BASE_URL = ollama.base_url
+    
+    pipeline = AnalysisPipeline()
+    semaphore = asyncio.Semaphore(args.concurrency)
+    latencies = []
+    
+    async def discard(stage: str, text: str):
+        pass
+    
+    async def analyze(i: int):
+        async with semaphore:
+            started = time.perf_counter()
+            await pipeline.run(
+                company_name=site.company_name(i % args.companies),
+                company_url=site.company_url(i % args.companies),
+                resume_data={"type": "text", "content": RESUME_TEXT},
+                job_description=f"Python后端工程师（岗位{i}），3年以上经验，熟悉MySQL和Redis",
+                user_preferences={"expected_salary": "20-30K"},
+                on_token=discard if args.stream else None
+            )
+            latencies.append(time.perf_counter() - started)
+    
+    started = time.perf_counter()
+    try:
+        await asyncio.gather(*(analyze(i) for i in range(args.analyses)))
+    finally:
+        elapsed = time.perf_counter() - started
+        await pipeline.close()
+        await site.stop()
+        await ollama.stop()
+    
+    return {
+        "elapsed": elapsed,
+        "latencies": latencies,
+        "ollama": ollama.stats(),
+        "site_requests": site.requests
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="分析流程压测（模拟Ollama + 本地测试站点）")
+    parser.add_argument("--analyses", type=int, default=50, help="分析次数")
+    parser.add_argument("--concurrency", type=int, default=8, help="同时进行的分析数")
+    parser.add_argument("--companies", type=int, default=10, help="公司数量（同一公司的爬取结果会被缓存复用）")
+    parser.add_argument("--latency", type=float, default=0.2, help="模拟模型首个token前的延迟（秒）")
+    parser.add_argument("--tokens-per-second", type=float, default=200.0, help="模拟模型的生成速度")
+    parser.add_argument("--parallel", type=int, default=2, help="模拟模型同时处理的请求数")
+    parser.add_argument("--max-tokens", type=int, default=128, help="每个回复最多输出的token数")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="模拟模型返回500的概率")
+    parser.add_argument("--stream", action="store_true", help="流式接收模型输出（统计首个token延迟）")
+    parser.add_argument("--ollama-port", type=int, default=11436)
+    parser.add_argument("--site-port", type=int, default=8901)
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        # 不写数据库、不限速，HTTP缓存放在临时目录
+        settings.STORAGE_ENABLED = False
+        settings.CRAWLER_DELAY = 0
+        settings.CACHE_DIR = Path(tmp)
+        result = asyncio.run(run(args))
+    
+    latencies = result["latencies"]
+    ollama_calls = OLLAMA_SECONDS.count(endpoint="generate")
+    print(f"分析 {len(latencies)} 次，并发 {args.concurrency}，模型并行 {args.parallel}，"
+          f"{args.tokens_per_second:g} token/s")
+    print(f"总耗时: {result['elapsed']:.2f}s  吞吐量: {len(latencies) / result['elapsed']:.2f} 次/秒")
+    print(f"单次延迟: p50 {percentile(latencies, 0.5):.2f}s  p95 {percentile(latencies, 0.95):.2f}s  "
+          f"最大 {max(latencies):.2f}s  平均 {statistics.mean(latencies):.2f}s")
+    print(f"模型请求: {result['ollama']['requests']} 次，错误 {result['ollama']['errors']}，"
+          f"最大同时请求 {result['ollama']['peak_in_flight']}（超出并行槽位的在排队）")
+    if ollama_calls:
+        print(f"模型调用耗时: 平均 {OLLAMA_SECONDS.total(endpoint='generate') / ollama_calls:.2f}s")
+    if OLLAMA_FIRST_TOKEN.count():
+        print(f"首个token延迟: 平均 {OLLAMA_FIRST_TOKEN.total() / OLLAMA_FIRST_TOKEN.count():.2f}s（包括排队）")
+    print(f"测试站点请求: {result['site_requests']} 次")
+
+
+if __name__ == "__main__":
+    main()
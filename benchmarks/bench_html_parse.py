@@ -0,0 +1,162 @@
+"""
+HTML解析基准测试
+
+对比原来的BeautifulSoup整页解析与lxml定向解析的吞吐量，并测量并发解析时事件循环的最大停顿
+（在当前线程解析 vs 进程池解析）。
+
+用法:
+    # 使用HTTP缓存中保存的页面（爬取过一批公司之后）
+    python benchmarks/bench_html_parse.py
+    
+    # 使用指定目录下的 .html/.htm/.body 文件
+    python benchmarks/bench_html_parse.py --corpus path/to/pages
+    
+    # 没有现成页面时，用测试站点的页面模板生成放大的页面
+    python benchmarks/bench_html_parse.py --synthetic 200 --page-kb 300
+"""
+import sys
+import time
+import asyncio
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from config import settings
+from src.scrapers.extractors import HTMLExtractor, extract_basic_info, extract_page
+
+
+def load_corpus(corpus_dir: Path, limit: int) -> list[str]:
+    pages = []
+    for pattern in ("*.html", "*.htm", "*.body"):
+        for path in sorted(corpus_dir.glob(pattern)):
+            text = path.read_text(encoding="utf-8", errors="ignore")
+            if "<html" in text[:2000].lower():
+                pages.append(text)
+            if len(pages) >= limit:
+                return pages
+    return pages
+
+
+def synthetic_corpus(count: int, page_kb: int) -> list[str]:
+    """用测试站点的首页和招聘页模板生成页面，正文用重复段落放大到指定大小"""
+    from src.scrapers.fixture_server import FixtureServer
+    
+    server = FixtureServer(companies=count)
+    filler = "<div class=\"news\"><h4>公司新闻</h4><p>" + "我们持续投入研发，服务更多行业客户。" * 20 + "</p></div>\n"
+    pages = []
+    for i in range(count):
+        page = server._careers_page(i) if i % 2 else server._home_page(i)
+        padding = filler * max(0, (page_kb * 1024 - len(page.encode("utf-8"))) // len(filler.encode("utf-8")))
+        pages.append(page.replace("</body>", padding + "</body>"))
+    return pages
+
+
+def bs4_basic_info(html: str) -> dict:
+    """原实现：整页构建BeautifulSoup树后查找meta描述、关键词和页脚"""
+    from bs4 import BeautifulSoup
+    
+    soup = BeautifulSoup(html, "lxml")
+    description = soup.find("meta", attrs={"name": "description"})
+    keywords = soup.find("meta", attrs={"name": "keywords"})
+    footer = soup.find("footer")
+    return {
+        "description": description.get("content", "") if description else "",
+        "industry": keywords.get("content", "") if keywords else "",
+        "footer": footer.get_text(" ", strip=True) if footer else ""
+    }
+
+
+def bench_sync(name: str, func, pages: list[str]) -> dict:
+    start = time.perf_counter()
+    for html in pages:
+        func(html)
+    elapsed = time.perf_counter() - start
+    size_mb = sum(len(p.encode("utf-8")) for p in pages) / 1024 / 1024
+    return {
+        "name": name,
+        "seconds": elapsed,
+        "pages_per_sec": len(pages) / elapsed,
+        "mb_per_sec": size_mb / elapsed
+    }
+
+
+async def bench_loop(name: str, extractor: HTMLExtractor, pages: list[str]) -> dict:
+    """并发解析全部页面，同时用一个定时任务测量事件循环的最大停顿"""
+    interval = 0.005
+    max_lag = 0.0
+    stop = asyncio.Event()
+    
+    async def ticker():
+        nonlocal max_lag
+        while not stop.is_set():
+            before = time.perf_counter()
+            await asyncio.sleep(interval)
+            max_lag = max(max_lag, time.perf_counter() - before - interval)
+    
+    tick_task = asyncio.create_task(ticker())
+    await asyncio.sleep(0)
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        extractor.run(extract_page, html, "https://example.com/", "careers") for html in pages
+    ))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await tick_task
+    extractor.shutdown()
+    return {
+        "name": name,
+        "seconds": elapsed,
+        "pages_per_sec": len(pages) / elapsed,
+        "max_loop_lag_ms": max_lag * 1000
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HTML解析基准测试")
+    parser.add_argument("--corpus", help="页面目录（默认使用HTTP缓存目录）")
+    parser.add_argument("--limit", type=int, default=500, help="最多使用的页面数")
+    parser.add_argument("--synthetic", type=int, default=0, help="生成的页面数（不读取语料目录）")
+    parser.add_argument("--page-kb", type=int, default=200, help="生成页面的大小（KB）")
+    parser.add_argument("--workers", type=int, default=settings.HTML_PARSE_WORKERS, help="进程池大小")
+    args = parser.parse_args()
+    
+    if args.synthetic:
+        pages = synthetic_corpus(args.synthetic, args.page_kb)
+    else:
+        corpus_dir = Path(args.corpus) if args.corpus else settings.CACHE_DIR / "http"
+        pages = load_corpus(corpus_dir, args.limit)
+        if not pages:
+            print(f"{corpus_dir} 中没有HTML页面，改用 --synthetic 100 生成")
+            pages = synthetic_corpus(100, args.page_kb)
+    
+    total_mb = sum(len(p.encode("utf-8")) for p in pages) / 1024 / 1024
+    print(f"语料: {len(pages)} 个页面, {total_mb:.1f} MB\n")
+    
+    results = []
+    try:
+        results.append(bench_sync("bs4 整页解析(原实现)", bs4_basic_info, pages))
+    except ImportError:
+        print("未安装beautifulsoup4，跳过原实现对比")
+    results.append(bench_sync("lxml 基本信息(head+footer)", extract_basic_info, pages))
+    results.append(bench_sync(
+        "lxml 整页(链接+岗位)",
+        lambda html: extract_page(html, "https://example.com/", "careers"),
+        pages
+    ))
+    
+    print(f"{'方案':<28}{'耗时(s)':>10}{'页/秒':>10}{'MB/秒':>10}")
+    for r in results:
+        print(f"{r['name']:<28}{r['seconds']:>10.2f}{r['pages_per_sec']:>10.1f}{r['mb_per_sec']:>10.1f}")
+    
+    loop_results = [
+        asyncio.run(bench_loop("当前线程解析", HTMLExtractor(max_workers=0), pages)),
+        asyncio.run(bench_loop(f"进程池解析({args.workers}进程)", HTMLExtractor(max_workers=args.workers, inline_kb=0), pages))
+    ]
+    print(f"\n{'事件循环内并发解析':<28}{'耗时(s)':>10}{'页/秒':>10}{'最大停顿(ms)':>14}")
+    for r in loop_results:
+        print(f"{r['name']:<28}{r['seconds']:>10.2f}{r['pages_per_sec']:>10.1f}{r['max_loop_lag_ms']:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+日志热路径基准测试
+
+模拟MCP工具调用日志（参数中带一份多页简历的全文和解析结果），对比：
+- 原来的方式：完整参数格式化进日志、在调用线程同步写文件
+- 参数摘要 + 同步写入
+- 参数摘要 + 队列后台写入（默认配置）
+- 参数摘要 + 队列后台写入 + JSON记录
+
+统计调用方每次 logger.info 的耗时（平均、p99）和写完所有日志的总耗时。
+日志写到临时目录，不输出到控制台。
+
+用法:
+    python benchmarks/bench_logging.py
+    python benchmarks/bench_logging.py --calls 5000 --resume-pages 20
+"""
+import sys
+import time
+import tempfile
+import argparse
+import statistics
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from loguru import logger
+from src.utils.logger import setup_logger, summarize
+
+# 一页简历大约的字数
+PAGE_CHARS = 2500
+
+
+def make_arguments(pages: int) -> dict:
+    """构造带简历全文和公司信息的工具参数"""
+    line = "2019-2023 某科技公司 高级后端工程师 负责订单系统的设计与开发，使用Python、Go、Kafka、Redis。\n"
+    resume_text = (line * (pages * PAGE_CHARS // len(line) + 1))[:pages * PAGE_CHARS]
+    return {
+        "resume_text": resume_text,
+        "resume_data": {
+            "skills": [f"skill_{i}" for i in range(40)],
+            "experience": [{"company": f"公司{i}", "description": line * 5} for i in range(8)],
+        },
+        "company_info": {"name": "示例科技", "description": line * 40, "positions": [{"title": "后端工程师"}] * 30},
+        "user_preferences": {"location": "北京"},
+    }
+
+
+def run_case(logs_dir: Path, calls: int, arguments: dict, summarized: bool, enqueue: bool, json_format: bool) -> dict:
+    setup_logger(logs_dir=logs_dir, console=False, enqueue=enqueue, json_format=json_format)
+    
+    latencies = []
+    started = time.perf_counter()
+    for i in range(calls):
+        with logger.contextualize(request_id=str(i), tool="analyze_job_match"):
+            begin = time.perf_counter()
+            payload = summarize(arguments) if summarized else arguments
+            logger.info(f"调用工具: analyze_job_match, 参数: {payload}")
+            latencies.append(time.perf_counter() - begin)
+    # 等待队列中的日志写完
+    logger.complete()
+    total = time.perf_counter() - started
+    logger.remove()
+    
+    latencies.sort()
+    size = sum(path.stat().st_size for path in logs_dir.glob("*.log"))
+    return {
+        "mean_us": statistics.mean(latencies) * 1e6,
+        "p99_us": latencies[int(len(latencies) * 0.99) - 1] * 1e6,
+        "total_s": total,
+        "log_mb": size / 1024 / 1024,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="日志热路径基准测试")
+    parser.add_argument("--calls", type=int, default=2000, help="日志调用次数")
+    parser.add_argument("--resume-pages", type=int, default=10, help="模拟简历的页数")
+    args = parser.parse_args()
+    
+    arguments = make_arguments(args.resume_pages)
+    print(f"参数完整格式化后 {len(str(arguments)) / 1024:.1f} KB，摘要后 {len(str(summarize(arguments))) / 1024:.1f} KB\n")
+    
+    cases = [
+        ("完整参数 + 同步写入", False, False, False),
+        ("参数摘要 + 同步写入", True, False, False),
+        ("参数摘要 + 队列写入", True, True, False),
+        ("参数摘要 + 队列写入 + JSON", True, True, True),
+    ]
+    print(f"{'方式':<24}{'平均(us)':>12}{'p99(us)':>12}{'总耗时(s)':>12}{'日志(MB)':>12}")
+    for label, summarized, enqueue, json_format in cases:
+        with tempfile.TemporaryDirectory() as tmp:
+            result = run_case(Path(tmp), args.calls, arguments, summarized, enqueue, json_format)
+        print(
+            f"{label:<24}{result['mean_us']:>12.1f}{result['p99_us']:>12.1f}"
+            f"{result['total_s']:>12.3f}{result['log_mb']:>12.2f}"
+        )
+    
+    # 恢复默认配置
+    setup_logger()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+启动耗时基准测试
+
+用 python -X importtime 在新进程中导入各入口模块，统计导入耗时和最慢的依赖，并检查：
+- 导入耗时不超过预算（中位数）
+- 入口模块没有提前导入PDF/Word解析、爬虫、数据库等较重的依赖（应在首次使用时导入）
+- 导入配置不会在磁盘上创建目录
+
+任一项不满足时以非0状态退出，可以放进CI作为启动耗时的回归检查。
+
+用法:
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --runs 10 --top 15
+    python benchmarks/bench_startup.py --budget src.mcp_server=800
+"""
+import os
+import sys
+import argparse
+import statistics
+import subprocess
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# 入口模块 -> 导入耗时预算（毫秒）
+DEFAULT_BUDGETS = {
+    "config": 400,
+    "cli": 400,
+    "src.mcp_server": 1000,
+}
+# 入口模块导入时不应加载的依赖
+LAZY_MODULES = ("PyPDF2", "pdfplumber", "docx", "lxml", "bs4", "aiohttp", "sqlalchemy", "numpy")
+
+
+def import_profile(module: str, env: dict) -> tuple[float, list[tuple[str, int, int]]]:
+    """
+    在新进程中导入模块
+    
+    Returns:
+        (入口模块的累计导入耗时ms, [(模块名, 自身耗时us, 累计耗时us)])
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, env=env, capture_output=True, text=True
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"导入 {module} 失败:\n{proc.stderr[-2000:]}")
+    
+    entries = []
+    total_us = 0
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        entries.append((name.strip(), int(self_us), int(cumulative_us)))
+        # 顶层（没有缩进）的入口模块那一行是它的累计耗时
+        if name.rstrip() == f" {module}":
+            total_us = int(cumulative_us)
+    return total_us / 1000, entries
+
+
+def main():
+    parser = argparse.ArgumentParser(description="启动耗时基准测试")
+    parser.add_argument("--runs", type=int, default=5, help="每个模块导入的次数（取中位数）")
+    parser.add_argument("--top", type=int, default=10, help="列出最慢的依赖数")
+    parser.add_argument(
+        "--budget", action="append", default=[], metavar="MODULE=MS",
+        help="覆盖某个模块的耗时预算，可多次指定"
+    )
+    args = parser.parse_args()
+    
+    budgets = dict(DEFAULT_BUDGETS)
+    for item in args.budget:
+        module, _, ms = item.partition("=")
+        budgets[module] = float(ms)
+    
+    failures = []
+    with tempfile.TemporaryDirectory() as tmp:
+        # 数据目录指向不存在的路径，检查导入时是否创建目录
+        probe_dirs = {name: Path(tmp) / name.lower() for name in ("DATA_DIR", "CACHE_DIR", "LOGS_DIR")}
+        env = {**os.environ, **{name: str(path) for name, path in probe_dirs.items()}}
+        env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(ROOT), env.get("PYTHONPATH")]))
+        
+        print(f"{'模块':<20}{'中位数(ms)':>12}{'最小(ms)':>12}{'预算(ms)':>12}")
+        for module, budget in budgets.items():
+            timings = []
+            for _ in range(args.runs):
+                total_ms, entries = import_profile(module, env)
+                timings.append(total_ms)
+            median = statistics.median(timings)
+            status = "" if median <= budget else "  超出预算"
+            print(f"{module:<20}{median:>12.1f}{min(timings):>12.1f}{budget:>12.0f}{status}")
+            if status:
+                failures.append(f"{module} 导入耗时 {median:.0f}ms 超出预算 {budget:.0f}ms")
+            
+            loaded = {name for name, _, _ in entries}
+            eager = [name for name in LAZY_MODULES if name in loaded]
+            if eager:
+                failures.append(f"{module} 导入时加载了应延迟导入的依赖: {', '.join(eager)}")
+            
+            slowest = sorted(entries, key=lambda entry: entry[1], reverse=True)[:args.top]
+            for name, self_us, cumulative_us in slowest:
+                print(f"    {name:<40}自身 {self_us / 1000:>7.1f}ms  累计 {cumulative_us / 1000:>7.1f}ms")
+        
+        created = [name for name, path in probe_dirs.items() if path.exists()]
+        if created:
+            failures.append(f"导入时创建了目录: {', '.join(created)}")
+    
+    if failures:
+        print("\n失败:")
+        for failure in failures:
+            print(f"  - {failure}")
+        sys.exit(1)
+    print("\n全部通过")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,10 +6,6 @@ import argparse
 from pathlib import Path
 from loguru import logger
 
-from src.scrapers.company_scraper import CompanyScraper
-from src.parsers.resume_parser import ResumeParser
-from src.ai.matcher import OfferMatcher
-
 
 async def analyze_offer(
     company_name: str,
@@ -18,6 +14,10 @@ async def analyze_offer(
     company_url: str = None
 ):
     """完整的Offer分析流程"""
+    # 只在分析模式导入爬虫/解析器/模型相关模块，--mode test 等其他模式启动更快
+    from src.scrapers.company_scraper import CompanyScraper
+    from src.parsers.resume_parser import ResumeParser
+    from src.ai.matcher import OfferMatcher
     
     print("\n" + "="*60)
     print("🎯 Offer匹配器 - 开始分析")
@@ -31,6 +31,7 @@ async def analyze_offer(
         url=company_url,
         include_recruitment=True
     )
+    await scraper.close()
     
     if "error" in company_info:
         print(f"❌ 爬取失败: {company_info['error']}")
@@ -56,19 +57,21 @@ async def analyze_offer(
     print(f"\n🤖 步骤3: AI匹配分析...")
     matcher = OfferMatcher()
     
+    user_preferences = {
+        "expected_salary": "15-25K",
+        "location": "北京",
+        "overtime_acceptable": False
+    }
     match_result = await matcher.analyze_match(
         resume_data=resume_data,
         job_description=job_description,
         company_info=company_info,
-        user_preferences={
-            "expected_salary": "15-25K",
-            "location": "北京",
-            "overtime_acceptable": False
-        }
+        user_preferences=user_preferences
     )
     
     if "error" in match_result:
         print(f"❌ 分析失败: {match_result['error']}")
+        await matcher.ollama.close()
         return
     
     print(f"✅ 匹配分析完成")
@@ -85,7 +88,8 @@ async def analyze_offer(
         recommendations = await matcher.recommend_positions(
             resume_data=resume_data,
             company_info=company_info,
-            top_k=3
+            top_k=3,
+            user_preferences=user_preferences
         )
         
         if recommendations.get("recommendations"):
@@ -94,11 +98,64 @@ async def analyze_offer(
                 print(f"{i}. {rec['title']} - 匹配度: {rec['match_score']}/100")
                 print(f"   理由: {rec['reason']}\n")
     
+    await matcher.ollama.close()
+    
     print("\n" + "="*60)
     print("✨ 分析完成！")
     print("="*60)
 
 
+async def bulk_crawl(companies_path: str, output_dir: str = None, concurrency: int = None):
+    """批量爬取公司信息"""
+    from src.scrapers.bulk_crawler import BulkCrawler, load_company_list
+    from src.storage import Database, BatchWriter
+    from config import settings
+    
+    print(f"\n🕷️ 批量爬取: {companies_path}\n")
+    
+    writer = BatchWriter(Database()) if settings.STORAGE_ENABLED else None
+    crawler = BulkCrawler(
+        output_dir=Path(output_dir) if output_dir else None,
+        concurrency=concurrency,
+        writer=writer
+    )
+    try:
+        stats = await crawler.run(load_company_list(Path(companies_path)))
+    finally:
+        await crawler.scraper.close()
+        if writer:
+            await asyncio.to_thread(writer.close)
+    
+    print("\n" + "="*60)
+    print(f"✅ 成功: {stats['succeeded']}  ❌ 失败: {stats['failed']}  ⏭️ 跳过(已完成): {stats['skipped']}")
+    print(f"⏱️ 耗时: {stats['elapsed_seconds']}s  速度: {stats['companies_per_min']} 家/分钟  错误率: {stats['error_rate']:.1%}")
+    print(f"📁 结果: {crawler.results_path}")
+    if writer:
+        print(f"🗄️ 已写入数据库: {writer.stats()['written']} 条")
+    print("="*60)
+
+
+def ingest_feed(feed_paths: list[str], batch_size: int = None, field_map: str = None):
+    """导入招聘数据导出文件（JSONL/CSV）"""
+    from src.storage.ingest import FeedIngestor
+    
+    print(f"\n📥 导入招聘数据: {', '.join(feed_paths)}\n")
+    
+    mapping = None
+    if field_map:
+        # 形如 "title=job_name,company_name=corp"
+        mapping = dict(item.split("=", 1) for item in field_map.split(",") if "=" in item)
+    
+    ingestor = FeedIngestor(batch_size=batch_size or 5000, field_map=mapping)
+    stats = ingestor.run([Path(p) for p in feed_paths])
+    
+    print("\n" + "="*60)
+    print(f"📄 读取: {stats['read']} 行  ⚠️ 无效: {stats['invalid']}  🔁 批内重复: {stats['duplicates']}")
+    print(f"🗄️ 新增岗位: {stats['inserted']} 条  已有岗位更新: {stats['updated']} 条")
+    print(f"⏱️ 耗时: {stats['elapsed_seconds']}s  速度: {stats['rows_per_sec']} 行/秒")
+    print("="*60)
+
+
 async def quick_test():
     """快速测试模式"""
     print("\n🚀 快速测试模式\n")
@@ -125,6 +182,18 @@ async def quick_test():
         print("1. Ollama已安装并运行")
         print("2. 已下载模型（如 llama3.2:3b）")
         print("3. 检查配置文件中的 OLLAMA_BASE_URL 和 OLLAMA_MODEL")
+    
+    await client.close()
+
+
+def dump_metrics(metrics_file: str = None):
+    """运行结束时把指标写入文件（Prometheus文本格式，可由node_exporter的textfile收集器读取）"""
+    from src.utils.metrics import write_metrics
+    from config import settings
+    
+    path = Path(metrics_file) if metrics_file else settings.LOGS_DIR / "metrics.prom"
+    write_metrics(path)
+    print(f"📈 运行指标已写入: {path}")
 
 
 def main():
@@ -135,9 +204,9 @@ def main():
     
     parser.add_argument(
         "--mode",
-        choices=["analyze", "test"],
+        choices=["analyze", "test", "crawl", "ingest"],
         default="test",
-        help="运行模式：analyze（完整分析）或 test（快速测试）"
+        help="运行模式：analyze（完整分析）、test（快速测试）、crawl（批量爬取）或 ingest（导入招聘数据）"
     )
     
     parser.add_argument(
@@ -160,10 +229,62 @@ def main():
         help="公司官网URL（可选）"
     )
     
+    parser.add_argument(
+        "--companies",
+        help="公司列表文件，每行 \"公司名\" 或 \"公司名,官网URL\"（crawl模式）"
+    )
+    
+    parser.add_argument(
+        "--output",
+        help="批量爬取结果目录（crawl模式，默认 data/crawl）"
+    )
+    
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        help="同时爬取的公司数（crawl模式）"
+    )
+    
+    parser.add_argument(
+        "--feed",
+        nargs="+",
+        help="招聘数据导出文件，支持 .jsonl/.csv/.tsv 及其 .gz 压缩（ingest模式）"
+    )
+    
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        help="每批写入的岗位数（ingest模式，默认5000）"
+    )
+    
+    parser.add_argument(
+        "--field-map",
+        help="字段与列名的对应关系，如 \"title=job_name,company_name=corp\"（ingest模式，默认自动识别常见列名）"
+    )
+    
+    parser.add_argument(
+        "--metrics-file",
+        help="运行结束时写入指标的文件（默认 logs/metrics.prom）"
+    )
+    
     args = parser.parse_args()
     
     if args.mode == "test":
         asyncio.run(quick_test())
+    elif args.mode == "crawl":
+        if not args.companies:
+            print("错误: crawl模式需要提供 --companies 参数")
+            parser.print_help()
+            return
+        
+        asyncio.run(bulk_crawl(args.companies, args.output, args.concurrency))
+    elif args.mode == "ingest":
+        if not args.feed:
+            print("错误: ingest模式需要提供 --feed 参数")
+            parser.print_help()
+            return
+        
+        ingest_feed(args.feed, args.batch_size, args.field_map)
     elif args.mode == "analyze":
         if not all([args.company, args.resume, args.job]):
             print("错误: analyze模式需要提供 --company, --resume 和 --job 参数")
@@ -182,6 +303,8 @@ def main():
             job_description=job_desc,
             company_url=args.url
         ))
+    
+    dump_metrics(args.metrics_file)
 
 
 if __name__ == "__main__":
@@ -22,13 +22,37 @@ class Settings(BaseSettings):
     OLLAMA_MODEL: str = Field(default="qwen2.5:14b")
     OLLAMA_TEMPERATURE: float = Field(default=0.7)
     OLLAMA_MAX_TOKENS: int = Field(default=2048)
+    # 录制/回放：off 正常请求；record 保存每个成功的响应；replay 只返回保存的响应，不访问Ollama
+    OLLAMA_RECORD_MODE: str = Field(default="off")
+    OLLAMA_FIXTURES_DIR: Optional[Path] = Field(default=None)  # 默认 DATA_DIR/ollama_fixtures
     
     # MCP服务器配置
     MCP_SERVER_HOST: str = Field(default="localhost")
     MCP_SERVER_PORT: int = Field(default=8765)
+    MCP_OBJECT_TTL_SECONDS: int = Field(default=3600)
+    MCP_OBJECT_MAX_ENTRIES: int = Field(default=1024)
+    MCP_SHUTDOWN_TIMEOUT: int = Field(default=30)
+    MCP_BATCH_CONCURRENCY: int = Field(default=4)
+    MCP_BATCH_MAX_ANALYZE: int = Field(default=20)
+    # 每个工具的并发上限（未列出的工具使用 MCP_TOOL_CONCURRENCY），超出时排队
+    MCP_TOOL_CONCURRENCY: int = Field(default=8)
+    MCP_TOOL_LIMITS: dict[str, int] = Field(default={
+        "scrape_company_info": 8,
+        "parse_resume": 4,
+        "analyze_job_match": 4,
+        "recommend_positions": 4,
+        "analyze_offer": 2,
+        "batch_analyze_jobs": 1
+    })
+    MCP_QUEUE_SIZE: int = Field(default=32)
+    MCP_QUEUE_TIMEOUT: float = Field(default=30.0)
     
     # 数据库配置
     DATABASE_URL: Optional[str] = Field(default=None)
+    STORAGE_ENABLED: bool = Field(default=True)
+    DB_WRITE_BATCH_SIZE: int = Field(default=200)
+    DB_WRITE_FLUSH_SECONDS: float = Field(default=1.0)
+    DB_WRITE_QUEUE_SIZE: int = Field(default=10000)
     
     # 爬虫配置
     CRAWLER_USER_AGENT: str = Field(
@@ -37,6 +61,21 @@ class Settings(BaseSettings):
     CRAWLER_TIMEOUT: int = Field(default=30)
     CRAWLER_RETRY_TIMES: int = Field(default=3)
     CRAWLER_DELAY: float = Field(default=1.0)
+    CRAWLER_MAX_CONNECTIONS: int = Field(default=100)
+    CRAWLER_MAX_CONNECTIONS_PER_HOST: int = Field(default=4)
+    CRAWLER_DNS_CACHE_SECONDS: int = Field(default=300)
+    CRAWLER_MAX_CONCURRENCY: int = Field(default=32)
+    CRAWLER_BACKOFF_BASE: float = Field(default=0.5)
+    CRAWLER_BACKOFF_MAX: float = Field(default=60.0)
+    CRAWLER_CIRCUIT_THRESHOLD: int = Field(default=5)
+    CRAWLER_CIRCUIT_RESET_SECONDS: float = Field(default=60.0)
+    BULK_CRAWL_CONCURRENCY: int = Field(default=16)
+    HTML_PARSE_WORKERS: int = Field(default=2)
+    HTML_PARSE_INLINE_KB: int = Field(default=64)
+    SITE_CRAWL_MAX_PAGES: int = Field(default=20)
+    SITE_CRAWL_MAX_DEPTH: int = Field(default=2)
+    COMPANY_ALIASES_PATH: Optional[Path] = Field(default=None)
+    COMPANY_FUZZY_MIN_SCORE: float = Field(default=0.6)
     
     # 代理配置
     HTTP_PROXY: Optional[str] = Field(default=None)
@@ -44,27 +83,61 @@ class Settings(BaseSettings):
     
     # 缓存配置
     CACHE_EXPIRY_HOURS: int = Field(default=24)
+    UPLOAD_CACHE_MAX_MB: int = Field(default=512)
+    HTTP_CACHE_ENABLED: bool = Field(default=True)
+    HTTP_CACHE_MAX_MB: int = Field(default=256)
+    
+    # 近似重复检测（MinHash + LSH）
+    DEDUP_ENABLED: bool = Field(default=True)
+    DEDUP_THRESHOLD: float = Field(default=0.8)
+    DEDUP_NUM_PERM: int = Field(default=128)
+    DEDUP_BANDS: int = Field(default=32)
+    
+    # Web应用配置
+    ANALYSIS_WORKERS: int = Field(default=4)
     
     # 日志配置
     LOG_LEVEL: str = Field(default="INFO")
+    LOG_FORMAT: str = Field(default="text")  # text 或 json
+    LOG_ENQUEUE: bool = Field(default=True)  # 经队列由后台线程写日志
+    LOG_MAX_ARG_CHARS: int = Field(default=200)  # 日志中参数字符串的最大长度
+    
+    # 链路追踪配置
+    TRACING_ENABLED: bool = Field(default=False)
+    TRACE_EXPORT_PATH: Optional[Path] = Field(default=None)  # 默认 LOGS_DIR/traces.jsonl
+    TRACE_EXPORT_FORMAT: str = Field(default="jsonl")  # jsonl 或 otlp
+    
+    # 指标配置：设置端口后提供 http://<METRICS_HOST>:<METRICS_PORT>/metrics
+    METRICS_PORT: Optional[int] = Field(default=None)
+    METRICS_HOST: str = Field(default="127.0.0.1")
     
     # 简历解析配置
     RESUME_MAX_SIZE_MB: int = Field(default=10)
     RESUME_ALLOWED_FORMATS: list[str] = Field(
-        default=["pdf", "docx", "doc", "txt"]
+        default=["pdf", "docx", "doc", "txt", "png", "jpg", "jpeg"]
     )
     
+    # OCR配置（扫描件/图片简历）
+    OCR_ENABLED: bool = Field(default=True)
+    OCR_LANGUAGES: str = Field(default="chi_sim+eng")
+    OCR_DPI: int = Field(default=300)
+    OCR_MAX_WORKERS: int = Field(default=4)
+    OCR_PAGE_TIMEOUT: int = Field(default=60)
+    
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
         case_sensitive = False
     
-    def __init__(self, **kwargs):
-        super().__init__(**kwargs)
-        # 创建必要的目录
-        self.DATA_DIR.mkdir(exist_ok=True)
-        self.CACHE_DIR.mkdir(exist_ok=True)
-        self.LOGS_DIR.mkdir(exist_ok=True)
+    def ensure_dirs(self):
+        """
+        创建数据、缓存、日志目录
+        
+        导入配置时不做任何磁盘操作，由需要写文件的模块在首次写入前调用
+        （日志目录由loguru自动创建）
+        """
+        for directory in (self.DATA_DIR, self.CACHE_DIR, self.LOGS_DIR):
+            directory.mkdir(parents=True, exist_ok=True)
 
 
 # 全局配置实例
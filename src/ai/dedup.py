@@ -0,0 +1,161 @@
+"""
+近似重复检测模块 - 基于字符shingle的MinHash签名与LSH分桶索引
+"""
+import re
+import zlib
+import unicodedata
+from typing import Hashable, Iterable, Optional
+import numpy as np
+
+from config import settings
+
+
+# 小于2^32的最大素数，哈希值取模后仍可用uint32保存
+_PRIME = np.uint64(4294967291)
+_NOISE_PATTERN = re.compile(r'[\W_]+')
+
+
+class MinHasher:
+    """
+    MinHash签名
+    
+    文本归一化（NFKC、忽略大小写、去掉空白和标点）后切成长度为 shingle_size 的字符片段，
+    对片段集合做 num_perm 次随机线性哈希取最小值。两个签名相同位置相等的比例是
+    两段文本片段集合Jaccard相似度的无偏估计。中文按3字切片时，改了几处措辞、
+    多了一行地点说明的JD相似度仍在0.8以上，不同岗位的JD通常低于0.3。
+    """
+    
+    def __init__(self, num_perm: Optional[int] = None, shingle_size: int = 3, seed: int = 1):
+        self.num_perm = num_perm or settings.DEDUP_NUM_PERM
+        self.shingle_size = shingle_size
+        rng = np.random.default_rng(seed)
+        # a*x+b 在uint64内不会溢出（a < 2^31，x < 2^32）
+        self._a = rng.integers(1, 2 ** 31, self.num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, 2 ** 32, self.num_perm, dtype=np.uint64)
+    
+    @staticmethod
+    def normalize(text: str) -> str:
+        return _NOISE_PATTERN.sub("", unicodedata.normalize("NFKC", text or "").casefold())
+    
+    def shingles(self, text: str) -> set[int]:
+        text = self.normalize(text)
+        k = self.shingle_size
+        if len(text) <= k:
+            return {zlib.crc32(text.encode("utf-8"))} if text else set()
+        return {zlib.crc32(text[i:i + k].encode("utf-8")) for i in range(len(text) - k + 1)}
+    
+    def signature(self, text: str) -> np.ndarray:
+        """计算签名（长度为num_perm的uint32数组），空文本的签名全为最大值"""
+        shingles = self.shingles(text)
+        if not shingles:
+            return np.full(self.num_perm, np.iinfo(np.uint32).max, dtype=np.uint32)
+        x = np.fromiter(shingles, dtype=np.uint64, count=len(shingles))
+        hashes = (x[:, None] * self._a + self._b) % _PRIME
+        return hashes.min(axis=0).astype(np.uint32)
+    
+    @staticmethod
+    def similarity(a: np.ndarray, b: np.ndarray) -> float:
+        """由签名估计Jaccard相似度"""
+        return float(np.count_nonzero(a == b)) / len(a)
+
+
+class LSHIndex:
+    """
+    MinHash签名的LSH索引
+    
+    签名分成 bands 段，每段整体作为分桶键；两个签名只要有一段完全相同就成为候选，
+    查询只需查 bands 个桶，与索引大小无关。bands=32、每段4位时，相似度0.8的文本
+    成为候选的概率超过99.9%，相似度0.3的约23%，候选再用完整签名估计相似度过滤。
+    scope 用于隔离不同范围（如不同简历）的签名，只在同一scope内查找。
+    """
+    
+    def __init__(self, num_perm: Optional[int] = None, bands: Optional[int] = None):
+        self.num_perm = num_perm or settings.DEDUP_NUM_PERM
+        self.bands = bands or settings.DEDUP_BANDS
+        if self.num_perm % self.bands:
+            raise ValueError(f"签名长度 {self.num_perm} 必须能被分段数 {self.bands} 整除")
+        self.rows = self.num_perm // self.bands
+        self._buckets: dict[tuple, list[Hashable]] = {}
+        self._signatures: dict[Hashable, np.ndarray] = {}
+    
+    def __len__(self) -> int:
+        return len(self._signatures)
+    
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._signatures
+    
+    def _band_keys(self, signature: np.ndarray, scope: Hashable) -> Iterable[tuple]:
+        for band in range(self.bands):
+            yield scope, band, signature[band * self.rows:(band + 1) * self.rows].tobytes()
+    
+    def add(self, key: Hashable, signature: np.ndarray, scope: Hashable = None):
+        """加入签名（同一个key重复加入时忽略）"""
+        if key in self._signatures:
+            return
+        self._signatures[key] = signature
+        for band_key in self._band_keys(signature, scope):
+            self._buckets.setdefault(band_key, []).append(key)
+    
+    def query(
+        self,
+        signature: np.ndarray,
+        scope: Hashable = None,
+        threshold: Optional[float] = None
+    ) -> list[tuple[Hashable, float]]:
+        """
+        查找近似重复
+        
+        Returns:
+            [(key, 估计相似度)]，按相似度从高到低，只包含不低于阈值的结果
+        """
+        threshold = settings.DEDUP_THRESHOLD if threshold is None else threshold
+        candidates: set[Hashable] = set()
+        for band_key in self._band_keys(signature, scope):
+            candidates.update(self._buckets.get(band_key, ()))
+        
+        matches = []
+        for key in candidates:
+            score = MinHasher.similarity(signature, self._signatures[key])
+            if score >= threshold:
+                matches.append((key, score))
+        matches.sort(key=lambda item: item[1], reverse=True)
+        return matches
+
+
+def position_text(position: dict) -> str:
+    """用于比较岗位是否重复的文本：标题 + 职责 + 要求"""
+    return " ".join([
+        position.get("title") or "",
+        *(position.get("responsibilities") or []),
+        *(position.get("requirements") or [])
+    ])
+
+
+def dedupe_positions(
+    positions: list[dict],
+    hasher: Optional[MinHasher] = None,
+    threshold: Optional[float] = None
+) -> list[dict]:
+    """
+    去掉近似重复的岗位（同一岗位在多个页面或以细微改动重复发布），保留首次出现的
+    
+    只比较地点和薪资都相同的岗位，地点或薪资唯一的岗位不计算签名
+    """
+    hasher = hasher or MinHasher()
+    groups: dict[tuple, list[int]] = {}
+    for i, position in enumerate(positions):
+        groups.setdefault((position.get("location") or "", position.get("salary") or ""), []).append(i)
+    
+    keep: set[int] = set()
+    for members in groups.values():
+        if len(members) == 1:
+            keep.update(members)
+            continue
+        index = LSHIndex(hasher.num_perm)
+        for i in members:
+            signature = hasher.signature(position_text(positions[i]))
+            if index.query(signature, threshold=threshold):
+                continue
+            index.add(i, signature)
+            keep.add(i)
+    return [position for i, position in enumerate(positions) if i in keep]
@@ -0,0 +1,261 @@
+"""
+本地模拟Ollama服务 - 无需GPU和模型即可测试、压测分析流程
+
+实现 /api/tags、/api/generate（流式和非流式）、/api/chat、/api/embeddings，
+返回内容由提示词哈希决定（同一提示词总是得到同样的回复），格式与分析、推荐提示词要求的一致。
+可配置首个token前的延迟、生成速度、并行槽位数和错误率。
+
+用法:
+    python -m src.ai.fake_ollama --port 11435 --latency 0.3 --tokens-per-second 40 --parallel 2
+    
+    OLLAMA_BASE_URL=http://127.0.0.1:11435 python cli.py --mode test
+"""
+import json
+import math
+import time
+import random
+import asyncio
+import argparse
+import hashlib
+from typing import Optional
+from aiohttp import web
+from loguru import logger
+
+from config import settings
+
+
+class FakeOllamaServer:
+    """
+    模拟Ollama服务
+    
+    和真实的Ollama一样，同时只处理 parallel 个请求，其余请求排队；每个请求先等待 latency 秒
+    （模型加载和提示词处理），再按 tokens_per_second 的速度逐个输出token（一个token约两个汉字）。
+    最后一条响应带 prompt_eval_count、eval_count 和各阶段耗时（纳秒），与真实服务的字段相同。
+    error_rate 的请求返回500。
+    """
+    
+    CHARS_PER_TOKEN = 2
+    EMBEDDING_DIM = 384
+    
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 11435,
+        model: Optional[str] = None,
+        latency: float = 0.2,
+        tokens_per_second: float = 50.0,
+        parallel: int = 1,
+        error_rate: float = 0.0,
+        max_tokens: int = 256,
+        seed: int = 42
+    ):
+        self.host = host
+        self.port = port
+        self.model = model or settings.OLLAMA_MODEL
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.parallel = parallel
+        self.error_rate = error_rate
+        self.max_tokens = max_tokens
+        self._random = random.Random(seed)
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._runner: Optional[web.AppRunner] = None
+        self.requests = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+    
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+    
+    def stats(self) -> dict:
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "in_flight": self.in_flight,
+            "peak_in_flight": self.peak_in_flight
+        }
+    
+    @staticmethod
+    def _seed(text: str) -> int:
+        return int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "big")
+    
+    def reply_for(self, prompt: str) -> str:
+        """按提示词生成确定的回复：匹配分析、岗位推荐或普通回答"""
+        rng = random.Random(self._seed(prompt))
+        if "总分" in prompt:
+            score = rng.randint(40, 95)
+            decision = "推荐投递" if score >= 75 else "谨慎考虑" if score >= 60 else "不推荐"
+            return (
+                f"**总分：{score}/100**\n\n"
+                "**优势项：**\n- 技术栈与岗位要求高度重合\n- 有相关行业项目经验\n- 沟通协作能力较好\n\n"
+                "**风险项：**\n- 部分框架使用经验不足\n- 期望薪资与岗位范围存在差距\n\n"
+                "**建议：**\n- 突出与岗位相关的项目成果\n- 提前准备系统设计类面试题\n- 补充分布式系统相关知识\n\n"
+                f"**决策建议：** {decision}，综合匹配度为{score}分。"
+            )
+        if "推荐最适合的岗位" in prompt:
+            lines = []
+            for i in range(1, 4):
+                lines.append(
+                    f"{i}. 岗位名称：候选岗位{i}\n   匹配度评分：{rng.randint(60, 95)}\n"
+                    "   推荐理由：技能与岗位要求匹配\n   需要注意：关注团队规模和加班情况"
+                )
+            return "\n".join(lines)
+        return f"这是模拟Ollama服务的回复（{rng.randint(1000, 9999)}），用于在没有模型的环境中测试。"
+    
+    def embedding_for(self, text: str) -> list[float]:
+        """按文本生成确定的单位向量"""
+        rng = random.Random(self._seed(text))
+        vector = [rng.gauss(0, 1) for _ in range(self.EMBEDDING_DIM)]
+        norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+        return [v / norm for v in vector]
+    
+    def _tokens(self, text: str, limit: Optional[int]) -> list[str]:
+        tokens = [text[i:i + self.CHARS_PER_TOKEN] for i in range(0, len(text), self.CHARS_PER_TOKEN)]
+        return tokens[:min(limit or self.max_tokens, self.max_tokens)]
+    
+    def _stats(self, prompt: str, output_tokens: int, started: float, first_token: float) -> dict:
+        now = time.monotonic()
+        return {
+            "done": True,
+            "done_reason": "stop",
+            "total_duration": int((now - started) * 1e9),
+            "load_duration": 0,
+            "prompt_eval_count": max(1, len(prompt) // self.CHARS_PER_TOKEN),
+            "prompt_eval_duration": int((first_token - started) * 1e9),
+            "eval_count": output_tokens,
+            "eval_duration": int((now - first_token) * 1e9)
+        }
+    
+    async def _complete(self, request: web.Request, prompt: str, body: dict, wrap) -> web.StreamResponse:
+        """
+        生成回复（generate和chat共用）
+        
+        Args:
+            wrap: 把一段输出包装成响应对象的函数（generate为 response 字段，chat为 message 字段）
+        """
+        stream = body.get("stream", True)
+        tokens = self._tokens(self.reply_for(prompt), body.get("options", {}).get("num_predict"))
+        interval = 1 / self.tokens_per_second if self.tokens_per_second > 0 else 0
+        
+        async with self._slots:
+            started = time.monotonic()
+            await asyncio.sleep(self.latency)
+            first_token = time.monotonic()
+            
+            if not stream:
+                await asyncio.sleep(interval * len(tokens))
+                return web.json_response({
+                    "model": self.model,
+                    **wrap("".join(tokens)),
+                    **self._stats(prompt, len(tokens), started, first_token)
+                })
+            
+            response = web.StreamResponse(headers={"Content-Type": "application/x-ndjson"})
+            await response.prepare(request)
+            for token in tokens:
+                chunk = {"model": self.model, **wrap(token), "done": False}
+                await response.write(json.dumps(chunk, ensure_ascii=False).encode("utf-8") + b"\n")
+                await asyncio.sleep(interval)
+            final = {"model": self.model, **wrap(""), **self._stats(prompt, len(tokens), started, first_token)}
+            await response.write(json.dumps(final, ensure_ascii=False).encode("utf-8") + b"\n")
+            await response.write_eof()
+            return response
+    
+    @web.middleware
+    async def _track(self, request: web.Request, handler) -> web.StreamResponse:
+        """请求计数、并发统计和错误注入"""
+        self.requests += 1
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            if request.method == "POST" and self.error_rate and self._random.random() < self.error_rate:
+                self.errors += 1
+                return web.json_response({"error": "模拟的服务错误"}, status=500)
+            return await handler(request)
+        finally:
+            self.in_flight -= 1
+    
+    async def _tags(self, request: web.Request) -> web.Response:
+        return web.json_response({"models": [{"name": self.model, "model": self.model, "size": 0}]})
+    
+    async def _generate(self, request: web.Request) -> web.StreamResponse:
+        body = await request.json()
+        prompt = (body.get("system") or "") + body.get("prompt", "")
+        return await self._complete(request, prompt, body, lambda text: {"response": text})
+    
+    async def _chat(self, request: web.Request) -> web.StreamResponse:
+        body = await request.json()
+        prompt = "\n".join(message.get("content", "") for message in body.get("messages", []))
+        return await self._complete(
+            request, prompt, body, lambda text: {"message": {"role": "assistant", "content": text}}
+        )
+    
+    async def _embeddings(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        return web.json_response({"embedding": self.embedding_for(body.get("prompt", ""))})
+    
+    async def start(self):
+        """启动服务器"""
+        self._slots = asyncio.Semaphore(self.parallel)
+        app = web.Application(middlewares=[self._track])
+        app.router.add_get("/api/tags", self._tags)
+        app.router.add_post("/api/generate", self._generate)
+        app.router.add_post("/api/chat", self._chat)
+        app.router.add_post("/api/embeddings", self._embeddings)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        # port=0 时由系统分配端口
+        self.port = self._runner.addresses[0][1]
+        logger.info(
+            f"模拟Ollama服务已启动: {self.base_url} (模型 {self.model}, 延迟 {self.latency}s, "
+            f"{self.tokens_per_second} token/s, 并行 {self.parallel})"
+        )
+    
+    async def stop(self):
+        """停止服务器"""
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+
+async def _serve(args):
+    server = FakeOllamaServer(
+        host=args.host,
+        port=args.port,
+        model=args.model,
+        latency=args.latency,
+        tokens_per_second=args.tokens_per_second,
+        parallel=args.parallel,
+        error_rate=args.error_rate,
+        max_tokens=args.max_tokens
+    )
+    await server.start()
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本地模拟Ollama服务")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--model", help="模型名称（默认 OLLAMA_MODEL）")
+    parser.add_argument("--latency", type=float, default=0.2, help="首个token前的延迟（秒）")
+    parser.add_argument("--tokens-per-second", type=float, default=50.0, help="生成速度")
+    parser.add_argument("--parallel", type=int, default=1, help="同时处理的请求数，其余排队")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="返回500的概率")
+    parser.add_argument("--max-tokens", type=int, default=256, help="每个回复最多输出的token数")
+    args = parser.parse_args()
+    
+    try:
+        asyncio.run(_serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
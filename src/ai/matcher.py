@@ -2,15 +2,20 @@
 Offer匹配分析模块 - 使用Ollama本地模型
 """
 import json
-from typing import Dict, Any, List
+from typing import Awaitable, Callable, Dict, Any, List, Optional
 from loguru import logger
 
 from .ollama_client import OllamaClient
+from .position_index import PositionIndex
+from .dedup import LSHIndex, MinHasher, dedupe_positions
 from .prompts import (
     MATCH_ANALYSIS_PROMPT,
     POSITION_RECOMMENDATION_PROMPT,
     REPORT_GENERATION_PROMPT
 )
+from src.parsers.resume_parser import ResumeParser
+from src.scrapers.company_directory import CompanyDirectory
+from src.utils.tracing import current_span, span, traced
 from config import settings
 
 
@@ -19,13 +24,16 @@ class OfferMatcher:
     
     def __init__(self):
         self.ollama = OllamaClient()
+        self.hasher = MinHasher()
     
+    @traced("matcher.analyze_match")
     async def analyze_match(
         self,
         resume_data: Dict[str, Any],
         job_description: str,
         company_info: Dict[str, Any],
-        user_preferences: Dict[str, Any]
+        user_preferences: Dict[str, Any],
+        on_token: Optional[Callable[[str], Awaitable[None]]] = None
     ) -> Dict[str, Any]:
         """
         分析岗位匹配度
@@ -35,6 +43,7 @@ class OfferMatcher:
             job_description: 岗位描述
             company_info: 公司信息
             user_preferences: 用户偏好
+            on_token: 模型每输出一段文本时的回调（流式展示分析过程）
         
         Returns:
             匹配分析结果
@@ -47,24 +56,27 @@ class OfferMatcher:
                 }
             
             # 构建提示词
-            prompt = MATCH_ANALYSIS_PROMPT.format(
-                resume_skills=", ".join(resume_data.get("skills", [])),
-                resume_experience=self._format_experience(resume_data.get("work_experience", [])),
-                resume_education=self._format_education(resume_data.get("education", [])),
-                job_description=job_description,
-                company_name=company_info.get("company_name", "未知公司"),
-                company_description=company_info.get("basic_info", {}).get("description", ""),
-                expected_salary=user_preferences.get("expected_salary", ""),
-                location=user_preferences.get("location", ""),
-                overtime_acceptable="接受" if user_preferences.get("overtime_acceptable") else "不接受"
-            )
+            with span("matcher.build_prompt") as prompt_span:
+                prompt = MATCH_ANALYSIS_PROMPT.format(
+                    resume_skills=", ".join(resume_data.get("skills", [])),
+                    resume_experience=self._format_experience(resume_data.get("work_experience", [])),
+                    resume_education=self._format_education(resume_data.get("education", [])),
+                    job_description=job_description,
+                    company_name=company_info.get("company_name", "未知公司"),
+                    company_description=company_info.get("basic_info", {}).get("description", ""),
+                    expected_salary=user_preferences.get("expected_salary", ""),
+                    location=user_preferences.get("location", ""),
+                    overtime_acceptable="接受" if user_preferences.get("overtime_acceptable") else "不接受"
+                )
+                prompt_span.set(prompt_chars=len(prompt))
             
             # 调用Ollama生成分析
             logger.info("开始AI匹配分析...")
             response = await self.ollama.generate(
                 prompt=prompt,
                 temperature=settings.OLLAMA_TEMPERATURE,
-                max_tokens=settings.OLLAMA_MAX_TOKENS
+                max_tokens=settings.OLLAMA_MAX_TOKENS,
+                on_token=on_token
             )
             
             # 解析响应
@@ -75,13 +87,17 @@ class OfferMatcher:
             
         except Exception as e:
             logger.error(f"匹配分析失败: {e}")
+            current_span().record_error(e)
             return {"error": str(e)}
     
+    @traced("matcher.recommend_positions")
     async def recommend_positions(
         self,
         resume_data: Dict[str, Any],
         company_info: Dict[str, Any],
-        top_k: int = 3
+        top_k: int = 3,
+        user_preferences: Optional[Dict[str, Any]] = None,
+        on_token: Optional[Callable[[str], Awaitable[None]]] = None
     ) -> Dict[str, Any]:
         """
         推荐更适合的岗位
@@ -90,6 +106,8 @@ class OfferMatcher:
             resume_data: 简历数据
             company_info: 公司信息
             top_k: 返回top K个推荐
+            user_preferences: 用户偏好，提供期望薪资/地点时先筛掉薪资区间不重叠或城市不符的岗位
+            on_token: 模型每输出一段文本时的回调
         
         Returns:
             推荐结果
@@ -103,19 +121,47 @@ class OfferMatcher:
                     "message": "该公司暂无招聘岗位信息"
                 }
             
+            # 先按薪资和地点预筛选，只把可能合适的岗位交给模型
+            if user_preferences:
+                total = len(positions)
+                positions = PositionIndex(positions).filter(
+                    salary=user_preferences.get("expected_salary"),
+                    location=user_preferences.get("location")
+                )
+                if len(positions) < total:
+                    logger.info(f"按期望薪资和地点预筛选岗位: {total} -> {len(positions)}")
+                if not positions:
+                    return {
+                        "recommendations": [],
+                        "filtered_out": total,
+                        "message": "该公司暂无符合期望薪资和地点的岗位"
+                    }
+            
+            # 同一岗位在多个页面重复发布时只保留一份，减少提示词长度
+            if settings.DEDUP_ENABLED and len(positions) > 1:
+                unique = dedupe_positions(positions, self.hasher)
+                if len(unique) < len(positions):
+                    logger.info(f"合并近似重复岗位: {len(positions)} -> {len(unique)}")
+                positions = unique
+            
+            current_span().set(positions=len(positions))
+            
             # 构建提示词
-            prompt = POSITION_RECOMMENDATION_PROMPT.format(
-                resume_skills=", ".join(resume_data.get("skills", [])),
-                resume_experience=self._format_experience(resume_data.get("work_experience", [])),
-                positions=self._format_positions(positions),
-                top_k=top_k
-            )
+            with span("matcher.build_prompt") as prompt_span:
+                prompt = POSITION_RECOMMENDATION_PROMPT.format(
+                    resume_skills=", ".join(resume_data.get("skills", [])),
+                    resume_experience=self._format_experience(resume_data.get("work_experience", [])),
+                    positions=self._format_positions(positions),
+                    top_k=top_k
+                )
+                prompt_span.set(prompt_chars=len(prompt))
             
             logger.info(f"开始推荐岗位 (top {top_k})...")
             response = await self.ollama.generate(
                 prompt=prompt,
                 temperature=0.5,  # 降低温度，使推荐更稳定
-                max_tokens=1024
+                max_tokens=1024,
+                on_token=on_token
             )
             
             result = self._parse_recommendation_response(response, positions)
@@ -125,8 +171,67 @@ class OfferMatcher:
             
         except Exception as e:
             logger.error(f"岗位推荐失败: {e}")
+            current_span().record_error(e)
             return {"error": str(e)}
     
+    def prescreen_jobs(
+        self,
+        resume_data: Dict[str, Any],
+        jobs: List[Dict[str, Any]],
+        user_preferences: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        批量分析前的快速预筛（不调用模型）
+        
+        - 带薪资/地点的岗位（岗位表中的岗位）按期望薪资和地点筛掉明显不符的，同 recommend_positions
+        - 同一公司内近似重复的岗位描述只分析一次，结果共用（不同公司的分析带有各自的公司信息，不共用）
+        - 其余按技能覆盖率打分（岗位描述中出现的技能有几成在简历里），决定送去模型分析的先后
+        
+        Args:
+            jobs: [{"job_description", "company_name"（可选）, "position"（可选）}]
+        
+        Returns:
+            与 jobs 一一对应的 {"prescreen_score", "matched_skills", "missing_skills"}，
+            被筛掉的另含 "excluded"（原因），重复的另含 "duplicate_of"（被复用的岗位序号）
+        """
+        resume_skills = {skill.lower() for skill in resume_data.get("skills", [])}
+        results = []
+        for job in jobs:
+            required = ResumeParser.find_skills(job["job_description"])
+            matched = [skill for skill in required if skill.lower() in resume_skills]
+            results.append({
+                # 岗位描述里没有可识别的技能时无法判断，按中等分数排序
+                "prescreen_score": round(len(matched) / len(required), 3) if required else 0.5,
+                "matched_skills": matched,
+                "missing_skills": [skill for skill in required if skill.lower() not in resume_skills]
+            })
+        
+        if user_preferences:
+            candidates = [job.get("position") or {} for job in jobs]
+            kept = {id(position) for position in PositionIndex(candidates).filter(
+                salary=user_preferences.get("expected_salary"),
+                location=user_preferences.get("location")
+            )}
+            for position, result in zip(candidates, results):
+                if id(position) not in kept:
+                    result["excluded"] = "薪资或地点不符合期望"
+        
+        if settings.DEDUP_ENABLED:
+            index = LSHIndex(self.hasher.num_perm)
+            for i, (job, result) in enumerate(zip(jobs, results)):
+                if "excluded" in result:
+                    continue
+                company_name = job.get("company_name") or ""
+                scope = CompanyDirectory.normalize(company_name) or company_name.strip()
+                signature = self.hasher.signature(job["job_description"])
+                matches = index.query(signature, scope=scope)
+                if matches:
+                    result["duplicate_of"] = matches[0][0]
+                else:
+                    index.add(i, signature, scope)
+        
+        return results
+    
     async def generate_report(
         self,
         match_result: Dict[str, Any],
@@ -227,20 +332,34 @@ class OfferMatcher:
         if score_match:
             result["overall_score"] = int(score_match.group(1))
         
-        # 提取优势
-        strengths_match = re.search(r'优势[：:](.+?)(?=劣势|风险|建议|$)', response, re.DOTALL)
-        if strengths_match:
-            strengths_text = strengths_match.group(1)
-            result["strengths"] = [s.strip() for s in strengths_text.split('\n') if s.strip() and not s.strip().startswith('-')]
+        # 提取优势、风险和建议（按提示词要求的格式，各项为"- "开头的列表）
+        sections = {
+            "strengths": r'优势项?[：:](.+?)(?=风险|劣势|建议|决策|$)',
+            "weaknesses": r'(?:风险|劣势)项?[：:](.+?)(?=建议|决策|$)',
+            "recommendations": r'(?<!决策)建议[：:](.+?)(?=决策|$)'
+        }
+        for field, pattern in sections.items():
+            section_match = re.search(pattern, response, re.DOTALL)
+            if section_match:
+                result[field] = self._list_items(section_match.group(1))
         
-        # 提取建议
-        recommendations_match = re.search(r'建议[：:](.+?)(?=决策|$)', response, re.DOTALL)
-        if recommendations_match:
-            rec_text = recommendations_match.group(1)
-            result["recommendations"] = [r.strip() for r in rec_text.split('\n') if r.strip() and not r.strip().startswith('-')]
+        # 提取决策建议
+        decision_match = re.search(r'决策建议[：:]\**\s*(.+)', response)
+        if decision_match:
+            result["decision"] = decision_match.group(1).strip()
         
         return result
     
+    @staticmethod
+    def _list_items(text: str) -> List[str]:
+        """逐行提取列表项，去掉列表符号和Markdown加粗符号"""
+        items = []
+        for line in text.split('\n'):
+            item = line.strip().strip('*').strip().lstrip('-•').strip()
+            if item:
+                items.append(item)
+        return items
+    
     def _parse_recommendation_response(
         self,
         response: str,
@@ -3,45 +3,152 @@ Ollama客户端封装
 """
 import asyncio
 import json
-from typing import Optional, List, Dict, Any
+import time
+import hashlib
+from pathlib import Path
+from typing import Awaitable, Callable, Optional, List, Dict, Any
 import aiohttp
 from loguru import logger
 from config import settings
+from src.utils.tracing import current_span, traced
+from src.utils.metrics import counter, gauge, histogram
+
+OLLAMA_IN_FLIGHT = gauge("ollama_in_flight_requests", "本进程发往Ollama尚未完成的请求数（排队深度）", ["endpoint"])
+OLLAMA_SECONDS = histogram("ollama_request_seconds", "Ollama请求耗时（秒）", ["endpoint"])
+OLLAMA_ERRORS = counter("ollama_errors_total", "Ollama请求失败次数", ["endpoint"])
+OLLAMA_FIRST_TOKEN = histogram("ollama_first_token_seconds", "流式生成收到第一段输出的耗时（秒）")
+OLLAMA_TOKENS = counter("ollama_tokens_total", "Ollama处理的token数（prompt/output）", ["kind"])
+OLLAMA_TOKEN_RATE = histogram(
+    "ollama_tokens_per_second", "Ollama生成速度（token/秒）",
+    buckets=(1, 2, 5, 10, 20, 30, 50, 75, 100, 150, 200, 300)
+)
 
 
 class OllamaClient:
-    """Ollama API客户端"""
+    """
+    Ollama API客户端
+    
+    record_mode 为 record 时把每个成功的响应保存到 fixtures_dir（按接口和请求参数的哈希命名），
+    为 replay 时直接返回保存的响应、不访问Ollama，没有对应录制的请求按失败处理。
+    回放让依赖模型的流程在CI和离线环境中得到确定的结果。
+    """
+    
+    # 模型可用性检查结果的缓存时间（秒），避免每次分析都请求 /api/tags
+    MODEL_CHECK_TTL = 300
+    RECORD_MODES = ("off", "record", "replay")
     
     def __init__(
         self,
         base_url: Optional[str] = None,
-        model: Optional[str] = None
+        model: Optional[str] = None,
+        record_mode: Optional[str] = None,
+        fixtures_dir: Optional[Path] = None
     ):
         self.base_url = base_url or settings.OLLAMA_BASE_URL
         self.model = model or settings.OLLAMA_MODEL
         self.timeout = aiohttp.ClientTimeout(total=120)  # 2分钟超时
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._session_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._model_checked_at: Optional[float] = None
+        
+        self.record_mode = record_mode or settings.OLLAMA_RECORD_MODE
+        if self.record_mode not in self.RECORD_MODES:
+            raise ValueError(f"不支持的录制模式: {self.record_mode}")
+        self.fixtures_dir = Path(fixtures_dir or settings.OLLAMA_FIXTURES_DIR or settings.DATA_DIR / "ollama_fixtures")
+    
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """
+        获取复用的HTTP会话
+        
+        会话绑定在创建它的事件循环上，换了循环（如CLI多次asyncio.run）时重新创建
+        """
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._session_loop is not loop:
+            self._session = aiohttp.ClientSession(timeout=self.timeout)
+            self._session_loop = loop
+        return self._session
+    
+    async def close(self):
+        """关闭HTTP会话"""
+        if self._session and not self._session.closed:
+            await self._session.close()
+        self._session = None
+    
+    def _fixture_path(self, endpoint: str, payload: dict) -> Path:
+        """录制文件路径，由接口和请求参数决定（是否流式不影响）"""
+        request = {key: value for key, value in payload.items() if key != "stream"}
+        digest = hashlib.sha256(
+            json.dumps([endpoint, request], ensure_ascii=False, sort_keys=True).encode("utf-8")
+        ).hexdigest()
+        return self.fixtures_dir / f"{endpoint}_{digest[:16]}.json"
+    
+    def _record(self, endpoint: str, payload: dict, response: Any, chunks: Optional[List[str]] = None):
+        """录制模式下保存响应（流式输出同时保存分段，回放时按原来的分段回调）"""
+        if self.record_mode != "record":
+            return
+        path = self._fixture_path(endpoint, payload)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fixture = {
+            "endpoint": endpoint,
+            "request": {key: value for key, value in payload.items() if key != "stream"},
+            "response": response,
+            "chunks": chunks
+        }
+        path.write_text(json.dumps(fixture, ensure_ascii=False, indent=2), encoding="utf-8")
+        logger.debug(f"已录制Ollama响应: {path.name}")
+    
+    async def _replay(
+        self,
+        endpoint: str,
+        payload: dict,
+        on_token: Optional[Callable[[str], Awaitable[None]]] = None
+    ) -> Any:
+        """
+        回放录制的响应
+        
+        Raises:
+            LookupError: 没有对应的录制
+        """
+        path = self._fixture_path(endpoint, payload)
+        current_span().set(replay=path.name)
+        if not path.exists():
+            raise LookupError(f"没有录制的响应: {path.name}（先用 OLLAMA_RECORD_MODE=record 运行一次）")
+        fixture = json.loads(path.read_text(encoding="utf-8"))
+        if on_token:
+            for chunk in fixture.get("chunks") or [fixture["response"]]:
+                await on_token(chunk)
+        return fixture["response"]
     
+    @traced("ollama.generate")
+    @OLLAMA_SECONDS.time(endpoint="generate")
+    @OLLAMA_IN_FLIGHT.track_inprogress(endpoint="generate")
     async def generate(
         self,
         prompt: str,
         system: Optional[str] = None,
         temperature: float = 0.7,
         max_tokens: Optional[int] = None,
-        stream: bool = False
+        stream: bool = False,
+        on_token: Optional[Callable[[str], Awaitable[None]]] = None
     ) -> str:
         """
         生成文本
         
+        调用方被取消时请求随之中断，连接关闭后Ollama停止生成，不会继续占用GPU。
+        
         Args:
             prompt: 用户提示词
             system: 系统提示词
             temperature: 温度参数（0-1）
             max_tokens: 最大token数
             stream: 是否流式输出
+            on_token: 每收到一段输出时的回调（提供时总是流式输出）
         
         Returns:
             生成的文本
         """
+        stream = stream or on_token is not None
+        span = current_span().set(model=self.model, prompt_chars=len(prompt), stream=stream)
         try:
             url = f"{self.base_url}/api/generate"
             
@@ -60,31 +167,80 @@ class OllamaClient:
             if max_tokens:
                 payload["options"]["num_predict"] = max_tokens
             
-            async with aiohttp.ClientSession(timeout=self.timeout) as session:
-                async with session.post(url, json=payload) as response:
-                    if response.status == 200:
-                        if stream:
-                            # 流式输出
-                            full_response = ""
-                            async for line in response.content:
-                                if line:
-                                    data = json.loads(line)
-                                    if "response" in data:
-                                        full_response += data["response"]
-                            return full_response
-                        else:
-                            # 非流式输出
-                            result = await response.json()
-                            return result.get("response", "")
+            if self.record_mode == "replay":
+                return await self._replay("generate", payload, on_token)
+            
+            session = await self._get_session()
+            started = time.perf_counter()
+            async with session.post(url, json=payload) as response:
+                if response.status == 200:
+                    if stream:
+                        # 流式输出
+                        chunks = []
+                        async for line in response.content:
+                            if line:
+                                data = json.loads(line)
+                                if data.get("response"):
+                                    if not chunks:
+                                        first_token = time.perf_counter() - started
+                                        OLLAMA_FIRST_TOKEN.observe(first_token)
+                                        span.set(first_token_ms=round(first_token * 1000, 1))
+                                    chunks.append(data["response"])
+                                    if on_token:
+                                        await on_token(data["response"])
+                                if data.get("done"):
+                                    self._record_stats(span, data, started)
+                        self._record("generate", payload, "".join(chunks), chunks)
+                        return "".join(chunks)
                     else:
-                        error_text = await response.text()
-                        logger.error(f"Ollama API错误: {response.status}, {error_text}")
-                        return f"错误: {response.status}"
+                        # 非流式输出
+                        result = await response.json()
+                        self._record_stats(span, result, started)
+                        self._record("generate", payload, result.get("response", ""))
+                        return result.get("response", "")
+                else:
+                    error_text = await response.text()
+                    logger.error(f"Ollama API错误: {response.status}, {error_text}")
+                    OLLAMA_ERRORS.inc(endpoint="generate")
+                    span.record_error(f"HTTP {response.status}")
+                    return f"错误: {response.status}"
         
+        except asyncio.CancelledError:
+            logger.info("Ollama生成已取消")
+            raise
         except Exception as e:
             logger.error(f"Ollama生成失败: {e}")
+            OLLAMA_ERRORS.inc(endpoint="generate")
+            span.record_error(e)
             return f"错误: {str(e)}"
     
+    @staticmethod
+    def _record_stats(span, data: dict, started: float):
+        """
+        把Ollama返回的统计信息记到span和指标上（耗时字段单位为纳秒）
+        
+        请求总耗时减去Ollama内部的处理耗时，约等于在Ollama中排队和网络传输的时间
+        """
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        total_ms = data.get("total_duration", 0) / 1e6
+        eval_ms = data.get("eval_duration", 0) / 1e6
+        OLLAMA_TOKENS.inc(data.get("prompt_eval_count", 0), kind="prompt")
+        OLLAMA_TOKENS.inc(data.get("eval_count", 0), kind="output")
+        if eval_ms:
+            OLLAMA_TOKEN_RATE.observe(data.get("eval_count", 0) / eval_ms * 1000)
+        span.set(
+            prompt_tokens=data.get("prompt_eval_count", 0),
+            output_tokens=data.get("eval_count", 0),
+            load_ms=round(data.get("load_duration", 0) / 1e6, 1),
+            prompt_eval_ms=round(data.get("prompt_eval_duration", 0) / 1e6, 1),
+            eval_ms=round(eval_ms, 1),
+            queue_ms=round(max(0.0, elapsed_ms - total_ms), 1),
+            tokens_per_second=round(data.get("eval_count", 0) / eval_ms * 1000, 1) if eval_ms else 0.0
+        )
+    
+    @traced("ollama.chat")
+    @OLLAMA_SECONDS.time(endpoint="chat")
+    @OLLAMA_IN_FLIGHT.track_inprogress(endpoint="chat")
     async def chat(
         self,
         messages: List[Dict[str, str]],
@@ -102,6 +258,7 @@ class OllamaClient:
         Returns:
             助手回复
         """
+        span = current_span().set(model=self.model, messages=len(messages))
         try:
             url = f"{self.base_url}/api/chat"
             
@@ -117,20 +274,34 @@ class OllamaClient:
             if max_tokens:
                 payload["options"]["num_predict"] = max_tokens
             
-            async with aiohttp.ClientSession(timeout=self.timeout) as session:
-                async with session.post(url, json=payload) as response:
-                    if response.status == 200:
-                        result = await response.json()
-                        return result.get("message", {}).get("content", "")
-                    else:
-                        error_text = await response.text()
-                        logger.error(f"Ollama Chat API错误: {response.status}, {error_text}")
-                        return f"错误: {response.status}"
+            if self.record_mode == "replay":
+                return await self._replay("chat", payload)
+            
+            session = await self._get_session()
+            started = time.perf_counter()
+            async with session.post(url, json=payload) as response:
+                if response.status == 200:
+                    result = await response.json()
+                    self._record_stats(span, result, started)
+                    content = result.get("message", {}).get("content", "")
+                    self._record("chat", payload, content)
+                    return content
+                else:
+                    error_text = await response.text()
+                    logger.error(f"Ollama Chat API错误: {response.status}, {error_text}")
+                    OLLAMA_ERRORS.inc(endpoint="chat")
+                    span.record_error(f"HTTP {response.status}")
+                    return f"错误: {response.status}"
         
         except Exception as e:
             logger.error(f"Ollama对话失败: {e}")
+            OLLAMA_ERRORS.inc(endpoint="chat")
+            span.record_error(e)
             return f"错误: {str(e)}"
     
+    @traced("ollama.embeddings")
+    @OLLAMA_SECONDS.time(endpoint="embeddings")
+    @OLLAMA_IN_FLIGHT.track_inprogress(endpoint="embeddings")
     async def embeddings(self, text: str) -> List[float]:
         """
         生成文本嵌入向量
@@ -141,6 +312,7 @@ class OllamaClient:
         Returns:
             嵌入向量
         """
+        span = current_span().set(model=self.model, text_chars=len(text))
         try:
             url = f"{self.base_url}/api/embeddings"
             
@@ -149,40 +321,57 @@ class OllamaClient:
                 "prompt": text
             }
             
-            async with aiohttp.ClientSession(timeout=self.timeout) as session:
-                async with session.post(url, json=payload) as response:
-                    if response.status == 200:
-                        result = await response.json()
-                        return result.get("embedding", [])
-                    else:
-                        logger.error(f"Ollama Embeddings API错误: {response.status}")
-                        return []
+            if self.record_mode == "replay":
+                return await self._replay("embeddings", payload)
+            
+            session = await self._get_session()
+            async with session.post(url, json=payload) as response:
+                if response.status == 200:
+                    result = await response.json()
+                    self._record("embeddings", payload, result.get("embedding", []))
+                    return result.get("embedding", [])
+                else:
+                    logger.error(f"Ollama Embeddings API错误: {response.status}")
+                    OLLAMA_ERRORS.inc(endpoint="embeddings")
+                    span.record_error(f"HTTP {response.status}")
+                    return []
         
         except Exception as e:
             logger.error(f"生成嵌入向量失败: {e}")
+            OLLAMA_ERRORS.inc(endpoint="embeddings")
+            span.record_error(e)
             return []
     
+    @traced("ollama.check_model")
     async def check_model(self) -> bool:
-        """检查模型是否可用"""
+        """检查模型是否可用（可用结果会缓存MODEL_CHECK_TTL秒）"""
+        if self._model_checked_at is not None and time.monotonic() - self._model_checked_at < self.MODEL_CHECK_TTL:
+            current_span().set(cache_hit=True)
+            return True
+        if self.record_mode == "replay":
+            # 回放不访问Ollama，模型视为可用
+            return True
+        
         try:
             url = f"{self.base_url}/api/tags"
             
-            async with aiohttp.ClientSession(timeout=self.timeout) as session:
-                async with session.get(url) as response:
-                    if response.status == 200:
-                        result = await response.json()
-                        models = result.get("models", [])
-                        model_names = [m.get("name") for m in models]
-                        
-                        if self.model in model_names:
-                            logger.info(f"模型可用: {self.model}")
-                            return True
-                        else:
-                            logger.warning(f"模型不存在: {self.model}, 可用模型: {model_names}")
-                            return False
+            session = await self._get_session()
+            async with session.get(url) as response:
+                if response.status == 200:
+                    result = await response.json()
+                    models = result.get("models", [])
+                    model_names = [m.get("name") for m in models]
+                    
+                    if self.model in model_names:
+                        logger.info(f"模型可用: {self.model}")
+                        self._model_checked_at = time.monotonic()
+                        return True
                     else:
-                        logger.error(f"无法连接到Ollama服务: {response.status}")
+                        logger.warning(f"模型不存在: {self.model}, 可用模型: {model_names}")
                         return False
+                else:
+                    logger.error(f"无法连接到Ollama服务: {response.status}")
+                    return False
         
         except Exception as e:
             logger.error(f"检查模型失败: {e}")
@@ -0,0 +1,93 @@
+"""
+岗位索引模块 - 按薪资区间和工作地点预筛选岗位，减少交给大模型判断的岗位数
+"""
+from bisect import bisect_left, bisect_right
+from typing import Optional
+
+from src.utils.normalize import (
+    ANYWHERE, REMOTE, SalaryRange, normalize_locations, parse_salary
+)
+
+
+class PositionIndex:
+    """
+    岗位的薪资区间索引 + 城市倒排索引
+    
+    薪资区间查询：岗位按区间下限、上限各排一次序，与 [lo, hi] 有交集的岗位是
+    "下限 <= hi" 与 "上限 >= lo" 两个有序前缀/后缀的交集，二分定位后只遍历较短的一段。
+    薪资写"面议"或地点为空的岗位信息不全，筛选时保留，由后续分析判断。
+    """
+    
+    def __init__(self, positions: list[dict]):
+        self.positions = positions
+        self.salaries: list[Optional[SalaryRange]] = []
+        self._by_city: dict[str, set[int]] = {}
+        # 不限地点/远程/未写地点的岗位，对任何期望地点都保留
+        self._any_city: set[int] = set()
+        self._unknown_salary: set[int] = set()
+        
+        for i, position in enumerate(positions):
+            salary = parse_salary(position.get("salary"))
+            self.salaries.append(salary)
+            if salary is None:
+                self._unknown_salary.add(i)
+            
+            cities = normalize_locations(position.get("location"))
+            if not cities or ANYWHERE in cities or REMOTE in cities:
+                self._any_city.add(i)
+            for city in cities:
+                self._by_city.setdefault(city, set()).add(i)
+        
+        known = [i for i, salary in enumerate(self.salaries) if salary is not None]
+        self._by_low = sorted(known, key=lambda i: self.salaries[i].low)
+        self._lows = [self.salaries[i].low for i in self._by_low]
+        self._by_high = sorted(known, key=lambda i: self.salaries[i].high)
+        self._highs = [self.salaries[i].high for i in self._by_high]
+    
+    def __len__(self) -> int:
+        return len(self.positions)
+    
+    def salary_overlapping(self, salary: SalaryRange) -> set[int]:
+        """薪资区间与给定区间有交集的岗位序号（不含薪资未知的岗位）"""
+        low_end = bisect_right(self._lows, salary.high)
+        high_start = bisect_left(self._highs, salary.low)
+        if low_end <= len(self._highs) - high_start:
+            return {i for i in self._by_low[:low_end] if self.salaries[i].high >= salary.low}
+        return {i for i in self._by_high[high_start:] if self.salaries[i].low <= salary.high}
+    
+    def in_cities(self, cities: frozenset[str]) -> set[int]:
+        """工作地点在任一城市的岗位序号（不含不限地点的岗位）"""
+        matched: set[int] = set()
+        for city in cities:
+            matched |= self._by_city.get(city, set())
+        return matched
+    
+    def filter(
+        self,
+        salary: Optional[str | SalaryRange] = None,
+        location: Optional[str] = None,
+        tolerance: float = 0.1
+    ) -> list[dict]:
+        """
+        按期望薪资和地点筛选岗位（保持原顺序）
+        
+        Args:
+            salary: 期望薪资（文本或已解析的区间），无法解析时不按薪资筛选
+            location: 期望地点（可包含多个城市），"不限"时不按地点筛选
+            tolerance: 期望薪资区间两端放宽的比例，避免把刚好差一点的岗位筛掉
+        
+        Returns:
+            符合条件的岗位
+        """
+        selected = set(range(len(self.positions)))
+        
+        expected = parse_salary(salary) if isinstance(salary, str) else salary
+        if expected is not None:
+            widened = SalaryRange(expected.low * (1 - tolerance), expected.high * (1 + tolerance))
+            selected &= self.salary_overlapping(widened) | self._unknown_salary
+        
+        cities = normalize_locations(location)
+        if cities and ANYWHERE not in cities:
+            selected &= self.in_cities(cities) | self._any_city
+        
+        return [self.positions[i] for i in sorted(selected)]
@@ -2,7 +2,11 @@
 MCP服务器实现 - Offer匹配器的核心服务
 """
 import asyncio
-from typing import Any, Sequence
+import argparse
+import time
+import contextlib
+import weakref
+from typing import Any, Optional, Sequence
 from mcp.server import Server
 from mcp.server.stdio import stdio_server
 from mcp.types import (
@@ -13,23 +17,157 @@ from mcp.types import (
 )
 from loguru import logger
 
-from src.scrapers.company_scraper import CompanyScraper
-from src.parsers.resume_parser import ResumeParser
-from src.ai.matcher import OfferMatcher
+from src.utils.logger import summarize
+from src.utils.tracing import span
+from src.utils.metrics import counter, gauge, histogram, registry, start_http_server
+from src.utils.object_store import ObjectStore, dumps_compact
+from src.utils.admission import AdmissionController, OverloadedError
 from config import settings
 
+MCP_REQUESTS = counter("mcp_requests_total", "MCP工具调用次数（status: ok/error/rejected/cancelled）", ["tool", "status"])
+MCP_SECONDS = histogram("mcp_request_seconds", "MCP工具调用耗时，包括排队时间（秒）", ["tool"])
+MCP_IN_FLIGHT = gauge("mcp_tool_in_flight", "正在执行的工具调用数", ["tool"])
+MCP_WAITING = gauge("mcp_tool_waiting", "排队等待执行的工具调用数", ["tool"])
+MCP_SESSIONS = gauge("mcp_sessions", "当前MCP会话数")
+
+
+class ToolProgress:
+    """
+    工具执行进度（MCP notifications/progress）
+    
+    客户端在请求的 _meta.progressToken 中要求进度时才发送通知，否则所有方法什么都不做。
+    每完成一个阶段进度加1；模型输出按 INTERVAL 秒合并后放在通知的 message 中，
+    客户端可以边生成边展示，此时进度在当前阶段内递增但不到下一个整数。
+    通知按调用顺序依次发送，发送失败不影响工具执行。
+    """
+    
+    INTERVAL = 0.5
+    
+    def __init__(self, server: Server, total: Optional[int] = None):
+        try:
+            context = server.request_context
+        except LookupError:
+            context = None
+        self._session = context.session if context else None
+        self._request_id = str(context.request_id) if context else None
+        self._token = context.meta.progressToken if context and context.meta else None
+        self.total = total
+        self._stage = 0
+        self._chars = 0
+        self._buffer: list[str] = []
+        self._last_flush = time.monotonic()
+        self._last_send: Optional[asyncio.Future] = None
+    
+    @property
+    def enabled(self) -> bool:
+        return self._token is not None
+    
+    def _enqueue(self, progress: float, message: str):
+        previous = self._last_send
+        
+        async def send():
+            if previous is not None:
+                await asyncio.gather(previous, return_exceptions=True)
+            try:
+                await self._session.send_progress_notification(
+                    self._token, progress, self.total, message, related_request_id=self._request_id
+                )
+            except Exception as e:
+                logger.debug(f"发送进度通知失败: {e}")
+        
+        self._last_send = asyncio.ensure_future(send())
+    
+    def stage(self, message: str):
+        """完成一个阶段"""
+        if not self.enabled:
+            return
+        self._flush()
+        self._stage += 1
+        self._chars = 0
+        self._enqueue(self._stage, message)
+    
+    async def on_token(self, text: str):
+        """模型输出回调（传给 OllamaClient.generate 的 on_token）"""
+        if not self.enabled:
+            return
+        self._buffer.append(text)
+        if time.monotonic() - self._last_flush >= self.INTERVAL:
+            self._flush()
+    
+    def _flush(self):
+        self._last_flush = time.monotonic()
+        if not self._buffer:
+            return
+        text = "".join(self._buffer)
+        self._buffer.clear()
+        self._chars += len(text)
+        self._enqueue(self._stage + self._chars / (self._chars + 1000), text)
+    
+    async def drain(self):
+        """发出缓冲中的输出并等待所有通知发送完"""
+        if not self.enabled:
+            return
+        self._flush()
+        if self._last_send is not None:
+            await self._last_send
+
 
 class OfferMatcherServer:
-    """Offer匹配器MCP服务器"""
+    """
+    Offer匹配器MCP服务器
+    
+    解析后的简历、公司信息和匹配结果保存在服务端（见 ObjectStore），工具返回
+    resume_id/company_id/match_id，后续工具传ID即可，不必把完整数据再发回来。
+    
+    除stdio外还支持SSE和Streamable HTTP传输，多个客户端共用一个进程（爬虫连接池、
+    HTTP缓存、Ollama客户端都是共享的）；每个会话有自己的对象存储，ID不会在会话间串用，
+    会话结束后随会话对象一起释放。
+    
+    客户端请求进度时，耗时的工具发送阶段进度和模型的流式输出（见 ToolProgress）；
+    客户端取消请求后，进行中的Ollama请求和网页请求随之中断。
+    每个工具的并发数有上限，超出的调用排队，队列满或排队超时时直接返回错误和 retry_after
+    （见 AdmissionController），server_stats 工具查看负载。
+    """
+    
+    TRANSPORTS = ("stdio", "sse", "streamable-http")
     
     def __init__(self):
         self.server = Server("offer-matcher")
-        self.company_scraper = CompanyScraper()
-        self.resume_parser = ResumeParser()
-        self.matcher = OfferMatcher()
+        self._pipeline = None
+        # 不在会话中调用（如直接调用工具方法）时使用的对象存储
+        self.store = ObjectStore()
+        self._session_stores: weakref.WeakKeyDictionary[Any, ObjectStore] = weakref.WeakKeyDictionary()
+        # 按工具限制并发，排队满时快速拒绝并返回 retry_after
+        self.admission = AdmissionController()
+        registry.add_collector(self._collect_metrics)
         
         # 注册工具
         self._register_tools()
+    
+    @property
+    def pipeline(self):
+        """
+        与Web界面共用的分析流程（内存缓存、数据库、近似重复检测）
+        
+        首次调用工具时才创建：爬虫、解析器、数据库等模块导入较慢，
+        延后导入让服务启动和列出工具不必等待它们
+        """
+        if self._pipeline is None:
+            from src.pipeline import AnalysisPipeline
+            self._pipeline = AnalysisPipeline()
+        return self._pipeline
+    
+    @property
+    def company_scraper(self):
+        return self.pipeline.scraper
+    
+    @property
+    def resume_parser(self):
+        return self.pipeline.parser
+    
+    @property
+    def matcher(self):
+        return self.pipeline.matcher
         
     def _register_tools(self):
         """注册MCP工具"""
@@ -40,7 +178,7 @@ class OfferMatcherServer:
             return [
                 Tool(
                     name="scrape_company_info",
-                    description="爬取指定公司的官网信息，包括公司介绍、招聘信息、员工待遇等",
+                    description="爬取指定公司的官网信息，包括公司介绍、招聘信息、员工待遇等，返回company_id供后续工具使用",
                     inputSchema={
                         "type": "object",
                         "properties": {
@@ -63,7 +201,7 @@ class OfferMatcherServer:
                 ),
                 Tool(
                     name="parse_resume",
-                    description="解析用户简历，提取关键信息如技能、经验、教育背景等",
+                    description="解析用户简历，提取关键信息如技能、经验、教育背景等，返回resume_id供后续工具使用",
                     inputSchema={
                         "type": "object",
                         "properties": {
@@ -80,21 +218,29 @@ class OfferMatcherServer:
                 ),
                 Tool(
                     name="analyze_job_match",
-                    description="分析岗位与个人的匹配度，提供详细的评分和建议",
+                    description="分析岗位与个人的匹配度，提供详细的评分和建议，返回match_id供generate_report使用",
                     inputSchema={
                         "type": "object",
                         "properties": {
+                            "resume_id": {
+                                "type": "string",
+                                "description": "简历ID（由parse_resume返回）"
+                            },
                             "resume_data": {
                                 "type": "object",
-                                "description": "简历数据（由parse_resume返回）"
+                                "description": "简历数据（可选，与resume_id二选一）"
                             },
                             "job_description": {
                                 "type": "string",
                                 "description": "岗位描述"
                             },
+                            "company_id": {
+                                "type": "string",
+                                "description": "公司ID（由scrape_company_info返回，可选）"
+                            },
                             "company_info": {
                                 "type": "object",
-                                "description": "公司信息（由scrape_company_info返回）"
+                                "description": "公司信息（可选，与company_id二选一）"
                             },
                             "user_preferences": {
                                 "type": "object",
@@ -106,7 +252,7 @@ class OfferMatcherServer:
                                 }
                             }
                         },
-                        "required": ["resume_data", "job_description"]
+                        "required": ["job_description"]
                     }
                 ),
                 Tool(
@@ -115,21 +261,171 @@ class OfferMatcherServer:
                     inputSchema={
                         "type": "object",
                         "properties": {
+                            "resume_id": {
+                                "type": "string",
+                                "description": "简历ID（由parse_resume返回）"
+                            },
                             "resume_data": {
                                 "type": "object",
-                                "description": "简历数据"
+                                "description": "简历数据（可选，与resume_id二选一）"
+                            },
+                            "company_id": {
+                                "type": "string",
+                                "description": "公司ID（由scrape_company_info返回）"
                             },
                             "company_info": {
                                 "type": "object",
-                                "description": "公司信息（包含所有招聘岗位）"
+                                "description": "公司信息（包含所有招聘岗位，可选，与company_id二选一）"
                             },
                             "top_k": {
                                 "type": "integer",
                                 "description": "返回top K个推荐岗位",
                                 "default": 3
+                            },
+                            "user_preferences": {
+                                "type": "object",
+                                "description": "用户偏好（提供期望薪资、工作地点时先筛掉明显不符的岗位）",
+                                "properties": {
+                                    "expected_salary": {"type": "string"},
+                                    "location": {"type": "string"}
+                                }
+                            }
+                        }
+                    }
+                ),
+                Tool(
+                    name="search_positions",
+                    description="在已爬取/导入的岗位库中查询岗位，返回position_id供batch_analyze_jobs使用",
+                    inputSchema={
+                        "type": "object",
+                        "properties": {
+                            "title": {
+                                "type": "string",
+                                "description": "职位名称前缀（可选）"
+                            },
+                            "location": {
+                                "type": "string",
+                                "description": "工作地点（可选）"
+                            },
+                            "salary": {
+                                "type": "string",
+                                "description": "期望薪资，如'20-30K'（可选）"
+                            },
+                            "limit": {
+                                "type": "integer",
+                                "description": "最多返回条数",
+                                "default": 20
+                            }
+                        }
+                    }
+                ),
+                Tool(
+                    name="batch_analyze_jobs",
+                    description="用一份简历批量分析多个岗位：先快速预筛，再并发分析，逐个返回结果并给出排名",
+                    inputSchema={
+                        "type": "object",
+                        "properties": {
+                            "resume_id": {
+                                "type": "string",
+                                "description": "简历ID（由parse_resume返回）"
+                            },
+                            "resume_data": {
+                                "type": "object",
+                                "description": "简历数据（可选，与resume_id二选一）"
+                            },
+                            "jobs": {
+                                "type": "array",
+                                "description": "岗位描述列表，每项为文本或 {id, title, company_name, job_description}",
+                                "items": {
+                                    "anyOf": [
+                                        {"type": "string"},
+                                        {
+                                            "type": "object",
+                                            "properties": {
+                                                "id": {"type": "string"},
+                                                "title": {"type": "string"},
+                                                "company_name": {"type": "string"},
+                                                "job_description": {"type": "string"}
+                                            },
+                                            "required": ["job_description"]
+                                        }
+                                    ]
+                                }
+                            },
+                            "position_ids": {
+                                "type": "array",
+                                "description": "岗位库中的岗位ID（由search_positions返回），可与jobs同时提供",
+                                "items": {"type": "integer"}
+                            },
+                            "company_id": {
+                                "type": "string",
+                                "description": "公司ID（可选，jobs中的岗位都属于这家公司时提供）"
+                            },
+                            "user_preferences": {
+                                "type": "object",
+                                "description": "用户偏好（期望薪资、工作地点、加班接受度等）",
+                                "properties": {
+                                    "expected_salary": {"type": "string"},
+                                    "location": {"type": "string"},
+                                    "overtime_acceptable": {"type": "boolean"}
+                                }
+                            },
+                            "max_analyze": {
+                                "type": "integer",
+                                "description": "预筛后最多送去模型分析的岗位数（默认 MCP_BATCH_MAX_ANALYZE）"
+                            }
+                        }
+                    }
+                ),
+                Tool(
+                    name="analyze_offer",
+                    description="完整分析流程：爬取公司信息、解析简历、分析匹配度、推荐岗位并生成报告，支持进度通知",
+                    inputSchema={
+                        "type": "object",
+                        "properties": {
+                            "company_name": {
+                                "type": "string",
+                                "description": "公司名称"
+                            },
+                            "company_url": {
+                                "type": "string",
+                                "description": "公司官网URL（可选）"
+                            },
+                            "resume_id": {
+                                "type": "string",
+                                "description": "简历ID（由parse_resume返回）"
+                            },
+                            "resume_path": {
+                                "type": "string",
+                                "description": "简历文件路径（可选，与resume_id、resume_text三选一）"
+                            },
+                            "resume_text": {
+                                "type": "string",
+                                "description": "简历文本内容（可选）"
+                            },
+                            "job_description": {
+                                "type": "string",
+                                "description": "岗位描述"
+                            },
+                            "user_preferences": {
+                                "type": "object",
+                                "description": "用户偏好（期望薪资、工作地点、加班接受度等）",
+                                "properties": {
+                                    "expected_salary": {"type": "string"},
+                                    "location": {"type": "string"},
+                                    "overtime_acceptable": {"type": "boolean"}
+                                }
                             }
                         },
-                        "required": ["resume_data", "company_info"]
+                        "required": ["company_name", "job_description"]
+                    }
+                ),
+                Tool(
+                    name="server_stats",
+                    description="查看服务器负载：各工具的并发上限、执行中和排队中的调用数、拒绝次数",
+                    inputSchema={
+                        "type": "object",
+                        "properties": {}
                     }
                 ),
                 Tool(
@@ -138,9 +434,13 @@ class OfferMatcherServer:
                     inputSchema={
                         "type": "object",
                         "properties": {
+                            "match_id": {
+                                "type": "string",
+                                "description": "匹配结果ID（由analyze_job_match返回）"
+                            },
                             "match_result": {
                                 "type": "object",
-                                "description": "匹配分析结果"
+                                "description": "匹配分析结果（可选，与match_id二选一）"
                             },
                             "format": {
                                 "type": "string",
@@ -148,8 +448,7 @@ class OfferMatcherServer:
                                 "description": "报告格式",
                                 "default": "markdown"
                             }
-                        },
-                        "required": ["match_result"]
+                        }
                     }
                 )
             ]
@@ -158,26 +457,83 @@ class OfferMatcherServer:
         async def call_tool(name: str, arguments: Any) -> Sequence[TextContent | ImageContent | EmbeddedResource]:
             """调用工具"""
             try:
-                logger.info(f"调用工具: {name}, 参数: {arguments}")
-                
-                if name == "scrape_company_info":
-                    result = await self._scrape_company_info(arguments)
-                elif name == "parse_resume":
-                    result = await self._parse_resume(arguments)
-                elif name == "analyze_job_match":
-                    result = await self._analyze_job_match(arguments)
-                elif name == "recommend_positions":
-                    result = await self._recommend_positions(arguments)
-                elif name == "generate_report":
-                    result = await self._generate_report(arguments)
-                else:
-                    result = {"error": f"未知工具: {name}"}
-                
-                return [TextContent(type="text", text=str(result))]
-                
-            except Exception as e:
-                logger.error(f"工具调用失败: {name}, 错误: {e}")
-                return [TextContent(type="text", text=f"错误: {str(e)}")]
+                request_id = str(self.server.request_context.request_id)
+            except LookupError:
+                request_id = "-"
+            # 工具执行期间（包括其中创建的任务）的日志都带上请求ID和工具名，各阶段span挂在工具span下
+            with logger.contextualize(request_id=request_id, tool=name), \
+                    span(f"mcp.{name}", request_id=request_id) as tool_span, \
+                    MCP_SECONDS.time(tool=name):
+                try:
+                    logger.info(f"调用工具: {name}, 参数: {summarize(arguments)}")
+                    
+                    handlers = {
+                        "scrape_company_info": self._scrape_company_info,
+                        "parse_resume": self._parse_resume,
+                        "analyze_job_match": self._analyze_job_match,
+                        "recommend_positions": self._recommend_positions,
+                        "analyze_offer": self._analyze_offer,
+                        "search_positions": self._search_positions,
+                        "batch_analyze_jobs": self._batch_analyze_jobs,
+                        "generate_report": self._generate_report
+                    }
+                    if name == "server_stats":
+                        # 不经过准入控制，过载时也能查看状态
+                        result = self._server_stats()
+                    elif name in handlers:
+                        async with self.admission.admit(name):
+                            result = await handlers[name](arguments)
+                    else:
+                        result = {"error": f"未知工具: {name}"}
+                    
+                    failed = isinstance(result, dict) and "error" in result
+                    MCP_REQUESTS.inc(tool=name, status="error" if failed else "ok")
+                    return [TextContent(type="text", text=dumps_compact(result))]
+                    
+                except OverloadedError as e:
+                    logger.warning(f"拒绝工具调用: {e}")
+                    tool_span.record_error(e)
+                    MCP_REQUESTS.inc(tool=name, status="rejected")
+                    return [TextContent(type="text", text=dumps_compact({"error": str(e), "retry_after": e.retry_after}))]
+                except asyncio.CancelledError:
+                    logger.info(f"工具调用已取消: {name}")
+                    MCP_REQUESTS.inc(tool=name, status="cancelled")
+                    raise
+                except Exception as e:
+                    logger.error(f"工具调用失败: {name}, 错误: {e}")
+                    tool_span.record_error(e)
+                    MCP_REQUESTS.inc(tool=name, status="error")
+                    return [TextContent(type="text", text=dumps_compact({"error": str(e)}))]
+    
+    def _resolve(self, args: dict, kind: str, data_key: str, required: bool = True) -> Optional[dict]:
+        """
+        取出工具参数中的对象：优先按 <kind>_id 从服务端存储读取，否则使用内联数据
+        
+        Raises:
+            ValueError: ID不存在或已过期，或必需的对象两种方式都未提供
+        """
+        object_id = args.get(f"{kind}_id")
+        if object_id:
+            obj = self._store().get(object_id, kind)
+            if obj is None:
+                raise ValueError(f"{object_id} 不存在或已过期，请重新获取")
+            return obj
+        if args.get(data_key):
+            return args[data_key]
+        if required:
+            raise ValueError(f"必须提供{kind}_id或{data_key}之一")
+        return None
+    
+    def _store(self) -> ObjectStore:
+        """当前会话的对象存储"""
+        try:
+            session = self.server.request_context.session
+        except LookupError:
+            return self.store
+        store = self._session_stores.get(session)
+        if store is None:
+            store = self._session_stores[session] = ObjectStore()
+        return store
     
     async def _scrape_company_info(self, args: dict) -> dict:
         """爬取公司信息"""
@@ -193,7 +549,9 @@ class OfferMatcherServer:
             include_recruitment=include_recruitment
         )
         
-        return result
+        if "error" in result:
+            return result
+        return {"company_id": self._store().put("company", result), **result}
     
     async def _parse_resume(self, args: dict) -> dict:
         """解析简历"""
@@ -210,45 +568,271 @@ class OfferMatcherServer:
         else:
             result = await self.resume_parser.parse_text(resume_text)
         
-        return result
+        if "error" in result:
+            return {"error": result["error"]}
+        # 原文只留在服务端，返回给客户端的只有结构化字段
+        resume_id = self._store().put("resume", result)
+        return {"resume_id": resume_id, **{k: v for k, v in result.items() if k != "raw_text"}}
     
     async def _analyze_job_match(self, args: dict) -> dict:
         """分析岗位匹配度"""
-        resume_data = args["resume_data"]
+        resume_data = self._resolve(args, "resume", "resume_data")
         job_description = args["job_description"]
-        company_info = args.get("company_info", {})
+        company_info = self._resolve(args, "company", "company_info", required=False) or {}
         user_preferences = args.get("user_preferences", {})
         
         logger.info("开始分析岗位匹配度")
         
+        progress = ToolProgress(self.server, total=1)
         result = await self.matcher.analyze_match(
             resume_data=resume_data,
             job_description=job_description,
             company_info=company_info,
-            user_preferences=user_preferences
+            user_preferences=user_preferences,
+            on_token=progress.on_token
         )
+        progress.stage("匹配分析完成")
+        await progress.drain()
         
-        return result
+        if "error" in result:
+            return result
+        return {"match_id": self._store().put("match", result), **result}
     
     async def _recommend_positions(self, args: dict) -> dict:
         """推荐岗位"""
-        resume_data = args["resume_data"]
-        company_info = args["company_info"]
+        resume_data = self._resolve(args, "resume", "resume_data")
+        company_info = self._resolve(args, "company", "company_info")
         top_k = args.get("top_k", 3)
         
         logger.info(f"开始推荐岗位 (top {top_k})")
         
+        progress = ToolProgress(self.server, total=1)
         result = await self.matcher.recommend_positions(
             resume_data=resume_data,
             company_info=company_info,
-            top_k=top_k
+            top_k=top_k,
+            user_preferences=args.get("user_preferences"),
+            on_token=progress.on_token
         )
+        progress.stage("岗位推荐完成")
+        await progress.drain()
         
         return result
     
+    async def _analyze_offer(self, args: dict) -> dict:
+        """完整分析流程（每个阶段完成时发送进度，匹配分析过程流式输出）"""
+        if args.get("resume_id"):
+            resume = self._resolve(args, "resume", "resume_data")
+            resume_input = {"type": "text", "content": resume.get("raw_text", "")}
+        elif args.get("resume_path"):
+            resume_input = {"type": "file", "path": args["resume_path"]}
+        elif args.get("resume_text"):
+            resume_input = {"type": "text", "content": args["resume_text"]}
+        else:
+            return {"error": "必须提供resume_id、resume_path或resume_text之一"}
+        
+        logger.info(f"开始完整分析: {args['company_name']}")
+        
+        stage_names = {
+            "company_info": "公司信息爬取完成",
+            "resume_data": "简历解析完成",
+            "match_result": "匹配分析完成",
+            "recommendations": "岗位推荐完成",
+            "report": "报告生成完成"
+        }
+        progress = ToolProgress(self.server, total=len(stage_names))
+        
+        async def on_token(stage: str, text: str):
+            # 匹配分析与岗位推荐并发生成，只转发匹配分析的输出，避免两段文本交错
+            if stage == "match_result":
+                await progress.on_token(text)
+        
+        result = await self.pipeline.run(
+            company_name=args["company_name"],
+            company_url=args.get("company_url"),
+            resume_data=resume_input,
+            job_description=args["job_description"],
+            user_preferences=args.get("user_preferences") or {},
+            on_stage=lambda stage, _: progress.stage(stage_names[stage]),
+            on_token=on_token
+        )
+        await progress.drain()
+        
+        store = self._store()
+        response = {}
+        for kind, stage in (("company", "company_info"), ("resume", "resume_data"), ("match", "match_result")):
+            if "error" not in result[stage]:
+                response[f"{kind}_id"] = store.put(kind, result[stage])
+        response.update({stage: result[stage] for stage in ("match_result", "recommendations", "report")})
+        return response
+    
+    async def _search_positions(self, args: dict) -> dict:
+        """查询岗位库"""
+        positions = await self.pipeline.search_positions(
+            title=args.get("title"),
+            location=args.get("location"),
+            salary=args.get("salary"),
+            limit=args.get("limit", 20)
+        )
+        return {"positions": positions}
+    
+    async def _batch_jobs(self, args: dict) -> list[dict]:
+        """把 jobs 和 position_ids 统一成 {job_id, title, company_name, job_description, position}"""
+        jobs = []
+        for i, job in enumerate(args.get("jobs") or [], 1):
+            if isinstance(job, str):
+                job = {"job_description": job}
+            jobs.append({
+                "job_id": str(job.get("id") or f"job_{i}"),
+                "title": job.get("title", ""),
+                "company_name": job.get("company_name", ""),
+                "job_description": job["job_description"]
+            })
+        
+        position_ids = args.get("position_ids") or []
+        found = await self.pipeline.get_positions(position_ids)
+        missing = set(position_ids) - {position["position_id"] for position in found}
+        if missing:
+            raise ValueError(f"岗位不存在: {sorted(missing)}")
+        for position in found:
+            text = "\n".join([
+                position["title"],
+                f"地点: {position['location']}",
+                f"薪资: {position['salary']}",
+                *position["responsibilities"],
+                *position["requirements"]
+            ])
+            jobs.append({
+                "job_id": f"position_{position['position_id']}",
+                "title": position["title"],
+                "company_name": position["company_name"],
+                "job_description": text,
+                "position": position
+            })
+        return jobs
+    
+    async def _batch_analyze_jobs(self, args: dict) -> dict:
+        """
+        批量分析岗位
+        
+        预筛（薪资地点、近似重复、技能覆盖率）后取得分最高的 max_analyze 个岗位，
+        最多 MCP_BATCH_CONCURRENCY 个同时分析；每完成一个岗位就发一条进度通知，
+        message 为该岗位结果的JSON，最后返回按匹配度排序的汇总。
+        """
+        resume_data = self._resolve(args, "resume", "resume_data")
+        company_info = self._resolve(args, "company", "company_info", required=False) or {}
+        user_preferences = args.get("user_preferences") or {}
+        max_analyze = args.get("max_analyze") or settings.MCP_BATCH_MAX_ANALYZE
+        
+        jobs = await self._batch_jobs(args)
+        if not jobs:
+            return {"error": "必须提供jobs或position_ids"}
+        
+        screens = self.matcher.prescreen_jobs(resume_data, jobs, user_preferences)
+        candidates = [
+            i for i, screen in enumerate(screens) if "excluded" not in screen and "duplicate_of" not in screen
+        ]
+        candidates.sort(key=lambda i: screens[i]["prescreen_score"], reverse=True)
+        selected = candidates[:max_analyze]
+        logger.info(f"批量分析: {len(jobs)} 个岗位，预筛后分析 {len(selected)} 个")
+        
+        progress = ToolProgress(self.server, total=len(selected))
+        semaphore = asyncio.Semaphore(settings.MCP_BATCH_CONCURRENCY)
+        store = self._store()
+        
+        async def analyze(i: int) -> tuple[int, dict]:
+            job = jobs[i]
+            async with semaphore:
+                result = await self.matcher.analyze_match(
+                    resume_data=resume_data,
+                    job_description=job["job_description"],
+                    company_info={"company_name": job["company_name"]} if job["company_name"] else company_info,
+                    user_preferences=user_preferences
+                )
+            return i, result
+        
+        entries: dict[int, dict] = {}
+        tasks = [asyncio.ensure_future(analyze(i)) for i in selected]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                i, result = await next_done
+                entry = {
+                    "job_id": jobs[i]["job_id"],
+                    "title": jobs[i]["title"],
+                    "company_name": jobs[i]["company_name"],
+                    "prescreen_score": screens[i]["prescreen_score"]
+                }
+                if "error" in result:
+                    entry["error"] = result["error"]
+                else:
+                    entry.update({
+                        "match_id": store.put("match", result),
+                        "overall_score": result.get("overall_score", 0),
+                        "decision": result.get("decision", "")
+                    })
+                entries[i] = entry
+                progress.stage(dumps_compact(entry))
+        finally:
+            # 调用被取消时不再分析剩下的岗位
+            for task in tasks:
+                task.cancel()
+        await progress.drain()
+        
+        # 近似重复的岗位沿用被复用岗位的结果
+        for i, screen in enumerate(screens):
+            if "duplicate_of" in screen and screen["duplicate_of"] in entries:
+                entries[i] = {
+                    **entries[screen["duplicate_of"]],
+                    "job_id": jobs[i]["job_id"],
+                    "title": jobs[i]["title"],
+                    "company_name": jobs[i]["company_name"],
+                    "duplicate_of": jobs[screen["duplicate_of"]]["job_id"]
+                }
+        
+        ranked = sorted(
+            (entry for entry in entries.values() if "error" not in entry),
+            key=lambda entry: (entry["overall_score"], entry["prescreen_score"]),
+            reverse=True
+        )
+        screened_out = []
+        for i in sorted(set(range(len(jobs))) - set(entries), key=lambda i: screens[i]["prescreen_score"], reverse=True):
+            if "excluded" in screens[i]:
+                reason = screens[i]["excluded"]
+            elif "duplicate_of" in screens[i]:
+                reason = f"与 {jobs[screens[i]['duplicate_of']]['job_id']} 近似重复"
+            else:
+                reason = "预筛得分较低，未分析"
+            screened_out.append({
+                "job_id": jobs[i]["job_id"],
+                "title": jobs[i]["title"],
+                "prescreen_score": screens[i]["prescreen_score"],
+                "reason": reason
+            })
+        return {
+            "total": len(jobs),
+            "analyzed": len(selected),
+            "ranking": ranked,
+            "failed": [entry for entry in entries.values() if "error" in entry],
+            "screened_out": screened_out
+        }
+    
+    def _server_stats(self) -> dict:
+        """准入控制和会话统计"""
+        return {
+            "admission": self.admission.stats(),
+            "sessions": len(self._session_stores)
+        }
+    
+    def _collect_metrics(self):
+        """输出指标前把准入控制的执行中、排队数写入仪表盘"""
+        for tool, stats in self.admission.stats()["tools"].items():
+            MCP_IN_FLIGHT.set(stats["in_flight"], tool=tool)
+            MCP_WAITING.set(stats["waiting"], tool=tool)
+        MCP_SESSIONS.set(len(self._session_stores))
+    
     async def _generate_report(self, args: dict) -> dict:
         """生成报告"""
-        match_result = args["match_result"]
+        match_result = self._resolve(args, "match", "match_result")
         format_type = args.get("format", "markdown")
         
         logger.info(f"生成报告，格式: {format_type}")
@@ -260,21 +844,126 @@ class OfferMatcherServer:
         
         return result
     
-    async def run(self):
-        """启动MCP服务器"""
-        logger.info("启动Offer匹配器MCP服务器...")
-        async with stdio_server() as (read_stream, write_stream):
-            await self.server.run(
-                read_stream,
-                write_stream,
-                self.server.create_initialization_options()
-            )
+    async def close(self):
+        """释放爬虫会话、解析进程池和Ollama连接，写完数据库队列"""
+        if self._pipeline is not None:
+            await self._pipeline.close()
+    
+    def _http_app(self, transport: str):
+        """
+        构建HTTP传输的ASGI应用
+        
+        - sse: GET /sse 建立事件流，POST /messages/?session_id=... 发送请求
+        - streamable-http: 所有请求发往 /mcp，会话由 Mcp-Session-Id 头区分
+        - 两种方式都在 GET /metrics 提供Prometheus格式的指标
+        """
+        from starlette.applications import Starlette
+        from starlette.responses import PlainTextResponse, Response
+        from starlette.routing import Mount, Route
+        
+        if transport == "sse":
+            from mcp.server.sse import SseServerTransport
+            
+            sse = SseServerTransport("/messages/")
+            
+            async def handle_sse(request):
+                async with sse.connect_sse(request.scope, request.receive, request._send) as (read_stream, write_stream):
+                    await self.server.run(read_stream, write_stream, self.server.create_initialization_options())
+                return Response()
+            
+            routes = [
+                Route("/sse", endpoint=handle_sse, methods=["GET"]),
+                Mount("/messages/", app=sse.handle_post_message)
+            ]
+            transport_context = contextlib.nullcontext
+        else:
+            from mcp.server.streamable_http_manager import StreamableHTTPSessionManager
+            
+            manager = StreamableHTTPSessionManager(app=self.server)
+            
+            async def handle_mcp(scope, receive, send):
+                await manager.handle_request(scope, receive, send)
+            
+            routes = [Mount("/mcp", app=handle_mcp)]
+            transport_context = manager.run
+        
+        async def handle_metrics(request):
+            return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+        
+        routes.append(Route("/metrics", endpoint=handle_metrics, methods=["GET"]))
+        
+        @contextlib.asynccontextmanager
+        async def lifespan(app):
+            # 停止时先结束所有会话，再释放共享资源
+            try:
+                async with transport_context():
+                    yield
+            finally:
+                await self.close()
+                logger.info("MCP服务器已停止")
+        
+        return Starlette(routes=routes, lifespan=lifespan)
+    
+    async def run(self, transport: str = "stdio", host: Optional[str] = None, port: Optional[int] = None):
+        """
+        启动MCP服务器
+        
+        Args:
+            transport: stdio / sse / streamable-http
+            host: HTTP传输的监听地址（默认 MCP_SERVER_HOST）
+            port: HTTP传输的端口（默认 MCP_SERVER_PORT）
+        """
+        if transport not in self.TRANSPORTS:
+            raise ValueError(f"不支持的传输方式: {transport}")
+        
+        # 配置了 METRICS_PORT 时在单独的端口提供 /metrics（stdio模式没有HTTP端口）
+        if settings.METRICS_PORT:
+            start_http_server(settings.METRICS_PORT, settings.METRICS_HOST)
+        
+        if transport == "stdio":
+            logger.info("启动Offer匹配器MCP服务器...")
+            try:
+                async with stdio_server() as (read_stream, write_stream):
+                    await self.server.run(
+                        read_stream,
+                        write_stream,
+                        self.server.create_initialization_options()
+                    )
+            finally:
+                await self.close()
+            return
+        
+        import uvicorn
+        
+        host = host or settings.MCP_SERVER_HOST
+        port = port or settings.MCP_SERVER_PORT
+        logger.info(f"启动Offer匹配器MCP服务器 ({transport}): http://{host}:{port}")
+        config = uvicorn.Config(
+            self._http_app(transport),
+            host=host,
+            port=port,
+            log_level="warning",
+            # 收到SIGINT/SIGTERM后等待进行中的请求，超时再强制关闭
+            timeout_graceful_shutdown=settings.MCP_SHUTDOWN_TIMEOUT
+        )
+        await uvicorn.Server(config).serve()
 
 
 async def main():
     """主函数"""
+    parser = argparse.ArgumentParser(description="Offer匹配器MCP服务器")
+    parser.add_argument(
+        "--transport",
+        choices=OfferMatcherServer.TRANSPORTS,
+        default="stdio",
+        help="传输方式（sse/streamable-http 时多个客户端共用一个进程）"
+    )
+    parser.add_argument("--host", help="HTTP监听地址（默认 MCP_SERVER_HOST）")
+    parser.add_argument("--port", type=int, help="HTTP端口（默认 MCP_SERVER_PORT）")
+    args = parser.parse_args()
+    
     server = OfferMatcherServer()
-    await server.run()
+    await server.run(args.transport, args.host, args.port)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,153 @@
+"""
+OCR识别模块 - 扫描件PDF和图片简历的文字识别
+"""
+import io
+import asyncio
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Optional, Union
+from loguru import logger
+
+from config import settings
+
+
+def _ocr_image(image_bytes: bytes, languages: str, timeout: int) -> str:
+    """
+    在子进程中识别单张图片
+    
+    必须是模块级函数，才能被进程池pickle
+    """
+    import pytesseract
+    from PIL import Image
+    
+    with Image.open(io.BytesIO(image_bytes)) as image:
+        # timeout到期时pytesseract会杀掉tesseract子进程并抛出RuntimeError
+        return pytesseract.image_to_string(image, lang=languages, timeout=timeout)
+
+
+class OCREngine:
+    """OCR识别引擎（进程池并行 + 按页图像哈希缓存）"""
+    
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        page_timeout: Optional[int] = None,
+        languages: Optional[str] = None,
+        cache_dir: Optional[Path] = None
+    ):
+        self.max_workers = max_workers or settings.OCR_MAX_WORKERS
+        self.page_timeout = page_timeout or settings.OCR_PAGE_TIMEOUT
+        self.languages = languages or settings.OCR_LANGUAGES
+        self.dpi = settings.OCR_DPI
+        self.cache_dir = cache_dir or settings.CACHE_DIR / "ocr"
+        self._executor: Optional[ProcessPoolExecutor] = None
+    
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """延迟创建进程池，避免未使用OCR时启动子进程"""
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+    
+    def shutdown(self):
+        """关闭进程池"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+    
+    def _cache_path(self, image_bytes: bytes) -> Path:
+        """根据图像内容和识别语言计算缓存路径"""
+        digest = hashlib.sha256(image_bytes)
+        digest.update(self.languages.encode("utf-8"))
+        key = digest.hexdigest()
+        return self.cache_dir / key[:2] / f"{key}.txt"
+    
+    async def recognize_image(self, image_bytes: bytes) -> str:
+        """
+        识别单张图片中的文字
+        
+        Args:
+            image_bytes: 图片内容（PNG/JPG等PIL支持的格式）
+        
+        Returns:
+            识别出的文本，失败或超时返回空字符串
+        """
+        cache_path = self._cache_path(image_bytes)
+        if cache_path.exists():
+            return cache_path.read_text(encoding="utf-8")
+        
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(
+            self._get_executor(),
+            _ocr_image,
+            image_bytes,
+            self.languages,
+            self.page_timeout
+        )
+        
+        try:
+            # 额外留出进程调度的余量，正常情况下由tesseract自身的timeout先触发
+            text = await asyncio.wait_for(future, timeout=self.page_timeout + 5)
+        except asyncio.TimeoutError:
+            logger.warning(f"OCR识别超时（{self.page_timeout}秒），跳过该页")
+            return ""
+        except Exception as e:
+            logger.error(f"OCR识别失败: {e}")
+            return ""
+        
+        text = text.strip()
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        cache_path.write_text(text, encoding="utf-8")
+        return text
+    
+    async def recognize_pages(self, images: list[bytes]) -> list[str]:
+        """
+        并行识别多页图片，结果顺序与输入一致
+        
+        Args:
+            images: 每页的图片内容
+        
+        Returns:
+            每页的识别文本
+        """
+        return list(await asyncio.gather(*(self.recognize_image(img) for img in images)))
+    
+    async def recognize_pdf_pages(
+        self,
+        source: Union[Path, io.BytesIO],
+        page_numbers: list[int]
+    ) -> dict[int, str]:
+        """
+        将PDF中没有文本层的页面栅格化后识别
+        
+        Args:
+            source: PDF文件路径或内存流
+            page_numbers: 需要识别的页码（从0开始）
+        
+        Returns:
+            页码 -> 识别文本
+        """
+        if not page_numbers:
+            return {}
+        
+        images = await asyncio.to_thread(self._rasterize_pdf_pages, source, page_numbers)
+        texts = await self.recognize_pages(images)
+        logger.info(f"OCR识别完成: {len(page_numbers)} 页")
+        return dict(zip(page_numbers, texts))
+    
+    def _rasterize_pdf_pages(
+        self,
+        source: Union[Path, io.BytesIO],
+        page_numbers: list[int]
+    ) -> list[bytes]:
+        """将指定页面渲染为PNG"""
+        import pdfplumber
+        
+        images = []
+        with pdfplumber.open(source) as pdf:
+            for number in page_numbers:
+                page_image = pdf.pages[number].to_image(resolution=self.dpi)
+                buffer = io.BytesIO()
+                page_image.original.save(buffer, format="PNG")
+                images.append(buffer.getvalue())
+        return images
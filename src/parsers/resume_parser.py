@@ -1,29 +1,44 @@
 """
 简历解析模块
 """
+import io
 import re
+import time
 import asyncio
 from pathlib import Path
 from typing import Optional, Union
 from loguru import logger
 
-# PDF解析
-import PyPDF2
-import pdfplumber
+from config import settings
+from src.utils.tracing import current_span, traced
+from src.utils.metrics import counter, histogram
+from .ocr import OCREngine
 
-# Word解析
-from docx import Document
+PARSE_SECONDS = histogram("resume_parse_seconds", "简历文本提取耗时（秒）", ["format"])
+PARSE_ERRORS = counter("resume_parse_errors_total", "简历解析失败次数")
 
-from config import settings
 
+# 常见技能关键词
+SKILL_KEYWORDS = [
+    'Python', 'Java', 'JavaScript', 'C++', 'Go', 'Rust',
+    'Django', 'Flask', 'Spring', 'React', 'Vue', 'Angular',
+    'MySQL', 'PostgreSQL', 'MongoDB', 'Redis',
+    'Docker', 'Kubernetes', 'AWS', 'Azure',
+    'Git', 'Linux', 'Nginx', 'Kafka'
+]
 
 class ResumeParser:
     """简历解析器"""
     
+    IMAGE_FORMATS = ('png', 'jpg', 'jpeg')
+    _SKILL_PATTERN: Optional[re.Pattern] = None
+    
     def __init__(self):
         self.allowed_formats = settings.RESUME_ALLOWED_FORMATS
         self.max_size_mb = settings.RESUME_MAX_SIZE_MB
+        self.ocr = OCREngine() if settings.OCR_ENABLED else None
     
+    @traced("resume.parse_file")
     async def parse_file(self, file_path: str) -> dict:
         """
         解析简历文件
@@ -42,7 +57,9 @@ class ResumeParser:
                 return {"error": f"文件不存在: {file_path}"}
             
             # 检查文件大小
-            size_mb = path.stat().st_size / (1024 * 1024)
+            size = path.stat().st_size
+            current_span().set(bytes=size, format=path.suffix.lower().lstrip('.'))
+            size_mb = size / (1024 * 1024)
             if size_mb > self.max_size_mb:
                 return {"error": f"文件过大: {size_mb:.2f}MB (最大{self.max_size_mb}MB)"}
             
@@ -51,14 +68,8 @@ class ResumeParser:
             if suffix not in self.allowed_formats:
                 return {"error": f"不支持的文件格式: {suffix}"}
             
-            # 根据格式解析
-            if suffix == 'pdf':
-                text = await self._parse_pdf(path)
-            elif suffix in ['docx', 'doc']:
-                text = await self._parse_word(path)
-            elif suffix == 'txt':
-                text = await self._parse_txt(path)
-            else:
+            text = await self._extract_text(path, suffix)
+            if text is None:
                 return {"error": f"未实现的解析器: {suffix}"}
             
             # 提取结构化信息
@@ -71,8 +82,55 @@ class ResumeParser:
             
         except Exception as e:
             logger.error(f"解析简历失败: {file_path}, 错误: {e}")
+            current_span().record_error(e)
+            PARSE_ERRORS.inc()
             return {"error": str(e)}
     
+    @traced("resume.parse_bytes")
+    async def parse_bytes(self, data: Union[bytes, bytearray, memoryview], filename: str) -> dict:
+        """
+        直接解析内存中的简历内容（无需先落盘）
+        
+        Args:
+            data: 文件内容
+            filename: 原始文件名，用于判断格式
+        
+        Returns:
+            解析后的简历数据
+        """
+        try:
+            if not isinstance(data, bytes):
+                data = bytes(data)
+            
+            # 检查文件大小
+            current_span().set(bytes=len(data), format=Path(filename).suffix.lower().lstrip('.'))
+            size_mb = len(data) / (1024 * 1024)
+            if size_mb > self.max_size_mb:
+                return {"error": f"文件过大: {size_mb:.2f}MB (最大{self.max_size_mb}MB)"}
+            
+            # 检查文件格式
+            suffix = Path(filename).suffix.lower().replace('.', '')
+            if suffix not in self.allowed_formats:
+                return {"error": f"不支持的文件格式: {suffix}"}
+            
+            text = await self._extract_text(data, suffix)
+            if text is None:
+                return {"error": f"未实现的解析器: {suffix}"}
+            
+            result = await self.parse_text(text)
+            result["file_name"] = filename
+            result["file_format"] = suffix
+            
+            logger.info(f"成功解析简历: {filename}")
+            return result
+            
+        except Exception as e:
+            logger.error(f"解析简历失败: {filename}, 错误: {e}")
+            current_span().record_error(e)
+            PARSE_ERRORS.inc()
+            return {"error": str(e)}
+    
+    @traced("resume.parse_text")
     async def parse_text(self, text: str) -> dict:
         """
         解析简历文本
@@ -94,57 +152,107 @@ class ResumeParser:
                 "certificates": self._extract_certificates(text),
                 "summary": self._extract_summary(text)
             }
+            current_span().set(chars=len(text), skills=len(result["skills"]))
             
             return result
             
         except Exception as e:
             logger.error(f"解析简历文本失败: {e}")
+            current_span().record_error(e)
+            PARSE_ERRORS.inc()
             return {"error": str(e), "raw_text": text}
     
-    async def _parse_pdf(self, path: Path) -> str:
+    @traced("resume.extract_text")
+    async def _extract_text(self, source: Union[Path, bytes], suffix: str) -> Optional[str]:
+        """按格式提取文本，source可以是文件路径或文件内容；不支持的格式返回None"""
+        started = time.perf_counter()
+        if suffix == 'pdf':
+            text = await self._parse_pdf(source)
+        elif suffix in ['docx', 'doc']:
+            text = await self._parse_word(source)
+        elif suffix == 'txt':
+            text = await self._parse_txt(source)
+        elif suffix in self.IMAGE_FORMATS:
+            text = await self._parse_image(source)
+        else:
+            return None
+        PARSE_SECONDS.observe(time.perf_counter() - started, format=suffix)
+        current_span().set(format=suffix, chars=len(text or ""))
+        return text
+    
+    @staticmethod
+    def _open_source(source: Union[Path, bytes]) -> Union[Path, io.BytesIO]:
+        """路径原样返回，内容包装为内存流（BytesIO与bytes共享内存，不复制）"""
+        if isinstance(source, Path):
+            return source
+        return io.BytesIO(source)
+    
+    @staticmethod
+    def _describe(source: Union[Path, bytes]) -> str:
+        """日志中使用的来源描述"""
+        return str(source) if isinstance(source, Path) else f"<内存文件 {len(source)} 字节>"
+    
+    async def _parse_pdf(self, source: Union[Path, bytes]) -> str:
         """解析PDF文件"""
+        # PDF/Word解析库导入较慢，首次解析时才导入
+        import PyPDF2
+        import pdfplumber
+        
         try:
-            text = ""
-            
             # 方法1: 使用pdfplumber（推荐）
-            with pdfplumber.open(path) as pdf:
-                for page in pdf.pages:
-                    page_text = page.extract_text()
-                    if page_text:
-                        text += page_text + "\n"
+            with pdfplumber.open(self._open_source(source)) as pdf:
+                pages = [page.extract_text() or "" for page in pdf.pages]
+            
+            # 没有文本层的页面（扫描件）走OCR
+            scanned = [i for i, page_text in enumerate(pages) if not page_text.strip()]
+            if scanned and self.ocr:
+                logger.info(f"检测到 {len(scanned)} 页无文本层，启用OCR: {self._describe(source)}")
+                ocr_texts = await self.ocr.recognize_pdf_pages(self._open_source(source), scanned)
+                for i, page_text in ocr_texts.items():
+                    pages[i] = page_text
+            
+            text = "".join(page_text + "\n" for page_text in pages if page_text)
             
             # 如果pdfplumber失败，尝试PyPDF2
             if not text.strip():
-                with open(path, 'rb') as file:
-                    pdf_reader = PyPDF2.PdfReader(file)
-                    for page in pdf_reader.pages:
-                        text += page.extract_text() + "\n"
+                pdf_reader = PyPDF2.PdfReader(self._open_source(source))
+                for page in pdf_reader.pages:
+                    text += page.extract_text() + "\n"
             
             return text.strip()
             
         except Exception as e:
-            logger.error(f"解析PDF失败: {path}, 错误: {e}")
+            logger.error(f"解析PDF失败: {self._describe(source)}, 错误: {e}")
             return ""
     
-    async def _parse_word(self, path: Path) -> str:
+    async def _parse_word(self, source: Union[Path, bytes]) -> str:
         """解析Word文件"""
+        from docx import Document
+        
         try:
-            doc = Document(path)
+            doc = Document(self._open_source(source))
             text = "\n".join([paragraph.text for paragraph in doc.paragraphs])
             return text.strip()
         except Exception as e:
-            logger.error(f"解析Word失败: {path}, 错误: {e}")
+            logger.error(f"解析Word失败: {self._describe(source)}, 错误: {e}")
+            return ""
+    
+    async def _parse_image(self, source: Union[Path, bytes]) -> str:
+        """解析图片文件（OCR）"""
+        if not self.ocr:
+            logger.error(f"OCR未启用，无法解析图片: {self._describe(source)}")
             return ""
+        data = source.read_bytes() if isinstance(source, Path) else source
+        return await self.ocr.recognize_image(data)
     
-    async def _parse_txt(self, path: Path) -> str:
+    async def _parse_txt(self, source: Union[Path, bytes]) -> str:
         """解析TXT文件"""
+        data = source.read_bytes() if isinstance(source, Path) else source
         try:
-            with open(path, 'r', encoding='utf-8') as f:
-                return f.read().strip()
+            return data.decode('utf-8').strip()
         except UnicodeDecodeError:
             # 尝试其他编码
-            with open(path, 'r', encoding='gbk') as f:
-                return f.read().strip()
+            return data.decode('gbk').strip()
     
     def _extract_personal_info(self, text: str) -> dict:
         """提取个人信息"""
@@ -222,22 +330,29 @@ class ResumeParser:
     
     def _extract_skills(self, text: str) -> list:
         """提取技能列表"""
-        skills = []
-        
-        # 常见技能关键词
-        skill_keywords = [
-            'Python', 'Java', 'JavaScript', 'C++', 'Go', 'Rust',
-            'Django', 'Flask', 'Spring', 'React', 'Vue', 'Angular',
-            'MySQL', 'PostgreSQL', 'MongoDB', 'Redis',
-            'Docker', 'Kubernetes', 'AWS', 'Azure',
-            'Git', 'Linux', 'Nginx', 'Kafka'
-        ]
-        
-        for keyword in skill_keywords:
-            if re.search(rf'\b{keyword}\b', text, re.IGNORECASE):
-                skills.append(keyword)
+        return self.find_skills(text)
+    
+    @classmethod
+    def find_skills(cls, text: str) -> list[str]:
+        """文本中出现的技能关键词（也用于从岗位描述中提取技能要求）"""
+        # 单次扫描全文，按关键词表顺序返回命中的技能
+        found = {match.group(0).lower() for match in cls._skill_pattern().finditer(text)}
+        return [keyword for keyword in SKILL_KEYWORDS if keyword.lower() in found]
+    
+    @classmethod
+    def _skill_pattern(cls) -> re.Pattern:
+        """
+        所有技能关键词合并成的单个正则（进程内只编译一次）
         
-        return skills
+        边界只排除ASCII字母数字及+#，因此"熟悉Python开发"这类中英混排也能命中
+        """
+        if cls._SKILL_PATTERN is None:
+            alternatives = sorted(SKILL_KEYWORDS, key=len, reverse=True)
+            cls._SKILL_PATTERN = re.compile(
+                r'(?<![A-Za-z0-9_+#])(?:' + '|'.join(map(re.escape, alternatives)) + r')(?![A-Za-z0-9_+#])',
+                re.IGNORECASE
+            )
+        return cls._SKILL_PATTERN
     
     def _extract_certificates(self, text: str) -> list:
         """提取证书"""
@@ -0,0 +1,386 @@
+"""
+分析流程 - 复用爬虫/解析器/匹配器实例，并按输入哈希缓存中间结果
+"""
+import json
+import time
+import asyncio
+import hashlib
+from collections import OrderedDict
+import numpy as np
+from typing import Any, Awaitable, Callable, Optional
+from loguru import logger
+
+from src.scrapers.company_scraper import CompanyScraper
+from src.parsers.resume_parser import ResumeParser
+from src.ai.matcher import OfferMatcher
+from src.ai.dedup import MinHasher, LSHIndex
+from src.storage import Database, BatchWriter
+from src.utils.async_runner import SharedTasks
+from src.utils.tracing import current_span, traced
+from src.utils.metrics import counter, histogram
+from config import settings
+
+STAGE_SECONDS = histogram("pipeline_stage_seconds", "分析流程各阶段耗时（秒）", ["stage"])
+CACHE_LOOKUPS = counter("cache_lookups_total", "缓存查询次数", ["cache", "result"])
+ANALYSES = counter("analyses_total", "完整分析次数（computed: 调用模型, reused: 复用相同岗位描述的结果, similar: 复用近似重复岗位描述的结果）", ["result"])
+
+
+class _TTLMemo:
+    """
+    带过期时间和容量上限的异步结果缓存
+    
+    同一个key的并发请求共享同一个进行中的任务，不会重复计算；所有等待者都取消时任务随之取消。
+    """
+    
+    def __init__(self, name: str, ttl_seconds: float, max_entries: int):
+        self.name = name
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._inflight = SharedTasks()
+    
+    async def get_or_create(self, key: str, factory: Callable[[], Awaitable[dict]]) -> dict:
+        entry = self._entries.get(key)
+        if entry and entry[0] > time.monotonic():
+            self._entries.move_to_end(key)
+            current_span().set(cache="memory")
+            CACHE_LOOKUPS.inc(cache=self.name, result="memory")
+            return entry[1]
+        
+        result = await self._inflight.run(key, factory)
+        
+        # 失败结果不缓存，下次重新计算
+        if "error" not in result:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        
+        return result
+
+
+class AnalysisPipeline:
+    """
+    完整的Offer分析流程（进程级单例，跨请求复用资源）
+    
+    结果先查内存缓存，再查数据库（有效期内的爬取结果、简历解析结果和相同输入的分析记录
+    直接复用），都未命中时才重新计算；新结果由BatchWriter在后台线程批量写入数据库。
+    同一份简历分析过近似重复的岗位描述（转发到其他网站、改了几个字）时，也直接复用
+    之前的分析结果，并在匹配结果的 duplicate_of 中指向被复用的记录。
+    """
+    
+    def __init__(self, max_entries: int = 256, database: Optional[Database] = None):
+        self.scraper = CompanyScraper()
+        self.parser = ResumeParser()
+        self.matcher = OfferMatcher()
+        
+        self.ttl_seconds = settings.CACHE_EXPIRY_HOURS * 3600
+        self._scrape_memo = _TTLMemo("company", self.ttl_seconds, max_entries)
+        self._parse_memo = _TTLMemo("resume", self.ttl_seconds, max_entries)
+        
+        if database is None and settings.STORAGE_ENABLED:
+            try:
+                database = Database()
+            except Exception as e:
+                logger.warning(f"数据库不可用，结果只保存在内存中: {e}")
+        self.db = database
+        self.writer = BatchWriter(database) if database else None
+        
+        # 岗位描述的近似重复索引，首次使用时从数据库加载
+        self.hasher = MinHasher() if settings.DEDUP_ENABLED and database else None
+        self._jd_index: Optional[LSHIndex] = None
+        self._jd_index_lock = asyncio.Lock()
+    
+    @staticmethod
+    def _hash(*parts: Optional[str]) -> str:
+        digest = hashlib.sha256()
+        for part in parts:
+            digest.update((part or "").encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+    
+    async def _query(self, method: str, *args, **kwargs) -> Any:
+        """在线程中执行数据库查询，数据库不可用或查询失败时返回None"""
+        if self.db is None:
+            return None
+        try:
+            return await asyncio.to_thread(getattr(self.db, method), *args, **kwargs)
+        except Exception as e:
+            logger.warning(f"数据库查询失败: {e}")
+            return None
+    
+    def _save(self, kind: str, row: dict):
+        if self.writer:
+            self.writer.submit(kind, row)
+    
+    @traced("pipeline.scrape_company")
+    async def scrape_company(self, company_name: str, company_url: Optional[str] = None) -> dict:
+        """爬取公司信息（按公司名+URL缓存，有效期内优先使用数据库中的结果）"""
+        async def factory() -> dict:
+            stored = await self._query("get_company", company_name, max_age=self.ttl_seconds)
+            if stored and (not company_url or stored["url"] == company_url):
+                logger.info(f"使用数据库中的公司信息: {company_name}")
+                current_span().set(cache="database")
+                CACHE_LOOKUPS.inc(cache="company", result="database")
+                return stored
+            current_span().set(cache="miss")
+            CACHE_LOOKUPS.inc(cache="company", result="miss")
+            result = await self.scraper.scrape(
+                company_name=company_name,
+                url=company_url or None,
+                include_recruitment=True
+            )
+            if "error" not in result:
+                self._save("company", result)
+            return result
+        
+        key = self._hash(company_name, company_url)
+        return await self._scrape_memo.get_or_create(key, factory)
+    
+    def _resume_key(self, resume_data: dict) -> str:
+        """简历的内容哈希（同时作为内存缓存和数据库的键）"""
+        if resume_data["type"] == "bytes":
+            return resume_data.get("digest") or hashlib.sha256(resume_data["data"]).hexdigest()
+        if resume_data["type"] == "file":
+            return self._hash("file", resume_data["path"])
+        return self._hash("text", resume_data["content"])
+    
+    @traced("pipeline.parse_resume")
+    async def parse_resume(self, resume_data: dict) -> dict:
+        """
+        解析简历（按内容哈希缓存）
+        
+        Args:
+            resume_data: {"type": "bytes", "data", "filename", "digest"}（data可以是memoryview）/
+                         {"type": "file", "path"} / {"type": "text", "content"}
+        """
+        key = self._resume_key(resume_data)
+        
+        async def factory() -> dict:
+            # 文件路径对应的内容可能变化，只有按内容寻址的简历才从数据库复用
+            if resume_data["type"] != "file":
+                stored = await self._query("get_resume", key)
+                if stored:
+                    current_span().set(cache="database")
+                    CACHE_LOOKUPS.inc(cache="resume", result="database")
+                    return stored
+            current_span().set(cache="miss")
+            CACHE_LOOKUPS.inc(cache="resume", result="miss")
+            
+            if resume_data["type"] == "bytes":
+                result = await self.parser.parse_bytes(resume_data["data"], resume_data["filename"])
+            elif resume_data["type"] == "file":
+                result = await self.parser.parse_file(resume_data["path"])
+            else:
+                result = await self.parser.parse_text(resume_data["content"])
+            
+            if "error" not in result and resume_data["type"] != "file":
+                self._save("resume", {"digest": key, "filename": resume_data.get("filename"), "data": result})
+            return result
+        
+        return await self._parse_memo.get_or_create(key, factory)
+    
+    async def _get_jd_index(self) -> LSHIndex:
+        async with self._jd_index_lock:
+            if self._jd_index is None:
+                index = LSHIndex(self.hasher.num_perm)
+                for row in await self._query("analysis_signatures", max_age=self.ttl_seconds) or []:
+                    scope = (row["company_key"], row["resume_digest"], row["prefs_hash"])
+                    index.add((*scope, row["job_hash"]), np.frombuffer(row["jd_signature"], dtype=np.uint32), scope)
+                self._jd_index = index
+                logger.debug(f"岗位描述近似重复索引已加载: {len(index)} 条")
+        return self._jd_index
+    
+    async def _find_previous_analysis(
+        self,
+        company_name: str,
+        resume_key: str,
+        job_hash: str,
+        prefs_hash: str,
+        signature: Optional[np.ndarray]
+    ) -> Optional[dict]:
+        """
+        查找可复用的分析记录：先按岗位描述哈希精确查找，再在近似重复索引中查找
+        
+        Returns:
+            分析记录，近似重复命中时带 "similarity"
+        """
+        previous = await self._query(
+            "find_analysis", company_name, resume_key, job_hash, max_age=self.ttl_seconds
+        )
+        if previous or signature is None:
+            return previous
+        
+        scope = (Database.company_key(company_name), resume_key, prefs_hash)
+        index = await self._get_jd_index()
+        matches = index.query(signature, scope)
+        if matches and self.writer:
+            # 命中的可能是刚分析完、还在写入队列中的记录
+            await asyncio.to_thread(self.writer.flush, 5)
+        for key, similarity in matches:
+            previous = await self._query(
+                "find_analysis", company_name, resume_key, key[-1], max_age=self.ttl_seconds
+            )
+            if previous:
+                return {**previous, "similarity": similarity}
+        return None
+    
+    @traced("pipeline.run")
+    async def run(
+        self,
+        company_name: str,
+        company_url: Optional[str],
+        resume_data: dict,
+        job_description: str,
+        user_preferences: dict,
+        on_stage: Optional[Callable[[str, Any], None]] = None,
+        on_token: Optional[Callable[[str, str], Awaitable[None]]] = None
+    ) -> dict:
+        """
+        执行完整分析流程
+        
+        Args:
+            on_stage: 每个阶段完成时的回调 (阶段名, 结果)，
+                      阶段名为 company_info/resume_data/match_result/recommendations/report
+            on_token: 模型输出的回调 (阶段名, 新输出的文本)，阶段名为 match_result/recommendations
+        
+        Returns:
+            所有阶段结果
+        """
+        result = {}
+        
+        def emit(stage: str, value: Any):
+            result[stage] = value
+            if on_stage:
+                on_stage(stage, value)
+        
+        def stream(stage: str) -> Optional[Callable[[str], Awaitable[None]]]:
+            if on_token is None:
+                return None
+            return lambda text: on_token(stage, text)
+        
+        async def scrape_stage():
+            with STAGE_SECONDS.time(stage="company_info"):
+                emit("company_info", await self.scrape_company(company_name, company_url))
+        
+        async def parse_stage():
+            with STAGE_SECONDS.time(stage="resume_data"):
+                emit("resume_data", await self.parse_resume(resume_data))
+        
+        # 1-2. 爬取公司信息与解析简历互不依赖，并发执行
+        await asyncio.gather(scrape_stage(), parse_stage())
+        company_info = result["company_info"]
+        parsed_resume = result["resume_data"]
+        
+        # 相同公司、简历和偏好在有效期内分析过相同或近似重复的岗位描述时，直接复用之前的结果
+        resume_key = self._resume_key(resume_data)
+        prefs_hash = self._hash(json.dumps(user_preferences, ensure_ascii=False, sort_keys=True))
+        job_hash = self._hash(job_description, prefs_hash)
+        signature = self.hasher.signature(job_description) if self.hasher else None
+        analysis_record = {
+            "company_name": company_name,
+            "resume_digest": resume_key,
+            "job_hash": job_hash,
+            "prefs_hash": prefs_hash,
+            "jd_signature": signature.tobytes() if signature is not None else None
+        }
+        
+        previous = None
+        if resume_data["type"] != "file":
+            previous = await self._find_previous_analysis(
+                company_name, resume_key, job_hash, prefs_hash, signature
+            )
+        if previous:
+            current_span().set(reused_analysis=previous["id"], similarity=round(previous.get("similarity", 1.0), 3))
+            ANALYSES.inc(result="similar" if "similarity" in previous else "reused")
+            match_result = previous["match_result"]
+            if "similarity" in previous:
+                # 近似重复：记录指向原分析，下次相同的岗位描述可直接精确命中
+                duplicate_of = previous["duplicate_of"] or previous["id"]
+                match_result = {
+                    **match_result,
+                    "duplicate_of": {"analysis_id": duplicate_of, "similarity": round(previous["similarity"], 3)}
+                }
+                logger.info(
+                    f"岗位描述与已分析的记录 #{duplicate_of} 近似重复（相似度 {previous['similarity']:.2f}），"
+                    f"复用分析结果: {company_name}"
+                )
+                self._save("analysis", {
+                    **analysis_record,
+                    "jd_signature": None,
+                    "duplicate_of": duplicate_of,
+                    "match_result": match_result,
+                    "recommendations": previous["recommendations"],
+                    "report": previous["report"]
+                })
+            else:
+                logger.info(f"复用已有的分析结果: {company_name}（记录 #{previous['id']}）")
+            emit("match_result", match_result)
+            emit("recommendations", previous["recommendations"])
+            emit("report", previous["report"])
+            return result
+        
+        # 3-5. 岗位推荐不依赖匹配结果，与匹配分析并发；报告依赖匹配结果
+        async def match_and_report_stage():
+            with STAGE_SECONDS.time(stage="match_result"):
+                match_result = await self.matcher.analyze_match(
+                    resume_data=parsed_resume,
+                    job_description=job_description,
+                    company_info=company_info,
+                    user_preferences=user_preferences,
+                    on_token=stream("match_result")
+                )
+            emit("match_result", match_result)
+            with STAGE_SECONDS.time(stage="report"):
+                emit("report", await self.matcher.generate_report(
+                    match_result=match_result,
+                    format_type="markdown"
+                ))
+        
+        async def recommend_stage():
+            with STAGE_SECONDS.time(stage="recommendations"):
+                emit("recommendations", await self.matcher.recommend_positions(
+                    resume_data=parsed_resume,
+                    company_info=company_info,
+                    top_k=3,
+                    user_preferences=user_preferences,
+                    on_token=stream("recommendations")
+                ))
+        
+        await asyncio.gather(match_and_report_stage(), recommend_stage())
+        ANALYSES.inc(result="computed")
+        
+        if resume_data["type"] != "file" and not any(
+            "error" in result[stage] for stage in ("match_result", "recommendations")
+        ):
+            self._save("analysis", {
+                **analysis_record,
+                "match_result": result["match_result"],
+                "recommendations": result["recommendations"],
+                "report": result["report"]
+            })
+            if signature is not None and self._jd_index is not None:
+                scope = (Database.company_key(company_name), resume_key, prefs_hash)
+                self._jd_index.add((*scope, job_hash), signature, scope)
+        
+        logger.info(f"分析流程完成: {company_name}")
+        return result
+    
+    async def search_positions(self, **filters) -> list[dict]:
+        """查询岗位库，参数同 Database.search_positions（数据库不可用时为空）"""
+        return await self._query("search_positions", **filters) or []
+    
+    async def get_positions(self, position_ids: list[int]) -> list[dict]:
+        """按岗位ID读取岗位（数据库不可用时为空）"""
+        return await self._query("get_positions", position_ids) or []
+    
+    async def history(self, limit: int = 20) -> list[dict]:
+        """最近的分析记录（数据库不可用时为空）"""
+        return await self._query("recent_analyses", limit) or []
+    
+    async def close(self):
+        """释放网络会话，写完数据库队列中剩余的数据"""
+        await self.scraper.close()
+        await self.matcher.ollama.close()
+        if self.writer:
+            await asyncio.to_thread(self.writer.close)
@@ -0,0 +1,188 @@
+"""
+批量爬取模块 - 从公司列表文件并发爬取，支持断点续爬
+"""
+import json
+import time
+import asyncio
+from pathlib import Path
+from typing import Iterator, Optional
+from loguru import logger
+
+from config import settings
+from .company_scraper import CompanyScraper
+
+
+def load_company_list(path: Path) -> Iterator[tuple[str, Optional[str]]]:
+    """
+    逐行读取公司列表
+    
+    每行格式为 "公司名" 或 "公司名,官网URL"（也支持制表符分隔），
+    空行和以#开头的行会被忽略
+    
+    Yields:
+        (公司名, 官网URL或None)
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            parts = [p.strip() for p in line.replace("\t", ",").split(",", 1)]
+            name = parts[0]
+            url = parts[1] if len(parts) > 1 and parts[1] else None
+            yield name, url
+
+
+class CrawlStats:
+    """批量爬取统计"""
+    
+    def __init__(self):
+        self.started_at = time.monotonic()
+        self.succeeded = 0
+        self.failed = 0
+        self.skipped = 0
+    
+    @property
+    def completed(self) -> int:
+        return self.succeeded + self.failed
+    
+    def as_dict(self) -> dict:
+        elapsed = time.monotonic() - self.started_at
+        return {
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "skipped": self.skipped,
+            "elapsed_seconds": round(elapsed, 1),
+            "companies_per_min": round(self.completed / elapsed * 60, 1) if elapsed > 0 else 0.0,
+            "error_rate": round(self.failed / self.completed, 4) if self.completed else 0.0
+        }
+
+
+class BulkCrawler:
+    """
+    批量公司爬虫
+    
+    结果逐条追加写入 <output_dir>/results.jsonl，成功的公司名追加到 checkpoint.txt，
+    失败记录写入 errors.jsonl。重新运行时跳过checkpoint中已完成的公司。
+    传入writer（src.storage.BatchWriter）时，成功的结果同时批量写入数据库。
+    所有请求共用一个CompanyScraper，因此受同一套按主机限速和熔断约束。
+    """
+    
+    def __init__(
+        self,
+        output_dir: Optional[Path] = None,
+        concurrency: Optional[int] = None,
+        scraper: Optional[CompanyScraper] = None,
+        progress_interval: float = 10.0,
+        writer=None
+    ):
+        self.output_dir = Path(output_dir or settings.DATA_DIR / "crawl")
+        self.concurrency = concurrency or settings.BULK_CRAWL_CONCURRENCY
+        self.scraper = scraper or CompanyScraper()
+        self.progress_interval = progress_interval
+        self.writer = writer
+        self.stats = CrawlStats()
+        
+        self.results_path = self.output_dir / "results.jsonl"
+        self.errors_path = self.output_dir / "errors.jsonl"
+        self.checkpoint_path = self.output_dir / "checkpoint.txt"
+    
+    def _load_checkpoint(self) -> set[str]:
+        if not self.checkpoint_path.exists():
+            return set()
+        with open(self.checkpoint_path, "r", encoding="utf-8") as f:
+            return {line.rstrip("\n") for line in f if line.strip()}
+    
+    @staticmethod
+    def _failure_reason(result: dict) -> Optional[str]:
+        """判断爬取是否失败"""
+        if "error" in result:
+            return result["error"]
+        if not result.get("url"):
+            return "未找到公司官网"
+        if not result.get("basic_info"):
+            return "官网首页爬取失败"
+        return None
+    
+    async def run(self, companies: Iterator[tuple[str, Optional[str]]]) -> dict:
+        """
+        执行批量爬取
+        
+        Args:
+            companies: (公司名, 官网URL) 迭代器，可直接传入 load_company_list 的结果
+        
+        Returns:
+            爬取统计
+        """
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        done = self._load_checkpoint()
+        if done:
+            logger.info(f"从断点恢复，已完成 {len(done)} 家公司")
+        
+        # 有界队列：公司列表边读边爬，不需要一次性读入内存
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency * 2)
+        
+        with open(self.results_path, "a", encoding="utf-8") as results_file, \
+                open(self.errors_path, "a", encoding="utf-8") as errors_file, \
+                open(self.checkpoint_path, "a", encoding="utf-8") as checkpoint_file:
+            
+            async def worker():
+                while True:
+                    item = await queue.get()
+                    if item is None:
+                        queue.task_done()
+                        return
+                    name, url = item
+                    try:
+                        result = await self.scraper.scrape(name, url=url, include_recruitment=True)
+                        reason = self._failure_reason(result)
+                        if reason:
+                            self.stats.failed += 1
+                            errors_file.write(json.dumps(
+                                {"company_name": name, "url": url, "error": reason},
+                                ensure_ascii=False
+                            ) + "\n")
+                            errors_file.flush()
+                        else:
+                            self.stats.succeeded += 1
+                            result["crawled_at"] = time.time()
+                            # 先写结果再记录断点，中断后只会重爬当时正在进行中的公司
+                            results_file.write(json.dumps(result, ensure_ascii=False) + "\n")
+                            results_file.flush()
+                            checkpoint_file.write(name + "\n")
+                            checkpoint_file.flush()
+                            if self.writer:
+                                self.writer.submit("company", result)
+                    finally:
+                        queue.task_done()
+            
+            async def report_progress():
+                while True:
+                    await asyncio.sleep(self.progress_interval)
+                    stats = self.stats.as_dict()
+                    logger.info(
+                        f"批量爬取进度: 成功 {stats['succeeded']}, 失败 {stats['failed']}, "
+                        f"{stats['companies_per_min']} 家/分钟, 错误率 {stats['error_rate']:.1%}"
+                    )
+            
+            workers = [asyncio.create_task(worker()) for _ in range(self.concurrency)]
+            reporter = asyncio.create_task(report_progress())
+            
+            try:
+                for name, url in companies:
+                    if name in done:
+                        self.stats.skipped += 1
+                        continue
+                    done.add(name)
+                    await queue.put((name, url))
+                for _ in workers:
+                    await queue.put(None)
+                await asyncio.gather(*workers)
+            finally:
+                reporter.cancel()
+                for task in workers:
+                    task.cancel()
+        
+        stats = self.stats.as_dict()
+        logger.info(f"批量爬取完成: {stats}")
+        return stats
@@ -0,0 +1,302 @@
+"""
+公司名录 - 公司名称/别名到官网URL的解析（精确查找 + 模糊查找）
+"""
+import re
+import math
+import heapq
+import pickle
+import threading
+import unicodedata
+from array import array
+from pathlib import Path
+from typing import Optional
+from loguru import logger
+
+from config import settings
+
+
+# 归一化时去掉的法律后缀（可叠加，如"集团有限公司"、"group co., ltd."）
+ZH_SUFFIXES = ("股份有限公司", "有限责任公司", "有限公司", "集团", "公司")
+EN_SUFFIXES = ("corporation", "limited", "holdings", "group", "corp", "inc", "ltd", "llc", "co")
+_ZH_SUFFIX_PATTERN = re.compile("(?:" + "|".join(ZH_SUFFIXES) + ")$")
+# 英文后缀必须是独立的单词，避免把 "costco" 截成 "cost"
+_EN_SUFFIX_PATTERN = re.compile(r'[\s,.]+(?:' + "|".join(EN_SUFFIXES) + r')[\s,.]*$')
+_REGION_PATTERN = re.compile(r'\((?:中国|china|北京|上海|深圳|杭州|广州)\)')
+_NOISE_PATTERN = re.compile(r'[\s\-_.,，。·・&/\\\'"“”()（）]+')
+
+
+class CompanyDirectory:
+    """
+    公司名录
+    
+    别名表为TSV文件，每行: 标准名称<TAB>官网URL<TAB>别名1|别名2|...
+    （别名可包括英文名、简称、曾用名，#开头的行为注释）。
+    
+    - 精确查找：归一化后的名称 -> 公司编号的字典，O(1)
+    - 模糊查找：字符二元组倒排索引，按Dice系数给候选打分排序，前缀过滤避免扫描高频二元组
+    - 索引用连续的array存储，首次加载后序列化到缓存目录，别名表未变化时直接读取
+    """
+    
+    INDEX_VERSION = 3
+    # 出现在过多别名中的二元组（如"科技"）区分度低，不用来生成候选
+    MAX_POSTINGS = 2000
+    # 精确计算相似度的候选上限，超出时保留命中二元组最多的候选
+    MAX_CANDIDATES = 200
+    
+    def __init__(self, path: Optional[Path] = None, cache_dir: Optional[Path] = None):
+        self.path = Path(path or settings.COMPANY_ALIASES_PATH or settings.DATA_DIR / "company_aliases.tsv")
+        self.cache_dir = cache_dir or settings.CACHE_DIR
+        self.loaded = False
+        self._load_lock = threading.Lock()
+        self._names: list[str] = []
+        self._urls: list[str] = []
+        # 别名原文拼成一个字符串，按偏移量截取，比几十万个str对象紧凑
+        self._alias_text = ""
+        self._alias_offsets = array("I", [0])
+        self._alias_company = array("I")
+        # 归一化后的别名，与_exact共用同一批字符串对象
+        self._alias_keys: list[str] = []
+        self._exact: dict[str, int] = {}
+        # 倒排索引（CSR格式）：二元组 -> 序号，_postings[_gram_offsets[i]:_gram_offsets[i+1]] 为该二元组的别名编号
+        self._gram_ids: dict[str, int] = {}
+        self._gram_offsets = array("I", [0])
+        self._postings = array("I")
+    
+    @staticmethod
+    def normalize(name: str) -> str:
+        """
+        归一化公司名称：NFKC（全角转半角）、忽略大小写、去掉空白标点、地区括注和法律后缀
+        
+        例如 "腾讯科技（深圳）有限公司" 和 "腾讯科技" 归一化结果相同，
+        "Tencent Holdings Ltd." 和 "tencent" 相同
+        """
+        text = unicodedata.normalize("NFKC", name).casefold().strip()
+        text = _REGION_PATTERN.sub("", text)
+        # 后缀可能叠加，反复去除，但至少保留两个字符
+        for pattern, noise in ((_EN_SUFFIX_PATTERN, False), (_ZH_SUFFIX_PATTERN, True)):
+            if noise:
+                text = _NOISE_PATTERN.sub("", text)
+            while True:
+                stripped = pattern.sub("", text)
+                if stripped == text or len(stripped) < 2:
+                    break
+                text = stripped
+        return text
+    
+    @staticmethod
+    def _bigrams(key: str) -> set[str]:
+        if len(key) < 2:
+            return {key} if key else set()
+        return {key[i:i + 2] for i in range(len(key) - 1)}
+    
+    def _index_path(self) -> Path:
+        return self.cache_dir / "company_directory.pickle"
+    
+    def _source_signature(self) -> tuple:
+        stat = self.path.stat()
+        return (self.INDEX_VERSION, str(self.path.resolve()), stat.st_mtime_ns, stat.st_size)
+    
+    def load(self):
+        """加载别名表（优先读取已序列化的索引），可在线程中并发调用"""
+        if self.loaded:
+            return
+        with self._load_lock:
+            if not self.loaded:
+                self._load()
+    
+    def _load(self):
+        if not self.path.exists():
+            logger.warning(f"公司别名表不存在: {self.path}")
+            self.loaded = True
+            return
+        
+        signature = self._source_signature()
+        index_path = self._index_path()
+        if index_path.exists():
+            try:
+                with open(index_path, "rb") as f:
+                    state = pickle.load(f)
+                if state.get("signature") == signature:
+                    self._restore(state)
+                    self.loaded = True
+                    logger.debug(f"公司名录已从索引缓存加载: {len(self._names)} 家公司")
+                    return
+            except Exception as e:
+                logger.warning(f"公司名录索引缓存无法读取，重新构建: {e}")
+        
+        self._build()
+        self.loaded = True
+        try:
+            index_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = index_path.with_name(index_path.name + ".tmp")
+            with open(tmp_path, "wb") as f:
+                pickle.dump({"signature": signature, **self._state()}, f, protocol=pickle.HIGHEST_PROTOCOL)
+            tmp_path.replace(index_path)
+        except OSError as e:
+            logger.warning(f"公司名录索引缓存写入失败: {e}")
+    
+    _STATE_FIELDS = (
+        "_names", "_urls", "_alias_text", "_alias_offsets", "_alias_company",
+        "_alias_keys", "_exact", "_gram_ids", "_gram_offsets", "_postings"
+    )
+    
+    def _state(self) -> dict:
+        return {field: getattr(self, field) for field in self._STATE_FIELDS}
+    
+    def _restore(self, state: dict):
+        for field in self._STATE_FIELDS:
+            setattr(self, field, state[field])
+    
+    def _build(self):
+        """解析别名表并建立索引"""
+        aliases: list[str] = []
+        grams: dict[str, list[int]] = {}
+        
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.rstrip("\n")
+                if not line.strip() or line.startswith("#"):
+                    continue
+                parts = line.split("\t")
+                if len(parts) < 2 or not parts[1].strip():
+                    continue
+                company_id = len(self._names)
+                self._names.append(parts[0].strip())
+                self._urls.append(parts[1].strip())
+                
+                for alias in [parts[0]] + (parts[2].split("|") if len(parts) > 2 else []):
+                    alias = alias.strip()
+                    key = self.normalize(alias)
+                    if not key or key in self._exact:
+                        # 同名别名以先出现的公司为准
+                        continue
+                    alias_id = len(aliases)
+                    self._exact[key] = company_id
+                    aliases.append(alias)
+                    self._alias_company.append(company_id)
+                    self._alias_keys.append(key)
+                    for gram in self._bigrams(key):
+                        grams.setdefault(gram, []).append(alias_id)
+        
+        self._alias_text = "".join(aliases)
+        for alias in aliases:
+            self._alias_offsets.append(self._alias_offsets[-1] + len(alias))
+        for gram_id, (gram, postings) in enumerate(grams.items()):
+            self._gram_ids[gram] = gram_id
+            self._postings.extend(postings)
+            self._gram_offsets.append(len(self._postings))
+        
+        logger.info(
+            f"公司名录已加载: {len(self._names)} 家公司, {len(aliases)} 个别名, "
+            f"{len(self._gram_ids)} 个索引项"
+        )
+    
+    def _alias(self, alias_id: int) -> str:
+        return self._alias_text[self._alias_offsets[alias_id]:self._alias_offsets[alias_id + 1]]
+    
+    def __len__(self) -> int:
+        self.load()
+        return len(self._names)
+    
+    def _company(self, company_id: int, alias: str, score: float) -> dict:
+        return {
+            "name": self._names[company_id],
+            "url": self._urls[company_id],
+            "alias": alias,
+            "score": round(score, 3)
+        }
+    
+    def lookup(self, name: str) -> Optional[dict]:
+        """
+        精确查找（名称归一化后完全一致）
+        
+        Returns:
+            {"name", "url", "alias", "score"}，未找到返回None
+        """
+        self.load()
+        company_id = self._exact.get(self.normalize(name))
+        if company_id is None:
+            return None
+        return self._company(company_id, name, 1.0)
+    
+    def search(self, name: str, limit: int = 5, min_score: float = 0.3) -> list[dict]:
+        """
+        模糊查找
+        
+        Args:
+            name: 公司名称（可以是简称、英文名或有错字的名称）
+            limit: 最多返回的公司数
+            min_score: 最低相似度（Dice系数，0-1）
+        
+        Returns:
+            按相似度从高到低排列的候选公司
+        """
+        self.load()
+        key = self.normalize(name)
+        exact = self._exact.get(key)
+        if exact is not None:
+            return [self._company(exact, name, 1.0)]
+        
+        grams = self._bigrams(key)
+        # (起始, 结束) 区间，按倒排列表长度从短到长
+        spans = sorted(
+            (
+                (self._gram_offsets[i], self._gram_offsets[i + 1])
+                for i in (self._gram_ids.get(g) for g in grams) if i is not None
+            ),
+            key=lambda span: span[1] - span[0]
+        )
+        if not spans:
+            return []
+        
+        # 前缀过滤：Dice >= s 要求共同二元组数 >= t = s*q/(2-s)，所以达标的别名必然出现在
+        # 最稀有的 q-t+1 个倒排列表中。只展开这些列表生成候选（高频二元组的长列表除外），
+        # 按命中次数保留前MAX_CANDIDATES个，再用二元组集合精确计算相似度
+        query_size = len(grams)
+        min_common = max(1, math.ceil(min_score * query_size / (2 - min_score) - 1e-9))
+        prefix = max(1, len(spans) - min_common + 1)
+        
+        counts: dict[int, int] = {}
+        postings = self._postings
+        for n, (start, end) in enumerate(spans[:prefix]):
+            if n and end - start > self.MAX_POSTINGS:
+                break
+            for alias_id in postings[start:end]:
+                counts[alias_id] = counts.get(alias_id, 0) + 1
+        if len(counts) > self.MAX_CANDIDATES:
+            counts = dict(heapq.nlargest(self.MAX_CANDIDATES, counts.items(), key=lambda item: item[1]))
+        
+        best: dict[int, tuple[float, int]] = {}
+        for alias_id in counts:
+            alias_grams = self._bigrams(self._alias_keys[alias_id])
+            score = 2 * len(grams & alias_grams) / (query_size + len(alias_grams))
+            if score < min_score:
+                continue
+            company_id = self._alias_company[alias_id]
+            if company_id not in best or score > best[company_id][0]:
+                best[company_id] = (score, alias_id)
+        
+        ranked = sorted(best.items(), key=lambda item: item[1][0], reverse=True)[:limit]
+        return [
+            self._company(company_id, self._alias(alias_id), score)
+            for company_id, (score, alias_id) in ranked
+        ]
+    
+    def resolve(self, name: str, min_score: Optional[float] = None) -> Optional[str]:
+        """
+        解析公司官网URL：先精确查找，未命中时取相似度最高且超过阈值的候选
+        
+        Returns:
+            官网URL，无可信候选时返回None
+        """
+        threshold = settings.COMPANY_FUZZY_MIN_SCORE if min_score is None else min_score
+        candidates = self.search(name, limit=3, min_score=threshold)
+        if not candidates:
+            return None
+        best = candidates[0]
+        if best["score"] < 1.0:
+            logger.info(
+                f"公司名称模糊匹配: {name} -> {best['name']}（{best['alias']}, 相似度 {best['score']}）"
+                + (f"，其他候选: {[c['name'] for c in candidates[1:]]}" if len(candidates) > 1 else "")
+            )
+        return best["url"]
@@ -3,10 +3,21 @@
 """
 import asyncio
 import aiohttp
-from bs4 import BeautifulSoup
 from typing import Optional
 from loguru import logger
 from config import settings
+from src.utils.async_runner import SharedTasks
+from src.utils.tracing import current_span, traced
+from src.utils.metrics import counter, histogram
+from .http_cache import HTTPCache, CachedPage
+from .scheduler import CrawlScheduler, RetryableHTTPError, parse_retry_after
+from .site_crawler import SiteCrawler
+from .extractors import HTMLExtractor, extract_basic_info
+from .company_directory import CompanyDirectory
+
+SCRAPE_SECONDS = histogram("scrape_seconds", "爬取一家公司信息的耗时（秒）")
+SCRAPE_ERRORS = counter("scrape_errors_total", "爬取失败次数（status: 页面返回错误状态码, exception: 爬取出错）", ["reason"])
+CACHE_LOOKUPS = counter("cache_lookups_total", "缓存查询次数", ["cache", "result"])
 
 
 class CompanyScraper:
@@ -15,9 +26,123 @@ class CompanyScraper:
     def __init__(self):
         self.timeout = aiohttp.ClientTimeout(total=settings.CRAWLER_TIMEOUT)
         self.headers = {
-            "User-Agent": settings.CRAWLER_USER_AGENT
+            "User-Agent": settings.CRAWLER_USER_AGENT,
+            "Accept-Encoding": "gzip, deflate"
+        }
+        self.proxies = {
+            "http": settings.HTTP_PROXY,
+            "https": settings.HTTPS_PROXY
         }
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._session_loop: Optional[asyncio.AbstractEventLoop] = None
+        self.http_cache = HTTPCache() if settings.HTTP_CACHE_ENABLED else None
+        self.scheduler = CrawlScheduler()
+        self.extractor = HTMLExtractor()
+        self.directory = CompanyDirectory()
+        self.site_crawler = SiteCrawler(self._fetch_page, self.http_cache, self.extractor)
+        # 进行中的页面请求和官网爬取，同一URL的并发调用共享一个任务
+        self._page_tasks = SharedTasks()
+        self._site_tasks = SharedTasks()
+    
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """
+        获取共享的HTTP会话（连接池）
+        
+        连接池限制总连接数和单主机连接数，并缓存DNS解析结果；
+        会话绑定在创建它的事件循环上，换了循环时重新创建
+        """
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._session_loop is not loop:
+            connector = aiohttp.TCPConnector(
+                limit=settings.CRAWLER_MAX_CONNECTIONS,
+                limit_per_host=settings.CRAWLER_MAX_CONNECTIONS_PER_HOST,
+                ttl_dns_cache=settings.CRAWLER_DNS_CACHE_SECONDS,
+                use_dns_cache=True
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=self.timeout,
+                headers=self.headers,
+                auto_decompress=True
+            )
+            self._session_loop = loop
+        return self._session
+    
+    def _proxy_for(self, url: str) -> Optional[str]:
+        """按URL协议选择代理（HTTP_PROXY / HTTPS_PROXY）"""
+        scheme = url.split("://", 1)[0].lower()
+        return self.proxies.get(scheme) or None
+    
+    async def _fetch_page(self, url: str) -> Optional[CachedPage]:
+        """
+        获取页面（经过HTTP缓存）
+        
+        新鲜的缓存直接返回不访问网络；过期的缓存发条件请求，304时复用。
+        同一URL的并发请求（如首页同时用于基本信息和官网爬取）只发一次
+        
+        Returns:
+            页面，请求失败返回None
+        """
+        return await self._page_tasks.run(url, lambda: self._request_page(url))
+    
+    @traced("scraper.fetch")
+    async def _request_page(self, url: str) -> Optional[CachedPage]:
+        span = current_span().set(url=url)
+        # 缓存读写都在线程中进行，磁盘I/O不阻塞其他并发的爬取
+        cached = await asyncio.to_thread(self.http_cache.get, url) if self.http_cache else None
+        if cached and self.http_cache.is_fresh(cached):
+            span.set(cache="fresh", chars=len(cached.text))
+            CACHE_LOOKUPS.inc(cache="http", result="fresh")
+            return cached
+        
+        headers = self.http_cache.conditional_headers(cached) if self.http_cache else {}
+        
+        async def request() -> Optional[CachedPage]:
+            session = await self._get_session()
+            async with session.get(url, headers=headers, proxy=self._proxy_for(url)) as response:
+                span.set(status=response.status)
+                if response.status == 304 and cached:
+                    logger.debug(f"页面未变化(304): {url}")
+                    span.set(cache="revalidated", chars=len(cached.text))
+                    CACHE_LOOKUPS.inc(cache="http", result="revalidated")
+                    return await asyncio.to_thread(self.http_cache.revalidated, cached, response.headers)
+                
+                if response.status in CrawlScheduler.RETRY_STATUSES:
+                    raise RetryableHTTPError(
+                        response.status,
+                        retry_after=parse_retry_after(response.headers.get("Retry-After"))
+                    )
+                
+                if response.status != 200:
+                    logger.warning(f"请求页面失败: {url}, 状态码: {response.status}")
+                    SCRAPE_ERRORS.inc(reason="status")
+                    return None
+                
+                text = await response.text()
+                span.set(cache="miss", chars=len(text))
+                CACHE_LOOKUPS.inc(cache="http", result="miss")
+                if self.http_cache:
+                    return await asyncio.to_thread(self.http_cache.store, url, text, response.headers)
+                return CachedPage("", {"url": url, "body_hash": "", "expires_at": 0}, text)
+        
+        # 经调度器执行：按主机限速、失败重试、熔断
+        return await self.scheduler.run(url, request)
     
+    async def close(self):
+        """关闭HTTP会话和HTML解析进程池"""
+        if self._session and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        self.extractor.shutdown()
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, *exc):
+        await self.close()
+    
+    @traced("scraper.scrape")
+    @SCRAPE_SECONDS.time()
     async def scrape(
         self,
         company_name: str,
@@ -50,21 +175,30 @@ class CompanyScraper:
                 result["url"] = url
             
             if url:
-                # 爬取基本信息
-                result["basic_info"] = await self._scrape_basic_info(url)
-                
-                # 爬取企业文化
-                result["culture"] = await self._scrape_culture(url)
+                # 基本信息、企业文化、招聘信息互不依赖，并发爬取
+                tasks = [
+                    self._scrape_basic_info(url),
+                    self._scrape_culture(url)
+                ]
+                if include_recruitment:
+                    tasks.append(self._scrape_positions(url, company_name))
                 
-                # 爬取招聘信息
+                results = await asyncio.gather(*tasks)
+                result["basic_info"] = results[0]
+                result["culture"] = results[1]
                 if include_recruitment:
-                    result["positions"] = await self._scrape_positions(url, company_name)
+                    result["positions"] = results[2]
             
             logger.info(f"成功爬取公司信息: {company_name}")
+            current_span().set(company=company_name, positions=len(result["positions"]))
+            if self.http_cache:
+                logger.debug(f"HTTP缓存统计: {self.http_cache.stats()}")
             return result
             
         except Exception as e:
             logger.error(f"爬取公司信息失败: {company_name}, 错误: {e}")
+            current_span().record_error(e)
+            SCRAPE_ERRORS.inc(reason="exception")
             return {
                 "company_name": company_name,
                 "error": str(e),
@@ -74,100 +208,58 @@ class CompanyScraper:
             }
     
     async def _search_company_url(self, company_name: str) -> Optional[str]:
-        """搜索公司官网URL"""
-        # TODO: 实现搜索逻辑（可以调用搜索引擎API或使用已知的公司URL映射）
+        """通过公司名录解析官网URL（支持别名、英文名和模糊匹配）"""
         logger.info(f"搜索公司URL: {company_name}")
+        if not self.directory.loaded:
+            # 首次使用时加载别名表，别名表很大时不阻塞事件循环
+            await asyncio.to_thread(self.directory.load)
         
-        # 示例：常见公司URL映射
-        known_companies = {
-            "腾讯": "https://www.tencent.com",
-            "阿里巴巴": "https://www.alibaba.com",
-            "字节跳动": "https://www.bytedance.com",
-            "百度": "https://www.baidu.com",
-            "华为": "https://www.huawei.com",
-        }
-        
-        return known_companies.get(company_name)
+        url = self.directory.resolve(company_name)
+        if url is None:
+            logger.warning(f"公司名录中未找到: {company_name}")
+        return url
     
     async def _scrape_basic_info(self, url: str) -> dict:
         """爬取公司基本信息"""
         try:
-            async with aiohttp.ClientSession(timeout=self.timeout) as session:
-                async with session.get(url, headers=self.headers) as response:
-                    if response.status == 200:
-                        html = await response.text()
-                        soup = BeautifulSoup(html, 'lxml')
-                        
-                        # 提取基本信息（需要根据实际网站结构调整）
-                        info = {
-                            "description": self._extract_description(soup),
-                            "industry": self._extract_industry(soup),
-                            "size": self._extract_size(soup),
-                            "founded": self._extract_founded(soup)
-                        }
-                        
+            page = await self._fetch_page(url)
+            if page is not None:
+                # 页面正文未变化时直接复用上次的解析结果
+                if self.http_cache:
+                    info = self.http_cache.get_extracted(page, "basic_info")
+                    if info is not None:
                         return info
+                
+                # 只解析<head>和页脚，大页面在进程池中解析
+                info = await self.extractor.run(extract_basic_info, page.text)
+                
+                if self.http_cache:
+                    await asyncio.to_thread(self.http_cache.put_extracted, page, "basic_info", info)
+                return info
         except Exception as e:
             logger.error(f"爬取基本信息失败: {url}, 错误: {e}")
         
         return {}
     
+    async def _crawl_site(self, url: str) -> dict:
+        """爬取官网的招聘页和关于我们页，企业文化和招聘信息共用一次爬取"""
+        return await self._site_tasks.run(url, lambda: self.site_crawler.crawl(url))
+    
     async def _scrape_culture(self, url: str) -> dict:
         """爬取企业文化"""
         try:
-            # TODO: 实现企业文化爬取逻辑
-            return {
-                "values": [],
-                "mission": "",
-                "vision": ""
-            }
+            site = await self._crawl_site(url)
+            return site["culture"]
         except Exception as e:
             logger.error(f"爬取企业文化失败: {url}, 错误: {e}")
             return {}
     
     async def _scrape_positions(self, url: str, company_name: str) -> list:
-        """爬取招聘信息"""
+        """爬取招聘信息（官网招聘页）"""
         try:
-            # TODO: 实现招聘信息爬取
-            # 可以爬取公司官网的招聘页面，或者调用招聘平台API
-            
-            # 示例：返回模拟数据
-            positions = [
-                {
-                    "title": "Python后端工程师",
-                    "location": "北京",
-                    "salary": "20-35K",
-                    "requirements": [
-                        "3年以上Python开发经验",
-                        "熟悉Django/Flask框架",
-                        "熟悉MySQL、Redis等数据库"
-                    ],
-                    "responsibilities": [
-                        "负责后端服务开发和维护",
-                        "参与系统架构设计"
-                    ]
-                }
-            ]
-            
-            return positions
-            
+            site = await self._crawl_site(url)
+            logger.info(f"{company_name} 官网共发现 {len(site['positions'])} 个岗位")
+            return site["positions"]
         except Exception as e:
             logger.error(f"爬取招聘信息失败: {url}, 错误: {e}")
             return []
-    
-    def _extract_description(self, soup: BeautifulSoup) -> str:
-        """提取公司描述"""
-        # TODO: 根据实际网站结构提取
-        return ""
-    
-    def _extract_industry(self, soup: BeautifulSoup) -> str:
-        """提取行业信息"""
-        return ""
-    
-    def _extract_size(self, soup: BeautifulSoup) -> str:
-        """提取公司规模"""
-        return ""
-    
-    def _extract_founded(self, soup: BeautifulSoup) -> str:
-        """提取成立时间"""
-        return ""
@@ -0,0 +1,341 @@
+"""
+页面信息提取 - 从公司官网页面中提取基本信息、链接、招聘岗位和企业文化
+
+直接使用lxml解析并用XPath定位所需元素；基本信息只解析<head>和页脚片段。
+提取函数都是模块级纯函数，可以交给HTMLExtractor在进程池中执行。
+"""
+import re
+import json
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Optional
+from urllib.parse import urljoin
+import lxml.html
+from lxml import etree
+from loguru import logger
+
+from config import settings
+
+
+SALARY_PATTERN = re.compile(r'\d+(?:\.\d+)?\s*[-~至]\s*\d+(?:\.\d+)?\s*[kK千万]')
+CITY_PATTERN = re.compile(r'北京|上海|深圳|广州|杭州|成都|南京|武汉|西安|苏州|天津|重庆|长沙|厦门|远程')
+SIZE_PATTERN = re.compile(r'(\d+\s*[-~至]\s*\d+|\d+\s*\+?)\s*(?:人|名员工|employees)', re.IGNORECASE)
+FOUNDED_PATTERN = re.compile(r'(?:成立于|创立于|创建于|始于|founded\s+in)\s*(\d{4})', re.IGNORECASE)
+HEAD_END = re.compile(r'</head\s*>', re.IGNORECASE)
+FOOTER_START = re.compile(r'<footer[\s>]', re.IGNORECASE)
+CULTURE_HEADINGS = {
+    "mission": ("使命", "mission"),
+    "vision": ("愿景", "vision"),
+    "values": ("价值观", "核心价值", "values"),
+}
+
+_LOWER = "translate({}, 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz')"
+_CONTAINER_TAGS = "self::li or self::div or self::tr or self::article"
+_HEADING_TAGS = ("h1", "h2", "h3", "h4")
+
+
+def _class_contains(*keywords: str) -> str:
+    """XPath条件：class名（忽略大小写）包含任一关键词"""
+    return " or ".join(f"contains({_LOWER.format('@class')}, '{k}')" for k in keywords)
+
+
+def _parse(html: str) -> Optional[etree._Element]:
+    """解析HTML文档，内容为空或无法解析时返回None"""
+    if not html or not html.strip():
+        return None
+    try:
+        try:
+            return lxml.html.document_fromstring(html)
+        except ValueError:
+            # 带编码声明的XML/XHTML字符串不能直接解析，转为字节交给解析器处理
+            return lxml.html.document_fromstring(html.encode("utf-8"))
+    except etree.ParserError:
+        return None
+
+
+def _text(node) -> str:
+    if node is None:
+        return ""
+    return " ".join(node.text_content().split())
+
+
+def _first(nodes: list):
+    return nodes[0] if nodes else None
+
+
+def _meta(tree, name: str) -> str:
+    """读取<meta name=...>或<meta property=...>的content"""
+    values = tree.xpath(
+        f"//meta[{_LOWER.format('@name')}=$name or {_LOWER.format('@property')}=$name]/@content",
+        name=name
+    )
+    return " ".join(values[0].split()) if values else ""
+
+
+def extract_basic_info(html: str) -> dict:
+    """
+    提取公司基本信息
+    
+    只解析<head>（meta描述、关键词）和页脚（规模、成立时间），
+    缺少meta描述时才解析整页取首个标题和段落
+    
+    Returns:
+        {"description", "industry", "size", "founded"}
+    """
+    head_end = HEAD_END.search(html)
+    head = _parse(html[:head_end.end()] if head_end else html)
+    description = keywords = ""
+    if head is not None:
+        description = _meta(head, "description") or _meta(head, "og:description")
+        keywords = _meta(head, "keywords")
+    
+    footers = list(FOOTER_START.finditer(html))
+    footer_html = html[footers[-1].start():] if footers else html[-4000:]
+    footer = _parse(footer_html)
+    footer_text = _text(footer) if footer is not None else ""
+    
+    if not description:
+        tree = _parse(html)
+        if tree is not None:
+            heading = _first(tree.xpath("//h1"))
+            paragraph = _first(tree.xpath("//p[normalize-space()]"))
+            description = " ".join(t for t in (_text(heading), _text(paragraph)) if t)
+    
+    industry = "、".join([k.strip() for k in re.split(r'[,，、;；]', keywords) if k.strip()][:3])
+    size_match = SIZE_PATTERN.search(footer_text) or SIZE_PATTERN.search(description)
+    founded_match = FOUNDED_PATTERN.search(footer_text) or FOUNDED_PATTERN.search(description)
+    
+    return {
+        "description": description,
+        "industry": industry,
+        "size": re.sub(r'\s+', '', size_match.group(0)) if size_match else "",
+        "founded": founded_match.group(1) if founded_match else ""
+    }
+
+
+def _links(tree, base_url: str) -> list[tuple[str, str]]:
+    links = []
+    for a in tree.xpath("//a[@href]"):
+        href = a.get("href", "").strip()
+        if not href or href.startswith(("javascript:", "mailto:", "tel:", "#")):
+            continue
+        links.append((urljoin(base_url, href), _text(a)))
+    return links
+
+
+def _salary_from_jsonld(salary) -> str:
+    """JobPosting.baseSalary -> "20-35K" 形式的文本"""
+    if not isinstance(salary, dict):
+        return str(salary or "")
+    value = salary.get("value", {})
+    if isinstance(value, dict):
+        low, high = value.get("minValue"), value.get("maxValue")
+        unit = value.get("unitText", "")
+        if low and high:
+            return f"{low}-{high} {unit}".strip()
+        return str(value.get("value", ""))
+    return str(value)
+
+
+def _html_lines(fragment: str) -> list[str]:
+    """HTML片段 -> 非空文本行"""
+    if not fragment:
+        return []
+    try:
+        node = lxml.html.fragment_fromstring(fragment, create_parent="div")
+    except etree.ParserError:
+        return [line.strip() for line in fragment.splitlines() if line.strip()]
+    return [t.strip() for t in node.itertext() if t.strip()]
+
+
+def _positions_from_jsonld(tree) -> list[dict]:
+    """从schema.org JobPosting结构化数据中提取岗位"""
+    positions = []
+    for script in tree.xpath("//script[@type='application/ld+json']/text()"):
+        try:
+            data = json.loads(script)
+        except ValueError:
+            continue
+        if isinstance(data, list):
+            items = data
+        elif isinstance(data, dict):
+            items = data.get("@graph", [data])
+        else:
+            continue
+        for item in items:
+            if not isinstance(item, dict) or item.get("@type") != "JobPosting":
+                continue
+            location = item.get("jobLocation", {})
+            if isinstance(location, list):
+                location = location[0] if location else {}
+            address = location.get("address", {}) if isinstance(location, dict) else {}
+            positions.append({
+                "title": item.get("title", ""),
+                "location": address.get("addressLocality", "") if isinstance(address, dict) else "",
+                "salary": _salary_from_jsonld(item.get("baseSalary")),
+                "requirements": _html_lines(item.get("description", ""))[:10],
+                "responsibilities": []
+            })
+    return positions
+
+
+def _positions_from_html(tree) -> list[dict]:
+    """按常见的招聘列表结构（class含job/position的元素）提取岗位"""
+    positions = []
+    candidates = tree.xpath(f"//*[{_CONTAINER_TAGS}][{_class_contains('job', 'position', 'posting')}]")
+    for node in candidates:
+        # 跳过包含其他候选元素的容器（如岗位列表本身）
+        if node.xpath(f".//*[{_CONTAINER_TAGS}][{_class_contains('job')}]"):
+            continue
+        title = _text(_first(node.xpath(".//*[self::h2 or self::h3 or self::h4 or self::a or self::strong]")))
+        if not title:
+            continue
+        
+        text = _text(node)
+        salary_node = _first(node.xpath(f".//*[{_class_contains('salary', 'pay')}]"))
+        location_node = _first(node.xpath(f".//*[{_class_contains('location', 'city', 'place')}]"))
+        salary_match = SALARY_PATTERN.search(text)
+        city_match = CITY_PATTERN.search(text)
+        
+        requirements_node = _first(node.xpath(f".//*[{_class_contains('requirement', 'qualification')}]"))
+        responsibilities_node = _first(node.xpath(f".//*[{_class_contains('responsibilit', 'duty', 'duties')}]"))
+        
+        positions.append({
+            "title": title,
+            "location": _text(location_node) or (city_match.group(0) if city_match else ""),
+            "salary": _text(salary_node) or (salary_match.group(0) if salary_match else ""),
+            "requirements": [_text(p) for p in requirements_node.xpath(".//p | .//li")] if requirements_node is not None else [],
+            "responsibilities": [_text(p) for p in responsibilities_node.xpath(".//p | .//li")] if responsibilities_node is not None else []
+        })
+    return positions
+
+
+def _positions(tree) -> list[dict]:
+    # 优先使用JobPosting结构化数据，没有时按HTML结构推断
+    return _positions_from_jsonld(tree) or _positions_from_html(tree)
+
+
+def _section_after(heading) -> tuple[str, list[str]]:
+    """标题之后、下一个同级标题之前的文本和列表项"""
+    texts, items = [], []
+    for sibling in heading.itersiblings():
+        if not isinstance(sibling.tag, str):
+            continue
+        if sibling.tag in _HEADING_TAGS:
+            break
+        lis = sibling.xpath(".//li") if sibling.tag in ("ul", "ol") else []
+        if lis:
+            items.extend(_text(li) for li in lis)
+        elif _text(sibling):
+            texts.append(_text(sibling))
+    return " ".join(texts), items
+
+
+def _culture(tree) -> dict:
+    culture = {"values": [], "mission": "", "vision": ""}
+    for heading in tree.xpath("//*[self::h1 or self::h2 or self::h3 or self::h4 or self::dt or self::strong]"):
+        title = _text(heading).lower()
+        for field, keywords in CULTURE_HEADINGS.items():
+            if not any(k in title for k in keywords):
+                continue
+            text, items = _section_after(heading)
+            if field == "values":
+                culture["values"] = culture["values"] or items or [v for v in re.split(r'[、，,;；]', text) if v]
+            elif not culture[field]:
+                culture[field] = text
+    return culture
+
+
+def extract_page(html: str, base_url: str, kind: str) -> dict:
+    """
+    解析官网页面（只解析一次）
+    
+    所有页面提取链接；招聘页提取岗位（结构与CompanyScraper的positions一致），
+    其他页面提取企业文化（使命、愿景、价值观）
+    
+    Returns:
+        {"links": [(绝对URL, 链接文字)], "positions": [...]} 或 {"links": [...], "culture": {...}}
+    """
+    tree = _parse(html)
+    if tree is None:
+        return {"links": [], "positions": []} if kind == "careers" else {"links": [], "culture": {}}
+    
+    data: dict[str, Any] = {"links": _links(tree, base_url)}
+    if kind == "careers":
+        data["positions"] = _positions(tree)
+    else:
+        data["culture"] = _culture(tree)
+    return data
+
+
+def extract_sitemap_urls(xml: str) -> tuple[list[str], list[str]]:
+    """
+    解析sitemap
+    
+    Returns:
+        (页面URL列表, 子sitemap URL列表)
+    """
+    locs = re.findall(r'<loc>\s*(.*?)\s*</loc>', xml, re.IGNORECASE | re.DOTALL)
+    if re.search(r'<sitemapindex', xml, re.IGNORECASE):
+        return [], locs
+    return locs, []
+
+
+def merge_culture(target: dict, source: Optional[dict]) -> dict:
+    """合并多个页面提取到的企业文化，已有的字段不覆盖"""
+    if not source:
+        return target
+    for key in ("mission", "vision"):
+        target[key] = target.get(key) or source.get(key, "")
+    target["values"] = target.get("values") or source.get("values", [])
+    return target
+
+
+class HTMLExtractor:
+    """
+    HTML解析执行器
+    
+    小页面直接在当前线程解析（进程间传输的开销比解析本身大），
+    超过HTML_PARSE_INLINE_KB的页面交给进程池，避免CPU密集的解析阻塞事件循环中的并发请求
+    """
+    
+    def __init__(self, max_workers: Optional[int] = None, inline_kb: Optional[int] = None):
+        self.max_workers = settings.HTML_PARSE_WORKERS if max_workers is None else max_workers
+        self.inline_bytes = (settings.HTML_PARSE_INLINE_KB if inline_kb is None else inline_kb) * 1024
+        self._executor: Optional[ProcessPoolExecutor] = None
+    
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """延迟创建进程池，只有遇到大页面时才启动子进程"""
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+    
+    def shutdown(self):
+        """关闭进程池"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+    
+    async def run(self, func: Callable[..., Any], html: str, *args) -> Any:
+        """
+        执行提取函数
+        
+        Args:
+            func: 模块级提取函数（如extract_basic_info、extract_page）
+            html: 页面HTML
+            *args: 提取函数的其他参数
+        
+        Returns:
+            提取函数的返回值
+        """
+        if self.max_workers <= 0 or len(html) < self.inline_bytes:
+            return func(html, *args)
+        
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(self._get_executor(), func, html, *args)
+        except BrokenProcessPool:
+            logger.warning("HTML解析进程池异常退出，改为在当前线程解析")
+            self._executor = None
+            return func(html, *args)
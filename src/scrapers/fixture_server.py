@@ -0,0 +1,205 @@
+"""
+本地HTTP测试站点 - 生成若干虚构公司官网，用于无网络环境下测试爬虫
+
+用法:
+    python -m src.scrapers.fixture_server --companies 1000 --port 8900 --list companies.txt
+    
+    # 同一主机的请求受CRAWLER_DELAY限速，压测时可关闭
+    CRAWLER_DELAY=0 python cli.py --mode crawl --companies companies.txt
+"""
+import asyncio
+import argparse
+import hashlib
+import random
+from pathlib import Path
+from typing import Optional
+from aiohttp import web
+from loguru import logger
+
+
+CITIES = ["北京", "上海", "深圳", "杭州", "广州", "成都"]
+TITLES = ["Python后端工程师", "Java开发工程师", "前端工程师", "算法工程师", "测试工程师", "产品经理"]
+
+
+class FixtureServer:
+    """
+    虚构公司官网
+    
+    每家公司位于 /c/<编号>/ 下，包含首页、关于我们、招聘页和sitemap.xml；
+    响应带ETag并支持If-None-Match，可注入延迟和错误以测试重试、熔断和缓存。
+    """
+    
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 8900,
+        companies: int = 100,
+        latency: float = 0.0,
+        error_rate: float = 0.0,
+        seed: int = 42
+    ):
+        self.host = host
+        self.port = port
+        self.companies = companies
+        self.latency = latency
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+        self._runner: Optional[web.AppRunner] = None
+        self.requests = 0
+    
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+    
+    def company_name(self, index: int) -> str:
+        return f"测试公司{index:05d}"
+    
+    def company_url(self, index: int) -> str:
+        return f"{self.base_url}/c/{index}/"
+    
+    def write_company_list(self, path: Path):
+        """写出公司列表文件（公司名,官网URL）"""
+        with open(path, "w", encoding="utf-8") as f:
+            for i in range(self.companies):
+                f.write(f"{self.company_name(i)},{self.company_url(i)}\n")
+    
+    def _home_page(self, index: int) -> str:
+        name = self.company_name(index)
+        return f"""<!DOCTYPE html>
+<html><head>
+<meta charset="utf-8">
+<title>{name} - 官网</title>
+<meta name="description" content="{name}是一家专注于企业软件与云服务的科技公司。">
+<meta name="keywords" content="互联网,软件,云计算">
+</head><body>
+<nav><a href="/c/{index}/about">关于我们</a> <a href="/c/{index}/careers">加入我们</a></nav>
+<h1>{name}</h1>
+<p>用技术服务每一家企业。</p>
+<footer>© 2012-2025 {name} 员工规模 500-1000人 成立于2012年</footer>
+</body></html>"""
+    
+    def _about_page(self, index: int) -> str:
+        name = self.company_name(index)
+        return f"""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>关于{name}</title></head><body>
+<h1>关于我们</h1>
+<h2>使命</h2><p>让软件开发更简单</p>
+<h2>愿景</h2><p>成为最受信赖的企业服务商</p>
+<h2>价值观</h2><ul><li>客户第一</li><li>坦诚协作</li><li>持续学习</li></ul>
+</body></html>"""
+    
+    def _careers_page(self, index: int) -> str:
+        rng = random.Random(index)
+        items = []
+        for _ in range(rng.randint(2, 6)):
+            low = rng.randint(10, 30)
+            items.append(
+                f"""<li class="job"><h3>{rng.choice(TITLES)}</h3>
+<span class="location">{rng.choice(CITIES)}</span>
+<span class="salary">{low}-{low + rng.randint(5, 20)}K</span>
+<div class="requirements"><p>3年以上相关开发经验</p><p>熟悉MySQL、Redis等数据库</p></div>
+<div class="responsibilities"><p>负责核心业务系统开发</p></div></li>"""
+            )
+        return f"""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>加入我们</title></head><body>
+<h1>社会招聘</h1><ul class="jobs">{''.join(items)}</ul>
+</body></html>"""
+    
+    def _sitemap(self, index: int) -> str:
+        urls = "".join(
+            f"<url><loc>{self.base_url}/c/{index}/{path}</loc></url>"
+            for path in ("", "about", "careers")
+        )
+        return f'<?xml version="1.0" encoding="UTF-8"?><urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{urls}</urlset>'
+    
+    async def _handle(self, request: web.Request) -> web.Response:
+        self.requests += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.error_rate and self._random.random() < self.error_rate:
+            return web.Response(status=503, headers={"Retry-After": "1"})
+        
+        try:
+            index = int(request.match_info["index"])
+        except ValueError:
+            raise web.HTTPNotFound()
+        if not 0 <= index < self.companies:
+            raise web.HTTPNotFound()
+        
+        page = request.match_info.get("page", "")
+        renderers = {
+            "": (self._home_page, "text/html"),
+            "about": (self._about_page, "text/html"),
+            "careers": (self._careers_page, "text/html"),
+            "sitemap.xml": (self._sitemap, "application/xml"),
+        }
+        if page not in renderers:
+            raise web.HTTPNotFound()
+        
+        render, content_type = renderers[page]
+        body = render(index)
+        etag = '"' + hashlib.md5(body.encode("utf-8")).hexdigest() + '"'
+        if request.headers.get("If-None-Match") == etag:
+            return web.Response(status=304, headers={"ETag": etag})
+        return web.Response(
+            text=body,
+            content_type=content_type,
+            charset="utf-8",
+            headers={"ETag": etag, "Cache-Control": "max-age=0"}
+        )
+    
+    async def start(self):
+        """启动服务器"""
+        app = web.Application()
+        app.router.add_get("/c/{index}/", self._handle)
+        app.router.add_get("/c/{index}/{page}", self._handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        # port=0 时由系统分配端口
+        self.port = self._runner.addresses[0][1]
+        logger.info(f"测试站点已启动: {self.base_url} ({self.companies} 家公司)")
+    
+    async def stop(self):
+        """停止服务器"""
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+
+async def _serve(args):
+    server = FixtureServer(
+        host=args.host,
+        port=args.port,
+        companies=args.companies,
+        latency=args.latency,
+        error_rate=args.error_rate
+    )
+    if args.list:
+        server.write_company_list(Path(args.list))
+        logger.info(f"公司列表已写入: {args.list}")
+    await server.start()
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本地测试站点（虚构公司官网）")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--companies", type=int, default=100, help="公司数量")
+    parser.add_argument("--latency", type=float, default=0.0, help="每个请求的延迟（秒）")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="返回503的概率")
+    parser.add_argument("--list", help="写出公司列表文件的路径")
+    args = parser.parse_args()
+    
+    try:
+        asyncio.run(_serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,300 @@
+"""
+HTTP磁盘缓存 - 支持条件请求（ETag/Last-Modified）和解析结果缓存
+"""
+import os
+import re
+import json
+import time
+import hashlib
+import functools
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Mapping, Optional
+from loguru import logger
+
+from config import settings
+
+
+def _locked(method):
+    """在缓存的锁内执行（索引和统计会被多个线程同时修改）"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+class CachedPage:
+    """缓存中的一个页面"""
+    
+    def __init__(self, key: str, meta: dict, text: str):
+        self.key = key
+        self.meta = meta
+        self.text = text
+    
+    @property
+    def url(self) -> str:
+        return self.meta["url"]
+    
+    @property
+    def body_hash(self) -> str:
+        return self.meta["body_hash"]
+    
+    @property
+    def expires_at(self) -> float:
+        return self.meta["expires_at"]
+
+
+class HTTPCache:
+    """
+    基于磁盘的HTTP响应缓存
+    
+    每个URL对应 <key>.json（元数据、校验器、解析结果）和 <key>.body（页面正文）两个文件。
+    新鲜的条目直接返回；过期的条目携带 If-None-Match / If-Modified-Since 重新校验，
+    服务器返回304时复用正文及其解析结果。总大小超过上限时按LRU淘汰。
+    
+    get/store/revalidated/put_extracted 会读写磁盘，在事件循环中通过 asyncio.to_thread 调用，
+    索引由锁保护，可在多个线程中并发使用。
+    """
+    
+    def __init__(
+        self,
+        root: Optional[Path] = None,
+        max_size_mb: Optional[int] = None,
+        default_ttl: Optional[float] = None
+    ):
+        self.root = root or settings.CACHE_DIR / "http"
+        self.max_bytes = (max_size_mb or settings.HTTP_CACHE_MAX_MB) * 1024 * 1024
+        self.default_ttl = default_ttl if default_ttl is not None else settings.CACHE_EXPIRY_HOURS * 3600
+        self._index: Optional[OrderedDict[str, int]] = None
+        self._total_bytes = 0
+        self._lock = threading.RLock()
+        self._stats = {
+            "hits": 0,
+            "stale": 0,
+            "misses": 0,
+            "revalidated": 0,
+            "stores": 0,
+            "evictions": 0,
+            "extracted_hits": 0,
+            "extracted_misses": 0
+        }
+    
+    @staticmethod
+    def _key(url: str) -> str:
+        return hashlib.sha256(url.encode("utf-8")).hexdigest()
+    
+    def _meta_path(self, key: str) -> Path:
+        return self.root / f"{key}.json"
+    
+    def _body_path(self, key: str) -> Path:
+        return self.root / f"{key}.body"
+    
+    def _ensure_index(self) -> OrderedDict:
+        """首次使用时扫描磁盘，按最近访问时间建立LRU索引"""
+        if self._index is None:
+            self.root.mkdir(parents=True, exist_ok=True)
+            entries = []
+            for meta_path in self.root.glob("*.json"):
+                body_path = meta_path.with_suffix(".body")
+                try:
+                    size = meta_path.stat().st_size + body_path.stat().st_size
+                    entries.append((meta_path.stat().st_mtime, meta_path.stem, size))
+                except FileNotFoundError:
+                    continue
+            self._index = OrderedDict((key, size) for _, key, size in sorted(entries))
+            self._total_bytes = sum(self._index.values())
+        return self._index
+    
+    def _write_atomic(self, path: Path, data: bytes):
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    
+    def _write_meta(self, page: CachedPage, body_size: Optional[int] = None):
+        """写入元数据，并按新的文件大小更新LRU索引（解析结果会让元数据变大）"""
+        data = json.dumps(page.meta, ensure_ascii=False).encode("utf-8")
+        self._write_atomic(self._meta_path(page.key), data)
+        if body_size is None:
+            body_size = self._body_path(page.key).stat().st_size
+        
+        index = self._ensure_index()
+        size = len(data) + body_size
+        self._total_bytes += size - index.get(page.key, 0)
+        index[page.key] = size
+        index.move_to_end(page.key)
+        self._evict()
+    
+    def _ttl_from_headers(self, headers: Mapping[str, str]) -> Optional[float]:
+        """根据Cache-Control计算有效期，no-store返回None"""
+        cache_control = headers.get("Cache-Control", "").lower()
+        if "no-store" in cache_control:
+            return None
+        if "no-cache" in cache_control:
+            return 0
+        match = re.search(r"max-age=(\d+)", cache_control)
+        if match:
+            return int(match.group(1))
+        return self.default_ttl
+    
+    @_locked
+    def get(self, url: str) -> Optional[CachedPage]:
+        """
+        查找缓存页面（不论是否过期）
+        
+        Args:
+            url: 页面URL
+        
+        Returns:
+            缓存页面，未命中返回None
+        """
+        index = self._ensure_index()
+        key = self._key(url)
+        if key not in index:
+            self._stats["misses"] += 1
+            return None
+        
+        try:
+            meta = json.loads(self._meta_path(key).read_text(encoding="utf-8"))
+            text = self._body_path(key).read_text(encoding="utf-8")
+        except (FileNotFoundError, ValueError) as e:
+            logger.warning(f"HTTP缓存条目损坏，已丢弃: {url}, 错误: {e}")
+            self._remove(key)
+            self._stats["misses"] += 1
+            return None
+        
+        index.move_to_end(key)
+        os.utime(self._meta_path(key))
+        
+        page = CachedPage(key, meta, text)
+        self._stats["hits" if self.is_fresh(page) else "stale"] += 1
+        return page
+    
+    def is_fresh(self, page: CachedPage) -> bool:
+        """是否仍在有效期内（无需访问网络）"""
+        return time.time() < page.expires_at
+    
+    def conditional_headers(self, page: Optional[CachedPage]) -> dict:
+        """构造条件请求头"""
+        headers = {}
+        if page is None:
+            return headers
+        if page.meta.get("etag"):
+            headers["If-None-Match"] = page.meta["etag"]
+        if page.meta.get("last_modified"):
+            headers["If-Modified-Since"] = page.meta["last_modified"]
+        return headers
+    
+    @_locked
+    def store(self, url: str, text: str, headers: Mapping[str, str]) -> CachedPage:
+        """
+        保存200响应
+        
+        Args:
+            url: 页面URL
+            text: 页面正文
+            headers: 响应头
+        
+        Returns:
+            缓存页面（响应禁止缓存时也返回，但不落盘）
+        """
+        key = self._key(url)
+        body = text.encode("utf-8")
+        ttl = self._ttl_from_headers(headers)
+        meta = {
+            "url": url,
+            "etag": headers.get("ETag"),
+            "last_modified": headers.get("Last-Modified"),
+            "body_hash": hashlib.sha256(body).hexdigest(),
+            "stored_at": time.time(),
+            "expires_at": time.time() + (ttl or 0),
+            "extracted": {}
+        }
+        
+        # 正文未变化时保留已有的解析结果
+        index = self._ensure_index()
+        if key in index:
+            try:
+                old_meta = json.loads(self._meta_path(key).read_text(encoding="utf-8"))
+                if old_meta.get("body_hash") == meta["body_hash"]:
+                    meta["extracted"] = old_meta.get("extracted", {})
+            except (FileNotFoundError, ValueError):
+                pass
+        
+        page = CachedPage(key, meta, text)
+        if ttl is None:
+            # no-store：丢弃旧条目，本次结果只在内存中使用
+            if key in index:
+                self._remove(key)
+            return page
+        
+        self._write_atomic(self._body_path(key), body)
+        self._write_meta(page, len(body))
+        self._stats["stores"] += 1
+        return page
+    
+    @_locked
+    def revalidated(self, page: CachedPage, headers: Mapping[str, str]) -> CachedPage:
+        """服务器返回304：延长有效期，更新校验器"""
+        ttl = self._ttl_from_headers(headers)
+        page.meta["expires_at"] = time.time() + (ttl or 0)
+        if headers.get("ETag"):
+            page.meta["etag"] = headers["ETag"]
+        if headers.get("Last-Modified"):
+            page.meta["last_modified"] = headers["Last-Modified"]
+        # 条目可能已被淘汰，此时不再单独写回元数据
+        if page.key in self._ensure_index():
+            self._write_meta(page)
+        self._stats["revalidated"] += 1
+        return page
+    
+    def get_extracted(self, page: CachedPage, name: str) -> Optional[Any]:
+        """读取基于该页面正文的解析结果"""
+        entry = page.meta.get("extracted", {}).get(name)
+        if entry is not None and entry.get("body_hash") == page.body_hash:
+            self._stats["extracted_hits"] += 1
+            return entry["data"]
+        self._stats["extracted_misses"] += 1
+        return None
+    
+    @_locked
+    def put_extracted(self, page: CachedPage, name: str, data: Any):
+        """保存解析结果，与正文哈希绑定，正文变化后自动失效"""
+        page.meta.setdefault("extracted", {})[name] = {
+            "body_hash": page.body_hash,
+            "data": data
+        }
+        if page.key in self._ensure_index():
+            self._write_meta(page)
+    
+    def _remove(self, key: str):
+        index = self._ensure_index()
+        self._total_bytes -= index.pop(key, 0)
+        for path in (self._meta_path(key), self._body_path(key)):
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+    
+    def _evict(self):
+        """超出容量上限时淘汰最久未访问的条目"""
+        index = self._ensure_index()
+        while self._total_bytes > self.max_bytes and len(index) > 1:
+            key = next(iter(index))
+            self._remove(key)
+            self._stats["evictions"] += 1
+    
+    @_locked
+    def stats(self) -> dict:
+        """缓存统计"""
+        index = self._ensure_index()
+        lookups = self._stats["hits"] + self._stats["stale"] + self._stats["misses"]
+        served = self._stats["hits"] + self._stats["revalidated"]
+        return {
+            **self._stats,
+            "entries": len(index),
+            "size_bytes": self._total_bytes,
+            "hit_ratio": round(served / lookups, 4) if lookups else 0.0
+        }
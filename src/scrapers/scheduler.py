@@ -0,0 +1,272 @@
+"""
+爬取调度模块 - 按主机限速、失败重试与熔断
+"""
+import time
+import random
+import asyncio
+from email.utils import parsedate_to_datetime
+from typing import Awaitable, Callable, Optional, TypeVar
+from urllib.parse import urlsplit
+import aiohttp
+from loguru import logger
+
+from config import settings
+
+
+T = TypeVar("T")
+
+
+class RetryableHTTPError(Exception):
+    """可重试的HTTP错误（429/5xx）"""
+    
+    def __init__(self, status: int, retry_after: Optional[float] = None):
+        super().__init__(f"HTTP {status}")
+        self.status = status
+        self.retry_after = retry_after
+
+
+class CircuitOpenError(Exception):
+    """主机熔断中，请求被直接拒绝"""
+    
+    def __init__(self, host: str, retry_after: float):
+        super().__init__(f"主机 {host} 熔断中，{retry_after:.1f}秒后重试")
+        self.host = host
+        self.retry_after = retry_after
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """解析Retry-After头（秒数或HTTP日期）"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """令牌桶限速器"""
+    
+    def __init__(self, rate: float, capacity: float = 1.0):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self._lock: Optional[asyncio.Lock] = None
+    
+    def pause(self, seconds: float):
+        """暂停发放令牌（服务器要求Retry-After时）"""
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+    
+    async def acquire(self):
+        """获取一个令牌，必要时等待"""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    await asyncio.sleep(self.paused_until - now)
+                    continue
+                
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class CircuitBreaker:
+    """
+    熔断器
+    
+    连续失败达到阈值后进入打开状态，直接拒绝请求；
+    冷却期过后放行一个试探请求（半开），成功则恢复，失败则重新打开
+    """
+    
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+    
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.open_until = 0.0
+        self._probe_started: Optional[float] = None
+    
+    def retry_after(self) -> float:
+        return max(0.0, self.open_until - time.monotonic())
+    
+    def allow(self) -> bool:
+        if self.state == self.CLOSED:
+            return True
+        now = time.monotonic()
+        if self.state == self.OPEN and self.retry_after() <= 0:
+            self.state = self.HALF_OPEN
+            self._probe_started = None
+        # 半开状态只放行一个试探请求；试探请求被取消而没有结果时，超时后再放行一个
+        if self.state == self.HALF_OPEN and (
+            self._probe_started is None or now - self._probe_started > self.reset_timeout
+        ):
+            self._probe_started = now
+            return True
+        return False
+    
+    def record_success(self):
+        self.state = self.CLOSED
+        self.failures = 0
+        self._probe_started = None
+    
+    def record_failure(self):
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            self.trip(self.reset_timeout)
+    
+    def trip(self, seconds: float):
+        """立即打开熔断，至少持续seconds秒（服务器要求的Retry-After超过重试等待上限时）"""
+        self.state = self.OPEN
+        self.open_until = max(self.open_until, time.monotonic() + seconds)
+        self._probe_started = None
+
+
+class CrawlScheduler:
+    """
+    爬取调度器
+    
+    - 每个主机一个令牌桶，按CRAWLER_DELAY限制请求间隔
+    - 全局并发上限
+    - 429/5xx及网络错误按指数退避+随机抖动重试，优先遵守Retry-After；
+      Retry-After超过退避上限时不提前重试，而是熔断该主机直到服务器要求的时间
+    - 每个主机一个熔断器，站点宕机时快速失败。一次run()无论重试几次只计一次失败，
+      连续 CRAWLER_CIRCUIT_THRESHOLD 个请求失败才熔断
+    """
+    
+    RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+    
+    def __init__(
+        self,
+        delay: Optional[float] = None,
+        retries: Optional[int] = None,
+        max_concurrency: Optional[int] = None
+    ):
+        self.delay = settings.CRAWLER_DELAY if delay is None else delay
+        self.retries = settings.CRAWLER_RETRY_TIMES if retries is None else retries
+        self.max_concurrency = max_concurrency or settings.CRAWLER_MAX_CONCURRENCY
+        self.backoff_base = settings.CRAWLER_BACKOFF_BASE
+        self.backoff_max = settings.CRAWLER_BACKOFF_MAX
+        self._buckets: dict[str, TokenBucket] = {}
+        self._breakers: dict[str, CircuitBreaker] = {}
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._semaphore_loop: Optional[asyncio.AbstractEventLoop] = None
+    
+    def _bucket(self, host: str) -> Optional[TokenBucket]:
+        if self.delay <= 0:
+            return None
+        if host not in self._buckets:
+            self._buckets[host] = TokenBucket(rate=1.0 / self.delay)
+        return self._buckets[host]
+    
+    def _breaker(self, host: str) -> CircuitBreaker:
+        if host not in self._breakers:
+            self._breakers[host] = CircuitBreaker(
+                failure_threshold=settings.CRAWLER_CIRCUIT_THRESHOLD,
+                reset_timeout=settings.CRAWLER_CIRCUIT_RESET_SECONDS
+            )
+        return self._breakers[host]
+    
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        # 信号量绑定事件循环，在循环内延迟创建
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._semaphore_loop = loop
+        return self._semaphore
+    
+    def _backoff(self, attempt: int) -> float:
+        """指数退避 + 全抖动"""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+    
+    async def run(self, url: str, request: Callable[[], Awaitable[T]]) -> T:
+        """
+        在调度约束下执行请求
+        
+        Args:
+            url: 请求URL（用于确定主机）
+            request: 实际发起请求的协程函数，遇到429/5xx应抛出RetryableHTTPError
+        
+        Returns:
+            request的返回值
+        
+        Raises:
+            CircuitOpenError: 主机处于熔断状态
+            最后一次重试的异常（Retry-After超过退避上限时不再重试，直接抛出）
+        """
+        host = urlsplit(url).hostname or url
+        breaker = self._breaker(host)
+        bucket = self._bucket(host)
+        if not breaker.allow():
+            raise CircuitOpenError(host, breaker.retry_after())
+        last_error: Optional[Exception] = None
+        
+        for attempt in range(self.retries + 1):
+            if bucket:
+                await bucket.acquire()
+            
+            retry_after = None
+            async with self._get_semaphore():
+                try:
+                    result = await request()
+                except RetryableHTTPError as e:
+                    last_error = e
+                    retry_after = e.retry_after
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    last_error = e
+                except Exception:
+                    # 非网络错误说明主机可达，不计入熔断
+                    breaker.record_success()
+                    raise
+                else:
+                    breaker.record_success()
+                    return result
+            
+            if retry_after is not None and retry_after > self.backoff_max:
+                # 不提前重试：熔断该主机直到服务器要求的时间，其他请求也快速失败
+                logger.warning(f"服务器要求 {retry_after:.0f} 秒后重试，暂停访问该主机: {url}")
+                breaker.trip(retry_after)
+                raise last_error
+            if attempt == self.retries:
+                break
+            
+            if retry_after is not None:
+                delay = retry_after
+                # 服务器要求等待时，同一主机的其他请求也一起暂停
+                if bucket:
+                    bucket.pause(delay)
+            else:
+                delay = self._backoff(attempt)
+            
+            logger.warning(
+                f"请求失败，{delay:.1f}秒后重试 ({attempt + 1}/{self.retries}): {url}, 错误: {last_error!r}"
+            )
+            await asyncio.sleep(delay)
+        
+        breaker.record_failure()
+        raise last_error
+    
+    def stats(self) -> dict:
+        """各主机熔断状态"""
+        return {
+            "hosts": len(self._breakers),
+            "open_circuits": [
+                host for host, breaker in self._breakers.items()
+                if breaker.state != CircuitBreaker.CLOSED
+            ]
+        }
@@ -0,0 +1,226 @@
+"""
+官网多页爬取模块 - 在公司官网内按广度优先发现招聘页和关于我们页
+"""
+import asyncio
+from typing import Awaitable, Callable, Optional
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+from loguru import logger
+
+from config import settings
+from .http_cache import HTTPCache, CachedPage
+from .extractors import HTMLExtractor, extract_page, extract_sitemap_urls, merge_culture
+
+
+class SiteCrawler:
+    """
+    公司官网爬虫
+    
+    从首页和sitemap.xml出发，按链接地址和链接文字判断页面类型，只沿招聘、
+    关于我们类链接广度优先扩展，受最大页数和最大深度限制。URL规范化后去重。
+    每个页面的解析结果通过HTTPCache与正文哈希绑定，重新爬取时正文未变化的页面不再解析。
+    """
+    
+    CAREER_KEYWORDS = (
+        "career", "job", "join", "hiring", "recruit", "position", "vacanc",
+        "招聘", "加入", "职位", "岗位", "人才"
+    )
+    ABOUT_KEYWORDS = (
+        "about", "culture", "mission", "values", "who-we-are",
+        "关于", "文化", "简介", "价值观", "使命"
+    )
+    SKIP_EXTENSIONS = (
+        ".pdf", ".jpg", ".jpeg", ".png", ".gif", ".svg", ".webp", ".zip",
+        ".rar", ".doc", ".docx", ".xls", ".xlsx", ".ppt", ".pptx", ".mp4", ".css", ".js"
+    )
+    MAX_SITEMAPS = 3
+    
+    def __init__(
+        self,
+        fetch: Callable[[str], Awaitable[Optional[CachedPage]]],
+        http_cache: Optional[HTTPCache] = None,
+        extractor: Optional[HTMLExtractor] = None,
+        max_pages: Optional[int] = None,
+        max_depth: Optional[int] = None
+    ):
+        """
+        Args:
+            fetch: 获取页面的协程函数（通常是CompanyScraper._fetch_page）
+            http_cache: 用于保存页面解析结果的HTTP缓存
+            extractor: HTML解析执行器（大页面在进程池中解析）
+            max_pages: 每个站点最多爬取的页面数
+            max_depth: 从首页出发的最大链接深度
+        """
+        self.fetch = fetch
+        self.http_cache = http_cache
+        self.extractor = extractor or HTMLExtractor()
+        self.max_pages = max_pages or settings.SITE_CRAWL_MAX_PAGES
+        self.max_depth = settings.SITE_CRAWL_MAX_DEPTH if max_depth is None else max_depth
+    
+    @staticmethod
+    def normalize_url(url: str) -> str:
+        """规范化URL：去掉片段和跟踪参数，协议和主机名小写"""
+        parts = urlsplit(url.strip())
+        path = parts.path or "/"
+        query = urlencode(sorted(
+            (k, v) for k, v in parse_qsl(parts.query)
+            if not k.lower().startswith("utm_")
+        ))
+        return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, query, ""))
+    
+    @staticmethod
+    def _dedup_key(url: str) -> str:
+        """去重键：/careers 与 /careers/ 视为同一页面（请求时仍使用原路径）"""
+        return url.rstrip("/")
+    
+    @staticmethod
+    def _same_site(url: str, root: str) -> bool:
+        host = urlsplit(url).hostname or ""
+        root_host = urlsplit(root).hostname or ""
+        return host.removeprefix("www.") == root_host.removeprefix("www.")
+    
+    def classify(self, url: str, text: str = "") -> Optional[str]:
+        """
+        按URL路径和链接文字判断页面类型
+        
+        Returns:
+            "careers"、"about"，无关页面返回None
+        """
+        parts = urlsplit(url)
+        if parts.path.lower().endswith(self.SKIP_EXTENSIONS):
+            return None
+        target = f"{parts.path} {parts.query} {text}".lower()
+        if any(k in target for k in self.CAREER_KEYWORDS):
+            return "careers"
+        if any(k in target for k in self.ABOUT_KEYWORDS):
+            return "about"
+        return None
+    
+    async def _sitemap_urls(self, root_url: str) -> list[str]:
+        """读取站点根目录的sitemap.xml（支持一层sitemap索引）"""
+        parts = urlsplit(root_url)
+        sitemap_url = urlunsplit((parts.scheme, parts.netloc, "/sitemap.xml", "", ""))
+        # 站点部署在子路径下时，优先使用子路径下的sitemap
+        if parts.path.strip("/"):
+            sitemap_url = root_url.rstrip("/") + "/sitemap.xml"
+        
+        urls: list[str] = []
+        pending = [sitemap_url]
+        fetched = 0
+        while pending and fetched < self.MAX_SITEMAPS:
+            page = await self._safe_fetch(pending.pop(0))
+            fetched += 1
+            if page is None:
+                continue
+            page_urls, child_sitemaps = extract_sitemap_urls(page.text)
+            urls.extend(page_urls)
+            # 索引中优先展开与招聘相关的子sitemap
+            pending.extend(sorted(child_sitemaps, key=lambda u: self.classify(u) is None))
+        return urls
+    
+    async def _safe_fetch(self, url: str) -> Optional[CachedPage]:
+        try:
+            return await self.fetch(url)
+        except Exception as e:
+            logger.warning(f"官网页面获取失败: {url}, 错误: {e}")
+            return None
+    
+    async def _extract(self, page: CachedPage, kind: str) -> tuple[dict, bool]:
+        """
+        解析页面：所有页面提取链接，招聘页提取岗位，首页和关于我们页提取企业文化
+        
+        Returns:
+            (解析结果, 是否复用了缓存的解析结果)
+        """
+        name = f"site_{kind}"
+        if self.http_cache:
+            data = self.http_cache.get_extracted(page, name)
+            if data is not None:
+                return data, True
+        
+        data = await self.extractor.run(extract_page, page.text, page.url, kind)
+        if self.http_cache:
+            await asyncio.to_thread(self.http_cache.put_extracted, page, name, data)
+        return data, False
+    
+    async def _visit(self, url: str, kind: str) -> Optional[dict]:
+        page = await self._safe_fetch(url)
+        if page is None:
+            return None
+        data, unchanged = await self._extract(page, kind)
+        return {**data, "unchanged": unchanged}
+    
+    async def crawl(self, root_url: str) -> dict:
+        """
+        爬取公司官网
+        
+        Args:
+            root_url: 官网首页URL
+        
+        Returns:
+            {"positions": [...], "culture": {...}, "pages": {URL: 页面类型}, "stats": {...}}
+        """
+        root = self.normalize_url(root_url)
+        seen = {self._dedup_key(root)}
+        pages: dict[str, str] = {}
+        stats = {"fetched": 0, "failed": 0, "extracted": 0, "unchanged": 0}
+        positions: list[dict] = []
+        position_keys: set[tuple] = set()
+        culture = {"values": [], "mission": "", "vision": ""}
+        
+        # 第0层是首页（按原URL请求，与基本信息爬取共享同一次请求），sitemap中的相关页面视为第1层
+        frontier: list[tuple[str, str]] = [(root_url, "home")]
+        next_level: list[tuple[str, str]] = []
+        for url in await self._sitemap_urls(root_url):
+            normalized = self.normalize_url(url)
+            kind = self.classify(normalized)
+            if kind and self._dedup_key(normalized) not in seen and self._same_site(normalized, root):
+                seen.add(self._dedup_key(normalized))
+                next_level.append((normalized, kind))
+        
+        depth = 0
+        while frontier and len(pages) < self.max_pages:
+            frontier = frontier[:self.max_pages - len(pages)]
+            # 同一层的页面并发获取，限速由调度器按主机控制
+            results = await asyncio.gather(*(self._visit(url, kind) for url, kind in frontier))
+            
+            for (url, kind), data in zip(frontier, results):
+                pages[url] = kind
+                if data is None:
+                    stats["failed"] += 1
+                    continue
+                stats["fetched"] += 1
+                stats["unchanged" if data["unchanged"] else "extracted"] += 1
+                
+                for position in data.get("positions", []):
+                    key = (position.get("title"), position.get("location"), position.get("salary"))
+                    if key not in position_keys:
+                        position_keys.add(key)
+                        positions.append({**position, "url": url})
+                merge_culture(culture, data.get("culture"))
+                
+                if depth >= self.max_depth:
+                    continue
+                for link, text in data["links"]:
+                    normalized = self.normalize_url(link)
+                    if self._dedup_key(normalized) in seen or not self._same_site(normalized, root):
+                        continue
+                    link_kind = self.classify(normalized, text)
+                    if link_kind:
+                        seen.add(self._dedup_key(normalized))
+                        next_level.append((normalized, link_kind))
+            
+            # 招聘页优先，页数预算不够时先保证招聘页被爬取
+            frontier = sorted(next_level, key=lambda item: item[1] != "careers")
+            next_level = []
+            depth += 1
+        
+        logger.info(
+            f"官网爬取完成: {root}, 页面 {len(pages)} 个（重新解析 {stats['extracted']}，"
+            f"未变化 {stats['unchanged']}，失败 {stats['failed']}），岗位 {len(positions)} 个"
+        )
+        return {
+            "positions": positions,
+            "culture": culture,
+            "pages": pages,
+            "stats": stats
+        }
@@ -0,0 +1,7 @@
+"""
+Storage模块初始化
+"""
+from .database import Database
+from .batch_writer import BatchWriter
+
+__all__ = ["Database", "BatchWriter"]
@@ -0,0 +1,127 @@
+"""
+批量写入模块 - 在后台线程中合并写入请求，不阻塞请求处理
+"""
+import time
+import queue
+import threading
+from typing import Optional
+from loguru import logger
+
+from config import settings
+from .database import Database
+
+
+class BatchWriter:
+    """
+    数据库批量写入器
+    
+    submit() 只把数据放进有界队列后立即返回；后台线程攒够 batch_size 条或等待
+    flush_interval 秒后按类型批量写入。队列满时丢弃新数据（结果仍在内存缓存中，
+    只是不会持久化），保证数据库变慢时不拖慢分析流程。
+    """
+    
+    _STOP = object()
+    
+    def __init__(
+        self,
+        database: Database,
+        batch_size: Optional[int] = None,
+        flush_interval: Optional[float] = None,
+        max_queue: Optional[int] = None
+    ):
+        self.database = database
+        self.batch_size = batch_size or settings.DB_WRITE_BATCH_SIZE
+        self.flush_interval = settings.DB_WRITE_FLUSH_SECONDS if flush_interval is None else flush_interval
+        self._handlers = {
+            "company": database.save_companies,
+            "resume": database.save_resumes,
+            "analysis": database.save_analyses
+        }
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue or settings.DB_WRITE_QUEUE_SIZE)
+        self._stats = {"submitted": 0, "written": 0, "dropped": 0, "failed": 0, "batches": 0}
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+        self._thread.start()
+    
+    def submit(self, kind: str, row: dict) -> bool:
+        """
+        提交一行待写入的数据
+        
+        Args:
+            kind: "company"（爬取结果）/ "resume"（简历解析结果）/ "analysis"（分析记录）
+        
+        Returns:
+            是否已进入写入队列
+        """
+        if kind not in self._handlers:
+            raise ValueError(f"未知的写入类型: {kind}")
+        if self._closed:
+            return False
+        try:
+            self._queue.put_nowait((kind, row))
+        except queue.Full:
+            self._stats["dropped"] += 1
+            logger.warning(f"数据库写入队列已满，丢弃一条{kind}记录")
+            return False
+        self._stats["submitted"] += 1
+        return True
+    
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """等待此前提交的数据全部写入"""
+        if self._closed:
+            return True
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+    
+    def close(self, timeout: float = 10.0):
+        """写完队列中剩余的数据后停止后台线程"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(self._STOP)
+        self._thread.join(timeout)
+    
+    def stats(self) -> dict:
+        return {**self._stats, "pending": self._queue.qsize()}
+    
+    def _run(self):
+        pending: dict[str, list[dict]] = {}
+        count = 0
+        deadline = None
+        
+        while True:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+            
+            if isinstance(item, tuple):
+                kind, row = item
+                pending.setdefault(kind, []).append(row)
+                count += 1
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+                if count < self.batch_size:
+                    continue
+            
+            # 攒够一批、到达刷新时间、收到flush或停止请求时写入
+            if pending:
+                self._write(pending)
+                pending, count, deadline = {}, 0, None
+            if isinstance(item, threading.Event):
+                item.set()
+            elif item is self._STOP:
+                return
+    
+    def _write(self, pending: dict[str, list[dict]]):
+        for kind, rows in pending.items():
+            try:
+                self._handlers[kind](rows)
+                self._stats["written"] += len(rows)
+                self._stats["batches"] += 1
+            except Exception as e:
+                # 写入失败不重试，避免坏数据反复阻塞队列
+                self._stats["failed"] += len(rows)
+                logger.error(f"数据库批量写入失败: {kind} x {len(rows)}, 错误: {e}")
@@ -0,0 +1,513 @@
+"""
+数据库访问模块 - 公司、岗位、简历、分析记录的持久化与查询
+"""
+import json
+import math
+import time
+import hashlib
+import unicodedata
+from typing import Any, Iterable, Optional
+from sqlalchemy import create_engine, event, func, literal, select, update, and_, or_
+from sqlalchemy.engine import Connection, Engine
+from loguru import logger
+
+from config import settings
+from src.scrapers.company_directory import CompanyDirectory
+from src.utils.normalize import ANYWHERE, REMOTE, normalize_location, normalize_locations, parse_salary
+from .schema import metadata, companies, positions, resumes, analyses
+
+# 标题前缀查询的上界后缀：key >= 前缀 AND key < 前缀+最大码位，SQLite按UTF-8字节比较时等价于前缀匹配
+TITLE_PREFIX_UPPER = "\U0010ffff"
+# 查询已有岗位时每条语句包含的岗位数（公司ID和指纹各一个参数，SQLite旧版本每条语句最多999个参数）
+EXISTING_LOOKUP_CHUNK = 400
+
+
+def position_fingerprint(position: dict) -> str:
+    """
+    岗位指纹：归一化的标题+城市+薪资，同一公司内相同指纹视为同一岗位
+    
+    "后端工程师 / 北京市海淀区 / 20k-30k" 与 "后端工程师 / 北京 / 20-30K" 指纹相同
+    """
+    title = unicodedata.normalize("NFKC", position.get("title") or "").casefold()
+    salary = parse_salary(position.get("salary"))
+    parts = (
+        " ".join(title.split()),
+        normalize_location(position.get("location")),
+        f"{salary.low}-{salary.high}" if salary else (position.get("salary") or "").strip()
+    )
+    return hashlib.sha1("\0".join(parts).encode("utf-8")).hexdigest()
+
+
+def _json_dumps(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False)
+
+
+class Database:
+    """
+    结果数据库
+    
+    默认使用 data/offer_matcher.db（SQLite，WAL模式），配置 DATABASE_URL 时可切换到
+    任何SQLAlchemy支持的数据库。所有方法都是同步的，在事件循环中应通过
+    asyncio.to_thread 或 BatchWriter 调用。写入方法接收多行数据，按主键/唯一键批量upsert。
+    """
+    
+    def __init__(self, url: Optional[str] = None, engine: Optional[Engine] = None):
+        if not url and not settings.DATABASE_URL:
+            settings.ensure_dirs()
+        self.url = url or settings.DATABASE_URL or f"sqlite:///{settings.DATA_DIR / 'offer_matcher.db'}"
+        self.engine = engine or self._create_engine(self.url)
+        self.dialect = self.engine.dialect.name
+        metadata.create_all(self.engine)
+        logger.debug(f"数据库已就绪: {self.engine.url.render_as_string(hide_password=True)}")
+    
+    @staticmethod
+    def _create_engine(url: str) -> Engine:
+        if not url.startswith("sqlite"):
+            return create_engine(url, json_serializer=_json_dumps, pool_pre_ping=True)
+        
+        # 写入在BatchWriter线程，读取在to_thread的线程池中，连接需要跨线程使用
+        engine = create_engine(
+            url,
+            json_serializer=_json_dumps,
+            connect_args={"check_same_thread": False, "timeout": 30}
+        )
+        
+        @event.listens_for(engine, "connect")
+        def _sqlite_pragmas(dbapi_connection, _):
+            # WAL：读不阻塞写；NORMAL在WAL下只会在断电时丢失最后的事务
+            cursor = dbapi_connection.cursor()
+            cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute("PRAGMA synchronous=NORMAL")
+            cursor.execute("PRAGMA foreign_keys=ON")
+            cursor.close()
+        
+        return engine
+    
+    @staticmethod
+    def company_key(name: str) -> str:
+        """公司去重键（与公司名录的归一化规则一致）"""
+        return CompanyDirectory.normalize(name) or name.strip()
+    
+    def _upsert(
+        self,
+        conn: Connection,
+        table,
+        rows: list[dict],
+        keys: tuple[str, ...],
+        update_columns: Iterable[str]
+    ):
+        """按唯一键批量插入或更新（update_columns为空时已存在的行保持不变）"""
+        if not rows:
+            return
+        update_columns = list(update_columns)
+        
+        if self.dialect in ("sqlite", "postgresql"):
+            if self.dialect == "sqlite":
+                from sqlalchemy.dialects.sqlite import insert
+            else:
+                from sqlalchemy.dialects.postgresql import insert
+            stmt = insert(table)
+            if update_columns:
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=list(keys),
+                    set_={column: stmt.excluded[column] for column in update_columns}
+                )
+            else:
+                stmt = stmt.on_conflict_do_nothing(index_elements=list(keys))
+            conn.execute(stmt, rows)
+            return
+        
+        # 其他数据库：逐行先查找，存在则更新，否则插入
+        for row in rows:
+            condition = and_(*(table.c[key] == row[key] for key in keys))
+            if conn.execute(select(table.c[keys[0]]).where(condition)).first() is None:
+                conn.execute(table.insert().values(row))
+            elif update_columns:
+                conn.execute(update(table).where(condition).values({column: row[column] for column in update_columns}))
+    
+    @staticmethod
+    def _last_by_key(rows: Iterable[dict], *keys: str) -> list[dict]:
+        """同一批次内唯一键重复时只保留最后一行（PostgreSQL不允许一条语句更新同一行两次）"""
+        return list({tuple(row[key] for key in keys): row for row in rows}.values())
+    
+    # ---------- 公司与岗位 ----------
+    
+    def save_companies(self, items: list[dict]):
+        """
+        保存爬取结果（CompanyScraper.scrape 的返回值），失败的结果会被忽略
+        
+        公司按归一化名称upsert，岗位按 (公司, 指纹) upsert 并刷新最后出现时间
+        """
+        now = time.time()
+        company_rows = self._last_by_key((
+            {
+                "name_key": self.company_key(item["company_name"]),
+                "name": item["company_name"],
+                "url": item.get("url"),
+                "basic_info": item.get("basic_info") or {},
+                "culture": item.get("culture") or {},
+                "scraped_at": item.get("crawled_at") or now,
+                "_positions": item.get("positions") or []
+            }
+            for item in items if item.get("company_name") and "error" not in item
+        ), "name_key")
+        if not company_rows:
+            return
+        
+        with self.engine.begin() as conn:
+            self._upsert(
+                conn, companies,
+                [{k: v for k, v in row.items() if k != "_positions"} for row in company_rows],
+                ("name_key",),
+                ("name", "url", "basic_info", "culture", "scraped_at")
+            )
+            ids = self._company_ids(conn, [row["name_key"] for row in company_rows])
+            self._upsert_positions(conn, [
+                self._position_row(ids[row["name_key"]], position, row["scraped_at"], "site")
+                for row in company_rows for position in row["_positions"] if position.get("title")
+            ])
+    
+    def save_positions(self, items: list[dict], source: str = "feed", seen_at: Optional[float] = None) -> dict:
+        """
+        保存不是通过爬取官网得到的岗位（如招聘数据导出文件）
+        
+        items: [{"company_name", "title", "location", "salary", "requirements", "responsibilities", "url"}]。
+        不存在的公司只插入名称，已有公司的爬取信息不会被覆盖。
+        
+        Returns:
+            {"inserted": 新增的岗位数, "updated": 已存在、刷新了的岗位数}
+            （同一批次内指纹相同的岗位只计一次）
+        """
+        seen_at = seen_at or time.time()
+        items = [item for item in items if item.get("company_name") and item.get("title")]
+        if not items:
+            return {"inserted": 0, "updated": 0}
+        
+        with self.engine.begin() as conn:
+            keys = {self.company_key(item["company_name"]): item["company_name"] for item in items}
+            # scraped_at为0：只有岗位、没有官网信息的公司不会被当作有效的爬取结果复用
+            self._upsert(
+                conn, companies,
+                [
+                    {"name_key": key, "name": name, "url": None, "basic_info": {}, "culture": {}, "scraped_at": 0.0}
+                    for key, name in keys.items()
+                ],
+                ("name_key",),
+                ()
+            )
+            ids = self._company_ids(conn, list(keys))
+            rows = [
+                self._position_row(ids[self.company_key(item["company_name"])], item, seen_at, source)
+                for item in items
+            ]
+            return self._upsert_positions(conn, rows)
+    
+    @staticmethod
+    def _company_ids(conn: Connection, name_keys: list[str]) -> dict[str, int]:
+        return dict(conn.execute(
+            select(companies.c.name_key, companies.c.id).where(companies.c.name_key.in_(name_keys))
+        ).all())
+    
+    @staticmethod
+    def _position_row(company_id: int, position: dict, seen_at: float, source: str) -> dict:
+        salary = parse_salary(position.get("salary"))
+        return {
+            "company_id": company_id,
+            "fingerprint": position_fingerprint(position),
+            "title": position["title"],
+            "location": position.get("location") or "",
+            "city": normalize_location(position.get("location")),
+            "salary": position.get("salary") or "",
+            "salary_min": salary.low if salary else None,
+            "salary_max": salary.high if salary and not math.isinf(salary.high) else None,
+            "requirements": position.get("requirements") or [],
+            "responsibilities": position.get("responsibilities") or [],
+            "url": position.get("url"),
+            "source": source,
+            "first_seen_at": seen_at,
+            "last_seen_at": seen_at
+        }
+    
+    def _upsert_positions(self, conn: Connection, rows: list[dict]) -> dict:
+        """
+        岗位按 (公司, 指纹) upsert 并刷新最后出现时间，首次出现时间和来源保持不变
+        
+        Returns:
+            {"inserted": 新增的行数, "updated": 已存在的行数}
+        """
+        rows = self._last_by_key(rows, "company_id", "fingerprint")
+        existing = self._existing_positions(conn, rows)
+        self._upsert(
+            conn, positions, rows,
+            ("company_id", "fingerprint"),
+            ("requirements", "responsibilities", "url", "last_seen_at")
+        )
+        return {"inserted": len(rows) - len(existing), "updated": len(existing)}
+    
+    @staticmethod
+    def _existing_positions(conn: Connection, rows: list[dict]) -> set[tuple[int, str]]:
+        """rows中在岗位表里已存在的 (公司, 指纹)"""
+        wanted = sorted({(row["company_id"], row["fingerprint"]) for row in rows})
+        found = set()
+        for start in range(0, len(wanted), EXISTING_LOOKUP_CHUNK):
+            chunk = wanted[start:start + EXISTING_LOOKUP_CHUNK]
+            found.update(map(tuple, conn.execute(
+                select(positions.c.company_id, positions.c.fingerprint).where(
+                    positions.c.company_id.in_(sorted({company_id for company_id, _ in chunk})),
+                    positions.c.fingerprint.in_(sorted({fingerprint for _, fingerprint in chunk}))
+                )
+            ).all()))
+        return found & set(wanted)
+    
+    def get_company(self, name: str, max_age: Optional[float] = None) -> Optional[dict]:
+        """
+        读取公司的最近一次爬取结果
+        
+        Args:
+            name: 公司名称（按归一化名称查找）
+            max_age: 最大时效（秒），超过时返回None
+        
+        Returns:
+            与 CompanyScraper.scrape 相同结构的字典，另含 scraped_at
+        """
+        with self.engine.connect() as conn:
+            row = conn.execute(
+                select(companies).where(companies.c.name_key == self.company_key(name))
+            ).mappings().first()
+            if row is None or (max_age is not None and time.time() - row["scraped_at"] > max_age):
+                return None
+            # 只返回最近一次爬取时仍存在的岗位
+            position_rows = conn.execute(
+                select(positions)
+                .where(positions.c.company_id == row["id"], positions.c.last_seen_at >= row["scraped_at"])
+                .order_by(positions.c.id)
+            ).mappings().all()
+        
+        return {
+            "company_name": row["name"],
+            "url": row["url"],
+            "basic_info": row["basic_info"],
+            "culture": row["culture"],
+            "positions": [self._position(p) for p in position_rows],
+            "scraped_at": row["scraped_at"]
+        }
+    
+    @staticmethod
+    def _position(row) -> dict:
+        return {
+            "title": row["title"],
+            "location": row["location"],
+            "salary": row["salary"],
+            "requirements": row["requirements"],
+            "responsibilities": row["responsibilities"],
+            "url": row["url"]
+        }
+    
+    def search_positions(
+        self,
+        title: Optional[str] = None,
+        location: Optional[str] = None,
+        salary: Optional[str] = None,
+        min_salary: Optional[float] = None,
+        max_salary: Optional[float] = None,
+        max_age: Optional[float] = None,
+        limit: int = 50
+    ) -> list[dict]:
+        """
+        跨公司查询岗位
+        
+        Args:
+            title: 标题前缀（不区分大小写，走标题索引）
+            location: 工作地点（归一化为城市后匹配，可包含多个城市）
+            salary: 期望薪资文本（如 "15-25K"），解析后作为 min_salary/max_salary
+            min_salary/max_salary: 期望折算月薪范围（K），返回薪资范围与之有交集的岗位
+            max_age: 只返回最近多少秒内仍出现过的岗位
+        """
+        expected = parse_salary(salary)
+        if expected is not None:
+            min_salary = expected.low
+            max_salary = None if math.isinf(expected.high) else expected.high
+        
+        conditions = []
+        if title:
+            conditions.extend(self._title_prefix(title))
+        cities = normalize_locations(location)
+        if cities and ANYWHERE not in cities:
+            conditions.append(positions.c.city.in_(sorted(cities | {ANYWHERE, REMOTE, ""})))
+        if min_salary is not None:
+            conditions.append(or_(positions.c.salary_max.is_(None), positions.c.salary_max >= min_salary))
+        if max_salary is not None:
+            conditions.append(or_(positions.c.salary_min.is_(None), positions.c.salary_min <= max_salary))
+        if max_age is not None:
+            conditions.append(positions.c.last_seen_at >= time.time() - max_age)
+        
+        query = (
+            select(positions, companies.c.name.label("company_name"))
+            .join(companies, companies.c.id == positions.c.company_id)
+            .where(*conditions)
+            .order_by(positions.c.last_seen_at.desc())
+            .limit(limit)
+        )
+        with self.engine.connect() as conn:
+            rows = conn.execute(query).mappings().all()
+        return [self._position_with_company(row) for row in rows]
+    
+    def _title_prefix(self, prefix: str) -> list:
+        """
+        标题前缀条件
+        
+        SQLite的 LIKE 不区分ASCII大小写，但用不上索引；改为对 lower(title) 做范围查询，
+        走 ix_positions_title_lower 且保持不区分大小写。其他数据库的排序规则下
+        "前缀+最大码位" 不一定是有效上界，仍用 LIKE。
+        """
+        if self.dialect != "sqlite":
+            return [positions.c.title.startswith(prefix, autoescape=True)]
+        key = func.lower(positions.c.title)
+        lower_prefix = func.lower(literal(prefix))
+        return [key >= lower_prefix, key < lower_prefix.concat(TITLE_PREFIX_UPPER)]
+    
+    def get_positions(self, position_ids: list[int]) -> list[dict]:
+        """按岗位ID读取岗位（与 search_positions 结构相同），不存在的ID忽略，结果按传入顺序"""
+        if not position_ids:
+            return []
+        query = (
+            select(positions, companies.c.name.label("company_name"))
+            .join(companies, companies.c.id == positions.c.company_id)
+            .where(positions.c.id.in_(set(position_ids)))
+        )
+        with self.engine.connect() as conn:
+            rows = {row["id"]: row for row in conn.execute(query).mappings()}
+        return [self._position_with_company(rows[i]) for i in dict.fromkeys(position_ids) if i in rows]
+    
+    @classmethod
+    def _position_with_company(cls, row) -> dict:
+        return {
+            **cls._position(row), "position_id": row["id"], "company_name": row["company_name"],
+            "city": row["city"], "salary_min": row["salary_min"], "salary_max": row["salary_max"]
+        }
+    
+    # ---------- 简历 ----------
+    
+    def save_resumes(self, items: list[dict]):
+        """保存解析结果，items: [{"digest", "filename", "data"}]"""
+        now = time.time()
+        rows = self._last_by_key((
+            {
+                "digest": item["digest"],
+                "filename": item.get("filename"),
+                "data": item["data"],
+                "created_at": now
+            }
+            for item in items if "error" not in item["data"]
+        ), "digest")
+        with self.engine.begin() as conn:
+            self._upsert(conn, resumes, rows, ("digest",), ("filename", "data", "created_at"))
+    
+    def get_resume(self, digest: str, max_age: Optional[float] = None) -> Optional[dict]:
+        """按内容哈希读取简历解析结果"""
+        with self.engine.connect() as conn:
+            row = conn.execute(
+                select(resumes.c.data, resumes.c.created_at).where(resumes.c.digest == digest)
+            ).first()
+        if row is None or (max_age is not None and time.time() - row.created_at > max_age):
+            return None
+        return row.data
+    
+    # ---------- 分析记录 ----------
+    
+    def save_analyses(self, items: list[dict]):
+        """
+        保存分析记录
+        
+        items: [{"company_name", "resume_digest", "job_hash", "match_result", "recommendations", "report"}]，
+               可选 "prefs_hash"、"jd_signature"（bytes）、"duplicate_of"
+        """
+        now = time.time()
+        rows = [
+            {
+                "company_key": self.company_key(item["company_name"]),
+                "company_name": item["company_name"],
+                "resume_digest": item["resume_digest"],
+                "job_hash": item["job_hash"],
+                "prefs_hash": item.get("prefs_hash") or "",
+                "jd_signature": item.get("jd_signature"),
+                "duplicate_of": item.get("duplicate_of"),
+                "overall_score": item["match_result"].get("overall_score"),
+                "match_result": item["match_result"],
+                "recommendations": item.get("recommendations") or {},
+                "report": (item.get("report") or {}).get("content", ""),
+                "created_at": item.get("created_at") or now
+            }
+            for item in items if "error" not in item["match_result"]
+        ]
+        if not rows:
+            return
+        with self.engine.begin() as conn:
+            conn.execute(analyses.insert(), rows)
+    
+    @staticmethod
+    def _analysis(row) -> dict:
+        return {
+            "id": row["id"],
+            "company_name": row["company_name"],
+            "resume_digest": row["resume_digest"],
+            "overall_score": row["overall_score"],
+            "duplicate_of": row["duplicate_of"],
+            "match_result": row["match_result"],
+            "recommendations": row["recommendations"],
+            "report": {"format": "markdown", "content": row["report"]},
+            "created_at": row["created_at"]
+        }
+    
+    def find_analysis(
+        self,
+        company_name: str,
+        resume_digest: str,
+        job_hash: str,
+        max_age: Optional[float] = None
+    ) -> Optional[dict]:
+        """查找相同公司、简历、岗位描述和偏好的最近一次分析"""
+        conditions = [
+            analyses.c.company_key == self.company_key(company_name),
+            analyses.c.resume_digest == resume_digest,
+            analyses.c.job_hash == job_hash
+        ]
+        if max_age is not None:
+            conditions.append(analyses.c.created_at >= time.time() - max_age)
+        with self.engine.connect() as conn:
+            row = conn.execute(
+                select(analyses).where(*conditions).order_by(analyses.c.created_at.desc()).limit(1)
+            ).mappings().first()
+        return self._analysis(row) if row else None
+    
+    def analysis_signatures(self, max_age: Optional[float] = None) -> list[dict]:
+        """有岗位描述签名的分析记录（用于重建近似重复索引），复用产生的记录除外"""
+        conditions = [analyses.c.jd_signature.is_not(None), analyses.c.duplicate_of.is_(None)]
+        if max_age is not None:
+            conditions.append(analyses.c.created_at >= time.time() - max_age)
+        query = select(
+            analyses.c.company_key, analyses.c.resume_digest, analyses.c.prefs_hash,
+            analyses.c.job_hash, analyses.c.jd_signature
+        ).where(*conditions)
+        with self.engine.connect() as conn:
+            return [dict(row) for row in conn.execute(query).mappings()]
+    
+    def recent_analyses(self, limit: int = 20, company_name: Optional[str] = None) -> list[dict]:
+        """最近的分析记录摘要（不含完整报告）"""
+        query = select(
+            analyses.c.id, analyses.c.company_name, analyses.c.overall_score, analyses.c.created_at
+        )
+        if company_name:
+            query = query.where(analyses.c.company_key == self.company_key(company_name))
+        with self.engine.connect() as conn:
+            rows = conn.execute(query.order_by(analyses.c.created_at.desc()).limit(limit)).mappings().all()
+        return [dict(row) for row in rows]
+    
+    def get_analysis(self, analysis_id: int) -> Optional[dict]:
+        """按编号读取完整的分析记录"""
+        with self.engine.connect() as conn:
+            row = conn.execute(select(analyses).where(analyses.c.id == analysis_id)).mappings().first()
+        return self._analysis(row) if row else None
+    
+    def close(self):
+        self.engine.dispose()
@@ -0,0 +1,228 @@
+"""
+招聘数据导入模块 - 流式读取JSONL/CSV导出文件，归一化、去重后批量写入岗位表
+"""
+import re
+import csv
+import sys
+import gzip
+import json
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import IO, Iterator, Optional
+from loguru import logger
+
+from config import settings
+from src.ai.dedup import MinHasher, dedupe_positions
+from .database import Database
+
+
+# 导出文件中常见的列名 -> 岗位字段（按顺序取第一个非空的列）
+FIELD_ALIASES = {
+    "company_name": ("company_name", "company", "companyName", "employer", "公司", "公司名称", "企业名称"),
+    "title": ("title", "job_title", "jobTitle", "position", "name", "职位", "职位名称", "岗位", "岗位名称"),
+    "location": ("location", "city", "work_city", "jobLocation", "工作地点", "城市", "地点"),
+    "salary": ("salary", "salary_range", "salaryRange", "pay", "薪资", "薪酬", "薪资范围"),
+    "requirements": ("requirements", "qualifications", "任职要求", "岗位要求", "职位要求"),
+    "responsibilities": ("responsibilities", "description", "job_description", "duties", "岗位职责", "工作职责", "职位描述"),
+    "url": ("url", "link", "job_url", "source_url", "链接", "职位链接"),
+}
+_LIST_FIELDS = ("requirements", "responsibilities")
+_LIST_SPLIT = re.compile(r'[\r\n]+|[;；]\s*|(?:^|\s)\d+[.、)）]\s*')
+
+
+def open_text(path: Path) -> IO[str]:
+    """打开文本文件（.gz自动解压）"""
+    if path.suffix == ".gz":
+        return gzip.open(path, "rt", encoding="utf-8", errors="replace", newline="")
+    return open(path, "r", encoding="utf-8-sig", errors="replace", newline="")
+
+
+def iter_rows(path: Path) -> Iterator[dict]:
+    """
+    逐行读取导出文件，任何时刻只有一行在内存中
+    
+    按后缀识别格式：.jsonl/.ndjson/.json（每行一个JSON对象）、.csv、.tsv，可再加 .gz
+    """
+    fmt = path.suffixes[-2] if path.suffix == ".gz" and len(path.suffixes) > 1 else path.suffix
+    with open_text(path) as f:
+        if fmt in (".csv", ".tsv"):
+            # 岗位描述可能很长，放宽单个字段的长度限制
+            csv.field_size_limit(min(sys.maxsize, 2 ** 31 - 1))
+            yield from csv.DictReader(f, delimiter="\t" if fmt == ".tsv" else ",")
+            return
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError:
+                logger.debug(f"跳过无法解析的行: {path}:{line_no}")
+                yield {}
+                continue
+            yield row if isinstance(row, dict) else {}
+
+
+def _as_list(value) -> list[str]:
+    if not value:
+        return []
+    if isinstance(value, list):
+        return [str(v).strip() for v in value if str(v).strip()]
+    return [part.strip() for part in _LIST_SPLIT.split(str(value)) if part and part.strip()]
+
+
+def map_row(row: dict, field_map: Optional[dict[str, str]] = None) -> Optional[dict]:
+    """
+    把导出文件的一行映射为岗位（与 CompanyScraper 返回的岗位字段相同，另含 company_name）
+    
+    Args:
+        field_map: 岗位字段 -> 列名，优先于 FIELD_ALIASES
+    
+    Returns:
+        缺少公司名或职位名称时返回None
+    """
+    position = {}
+    for field, aliases in FIELD_ALIASES.items():
+        columns = (field_map[field],) if field_map and field in field_map else aliases
+        value = next((row[c] for c in columns if row.get(c) not in (None, "")), None)
+        # JSON-LD风格的嵌套字段，如 {"address": {"addressLocality": "北京"}}
+        while isinstance(value, dict):
+            value = value.get("name") or value.get("addressLocality") or value.get("address")
+        if field in _LIST_FIELDS:
+            position[field] = _as_list(value)
+        elif isinstance(value, list):
+            position[field] = "/".join(str(v).strip() for v in value if v)
+        else:
+            position[field] = str(value).strip() if value is not None else ""
+    if not position["company_name"] or not position["title"]:
+        return None
+    return position
+
+
+class IngestStats:
+    """导入统计"""
+    
+    def __init__(self):
+        self.started_at = time.monotonic()
+        self.read = 0
+        self.invalid = 0
+        self.duplicates = 0
+        self.inserted = 0
+        self.updated = 0
+    
+    def as_dict(self) -> dict:
+        elapsed = time.monotonic() - self.started_at
+        return {
+            "read": self.read,
+            "invalid": self.invalid,
+            "duplicates": self.duplicates,
+            "inserted": self.inserted,
+            "updated": self.updated,
+            "elapsed_seconds": round(elapsed, 1),
+            "rows_per_sec": round(self.read / elapsed, 1) if elapsed > 0 else 0.0
+        }
+
+
+class FeedIngestor:
+    """
+    招聘数据导入器
+    
+    边读边写：每读满 batch_size 行做一次归一化和去重，交给写线程批量upsert，同时继续读取
+    下一批，内存中最多同时存在两个批次，与文件大小无关。
+    去重分两层：批次内同一公司的近似重复岗位（MinHash，见 src.ai.dedup）只保留一条；
+    跨批次的重复由数据库按归一化指纹（标题+城市+薪资区间）upsert合并。
+    """
+    
+    def __init__(
+        self,
+        database: Optional[Database] = None,
+        batch_size: int = 5000,
+        field_map: Optional[dict[str, str]] = None,
+        dedup: Optional[bool] = None,
+        progress_interval: float = 10.0
+    ):
+        self.database = database or Database()
+        self.batch_size = batch_size
+        self.field_map = field_map
+        self.hasher = MinHasher() if (settings.DEDUP_ENABLED if dedup is None else dedup) else None
+        self.progress_interval = progress_interval
+        self.stats = IngestStats()
+    
+    def _prepare(self, batch: list[dict]) -> list[dict]:
+        """批次内去重（同一公司的岗位一起比较）"""
+        if self.hasher is None:
+            return batch
+        by_company: dict[str, list[dict]] = {}
+        for position in batch:
+            by_company.setdefault(Database.company_key(position["company_name"]), []).append(position)
+        unique = []
+        for group in by_company.values():
+            unique.extend(dedupe_positions(group, self.hasher) if len(group) > 1 else group)
+        self.stats.duplicates += len(batch) - len(unique)
+        return unique
+    
+    def _write(self, batch: list[dict], source: str) -> dict:
+        return self.database.save_positions(batch, source=source)
+    
+    def run(self, paths: list[Path], source: Optional[str] = None) -> dict:
+        """
+        导入一个或多个文件
+        
+        Args:
+            paths: 导出文件路径
+            source: 写入岗位表的来源标记（默认使用文件名）
+        
+        Returns:
+            导入统计
+        """
+        pending: Optional[Future] = None
+        last_report = time.monotonic()
+        
+        def wait_pending():
+            nonlocal pending
+            if pending is not None:
+                counts = pending.result()
+                self.stats.inserted += counts["inserted"]
+                self.stats.updated += counts["updated"]
+                pending = None
+        
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="ingest-writer") as writer:
+            for path in paths:
+                path = Path(path)
+                file_source = source or path.name
+                logger.info(f"开始导入: {path}")
+                batch: list[dict] = []
+                for row in iter_rows(path):
+                    self.stats.read += 1
+                    position = map_row(row, self.field_map)
+                    if position is None:
+                        self.stats.invalid += 1
+                        continue
+                    batch.append(position)
+                    if len(batch) < self.batch_size:
+                        continue
+                    
+                    prepared = self._prepare(batch)
+                    batch = []
+                    # 上一批写完再提交这一批，写入与读取、解析重叠进行
+                    wait_pending()
+                    pending = writer.submit(self._write, prepared, file_source)
+                    
+                    if time.monotonic() - last_report >= self.progress_interval:
+                        last_report = time.monotonic()
+                        stats = self.stats.as_dict()
+                        logger.info(
+                            f"导入进度: 已读取 {stats['read']} 行, 新增 {stats['inserted']} 条, 更新 {stats['updated']} 条, "
+                            f"{stats['rows_per_sec']} 行/秒"
+                        )
+                
+                if batch:
+                    prepared = self._prepare(batch)
+                    wait_pending()
+                    pending = writer.submit(self._write, prepared, file_source)
+            wait_pending()
+        
+        stats = self.stats.as_dict()
+        logger.info(f"导入完成: {stats}")
+        return stats
@@ -0,0 +1,107 @@
+"""
+数据库表结构
+"""
+from sqlalchemy import (
+    JSON,
+    Column,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    LargeBinary,
+    MetaData,
+    String,
+    Table,
+    Text,
+    UniqueConstraint,
+    func,
+    text,
+)
+
+
+metadata = MetaData()
+
+
+# 公司（name_key为归一化后的公司名，用于去重和查找）
+companies = Table(
+    "companies",
+    metadata,
+    Column("id", Integer, primary_key=True, autoincrement=True),
+    Column("name_key", String(255), nullable=False, unique=True),
+    Column("name", String(255), nullable=False),
+    Column("url", String(1024)),
+    Column("basic_info", JSON, nullable=False, default=dict),
+    Column("culture", JSON, nullable=False, default=dict),
+    Column("scraped_at", Float, nullable=False),
+    Index("ix_companies_scraped_at", "scraped_at"),
+)
+
+
+# 岗位（同一公司内按指纹去重，重复爬取时更新最后一次出现的时间）
+positions = Table(
+    "positions",
+    metadata,
+    Column("id", Integer, primary_key=True, autoincrement=True),
+    Column("company_id", Integer, ForeignKey("companies.id", ondelete="CASCADE"), nullable=False),
+    Column("fingerprint", String(64), nullable=False),
+    Column("title", String(255), nullable=False),
+    Column("location", String(255), nullable=False, default=""),
+    # 归一化后的主要城市（见 src.utils.normalize）
+    Column("city", String(64), nullable=False, default=""),
+    Column("salary", String(255), nullable=False, default=""),
+    # 折算月薪范围，单位K（年总包/12），无法解析时为空，"以上"的上限为空
+    Column("salary_min", Float),
+    Column("salary_max", Float),
+    Column("requirements", JSON, nullable=False, default=list),
+    Column("responsibilities", JSON, nullable=False, default=list),
+    Column("url", String(1024)),
+    # 来源：site（官网爬取）或数据导出文件名
+    Column("source", String(255), nullable=False, default="site"),
+    Column("first_seen_at", Float, nullable=False),
+    Column("last_seen_at", Float, nullable=False),
+    UniqueConstraint("company_id", "fingerprint", name="uq_positions_company_fingerprint"),
+    Index("ix_positions_company_id", "company_id"),
+    Index("ix_positions_title", "title"),
+    # 标题前缀查询忽略大小写（SQLite下按 lower(title) 的范围查询走这个索引）
+    Index("ix_positions_title_lower", func.lower(text("title"))),
+    Index("ix_positions_city", "city"),
+    Index("ix_positions_salary", "salary_min", "salary_max"),
+    Index("ix_positions_last_seen_at", "last_seen_at"),
+)
+
+
+# 解析后的简历（digest为原始内容的SHA-256）
+resumes = Table(
+    "resumes",
+    metadata,
+    Column("id", Integer, primary_key=True, autoincrement=True),
+    Column("digest", String(64), nullable=False, unique=True),
+    Column("filename", String(255)),
+    Column("data", JSON, nullable=False),
+    Column("created_at", Float, nullable=False),
+    Index("ix_resumes_created_at", "created_at"),
+)
+
+
+# 分析记录（job_hash为岗位描述+个人偏好的哈希，相同输入可直接复用结果；
+# jd_signature为岗位描述的MinHash签名，用于查找近似重复的岗位描述，见 src.ai.dedup）
+analyses = Table(
+    "analyses",
+    metadata,
+    Column("id", Integer, primary_key=True, autoincrement=True),
+    Column("company_key", String(255), nullable=False),
+    Column("company_name", String(255), nullable=False),
+    Column("resume_digest", String(64), nullable=False),
+    Column("job_hash", String(64), nullable=False),
+    Column("prefs_hash", String(64), nullable=False, default=""),
+    Column("jd_signature", LargeBinary),
+    # 复用近似重复岗位描述的分析结果时，指向被复用的记录
+    Column("duplicate_of", Integer, ForeignKey("analyses.id", ondelete="SET NULL")),
+    Column("overall_score", Float),
+    Column("match_result", JSON, nullable=False),
+    Column("recommendations", JSON, nullable=False, default=dict),
+    Column("report", Text, nullable=False, default=""),
+    Column("created_at", Float, nullable=False),
+    Index("ix_analyses_lookup", "company_key", "resume_digest", "job_hash", "created_at"),
+    Index("ix_analyses_created_at", "created_at"),
+)
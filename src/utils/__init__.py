@@ -2,5 +2,6 @@
 Utils模块初始化
 """
 from .logger import log
+from .upload_store import UploadStore
 
-__all__ = ["log"]
+__all__ = ["log", "UploadStore"]
@@ -0,0 +1,129 @@
+"""
+准入控制模块 - 按工具限制并发数，排队有上限，过载时快速失败
+"""
+import math
+import time
+import asyncio
+import contextlib
+from typing import AsyncIterator, Optional
+
+from config import settings
+
+
+class OverloadedError(Exception):
+    """排队已满或排队超时，retry_after 为建议的重试等待秒数"""
+    
+    def __init__(self, name: str, retry_after: int, reason: str):
+        super().__init__(f"服务繁忙（{name}: {reason}），请 {retry_after} 秒后重试")
+        self.name = name
+        self.retry_after = retry_after
+        self.reason = reason
+
+
+class _Gate:
+    """单个工具的并发闸门和统计"""
+    
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.semaphore = asyncio.Semaphore(limit)
+        self.in_flight = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.completed = 0
+        # 单次执行耗时的指数移动平均，用于估算重试等待时间
+        self.avg_seconds: Optional[float] = None
+    
+    def retry_after(self) -> int:
+        """按当前排队长度估算多久后有空位"""
+        per_call = self.avg_seconds or 1.0
+        return max(1, math.ceil(per_call * (self.waiting + 1) / self.limit))
+    
+    def record(self, seconds: float):
+        self.completed += 1
+        self.avg_seconds = seconds if self.avg_seconds is None else 0.8 * self.avg_seconds + 0.2 * seconds
+    
+    def stats(self) -> dict:
+        return {
+            "limit": self.limit,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "completed": self.completed,
+            "avg_seconds": round(self.avg_seconds, 3) if self.avg_seconds is not None else None
+        }
+
+
+class AdmissionController:
+    """
+    准入控制
+    
+    每个工具最多同时执行 limit 个调用，超出的进入等待队列；队列满或等待超过
+    queue_timeout 秒时立即拒绝并给出重试建议，而不是无限堆积请求直到内存耗尽、
+    所有请求一起超时。未单独配置的工具使用 default_limit。
+    """
+    
+    def __init__(
+        self,
+        limits: Optional[dict[str, int]] = None,
+        default_limit: Optional[int] = None,
+        max_queue: Optional[int] = None,
+        queue_timeout: Optional[float] = None
+    ):
+        self.limits = settings.MCP_TOOL_LIMITS if limits is None else limits
+        self.default_limit = default_limit or settings.MCP_TOOL_CONCURRENCY
+        self.max_queue = settings.MCP_QUEUE_SIZE if max_queue is None else max_queue
+        self.queue_timeout = queue_timeout or settings.MCP_QUEUE_TIMEOUT
+        self._gates: dict[str, _Gate] = {}
+    
+    def _gate(self, name: str) -> _Gate:
+        gate = self._gates.get(name)
+        if gate is None:
+            gate = self._gates[name] = _Gate(self.limits.get(name, self.default_limit))
+        return gate
+    
+    @contextlib.asynccontextmanager
+    async def admit(self, name: str) -> AsyncIterator[None]:
+        """
+        获取执行名额，退出时释放
+        
+        Raises:
+            OverloadedError: 等待队列已满或等待超时
+        """
+        gate = self._gate(name)
+        if gate.semaphore.locked():
+            if gate.waiting >= self.max_queue:
+                gate.rejected += 1
+                raise OverloadedError(name, gate.retry_after(), "等待队列已满")
+            gate.waiting += 1
+            try:
+                await asyncio.wait_for(gate.semaphore.acquire(), self.queue_timeout)
+            except asyncio.TimeoutError:
+                gate.rejected += 1
+                raise OverloadedError(name, gate.retry_after(), "排队超时") from None
+            finally:
+                gate.waiting -= 1
+        else:
+            await gate.semaphore.acquire()
+        
+        gate.admitted += 1
+        gate.in_flight += 1
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            gate.in_flight -= 1
+            gate.record(time.monotonic() - started)
+            gate.semaphore.release()
+    
+    def stats(self) -> dict:
+        """各工具的限额、执行中、排队中、拒绝次数等"""
+        gates = {name: gate.stats() for name, gate in sorted(self._gates.items())}
+        return {
+            "max_queue": self.max_queue,
+            "in_flight": sum(gate.in_flight for gate in self._gates.values()),
+            "waiting": sum(gate.waiting for gate in self._gates.values()),
+            "rejected": sum(gate.rejected for gate in self._gates.values()),
+            "tools": gates
+        }
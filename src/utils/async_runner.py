@@ -0,0 +1,83 @@
+"""
+后台事件循环 - 供同步代码（如Streamlit脚本）提交协程；并发调用合并
+"""
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Coroutine, Hashable, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class BackgroundLoop:
+    """
+    在守护线程中常驻运行的事件循环
+    
+    与每次调用 asyncio.run 不同，循环在进程内一直存在，
+    绑定在其上的aiohttp会话、连接池等资源可以跨请求复用。
+    """
+    
+    def __init__(self, name: str = "background-loop"):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+    
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+    
+    def submit(self, coro: Coroutine) -> Future:
+        """提交协程，立即返回 concurrent.futures.Future"""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+    
+    def run(self, coro: Coroutine, timeout: Optional[float] = None) -> Any:
+        """提交协程并阻塞等待结果"""
+        return self.submit(coro).result(timeout)
+    
+    def stop(self):
+        """停止事件循环并等待线程退出"""
+        if self.loop.is_running():
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self._thread.join(timeout=5)
+
+
+class SharedTasks:
+    """
+    按key合并并发调用：同一key同时只运行一个任务，所有调用方等待同一个结果
+    
+    某个调用方被取消时其他等待者不受影响；最后一个等待者也被取消时任务随之取消，
+    不会在没人等结果时继续占用网络连接或模型。
+    """
+    
+    def __init__(self):
+        self._tasks: dict[Hashable, asyncio.Task] = {}
+        self._waiters: dict[asyncio.Task, int] = {}
+    
+    def __len__(self) -> int:
+        return len(self._tasks)
+    
+    def _discard(self, key: Hashable, task: asyncio.Task):
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+    
+    async def run(self, key: Hashable, factory: Callable[[], Awaitable[T]]) -> T:
+        """执行或加入同一key正在进行的任务"""
+        task = self._tasks.get(key)
+        if task is None:
+            task = asyncio.ensure_future(factory())
+            self._tasks[key] = task
+            task.add_done_callback(lambda done: self._discard(key, done))
+        
+        self._waiters[task] = self._waiters.get(task, 0) + 1
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if not task.done() and self._waiters[task] == 1:
+                # 立即移除，不等取消完成；之后同一key的调用会启动新任务而不是加入正在取消的任务
+                self._discard(key, task)
+                task.cancel()
+            raise
+        finally:
+            self._waiters[task] -= 1
+            if not self._waiters[task]:
+                del self._waiters[task]
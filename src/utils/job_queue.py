@@ -0,0 +1,148 @@
+"""
+后台任务队列 - 在常驻事件循环上并发执行分析任务
+"""
+import time
+import uuid
+import asyncio
+import threading
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Optional
+from loguru import logger
+
+from .async_runner import BackgroundLoop
+
+
+class Job:
+    """
+    队列中的一个任务，各阶段结果随执行进度写入stages
+    
+    params 只在执行期间保留，任务结束后清空，历史记录中只留下页面展示用的stages
+    """
+    
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    
+    def __init__(self, params: dict, label: str = ""):
+        self.id = uuid.uuid4().hex[:12]
+        self.label = label
+        self.params = params
+        self.status = self.QUEUED
+        self.stages: dict[str, Any] = {}
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+    
+    def set_stage(self, stage: str, value: Any):
+        """记录某个阶段的结果（由工作协程调用）"""
+        self.stages[stage] = value
+    
+    @property
+    def active(self) -> bool:
+        return self.status in (self.QUEUED, self.RUNNING)
+    
+    @property
+    def elapsed(self) -> float:
+        """已运行时间（秒）"""
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.time()) - self.started_at
+
+
+class JobQueue:
+    """
+    进程内任务队列
+    
+    submit 可以在任意线程调用；任务由固定数量的工作协程在后台事件循环上执行，
+    调用方通过 get 轮询任务状态和已完成的阶段结果。
+    """
+    
+    def __init__(
+        self,
+        runner: BackgroundLoop,
+        handler: Callable[[Job], Awaitable[None]],
+        workers: int = 4,
+        max_history: int = 500
+    ):
+        self.runner = runner
+        self.handler = handler
+        self.max_history = max_history
+        self._jobs: OrderedDict[str, Job] = OrderedDict()
+        self._jobs_lock = threading.Lock()
+        self._queue: asyncio.Queue = runner.run(self._create_queue())
+        self._running = 0
+        for i in range(workers):
+            runner.submit(self._worker(i))
+    
+    @staticmethod
+    async def _create_queue() -> asyncio.Queue:
+        # asyncio.Queue必须在其所属的事件循环中创建
+        return asyncio.Queue()
+    
+    def submit(self, params: dict, label: str = "") -> Job:
+        """提交任务，立即返回"""
+        job = Job(params, label)
+        with self._jobs_lock:
+            self._jobs[job.id] = job
+            self._trim_history()
+        self.runner.loop.call_soon_threadsafe(self._queue.put_nowait, job)
+        logger.info(f"任务入队: {job.id} {label}")
+        return job
+    
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+    
+    def position(self, job_id: str) -> int:
+        """排在该任务之前、仍在等待的任务数（任务不在排队中时为0）"""
+        with self._jobs_lock:
+            ahead = 0
+            for job in self._jobs.values():
+                if job.id == job_id:
+                    return ahead if job.status == Job.QUEUED else 0
+                if job.status == Job.QUEUED:
+                    ahead += 1
+        return 0
+    
+    @property
+    def depth(self) -> int:
+        """排队等待中的任务数"""
+        return self._queue.qsize()
+    
+    @property
+    def running(self) -> int:
+        """正在执行的任务数"""
+        return self._running
+    
+    def _trim_history(self):
+        """只保留最近的已结束任务（调用方持有_jobs_lock）"""
+        overflow = len(self._jobs) - self.max_history
+        if overflow <= 0:
+            return
+        for job_id in [j.id for j in self._jobs.values() if not j.active][:overflow]:
+            del self._jobs[job_id]
+    
+    async def _worker(self, index: int):
+        while True:
+            job = await self._queue.get()
+            job.status = Job.RUNNING
+            job.started_at = time.time()
+            self._running += 1
+            try:
+                await self.handler(job)
+                status = Job.DONE
+            except Exception as e:
+                status = Job.FAILED
+                job.error = str(e)
+                logger.error(f"任务失败: {job.id}, 错误: {e}")
+            finally:
+                job.finished_at = time.time()
+                # 参数可能很大（简历内容等），结束后不再保留
+                job.params = {}
+                self._running -= 1
+                self._queue.task_done()
+            # 状态最后更新，轮询方看到任务结束时其余字段都已写好
+            job.status = status
+            if status == Job.DONE:
+                logger.info(f"任务完成: {job.id}, 耗时 {job.elapsed:.1f}s")
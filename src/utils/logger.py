@@ -3,47 +3,116 @@
 """
 import sys
 from pathlib import Path
+from typing import Any, Optional
 from loguru import logger
 from config import settings
 
+CONSOLE_FORMAT = (
+    "<green>{time:YYYY-MM-DD HH:mm:ss}</green> | "
+    "<level>{level: <8}</level> | "
+    "<magenta>{extra[request_id]}</magenta> | "
+    "<cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> | "
+    "<level>{message}</level>"
+)
+FILE_FORMAT = "{time:YYYY-MM-DD HH:mm:ss} | {level: <8} | {extra[request_id]} | {name}:{function}:{line} | {message}"
 
-def setup_logger():
-    """配置日志系统"""
+# 摘要时列表最多保留的元素数、嵌套最多展开的层数
+SUMMARY_MAX_ITEMS = 5
+SUMMARY_MAX_DEPTH = 3
+
+
+def summarize(value: Any, max_chars: Optional[int] = None, _depth: int = 0) -> Any:
+    """
+    生成适合写进日志的参数摘要
+    
+    长字符串截断并注明总长度，长列表只保留前几项，过深的嵌套只保留类型和大小，
+    避免把整份简历、公司信息格式化进每一行日志。
+    
+    Args:
+        value: 任意参数（通常是工具参数字典）
+        max_chars: 字符串保留的最大字符数，默认使用 LOG_MAX_ARG_CHARS
+    """
+    max_chars = max_chars or settings.LOG_MAX_ARG_CHARS
+    if isinstance(value, str):
+        if len(value) <= max_chars:
+            return value
+        return f"{value[:max_chars]}…(共{len(value)}字)"
+    if isinstance(value, dict):
+        if _depth >= SUMMARY_MAX_DEPTH:
+            return f"<dict {len(value)}项>"
+        return {key: summarize(item, max_chars, _depth + 1) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        if _depth >= SUMMARY_MAX_DEPTH:
+            return f"<list {len(value)}项>"
+        items = [summarize(item, max_chars, _depth + 1) for item in value[:SUMMARY_MAX_ITEMS]]
+        if len(value) > SUMMARY_MAX_ITEMS:
+            items.append(f"…(共{len(value)}项)")
+        return items
+    return value
+
+
+def setup_logger(
+    logs_dir: Optional[Path] = None,
+    console: bool = True,
+    enqueue: Optional[bool] = None,
+    json_format: Optional[bool] = None
+):
+    """
+    配置日志系统
+    
+    Args:
+        logs_dir: 日志文件目录，默认使用 LOGS_DIR
+        console: 是否输出到控制台（stderr）
+        enqueue: 是否经队列由后台线程写入，默认使用 LOG_ENQUEUE
+        json_format: 是否输出JSON记录（包含 request_id 等上下文字段），默认按 LOG_FORMAT
+    """
+    logs_dir = logs_dir or settings.LOGS_DIR
+    enqueue = settings.LOG_ENQUEUE if enqueue is None else enqueue
+    serialize = settings.LOG_FORMAT == "json" if json_format is None else json_format
     
     # 移除默认handler
     logger.remove()
+    # 不在请求上下文中的日志 request_id 显示为 -
+    logger.configure(extra={"request_id": "-"})
     
-    # 控制台输出
-    logger.add(
-        sys.stdout,
-        level=settings.LOG_LEVEL,
-        format="<green>{time:YYYY-MM-DD HH:mm:ss}</green> | "
-               "<level>{level: <8}</level> | "
-               "<cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> | "
-               "<level>{message}</level>",
-        colorize=True,
-    )
+    # 控制台输出到stderr：stdio模式的MCP服务器用stdout传输协议消息
+    if console:
+        logger.add(
+            sys.stderr,
+            level=settings.LOG_LEVEL,
+            format=CONSOLE_FORMAT,
+            colorize=not serialize,
+            serialize=serialize,
+            enqueue=enqueue,
+        )
     
     # 文件输出
+    # enqueue时写文件、轮换和压缩都在后台线程进行，不阻塞调用方
     logger.add(
-        settings.LOGS_DIR / "app_{time:YYYY-MM-DD}.log",
+        logs_dir / "app_{time:YYYY-MM-DD}.log",
         level="DEBUG",
-        format="{time:YYYY-MM-DD HH:mm:ss} | {level: <8} | {name}:{function}:{line} | {message}",
+        format=FILE_FORMAT,
         rotation="00:00",  # 每天午夜轮换
         retention="30 days",  # 保留30天
         compression="zip",  # 压缩旧日志
         encoding="utf-8",
+        serialize=serialize,
+        enqueue=enqueue,
+        delay=True,  # 首次写日志时才创建目录和文件
     )
     
     # 错误日志单独记录
     logger.add(
-        settings.LOGS_DIR / "error_{time:YYYY-MM-DD}.log",
+        logs_dir / "error_{time:YYYY-MM-DD}.log",
         level="ERROR",
-        format="{time:YYYY-MM-DD HH:mm:ss} | {level: <8} | {name}:{function}:{line} | {message}",
+        format=FILE_FORMAT,
         rotation="00:00",
         retention="90 days",
         compression="zip",
         encoding="utf-8",
+        serialize=serialize,
+        enqueue=enqueue,
+        delay=True,
     )
     
     return logger
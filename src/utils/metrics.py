@@ -0,0 +1,338 @@
+"""
+指标模块 - 计数器、仪表盘、直方图，以Prometheus文本格式输出
+
+用法:
+    REQUESTS = counter("mcp_requests_total", "MCP工具调用次数", ["tool", "status"])
+    REQUESTS.inc(tool="parse_resume", status="ok")
+    
+    LATENCY = histogram("resume_parse_seconds", "简历解析耗时", ["format"])
+    with LATENCY.time(format="pdf"):
+        ...
+
+同名指标只注册一次，多个模块用相同的名称和类型声明时得到同一个对象。
+指标总是在内存中累计（只是加锁更新数值），是否对外提供由调用方决定：
+start_http_server 在后台线程提供 /metrics，write_metrics 写入文本文件
+（可由 node_exporter 的 textfile 收集器读取）。
+"""
+import math
+import time
+import asyncio
+import functools
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Callable, Sequence
+from loguru import logger
+
+# 默认的耗时分桶（秒），覆盖从毫秒级的缓存命中到分钟级的模型生成
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+class _Timer:
+    """耗时统计，既可以用作 with 语句，也可以用作（同步或异步）函数装饰器"""
+    
+    def __init__(self, on_done: Callable[[float], None]):
+        self._on_done = on_done
+        self._started: list[float] = []
+    
+    def __enter__(self):
+        self._started.append(time.perf_counter())
+        return self
+    
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        self._on_done(time.perf_counter() - self._started.pop())
+        return False
+    
+    def __call__(self, func: Callable) -> Callable:
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    self._on_done(time.perf_counter() - started)
+            return async_wrapper
+        
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self._on_done(time.perf_counter() - started)
+        return wrapper
+
+
+class _Metric:
+    TYPE = ""
+    
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: dict[tuple[str, ...], Any] = {}
+    
+    def _key(self, labels: dict) -> tuple[str, ...]:
+        if len(labels) != len(self.labelnames) or any(name not in labels for name in self.labelnames):
+            raise ValueError(f"指标 {self.name} 的标签应为 {list(self.labelnames)}，实际为 {list(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+    
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.TYPE}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+
+class Counter(_Metric):
+    """只增不减的计数（请求数、错误数、token数）"""
+    
+    TYPE = "counter"
+    
+    def inc(self, amount: float = 1, **labels: Any):
+        if amount < 0:
+            raise ValueError("计数器只能增加")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+    
+    def value(self, **labels: Any) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+
+class Gauge(_Metric):
+    """可增可减的当前值（执行中的请求数、队列长度）"""
+    
+    TYPE = "gauge"
+    
+    def set(self, value: float, **labels: Any):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+    
+    def inc(self, amount: float = 1, **labels: Any):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+    
+    def dec(self, amount: float = 1, **labels: Any):
+        self.inc(-amount, **labels)
+    
+    def value(self, **labels: Any) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+    
+    def track_inprogress(self, **labels: Any) -> "_InProgress":
+        """进入时加1、退出时减1，可用作 with 语句或函数装饰器"""
+        return _InProgress(self, labels)
+
+
+class _InProgress(_Timer):
+    def __init__(self, gauge: Gauge, labels: dict):
+        super().__init__(lambda seconds: gauge.dec(**labels))
+        self._gauge = gauge
+        self._labels = labels
+    
+    def __enter__(self):
+        self._gauge.inc(**self._labels)
+        return super().__enter__()
+    
+    def __call__(self, func: Callable) -> Callable:
+        wrapped = super().__call__(func)
+        gauge, labels = self._gauge, self._labels
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                gauge.inc(**labels)
+                return await wrapped(*args, **kwargs)
+            return async_wrapper
+        
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            gauge.inc(**labels)
+            return wrapped(*args, **kwargs)
+        return wrapper
+
+
+class Histogram(_Metric):
+    """数值分布（耗时、每秒token数），按分桶累计；分位数由Prometheus端用 histogram_quantile 计算"""
+    
+    TYPE = "histogram"
+    
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+    
+    def observe(self, value: float, **labels: Any):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[0][i] += 1
+                    break
+            state[1] += value
+            state[2] += 1
+    
+    def time(self, **labels: Any) -> _Timer:
+        """记录耗时（秒），可用作 with 语句或函数装饰器"""
+        self._key(labels)
+        return _Timer(lambda seconds: self.observe(seconds, **labels))
+    
+    def count(self, **labels: Any) -> int:
+        with self._lock:
+            state = self._values.get(self._key(labels))
+            return state[2] if state else 0
+    
+    def total(self, **labels: Any) -> float:
+        with self._lock:
+            state = self._values.get(self._key(labels))
+            return state[1] if state else 0.0
+    
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.TYPE}"]
+        with self._lock:
+            items = sorted((key, ([*state[0]], state[1], state[2])) for key, state in self._values.items())
+        for key, (bucket_counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, bucket_counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labelnames + ("le",), key + (_format_value(bound),))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """指标注册表，输出时先执行采集回调（用于从其他组件读取当前状态）"""
+    
+    def __init__(self):
+        self._metrics: dict[str, _Metric] = {}
+        self._collectors: list[Callable[[], None]] = []
+        self._lock = threading.Lock()
+    
+    def register(self, metric: _Metric) -> _Metric:
+        """注册指标；同名同类型的指标已存在时返回已有的对象"""
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is None:
+                self._metrics[metric.name] = metric
+                return metric
+        if type(existing) is not type(metric) or existing.labelnames != metric.labelnames:
+            raise ValueError(f"指标 {metric.name} 已注册为不同的类型或标签")
+        return existing
+    
+    def add_collector(self, collector: Callable[[], None]):
+        """添加采集回调，每次输出前调用（如把队列长度写入仪表盘）"""
+        with self._lock:
+            self._collectors.append(collector)
+    
+    def remove_collector(self, collector: Callable[[], None]):
+        with self._lock:
+            if collector in self._collectors:
+                self._collectors.remove(collector)
+    
+    def render(self) -> str:
+        """Prometheus文本格式"""
+        with self._lock:
+            collectors = list(self._collectors)
+            metrics = sorted(self._metrics.values(), key=lambda metric: metric.name)
+        for collector in collectors:
+            try:
+                collector()
+            except Exception as e:
+                logger.warning(f"指标采集失败: {e}")
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+
+def counter(name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+    return registry.register(Counter(name, documentation, labelnames))
+
+
+def gauge(name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+    return registry.register(Gauge(name, documentation, labelnames))
+
+
+def histogram(
+    name: str,
+    documentation: str,
+    labelnames: Sequence[str] = (),
+    buckets: Sequence[float] = DEFAULT_BUCKETS
+) -> Histogram:
+    return registry.register(Histogram(name, documentation, labelnames, buckets))
+
+
+def write_metrics(path: Path):
+    """把当前指标写入文本文件（先写临时文件再替换，读取方不会读到一半的内容）"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    tmp_path.write_text(registry.render(), encoding="utf-8")
+    tmp_path.replace(path)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?", 1)[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = registry.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, format: str, *args):
+        logger.debug(f"指标请求: {self.address_string()} {format % args}")
+
+
+def start_http_server(port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """
+    在守护线程中提供 GET /metrics
+    
+    Returns:
+        HTTP服务器，调用 shutdown() 停止
+    """
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True)
+    thread.start()
+    logger.info(f"指标服务已启动: http://{host}:{server.server_address[1]}/metrics")
+    return server
@@ -0,0 +1,188 @@
+"""
+数据归一化模块 - 薪资文本转数值区间、工作地点转标准城市名
+"""
+import re
+import math
+import unicodedata
+from typing import NamedTuple, Optional
+
+
+class SalaryRange(NamedTuple):
+    """
+    薪资区间
+    
+    low/high 为折算月薪（单位K，年总包/12），便于比较 "20-35K·14薪" 与 "年薪40-60万"；
+    "25K以上" 的上限为inf。months 为原文中的薪数（未注明时为12）。
+    """
+    low: float
+    high: float
+    months: int = 12
+    
+    def overlaps(self, other: "SalaryRange") -> bool:
+        return self.low <= other.high and other.low <= self.high
+
+
+# 一个数字或一个区间，后面可带单位；区间两端的单位可以只写一个
+_RANGE_PATTERN = re.compile(
+    r'(\d+(?:\.\d+)?)\s*(k|千|w|万|元)?\s*(?:(?:-|~|至|到)\s*(\d+(?:\.\d+)?)\s*(k|千|w|万|元)?)?'
+)
+# 薪数："14薪" 或 "25K×14"
+_MONTHS_PATTERN = re.compile(r'[×x*]\s*(\d{2})(?!\d)|(\d{2})\s*薪')
+# 紧跟在数字后面表示非薪资的量词："3-5年"（经验）、"35岁"、"20人"、"3个月"，"年薪" 除外
+_NOT_SALARY_PATTERN = re.compile(r'\s*(?:年(?!薪)|岁|周岁|人|个)')
+_ANNUAL_PATTERN = re.compile(r'年薪|/\s*年|每年|per\s*year|年包')
+_DAILY_PATTERN = re.compile(r'/\s*天|每天|日薪|/\s*day')
+_ABOVE_PATTERN = re.compile(r'以上|起|\+')
+_BELOW_PATTERN = re.compile(r'以下|以内')
+_UNIT_SCALE = {"k": 1.0, "千": 1.0, "w": 10.0, "万": 10.0, "元": 0.001}
+# 日薪按每月21.75个工作日折算
+_WORKDAYS_PER_MONTH = 21.75
+
+
+def _salary_match(text: str) -> Optional[re.Match]:
+    """
+    找出文本中的薪资数字
+    
+    跳过 "3-5年"、"35岁" 这类带非薪资量词的数字；有多个候选时优先带单位的，
+    如 "3-5年 15-25K" 取 "15-25K"。
+    """
+    fallback = None
+    for match in _RANGE_PATTERN.finditer(text):
+        if _NOT_SALARY_PATTERN.match(text, match.end()):
+            continue
+        if match.group(2) or match.group(4):
+            return match
+        fallback = fallback or match
+    return fallback
+
+
+def parse_salary(text: Optional[str]) -> Optional[SalaryRange]:
+    """
+    解析薪资文本
+    
+    支持 "15-25K"、"15k~25k·14薪"、"25K×14"、"1.5-2.5万"、"15000-25000元/月"、"年薪30-50万"、
+    "200元/天"、"25K以上" 等写法。"面议"等无法解析的文本返回None。
+    """
+    if not text:
+        return None
+    text = unicodedata.normalize("NFKC", text).lower().replace(",", "")
+    months_match = _MONTHS_PATTERN.search(text)
+    months = int(months_match.group(1) or months_match.group(2)) if months_match else 12
+    months = months if 12 <= months <= 24 else 12
+    # 去掉薪数后再找金额，避免把 "14薪"、"×14" 当成薪资
+    text = _MONTHS_PATTERN.sub(" ", text)
+    match = _salary_match(text)
+    if not match:
+        return None
+    
+    low_text, low_unit, high_text, high_unit = match.groups()
+    annual = bool(_ANNUAL_PATTERN.search(text))
+    daily = bool(_DAILY_PATTERN.search(text))
+    unit = high_unit or low_unit
+    if unit is None:
+        # 无单位：日薪和大数字按元计，年薪默认按万计，其余按K计
+        if daily or float(high_text or low_text) >= 1000:
+            unit = "元"
+        else:
+            unit = "万" if annual else "k"
+    scale = _UNIT_SCALE[unit]
+    # "1.5万-25000元" 这类两端单位不同的写法
+    low_scale = _UNIT_SCALE[low_unit] if low_unit and high_unit else scale
+    
+    low = float(low_text) * low_scale
+    high = float(high_text) * scale if high_text else low
+    if daily:
+        low, high = low * _WORKDAYS_PER_MONTH, high * _WORKDAYS_PER_MONTH
+    elif annual:
+        low, high, months = low / 12, high / 12, 12
+    else:
+        low, high = low * months / 12, high * months / 12
+    
+    if not high_text:
+        # 只看到下一个数字为止，避免 "20K 5年以上" 里经验的 "以上" 被算进来
+        rest = re.split(r'\d', text[match.end():], maxsplit=1)[0]
+        if _ABOVE_PATTERN.search(rest):
+            high = math.inf
+        elif _BELOW_PATTERN.search(rest):
+            low = 0.0
+    if low > high:
+        low, high = high, low
+    return SalaryRange(round(low, 2), high if math.isinf(high) else round(high, 2), months)
+
+
+# 标准城市名及其别名（英文、拼音、简称）
+CITY_ALIASES = {
+    "北京": ("beijing", "peking", "京"),
+    "上海": ("shanghai", "沪"),
+    "深圳": ("shenzhen",),
+    "广州": ("guangzhou", "canton"),
+    "杭州": ("hangzhou",),
+    "成都": ("chengdu",),
+    "南京": ("nanjing",),
+    "武汉": ("wuhan",),
+    "西安": ("xi'an", "xian"),
+    "苏州": ("suzhou",),
+    "天津": ("tianjin",),
+    "重庆": ("chongqing",),
+    "长沙": ("changsha",),
+    "厦门": ("xiamen",),
+    "合肥": ("hefei",),
+    "珠海": ("zhuhai",),
+    "东莞": ("dongguan",),
+    "青岛": ("qingdao",),
+    "大连": ("dalian",),
+    "济南": ("jinan",),
+    "郑州": ("zhengzhou",),
+    "香港": ("hong kong", "hongkong"),
+    "新加坡": ("singapore",),
+}
+REMOTE = "远程"
+ANYWHERE = "不限"
+_REMOTE_ALIASES = ("远程", "remote", "在家办公", "wfh")
+_ANYWHERE_ALIASES = ("不限", "全国", "任意", "anywhere")
+
+_LOCATION_SEPARATORS = re.compile(r'[/、,，;；|]|\s+or\s+|或')
+_ALIAS_TO_CITY = {alias: city for city, aliases in CITY_ALIASES.items() for alias in (city, *aliases)}
+# 较长的别名优先匹配（"hong kong" 先于 "京" 这类单字简称）
+_CITY_PATTERN = re.compile("|".join(
+    re.escape(alias) for alias in sorted(_ALIAS_TO_CITY, key=len, reverse=True) if len(alias) > 1
+))
+
+
+def _cities(text: Optional[str]) -> list[str]:
+    """按原文顺序列出标准城市名（去重）"""
+    if not text:
+        return []
+    text = unicodedata.normalize("NFKC", text).strip().lower()
+    cities: list[str] = []
+    for part in _LOCATION_SEPARATORS.split(text):
+        part = part.strip()
+        if not part:
+            continue
+        if any(alias in part for alias in _REMOTE_ALIASES):
+            found = [REMOTE]
+        elif any(alias in part for alias in _ANYWHERE_ALIASES):
+            found = [ANYWHERE]
+        elif part in _ALIAS_TO_CITY:
+            found = [_ALIAS_TO_CITY[part]]
+        else:
+            found = [_ALIAS_TO_CITY[m] for m in _CITY_PATTERN.findall(part)]
+            found = found or [re.split(r'[·\-(（]', part)[0].removesuffix("市").strip()]
+        cities.extend(city for city in found if city and city not in cities)
+    return cities
+
+
+def normalize_locations(text: Optional[str]) -> frozenset[str]:
+    """
+    把工作地点文本归一化为标准城市名集合
+    
+    例如 "北京市海淀区" -> {"北京"}，"Shanghai / 杭州" -> {"上海", "杭州"}，
+    "远程" -> {"远程"}，"全国" -> {"不限"}。识别不出城市时保留去掉行政区后缀的原文。
+    """
+    return frozenset(_cities(text))
+
+
+def normalize_location(text: Optional[str]) -> str:
+    """工作地点的主要城市（多个城市时取原文中第一个），无法识别时返回空字符串"""
+    cities = _cities(text)
+    return cities[0] if cities else ""
@@ -0,0 +1,72 @@
+"""
+对象存储模块 - 在服务端保存解析结果，客户端只需传回短ID
+"""
+import json
+import time
+import hashlib
+from collections import OrderedDict
+from typing import Any, Optional
+
+from config import settings
+
+
+def dumps_compact(obj: Any) -> str:
+    """紧凑JSON（不转义中文、不加空格），无法序列化的值转为字符串"""
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=str)
+
+
+class ObjectStore:
+    """
+    带过期时间和容量上限的内存对象存储
+    
+    ID由类型前缀加内容哈希组成（如 resume_3f2a9c1b04de），相同内容重复保存得到同一个ID。
+    保存和读取都会刷新过期时间，因此条目按过期先后排列，淘汰时只需从头部弹出；
+    超出容量时同样淘汰最久未使用的对象。对象按引用保存，调用方不应修改 get 返回的对象。
+    """
+    
+    ID_LENGTH = 12
+    
+    def __init__(self, ttl_seconds: Optional[float] = None, max_entries: Optional[int] = None):
+        self.ttl_seconds = ttl_seconds or settings.MCP_OBJECT_TTL_SECONDS
+        self.max_entries = max_entries or settings.MCP_OBJECT_MAX_ENTRIES
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def put(self, kind: str, obj: Any) -> str:
+        """
+        保存对象
+        
+        Args:
+            kind: 对象类型，作为ID前缀（resume、company、match）
+            obj: 可JSON序列化的对象
+        
+        Returns:
+            对象ID
+        """
+        digest = hashlib.sha256(dumps_compact(obj).encode("utf-8")).hexdigest()
+        object_id = f"{kind}_{digest[:self.ID_LENGTH]}"
+        self._entries[object_id] = (time.monotonic() + self.ttl_seconds, obj)
+        self._entries.move_to_end(object_id)
+        self._evict()
+        return object_id
+    
+    def get(self, object_id: str, kind: Optional[str] = None) -> Optional[Any]:
+        """读取对象，不存在、已过期或类型不符时返回None"""
+        if kind and not object_id.startswith(f"{kind}_"):
+            return None
+        self._evict()
+        entry = self._entries.get(object_id)
+        if entry is None:
+            return None
+        self._entries[object_id] = (time.monotonic() + self.ttl_seconds, entry[1])
+        self._entries.move_to_end(object_id)
+        return entry[1]
+    
+    def _evict(self):
+        now = time.monotonic()
+        while self._entries and next(iter(self._entries.values()))[0] <= now:
+            self._entries.popitem(last=False)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
@@ -0,0 +1,285 @@
+"""
+链路追踪模块 - 记录一次分析在爬取、解析、提示词构建、模型调用等各阶段的耗时
+
+用法:
+    with span("scraper.fetch", url=url) as sp:
+        ...
+        sp.set(bytes=len(text), cache="miss")
+    
+    @traced("resume.parse_file")
+    async def parse_file(self, file_path): ...
+
+span 通过 contextvars 找到父span，asyncio 任务和 to_thread 都会继承上下文，
+并发执行的子阶段自动挂在发起它们的span下面。未启用时 span() 返回共享的空对象，
+开销只有一次属性判断。根span结束时整条链路交给后台线程写入导出文件，不在事件循环中做文件IO。
+"""
+import json
+import time
+import queue
+import atexit
+import random
+import asyncio
+import functools
+import threading
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Callable, Optional
+from loguru import logger
+
+from config import settings
+
+_current: ContextVar[Optional["Span"]] = ContextVar("trace_span", default=None)
+
+
+class Span:
+    """一个计时区间，with 语句结束时记录耗时和状态（ok/error/cancelled）"""
+    
+    __slots__ = (
+        "tracer", "name", "trace_id", "span_id", "parent_id", "attributes",
+        "status", "start_ns", "end_ns", "_started", "_token"
+    )
+    
+    def __init__(self, tracer: "Tracer", name: str, parent: Optional["Span"], attributes: dict):
+        self.tracer = tracer
+        self.name = name
+        self.trace_id = parent.trace_id if parent else f"{random.getrandbits(128):032x}"
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent.span_id if parent else None
+        self.attributes = attributes
+        self.status = "ok"
+        self.start_ns = 0
+        self.end_ns = 0
+        self._started = 0
+        self._token = None
+    
+    def set(self, **attributes: Any) -> "Span":
+        """添加属性（字节数、token数、是否命中缓存等）"""
+        self.attributes.update(attributes)
+        return self
+    
+    def record_error(self, error: Any):
+        """记录被捕获、没有向上抛出的错误"""
+        self.status = "error"
+        self.attributes["error"] = str(error)
+    
+    @property
+    def duration_ms(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e6
+    
+    def __enter__(self) -> "Span":
+        self.tracer._open(self)
+        self.start_ns = time.time_ns()
+        self._started = time.perf_counter_ns()
+        self._token = _current.set(self)
+        return self
+    
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        self.end_ns = self.start_ns + time.perf_counter_ns() - self._started
+        if exc_type is not None:
+            if issubclass(exc_type, asyncio.CancelledError):
+                self.status = "cancelled"
+            else:
+                self.record_error(exc)
+        _current.reset(self._token)
+        self.tracer._finish(self)
+        return False
+    
+    def to_dict(self) -> dict:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start_ns": self.start_ns,
+            "duration_ms": round(self.duration_ms, 3),
+            "status": self.status,
+            "attributes": self.attributes
+        }
+
+
+class _NoopSpan:
+    """未启用追踪或不在任何span中时使用，所有方法什么都不做"""
+    
+    __slots__ = ()
+    
+    def set(self, **attributes: Any) -> "_NoopSpan":
+        return self
+    
+    def record_error(self, error: Any):
+        pass
+    
+    def __enter__(self) -> "_NoopSpan":
+        return self
+    
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        return False
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+def _otlp_value(value: Any) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def to_otlp(spans: list[Span], service_name: str = "offer-matcher") -> dict:
+    """转换为OTLP/JSON的 ExportTraceServiceRequest，可由 OpenTelemetry Collector 的文件接收器读取"""
+    status_codes = {"ok": 1, "error": 2, "cancelled": 2}
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": service_name}}]},
+            "scopeSpans": [{
+                "scope": {"name": "offer_matcher"},
+                "spans": [
+                    {
+                        "traceId": span.trace_id,
+                        "spanId": span.span_id,
+                        "parentSpanId": span.parent_id or "",
+                        "name": span.name,
+                        "kind": 1,
+                        "startTimeUnixNano": str(span.start_ns),
+                        "endTimeUnixNano": str(span.end_ns),
+                        "attributes": [
+                            {"key": key, "value": _otlp_value(value)} for key, value in span.attributes.items()
+                        ],
+                        "status": {"code": status_codes[span.status], "message": span.attributes.get("error", "")}
+                    }
+                    for span in spans
+                ]
+            }]
+        }]
+    }
+
+
+class Tracer:
+    """
+    收集span并在根span结束时导出
+    
+    同一链路的span先暂存，根span结束时一起写入；根span结束后才结束的子span（如仍在运行的
+    共享任务）单独写入。序列化和写文件在后台线程中进行，结束span只是入队；
+    flush() 等待已结束的链路写完（进程退出时自动调用）。导出格式：
+    - jsonl：每行一个span
+    - otlp：每条链路一行OTLP/JSON
+    """
+    
+    def __init__(
+        self,
+        enabled: Optional[bool] = None,
+        path: Optional[Path] = None,
+        export_format: Optional[str] = None
+    ):
+        self.configure(enabled, path, export_format)
+        self._traces: dict[str, list[Span]] = {}
+        self._lock = threading.Lock()
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._thread: Optional[threading.Thread] = None
+    
+    def configure(
+        self,
+        enabled: Optional[bool] = None,
+        path: Optional[Path] = None,
+        export_format: Optional[str] = None
+    ):
+        """修改配置，未指定的参数使用settings中的值"""
+        self.enabled = settings.TRACING_ENABLED if enabled is None else enabled
+        self.path = Path(path or settings.TRACE_EXPORT_PATH or settings.LOGS_DIR / "traces.jsonl")
+        self.export_format = export_format or settings.TRACE_EXPORT_FORMAT
+        if self.export_format not in ("jsonl", "otlp"):
+            raise ValueError(f"不支持的追踪导出格式: {self.export_format}")
+    
+    def span(self, name: str, **attributes: Any) -> Span | _NoopSpan:
+        if not self.enabled:
+            return NOOP_SPAN
+        return Span(self, name, _current.get(), attributes)
+    
+    def _open(self, span: Span):
+        if span.parent_id is None:
+            with self._lock:
+                self._traces[span.trace_id] = []
+    
+    def _finish(self, span: Span):
+        with self._lock:
+            if span.parent_id is None:
+                spans = self._traces.pop(span.trace_id, [])
+                spans.append(span)
+            else:
+                pending = self._traces.get(span.trace_id)
+                if pending is not None:
+                    pending.append(span)
+                    return
+                spans = [span]
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+                self._thread.start()
+                atexit.register(self.flush, 5.0)
+            self._queue.put((spans, self.path, self.export_format))
+    
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """等待此前结束的链路全部写入导出文件"""
+        if self._thread is None:
+            return True
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+    
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if isinstance(item, threading.Event):
+                item.set()
+                continue
+            try:
+                self._export(*item)
+            except Exception as e:
+                logger.warning(f"链路导出失败: {e}")
+    
+    @staticmethod
+    def _export(spans: list[Span], path: Path, export_format: str):
+        if export_format == "otlp":
+            lines = [json.dumps(to_otlp(spans), ensure_ascii=False, default=str)]
+        else:
+            lines = [json.dumps(span.to_dict(), ensure_ascii=False, default=str) for span in spans]
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "a", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+
+
+tracer = Tracer()
+
+
+def span(name: str, **attributes: Any) -> Span | _NoopSpan:
+    """创建span（在 with 语句中使用），未启用追踪时返回空对象"""
+    return tracer.span(name, **attributes)
+
+
+def current_span() -> Span | _NoopSpan:
+    """当前所在的span，用于在函数内部补充属性；不在span中时返回空对象"""
+    return _current.get() or NOOP_SPAN
+
+
+def traced(name: str) -> Callable:
+    """把整个函数（同步或异步）放进一个span"""
+    def decorator(func: Callable) -> Callable:
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if not tracer.enabled:
+                    return await func(*args, **kwargs)
+                with tracer.span(name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+        
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not tracer.enabled:
+                return func(*args, **kwargs)
+            with tracer.span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
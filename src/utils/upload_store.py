@@ -0,0 +1,122 @@
+"""
+上传文件存储模块 - 按内容哈希去重存储
+"""
+import os
+import uuid
+import hashlib
+import threading
+from pathlib import Path
+from typing import Optional, Union
+from loguru import logger
+
+from config import settings
+
+
+BufferLike = Union[bytes, bytearray, memoryview]
+
+
+class UploadStore:
+    """
+    内容寻址的上传文件存储
+    
+    文件按SHA-256存放在 <root>/<前两位>/<哈希>.<后缀>，相同内容只写一次；
+    总大小超过上限时按最近访问时间淘汰最旧的文件。
+    """
+    
+    CHUNK_SIZE = 1024 * 1024
+    
+    def __init__(
+        self,
+        root: Optional[Path] = None,
+        max_size_mb: Optional[int] = None
+    ):
+        self.root = root or settings.CACHE_DIR / "uploads"
+        self.max_bytes = (max_size_mb or settings.UPLOAD_CACHE_MAX_MB) * 1024 * 1024
+        self._cleanup_lock = threading.Lock()
+    
+    @staticmethod
+    def digest(data: BufferLike) -> str:
+        """计算内容哈希（memoryview不会被复制）"""
+        return hashlib.sha256(data).hexdigest()
+    
+    def path_for(self, digest: str, suffix: str) -> Path:
+        """内容哈希对应的存储路径"""
+        return self.root / digest[:2] / f"{digest}.{suffix}"
+    
+    def put(self, data: BufferLike, filename: str, digest: Optional[str] = None) -> Path:
+        """
+        存储上传内容，已存在时只刷新访问时间
+        
+        Args:
+            data: 文件内容（可直接传入 UploadedFile.getbuffer() 的memoryview）
+            filename: 原始文件名，仅用于确定后缀
+            digest: 已计算好的内容哈希（可选）
+        
+        Returns:
+            存储路径
+        """
+        view = memoryview(data)
+        digest = digest or self.digest(view)
+        suffix = Path(filename).suffix.lower().lstrip('.') or "bin"
+        path = self.path_for(digest, suffix)
+        
+        if path.exists():
+            os.utime(path)
+            return path
+        
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # 先写临时文件再原子替换，并发上传相同内容时不会读到半截文件
+        tmp_path = path.with_name(f"{path.name}.{uuid.uuid4().hex}.tmp")
+        try:
+            with open(tmp_path, "wb") as f:
+                for offset in range(0, view.nbytes, self.CHUNK_SIZE):
+                    f.write(view[offset:offset + self.CHUNK_SIZE])
+            os.replace(tmp_path, path)
+        finally:
+            if tmp_path.exists():
+                tmp_path.unlink()
+        
+        logger.info(f"保存上传文件: {filename} -> {path.name}")
+        self.cleanup(keep=path)
+        return path
+    
+    def cleanup(self, keep: Optional[Path] = None) -> int:
+        """
+        超出容量上限时按访问时间淘汰最旧的文件
+        
+        Args:
+            keep: 不淘汰的文件（刚写入的文件，即使单个就超过上限也保留）
+        
+        Returns:
+            删除的文件数
+        """
+        with self._cleanup_lock:
+            entries = []
+            total = 0
+            for path in self.root.glob("*/*"):
+                if path.name.endswith(".tmp"):
+                    continue
+                try:
+                    stat = path.stat()
+                except FileNotFoundError:
+                    continue
+                total += stat.st_size
+                if path != keep:
+                    entries.append((stat.st_mtime, stat.st_size, path))
+            
+            if total <= self.max_bytes:
+                return 0
+            
+            removed = 0
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    path.unlink()
+                except FileNotFoundError:
+                    pass
+                total -= size
+                removed += 1
+            
+            logger.info(f"清理上传缓存: 删除 {removed} 个文件")
+            return removed
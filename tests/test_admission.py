@@ -0,0 +1,122 @@
+"""
+MCP工具准入控制的测试
+"""
+import asyncio
+
+import pytest
+
+from src.utils.admission import AdmissionController, OverloadedError
+
+
+async def _hold(controller: AdmissionController, name: str, release: asyncio.Event, started: list):
+    async with controller.admit(name):
+        started.append(name)
+        await release.wait()
+
+
+async def _settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def test_admits_up_to_limit_then_queues():
+    async def scenario():
+        controller = AdmissionController(limits={"slow": 2}, default_limit=4, max_queue=5, queue_timeout=5)
+        release, started = asyncio.Event(), []
+        tasks = [asyncio.create_task(_hold(controller, "slow", release, started)) for _ in range(3)]
+        await _settle()
+        
+        stats = controller.stats()["tools"]["slow"]
+        assert (len(started), stats["in_flight"], stats["waiting"]) == (2, 2, 1)
+        
+        release.set()
+        await asyncio.gather(*tasks)
+        stats = controller.stats()["tools"]["slow"]
+        assert (stats["admitted"], stats["completed"], stats["in_flight"], stats["waiting"]) == (3, 3, 0, 0)
+    
+    asyncio.run(scenario())
+
+
+def test_rejects_when_queue_is_full():
+    async def scenario():
+        controller = AdmissionController(limits={}, default_limit=1, max_queue=1, queue_timeout=5)
+        release, started = asyncio.Event(), []
+        tasks = [asyncio.create_task(_hold(controller, "tool", release, started)) for _ in range(2)]
+        await _settle()
+        
+        with pytest.raises(OverloadedError) as excinfo:
+            async with controller.admit("tool"):
+                pass
+        assert excinfo.value.reason == "等待队列已满"
+        assert excinfo.value.retry_after >= 1
+        assert controller.stats()["rejected"] == 1
+        
+        release.set()
+        await asyncio.gather(*tasks)
+    
+    asyncio.run(scenario())
+
+
+def test_rejects_after_queue_timeout_and_keeps_capacity():
+    async def scenario():
+        controller = AdmissionController(limits={}, default_limit=1, max_queue=5, queue_timeout=0.05)
+        release, started = asyncio.Event(), []
+        holder = asyncio.create_task(_hold(controller, "tool", release, started))
+        await _settle()
+        
+        with pytest.raises(OverloadedError) as excinfo:
+            async with controller.admit("tool"):
+                pass
+        assert excinfo.value.reason == "排队超时"
+        assert controller.stats()["waiting"] == 0
+        
+        release.set()
+        await holder
+        # 超时的等待者不能占用名额
+        async with controller.admit("tool"):
+            assert controller.stats()["in_flight"] == 1
+    
+    asyncio.run(scenario())
+
+
+def test_releases_slot_on_error_and_cancellation():
+    async def scenario():
+        controller = AdmissionController(limits={}, default_limit=1, max_queue=5, queue_timeout=5)
+        with pytest.raises(RuntimeError):
+            async with controller.admit("tool"):
+                raise RuntimeError("工具出错")
+        
+        release, started = asyncio.Event(), []
+        holder = asyncio.create_task(_hold(controller, "tool", release, started))
+        waiter = asyncio.create_task(_hold(controller, "tool", release, started))
+        await _settle()
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        assert controller.stats()["waiting"] == 0
+        
+        release.set()
+        await holder
+        async with controller.admit("tool"):
+            pass
+        assert controller.stats()["tools"]["tool"]["completed"] == 3
+    
+    asyncio.run(scenario())
+
+
+def test_tools_have_independent_limits():
+    async def scenario():
+        controller = AdmissionController(limits={"a": 1}, default_limit=1, max_queue=0, queue_timeout=5)
+        release, started = asyncio.Event(), []
+        holder = asyncio.create_task(_hold(controller, "a", release, started))
+        await _settle()
+        
+        async with controller.admit("b"):
+            pass
+        with pytest.raises(OverloadedError):
+            async with controller.admit("a"):
+                pass
+        
+        release.set()
+        await holder
+    
+    asyncio.run(scenario())
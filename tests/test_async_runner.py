@@ -0,0 +1,124 @@
+"""
+并发调用合并（SharedTasks）的测试
+"""
+import asyncio
+
+import pytest
+
+from src.utils.async_runner import SharedTasks
+
+
+class Factory:
+    """记录调用次数，在 release 之前一直挂起；被取消后还要 cleanup 秒才结束（模拟关闭连接）"""
+    
+    def __init__(self, cleanup: float = 0):
+        self.calls = 0
+        self.cancelled = 0
+        self.cleanup = cleanup
+        self.release = asyncio.Event()
+    
+    async def __call__(self):
+        self.calls += 1
+        call = self.calls
+        try:
+            await self.release.wait()
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            await asyncio.sleep(self.cleanup)
+            raise
+        return call
+
+
+async def _settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def test_concurrent_calls_share_one_task():
+    async def scenario():
+        shared, factory = SharedTasks(), Factory()
+        waiters = [asyncio.create_task(shared.run("k", factory)) for _ in range(3)]
+        other = asyncio.create_task(shared.run("other", factory))
+        await _settle()
+        assert len(shared) == 2
+        
+        factory.release.set()
+        results = await asyncio.gather(*waiters)
+        assert len(set(results)) == 1
+        await other
+        assert factory.calls == 2
+        assert len(shared) == 0
+    
+    asyncio.run(scenario())
+
+
+def test_cancelling_some_waiters_keeps_task_running():
+    async def scenario():
+        shared, factory = SharedTasks(), Factory()
+        first = asyncio.create_task(shared.run("k", factory))
+        second = asyncio.create_task(shared.run("k", factory))
+        await _settle()
+        
+        first.cancel()
+        await _settle()
+        assert first.cancelled()
+        assert factory.cancelled == 0 and len(shared) == 1
+        
+        factory.release.set()
+        assert await second == 1
+        assert factory.calls == 1
+    
+    asyncio.run(scenario())
+
+
+def test_cancelling_last_waiter_cancels_and_discards_task():
+    async def scenario():
+        shared, factory = SharedTasks(), Factory(cleanup=0.05)
+        waiters = [asyncio.create_task(shared.run("k", factory)) for _ in range(2)]
+        await _settle()
+        
+        for waiter in waiters:
+            waiter.cancel()
+        # 取消后立即从表中移除，不等任务取消完成
+        await asyncio.gather(*waiters, return_exceptions=True)
+        assert len(shared) == 0
+        assert factory.cancelled == 1
+    
+    asyncio.run(scenario())
+
+
+def test_rejoin_after_cancel_starts_new_task():
+    async def scenario():
+        shared, factory = SharedTasks(), Factory(cleanup=0.05)
+        waiter = asyncio.create_task(shared.run("k", factory))
+        await _settle()
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        
+        # 旧任务还在取消中，再次调用不能加入它
+        rejoined = asyncio.create_task(shared.run("k", factory))
+        await _settle()
+        factory.release.set()
+        assert await rejoined == 2
+        assert factory.calls == 2 and factory.cancelled == 1
+    
+    asyncio.run(scenario())
+
+
+def test_factory_error_reaches_all_waiters():
+    async def scenario():
+        shared = SharedTasks()
+        
+        async def failing():
+            await asyncio.sleep(0)
+            raise RuntimeError("失败")
+        
+        results = await asyncio.gather(
+            shared.run("k", failing), shared.run("k", failing), return_exceptions=True
+        )
+        assert [type(result) for result in results] == [RuntimeError, RuntimeError]
+        assert results[0] is results[1]
+        assert len(shared) == 0
+    
+    asyncio.run(scenario())
@@ -0,0 +1,107 @@
+"""
+MCP批量分析工具（batch_analyze_jobs）的排序与筛除测试，匹配分析用桩代替模型
+"""
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("mcp")
+
+from config import settings
+from src.ai.matcher import OfferMatcher
+from src.mcp_server import OfferMatcherServer
+
+RESUME = {"skills": ["Python", "MySQL", "Redis"]}
+JD = {
+    "a": "负责交易系统后端开发，要求熟悉Python、MySQL和Redis，有高并发系统经验者优先，参与架构设计。",
+    "b": "负责数据平台开发，要求熟悉Python和Kafka，参与离线与实时数据链路建设和维护工作。",
+    "c": "负责基础设施建设，要求熟悉Go、Kubernetes和Docker，有大规模集群运维经验者优先。",
+    "d": "负责产品规划和用户调研，与研发团队协作推进需求落地。",
+}
+SCORES = {"a": 70, "b": 85, "d": 60}
+
+
+class StubMatcher(OfferMatcher):
+    """预筛用真实逻辑，匹配分析按岗位描述返回固定分数"""
+    
+    def __init__(self):
+        super().__init__()
+        self.analyzed = []
+    
+    async def analyze_match(self, resume_data, job_description, company_info, user_preferences, on_token=None):
+        key = next(key for key, text in JD.items() if job_description.startswith(text))
+        self.analyzed.append((key, company_info.get("company_name")))
+        await asyncio.sleep(0)
+        if key not in SCORES:
+            return {"error": "模型超时"}
+        return {"overall_score": SCORES[key], "decision": "推荐投递"}
+
+
+@pytest.fixture
+def server(monkeypatch):
+    monkeypatch.setattr(settings, "DEDUP_ENABLED", True)
+    monkeypatch.setattr(settings, "MCP_BATCH_CONCURRENCY", 2)
+    
+    async def get_positions(ids):
+        return []
+    
+    instance = OfferMatcherServer()
+    instance._pipeline = SimpleNamespace(matcher=StubMatcher(), get_positions=get_positions)
+    return instance
+
+
+def _run(server, **args) -> dict:
+    return asyncio.run(server._batch_analyze_jobs({"resume_data": RESUME, **args}))
+
+
+def test_ranking_and_screened_out(server):
+    jobs = [
+        {"id": "a", "title": "后端", "company_name": "甲", "job_description": JD["a"]},
+        {"id": "a2", "title": "后端（二）", "company_name": "甲", "job_description": JD["a"] + "。"},
+        {"id": "b", "title": "数据", "company_name": "甲", "job_description": JD["b"]},
+        {"id": "c", "title": "运维", "company_name": "乙", "job_description": JD["c"]},
+        {"id": "d", "title": "产品", "company_name": "乙", "job_description": JD["d"]},
+    ]
+    result = _run(server, jobs=jobs, max_analyze=3)
+    
+    assert (result["total"], result["analyzed"]) == (5, 3)
+    # 预筛得分 a=1.0 > b=0.5 = d=0.5 > c=0.0，得分最低的c未分析，a2与a近似重复
+    assert sorted(key for key, _ in server.matcher.analyzed) == ["a", "b", "d"]
+    assert [(entry["job_id"], entry["overall_score"]) for entry in result["ranking"]] == [
+        ("b", 85), ("a", 70), ("a2", 70), ("d", 60)
+    ]
+    duplicate = result["ranking"][2]
+    assert duplicate["duplicate_of"] == "a" and duplicate["title"] == "后端（二）"
+    assert result["failed"] == []
+    assert result["screened_out"] == [
+        {"job_id": "c", "title": "运维", "prescreen_score": 0.0, "reason": "预筛得分较低，未分析"}
+    ]
+    for entry in result["ranking"]:
+        assert server.store.get(entry["match_id"], "match")["overall_score"] == entry["overall_score"]
+
+
+def test_failures_are_shared_with_duplicates(server):
+    jobs = [JD["c"], JD["c"] + "。", JD["b"]]
+    result = _run(server, jobs=jobs)
+    
+    assert [entry["job_id"] for entry in result["ranking"]] == ["job_3"]
+    # 重复岗位沿用被复用岗位的结果，失败也一样
+    assert [(entry["job_id"], entry["error"], entry.get("duplicate_of")) for entry in result["failed"]] == [
+        ("job_1", "模型超时", None), ("job_2", "模型超时", "job_1")
+    ]
+    assert result["screened_out"] == []
+
+
+def test_preference_exclusion_reason(server):
+    server.matcher.prescreen_jobs = lambda resume, jobs, prefs: [
+        {"prescreen_score": 1.0, "matched_skills": [], "missing_skills": []},
+        {"prescreen_score": 0.9, "matched_skills": [], "missing_skills": [], "excluded": "薪资或地点不符合期望"},
+    ]
+    result = _run(server, jobs=[JD["a"], JD["b"]], user_preferences={"location": "北京"})
+    assert [entry["job_id"] for entry in result["ranking"]] == ["job_1"]
+    assert result["screened_out"][0]["reason"] == "薪资或地点不符合期望"
+
+
+def test_requires_jobs(server):
+    assert "error" in _run(server)
@@ -0,0 +1,103 @@
+"""
+批量爬取的测试（对接本地测试站点 FixtureServer）
+"""
+import asyncio
+import json
+
+import pytest
+
+from config import settings
+from src.scrapers.bulk_crawler import BulkCrawler, load_company_list
+from src.scrapers.company_scraper import CompanyScraper
+from src.scrapers.fixture_server import FixtureServer
+
+COMPANIES = 8
+
+
+@pytest.fixture(autouse=True)
+def fast_crawl(monkeypatch):
+    # 测试站点在本机，不需要限速；关闭HTTP缓存保证每次都真的请求页面
+    monkeypatch.setattr(settings, "CRAWLER_DELAY", 0.0)
+    monkeypatch.setattr(settings, "HTTP_CACHE_ENABLED", False)
+
+
+def _write_list(server: FixtureServer, path):
+    server.write_company_list(path)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write("\n# 注释行\n")
+        # 编号超出范围，官网首页404
+        f.write(f"不存在的公司\t{server.base_url}/c/{COMPANIES + 1}/\n")
+
+
+def _read_jsonl(path) -> list[dict]:
+    if not path.exists():
+        return []
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+
+
+def test_load_company_list(tmp_path):
+    path = tmp_path / "companies.txt"
+    path.write_text("# 标题\n甲公司\n\n乙公司, https://b.example.com\n丙公司\thttps://c.example.com\n丁公司,\n", encoding="utf-8")
+    assert list(load_company_list(path)) == [
+        ("甲公司", None),
+        ("乙公司", "https://b.example.com"),
+        ("丙公司", "https://c.example.com"),
+        ("丁公司", None),
+    ]
+
+
+def test_interrupted_crawl_resumes_from_checkpoint(tmp_path):
+    output_dir = tmp_path / "crawl"
+    list_path = tmp_path / "companies.txt"
+    
+    async def scenario():
+        server = FixtureServer(port=0, companies=COMPANIES, latency=0.02)
+        await server.start()
+        try:
+            _write_list(server, list_path)
+            
+            # 第一次运行：完成几家公司后中断
+            first = BulkCrawler(output_dir=output_dir, concurrency=2, scraper=CompanyScraper())
+            task = asyncio.create_task(first.run(load_company_list(list_path)))
+            checkpoint = output_dir / "checkpoint.txt"
+            for _ in range(500):
+                await asyncio.sleep(0.01)
+                if checkpoint.exists() and len(checkpoint.read_text(encoding="utf-8").splitlines()) >= 3:
+                    break
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+            await first.scraper.close()
+            interrupted = checkpoint.read_text(encoding="utf-8").splitlines()
+            
+            # 第二次运行：跳过断点中已完成的公司
+            second = BulkCrawler(output_dir=output_dir, concurrency=2, scraper=CompanyScraper())
+            try:
+                stats = await second.run(load_company_list(list_path))
+            finally:
+                await second.scraper.close()
+            return server, interrupted, stats
+        finally:
+            await server.stop()
+    
+    server, interrupted, stats = asyncio.run(scenario())
+    assert 3 <= len(interrupted) < COMPANIES
+    assert stats["skipped"] == len(interrupted)
+    assert stats["succeeded"] == COMPANIES - len(interrupted)
+    assert stats["failed"] == 1
+    assert stats["error_rate"] == round(1 / (stats["succeeded"] + 1), 4)
+    
+    results = _read_jsonl(output_dir / "results.jsonl")
+    names = [result["company_name"] for result in results]
+    assert sorted(names) == sorted(server.company_name(i) for i in range(COMPANIES))
+    assert all(result["positions"] and result["crawled_at"] for result in results)
+    assert sorted((output_dir / "checkpoint.txt").read_text(encoding="utf-8").splitlines()) == sorted(names)
+    
+    # 失败的公司不进断点，每次运行都会重试
+    errors = _read_jsonl(output_dir / "errors.jsonl")
+    assert {error["company_name"] for error in errors} == {"不存在的公司"}
+    assert errors[-1] == {
+        "company_name": "不存在的公司",
+        "url": f"{server.base_url}/c/{COMPANIES + 1}/",
+        "error": "官网首页爬取失败"
+    }
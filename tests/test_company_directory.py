@@ -0,0 +1,85 @@
+"""
+公司名录（别名解析、模糊查找、索引缓存）的测试
+"""
+import pytest
+
+from src.scrapers.company_directory import CompanyDirectory
+
+ALIASES = """\
+# 标准名称\t官网URL\t别名
+腾讯科技（深圳）有限公司\thttps://www.tencent.com\t腾讯|Tencent Holdings Ltd.|鹅厂
+阿里巴巴集团\thttps://www.alibaba.com\t阿里|Alibaba Group|阿里巴巴
+字节跳动有限公司\thttps://www.bytedance.com\t字节|ByteDance Ltd.|抖音
+Costco Wholesale Corporation\thttps://www.costco.com\tCostco
+缺少URL的公司\t
+重名公司\thttps://dup.example.com\t腾讯
+"""
+
+
+@pytest.fixture
+def directory(tmp_path):
+    path = tmp_path / "company_aliases.tsv"
+    path.write_text(ALIASES, encoding="utf-8")
+    return CompanyDirectory(path, cache_dir=tmp_path / "cache")
+
+
+@pytest.mark.parametrize("name, expected", [
+    ("腾讯科技（深圳）有限公司", "腾讯科技"),
+    ("腾讯科技(深圳)有限公司", "腾讯科技"),
+    ("Tencent Holdings Ltd.", "tencent"),
+    ("ＴＥＮＣＥＮＴ", "tencent"),
+    ("阿里巴巴集团有限公司", "阿里巴巴"),
+    ("Costco", "costco"),
+])
+def test_normalize(name, expected):
+    assert CompanyDirectory.normalize(name) == expected
+
+
+def test_lookup_exact_aliases(directory):
+    assert directory.lookup("鹅厂")["url"] == "https://www.tencent.com"
+    assert directory.lookup("tencent")["name"] == "腾讯科技（深圳）有限公司"
+    assert directory.lookup("BYTEDANCE")["url"] == "https://www.bytedance.com"
+    assert directory.lookup("不存在的公司") is None
+
+
+def test_rows_without_url_are_skipped_and_first_alias_wins(directory):
+    assert len(directory) == 5
+    assert directory.lookup("缺少URL的公司") is None
+    # 重复的别名归先出现的公司
+    assert directory.lookup("腾讯")["url"] == "https://www.tencent.com"
+    assert directory.lookup("重名公司")["url"] == "https://dup.example.com"
+
+
+def test_search_ranks_fuzzy_candidates(directory):
+    results = directory.search("阿里巴巴网络技术", min_score=0.3)
+    assert results[0]["name"] == "阿里巴巴集团"
+    assert 0.3 <= results[0]["score"] < 1.0
+    assert [r["score"] for r in results] == sorted((r["score"] for r in results), reverse=True)
+    assert directory.search("完全无关的名字", min_score=0.5) == []
+
+
+def test_resolve(directory):
+    assert directory.resolve("字节跳动") == "https://www.bytedance.com"
+    assert directory.resolve("字节跳动科技", min_score=0.5) == "https://www.bytedance.com"
+    assert directory.resolve("字节跳动科技", min_score=0.95) is None
+    assert directory.resolve("完全无关的名字", min_score=0.5) is None
+
+
+def test_missing_alias_file(tmp_path):
+    directory = CompanyDirectory(tmp_path / "missing.tsv", cache_dir=tmp_path)
+    assert directory.resolve("腾讯") is None
+    assert len(directory) == 0
+
+
+def test_index_cache_is_reused_until_source_changes(directory, tmp_path):
+    directory.load()
+    index_path = tmp_path / "cache" / "company_directory.pickle"
+    assert index_path.exists()
+    
+    cached = CompanyDirectory(directory.path, cache_dir=tmp_path / "cache")
+    cached._build = lambda: pytest.fail("别名表未变化时不应重新构建索引")
+    assert cached.lookup("鹅厂")["url"] == "https://www.tencent.com"
+    
+    directory.path.write_text(ALIASES + "美团\thttps://www.meituan.com\n", encoding="utf-8")
+    rebuilt = CompanyDirectory(directory.path, cache_dir=tmp_path / "cache")
+    assert rebuilt.lookup("美团")["url"] == "https://www.meituan.com"
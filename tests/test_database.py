@@ -0,0 +1,169 @@
+"""
+结果数据库与批量写入的测试（临时SQLite文件）
+"""
+import pytest
+from sqlalchemy import func, select
+
+from src.storage.batch_writer import BatchWriter
+from src.storage.database import Database
+from src.storage.schema import companies, positions
+
+
+@pytest.fixture
+def db(tmp_path):
+    database = Database(f"sqlite:///{tmp_path / 'test.db'}")
+    yield database
+    database.close()
+
+
+def _count(db: Database, table) -> int:
+    with db.engine.connect() as conn:
+        return conn.execute(select(func.count()).select_from(table)).scalar()
+
+
+def _scraped(name: str, positions_: list[dict], crawled_at: float = 1000.0) -> dict:
+    return {
+        "company_name": name,
+        "url": "https://example.com",
+        "basic_info": {"name": name},
+        "culture": {"values": ["开放"]},
+        "positions": positions_,
+        "crawled_at": crawled_at
+    }
+
+
+BACKEND = {"title": "后端工程师", "location": "北京市海淀区", "salary": "20k-30k", "requirements": ["Python"]}
+
+
+def test_save_companies_upserts_by_normalized_name(db):
+    db.save_companies([_scraped("示例科技有限公司", [BACKEND])])
+    db.save_companies([_scraped("示例科技", [{**BACKEND, "location": "北京", "salary": "20-30K", "requirements": ["Go"]}], 2000.0)])
+    db.save_companies([{"company_name": "失败公司", "error": "超时"}])
+    
+    assert _count(db, companies) == 1
+    assert _count(db, positions) == 1
+    company = db.get_company("示例科技（北京）有限公司")
+    assert company["company_name"] == "示例科技"
+    assert company["scraped_at"] == 2000.0
+    assert company["positions"][0]["requirements"] == ["Go"]
+    assert db.get_company("示例科技", max_age=60) is None
+    assert db.get_company("失败公司") is None
+
+
+def test_get_company_returns_only_positions_seen_in_latest_scrape(db):
+    frontend = {"title": "前端工程师", "location": "上海", "salary": "15-25K"}
+    db.save_companies([_scraped("示例", [BACKEND, frontend], 1000.0)])
+    db.save_companies([_scraped("示例", [frontend], 2000.0)])
+    assert [p["title"] for p in db.get_company("示例")["positions"]] == ["前端工程师"]
+
+
+def test_save_positions_is_idempotent_and_keeps_scraped_company_info(db):
+    db.save_companies([_scraped("示例", [])])
+    items = [
+        {"company_name": "示例", **BACKEND},
+        {"company_name": "示例", **BACKEND, "location": "北京", "salary": "20-30K"},
+        {"company_name": "新公司", "title": "测试工程师", "location": "远程", "salary": "面议"},
+        {"company_name": "", "title": "无公司"},
+    ]
+    # 同一批次内指纹相同的两条只计一次
+    assert db.save_positions(items, source="feed.jsonl", seen_at=100.0) == {"inserted": 2, "updated": 0}
+    assert db.save_positions(items, source="feed.jsonl", seen_at=200.0) == {"inserted": 0, "updated": 2}
+    
+    assert _count(db, companies) == 2
+    assert _count(db, positions) == 2
+    assert db.get_company("示例")["basic_info"] == {"name": "示例"}
+    with db.engine.connect() as conn:
+        row = conn.execute(select(positions).where(positions.c.title == "后端工程师")).mappings().one()
+    assert (row["first_seen_at"], row["last_seen_at"], row["city"]) == (100.0, 200.0, "北京")
+    assert (row["salary_min"], row["salary_max"]) == (20.0, 30.0)
+
+
+@pytest.fixture
+def catalog(db):
+    db.save_positions([
+        {"company_name": "甲", "title": "Python后端工程师", "location": "北京", "salary": "20-30K"},
+        {"company_name": "甲", "title": "python实习生", "location": "上海", "salary": "200元/天"},
+        {"company_name": "乙", "title": "Java开发", "location": "北京", "salary": "15-25K"},
+        {"company_name": "乙", "title": "Py_运维", "location": "远程", "salary": "40K以上"},
+        {"company_name": "丙", "title": "算法工程师", "location": "杭州", "salary": "面议"},
+    ])
+    return db
+
+
+def _titles(results: list[dict]) -> set[str]:
+    return {position["title"] for position in results}
+
+
+def test_title_prefix_search_ignores_ascii_case(catalog):
+    assert _titles(catalog.search_positions(title="python")) == {"Python后端工程师", "python实习生"}
+    assert _titles(catalog.search_positions(title="PYTHON后端")) == {"Python后端工程师"}
+    # 前缀中的 % 和 _ 按字面匹配
+    assert _titles(catalog.search_positions(title="py_")) == {"Py_运维"}
+    assert _titles(catalog.search_positions(title="py%")) == set()
+    assert catalog.search_positions(title="算法")[0]["company_name"] == "丙"
+
+
+def test_title_prefix_search_uses_index(catalog):
+    query = select(positions.c.id).where(*catalog._title_prefix("py"))
+    sql = str(query.compile(catalog.engine, compile_kwargs={"literal_binds": True}))
+    with catalog.engine.connect() as conn:
+        plan = " ".join(row[3] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}"))
+    assert "ix_positions_title_lower" in plan
+
+
+def test_salary_and_city_filters(catalog):
+    # 薪资区间有交集，面议（薪资未知）的岗位保留
+    assert _titles(catalog.search_positions(salary="28-35K")) == {"Python后端工程师", "算法工程师"}
+    assert _titles(catalog.search_positions(min_salary=41)) == {"Py_运维", "算法工程师"}
+    assert _titles(catalog.search_positions(max_salary=10)) == {"python实习生", "算法工程师"}
+    # 远程岗位对任何城市都保留
+    assert _titles(catalog.search_positions(location="北京市")) == {"Python后端工程师", "Java开发", "Py_运维"}
+    assert _titles(catalog.search_positions(location="北京", salary="15K")) == {"Java开发"}
+    assert len(catalog.search_positions(limit=2)) == 2
+
+
+def test_resumes_and_analyses(db):
+    db.save_resumes([
+        {"digest": "d1", "filename": "a.pdf", "data": {"name": "张三"}},
+        {"digest": "d2", "filename": "b.pdf", "data": {"error": "解析失败"}},
+    ])
+    assert db.get_resume("d1") == {"name": "张三"}
+    assert db.get_resume("d2") is None
+    
+    analysis = {
+        "company_name": "示例", "resume_digest": "d1", "job_hash": "j1",
+        "match_result": {"overall_score": 80}, "recommendations": {}, "report": {"content": "# 报告"}
+    }
+    db.save_analyses([analysis, {**analysis, "job_hash": "j2", "match_result": {"error": "超时"}}])
+    found = db.find_analysis("示例有限公司", "d1", "j1")
+    assert found["overall_score"] == 80 and found["report"]["content"] == "# 报告"
+    assert db.find_analysis("示例", "d1", "j2") is None
+    assert db.get_analysis(found["id"])["match_result"] == {"overall_score": 80}
+    assert [row["company_name"] for row in db.recent_analyses()] == ["示例"]
+
+
+def test_batch_writer_flush_and_close(db):
+    writer = BatchWriter(db, batch_size=100, flush_interval=60, max_queue=10)
+    assert writer.submit("company", _scraped("示例", [BACKEND]))
+    assert writer.submit("resume", {"digest": "d1", "filename": "a.txt", "data": {"name": "张三"}})
+    with pytest.raises(ValueError):
+        writer.submit("unknown", {})
+    
+    # 未攒够一批、未到刷新时间，flush 时写入
+    assert writer.flush(timeout=5)
+    assert db.get_company("示例") is not None
+    assert db.get_resume("d1") == {"name": "张三"}
+    assert writer.stats()["written"] == 2 and writer.stats()["batches"] == 2
+    
+    writer.submit("resume", {"digest": "d2", "filename": "b.txt", "data": {"name": "李四"}})
+    writer.close()
+    assert db.get_resume("d2") == {"name": "李四"}
+    assert not writer.submit("resume", {"digest": "d3", "data": {}})
+
+
+def test_batch_writer_counts_failed_batches(db):
+    writer = BatchWriter(db, batch_size=100, flush_interval=60)
+    writer.submit("resume", {"digest": "d1"})
+    writer.flush(timeout=5)
+    assert writer.stats()["failed"] == 1
+    writer.close()
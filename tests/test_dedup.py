@@ -0,0 +1,83 @@
+"""
+MinHash签名、LSH索引与岗位去重的测试
+"""
+import pytest
+
+from src.ai.dedup import LSHIndex, MinHasher, dedupe_positions
+
+JD = (
+    "负责公司核心交易系统的设计与开发，参与高并发服务的性能优化与稳定性建设；"
+    "熟悉Python或Go，掌握MySQL、Redis、Kafka等常用中间件，有分布式系统经验者优先"
+)
+JD_EDITED = (
+    "负责公司核心交易系统的设计与研发，参与高并发服务的性能优化与稳定性建设；"
+    "熟悉Python或Go，掌握MySQL、Redis、Kafka等常用中间件，有分布式系统经验者优先。工作地点：北京"
+)
+OTHER = "负责品牌市场活动的策划与执行，撰写新媒体文案，跟进渠道投放效果并输出数据分析报告"
+
+
+@pytest.fixture
+def hasher():
+    return MinHasher(num_perm=128)
+
+
+def _jaccard(hasher, a, b):
+    x, y = hasher.shingles(a), hasher.shingles(b)
+    return len(x & y) / len(x | y)
+
+
+def test_signature_is_deterministic_and_ignores_case_and_punctuation(hasher):
+    signature = hasher.signature(JD)
+    assert len(signature) == 128
+    assert (signature == MinHasher(num_perm=128).signature(JD)).all()
+    assert MinHasher.similarity(hasher.signature("Senior Python, Engineer!"), hasher.signature("senior python engineer")) == 1.0
+
+
+def test_similarity_estimates_jaccard(hasher):
+    for a, b in ((JD, JD_EDITED), (JD, OTHER)):
+        estimate = MinHasher.similarity(hasher.signature(a), hasher.signature(b))
+        assert abs(estimate - _jaccard(hasher, a, b)) < 0.15
+    assert MinHasher.similarity(hasher.signature(JD), hasher.signature(JD_EDITED)) >= 0.7
+    assert MinHasher.similarity(hasher.signature(JD), hasher.signature(OTHER)) < 0.3
+
+
+def test_short_and_empty_text(hasher):
+    assert len(hasher.shingles("ab")) == 1
+    assert hasher.shingles("") == set()
+    assert MinHasher.similarity(hasher.signature(""), hasher.signature("，。")) == 1.0
+
+
+def test_lsh_bands_must_divide_signature():
+    with pytest.raises(ValueError):
+        LSHIndex(num_perm=128, bands=30)
+
+
+def test_lsh_query_finds_near_duplicates(hasher):
+    index = LSHIndex(num_perm=128, bands=32)
+    index.add("jd", hasher.signature(JD))
+    index.add("other", hasher.signature(OTHER))
+    index.add("jd", hasher.signature(OTHER))
+    assert len(index) == 2 and "jd" in index
+    
+    matches = index.query(hasher.signature(JD_EDITED), threshold=0.7)
+    assert [key for key, _ in matches] == ["jd"]
+    assert index.query(hasher.signature(JD), threshold=0.7)[0] == ("jd", 1.0)
+    assert index.query(hasher.signature("完全不同的一段文字内容，和上面都没有关系"), threshold=0.5) == []
+
+
+def test_lsh_scopes_are_isolated(hasher):
+    index = LSHIndex(num_perm=128, bands=32)
+    index.add("a", hasher.signature(JD), scope="resume-1")
+    assert index.query(hasher.signature(JD), scope="resume-2", threshold=0.5) == []
+    assert index.query(hasher.signature(JD), scope="resume-1", threshold=0.5) == [("a", 1.0)]
+
+
+def test_dedupe_positions_keeps_first_within_same_location_and_salary(hasher):
+    positions = [
+        {"title": "后端工程师", "location": "北京", "salary": "20-30K", "responsibilities": [JD]},
+        {"title": "后端工程师", "location": "北京", "salary": "20-30K", "responsibilities": [JD_EDITED]},
+        {"title": "后端工程师", "location": "上海", "salary": "20-30K", "responsibilities": [JD]},
+        {"title": "市场专员", "location": "北京", "salary": "20-30K", "responsibilities": [OTHER]},
+    ]
+    kept = dedupe_positions(positions, hasher, threshold=0.7)
+    assert kept == [positions[0], positions[2], positions[3]]
@@ -0,0 +1,175 @@
+"""
+官网页面信息提取的测试（页面来自本地测试站点 FixtureServer 和内联HTML）
+"""
+import asyncio
+import json
+
+import pytest
+
+from src.scrapers.extractors import (
+    HTMLExtractor,
+    extract_basic_info,
+    extract_page,
+    extract_sitemap_urls,
+    merge_culture,
+)
+from src.scrapers.fixture_server import FixtureServer
+
+SITE = FixtureServer(host="example.test", port=80, companies=3)
+BASE = "http://example.test:80/c/1/"
+
+
+def test_basic_info_from_fixture_home_page():
+    info = extract_basic_info(SITE._home_page(1))
+    assert info == {
+        "description": "测试公司00001是一家专注于企业软件与云服务的科技公司。",
+        "industry": "互联网、软件、云计算",
+        "size": "500-1000人",
+        "founded": "2012"
+    }
+
+
+def test_basic_info_without_meta_or_footer():
+    html = "<html><body><h1>示例科技</h1><p></p><p>创立于2018年，团队200+人</p></body></html>"
+    assert extract_basic_info(html) == {
+        "description": "示例科技 创立于2018年，团队200+人",
+        "industry": "",
+        "size": "200+人",
+        "founded": "2018"
+    }
+
+
+def test_links_from_fixture_home_page():
+    data = extract_page(SITE._home_page(1), BASE, "home")
+    assert data["links"] == [
+        ("http://example.test:80/c/1/about", "关于我们"),
+        ("http://example.test:80/c/1/careers", "加入我们"),
+    ]
+    assert data["culture"] == {"values": [], "mission": "", "vision": ""}
+
+
+def test_links_skip_non_navigational_hrefs():
+    html = """<html><body>
+    <a href="jobs/1">岗位 <b>一</b></a><a href="#top">顶部</a><a href="mailto:hr@example.com">邮件</a>
+    <a href="javascript:void(0)">脚本</a><a href="https://other.example.com/">外站</a><a>无链接</a>
+    </body></html>"""
+    assert extract_page(html, "https://example.com/careers/", "home")["links"] == [
+        ("https://example.com/careers/jobs/1", "岗位 一"),
+        ("https://other.example.com/", "外站"),
+    ]
+
+
+def test_culture_from_fixture_about_page():
+    culture = extract_page(SITE._about_page(1), BASE + "about", "about")["culture"]
+    assert culture == {
+        "values": ["客户第一", "坦诚协作", "持续学习"],
+        "mission": "让软件开发更简单",
+        "vision": "成为最受信赖的企业服务商"
+    }
+
+
+def test_culture_values_from_text():
+    html = "<html><body><h3>Our Values</h3><p>开放、务实，创新</p><h3>其他</h3><p>无关</p></body></html>"
+    assert extract_page(html, "https://example.com/", "about")["culture"]["values"] == ["开放", "务实", "创新"]
+
+
+def test_positions_from_fixture_careers_page():
+    data = extract_page(SITE._careers_page(1), BASE + "careers", "careers")
+    positions = data["positions"]
+    html = SITE._careers_page(1)
+    
+    assert len(positions) == html.count('<li class="job">')
+    for position in positions:
+        assert position["title"] in html
+        assert position["location"] in ("北京", "上海", "深圳", "杭州", "广州", "成都")
+        assert position["salary"].endswith("K") and f'<span class="salary">{position["salary"]}</span>' in html
+        assert position["requirements"] == ["3年以上相关开发经验", "熟悉MySQL、Redis等数据库"]
+        assert position["responsibilities"] == ["负责核心业务系统开发"]
+    assert "culture" not in data
+
+
+def test_positions_prefer_json_ld():
+    posting = {
+        "@context": "https://schema.org",
+        "@graph": [
+            {"@type": "Organization", "name": "示例科技"},
+            {
+                "@type": "JobPosting",
+                "title": "数据工程师",
+                "description": "<p>熟悉Spark</p><ul><li>熟悉Flink</li></ul>",
+                "jobLocation": [{"address": {"addressLocality": "杭州"}}],
+                "baseSalary": {"value": {"minValue": 20, "maxValue": 35, "unitText": "K"}}
+            }
+        ]
+    }
+    html = f"""<html><head><script type="application/ld+json">{json.dumps(posting, ensure_ascii=False)}</script>
+    <script type="application/ld+json">{{坏JSON</script></head>
+    <body><div class="job"><h3>不应使用的HTML岗位</h3></div></body></html>"""
+    assert extract_page(html, "https://example.com/jobs", "careers")["positions"] == [{
+        "title": "数据工程师",
+        "location": "杭州",
+        "salary": "20-35 K",
+        "requirements": ["熟悉Spark", "熟悉Flink"],
+        "responsibilities": []
+    }]
+
+
+def test_positions_fall_back_to_text_patterns():
+    html = """<html><body><div class="positions">
+    <div class="job-item"><a href="/j/1">算法工程师</a><p>深圳 · 30-50k · 本科</p></div>
+    <div class="job-item"><p>没有标题</p></div>
+    </div></body></html>"""
+    assert extract_page(html, "https://example.com/", "careers")["positions"] == [{
+        "title": "算法工程师",
+        "location": "深圳",
+        "salary": "30-50k",
+        "requirements": [],
+        "responsibilities": []
+    }]
+
+
+@pytest.mark.parametrize("html, kind, expected", [
+    ("", "careers", {"links": [], "positions": []}),
+    ("   ", "about", {"links": [], "culture": {}}),
+])
+def test_empty_pages(html, kind, expected):
+    assert extract_page(html, "https://example.com/", kind) == expected
+
+
+def test_xml_declaration_page():
+    html = '<?xml version="1.0" encoding="utf-8"?><html><body><a href="/about">关于</a></body></html>'
+    assert extract_page(html, "https://example.com/", "home")["links"] == [("https://example.com/about", "关于")]
+
+
+def test_sitemap_urls():
+    pages, children = extract_sitemap_urls(SITE._sitemap(2))
+    assert pages == [f"{SITE.base_url}/c/2/{path}" for path in ("", "about", "careers")]
+    assert children == []
+    
+    index = "<sitemapindex><sitemap><loc> https://example.com/jobs.xml </loc></sitemap></sitemapindex>"
+    assert extract_sitemap_urls(index) == ([], ["https://example.com/jobs.xml"])
+
+
+def test_merge_culture_keeps_existing_fields():
+    target = {"values": [], "mission": "已有使命", "vision": ""}
+    merge_culture(target, {"values": ["开放"], "mission": "新使命", "vision": "愿景"})
+    merge_culture(target, None)
+    assert target == {"values": ["开放"], "mission": "已有使命", "vision": "愿景"}
+
+
+def test_html_extractor_parses_inline_and_in_process_pool():
+    small, large = SITE._about_page(0), SITE._about_page(0) + "<!--" + "x" * 4096 + "-->"
+    
+    async def scenario():
+        extractor = HTMLExtractor(max_workers=1, inline_kb=2)
+        try:
+            inline = await extractor.run(extract_page, small, BASE, "about")
+            assert extractor._executor is None
+            pooled = await extractor.run(extract_page, large, BASE, "about")
+            assert extractor._executor is not None
+        finally:
+            extractor.shutdown()
+        return inline, pooled
+    
+    inline, pooled = asyncio.run(scenario())
+    assert pooled == inline
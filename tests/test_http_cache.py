@@ -0,0 +1,108 @@
+"""
+HTTP磁盘缓存的测试
+"""
+import asyncio
+
+from src.scrapers.http_cache import HTTPCache
+
+HEADERS = {"ETag": '"v1"', "Cache-Control": "max-age=60"}
+
+
+def _disk_bytes(cache: HTTPCache) -> int:
+    return sum(path.stat().st_size for path in cache.root.iterdir() if path.suffix in (".json", ".body"))
+
+
+def test_store_get_and_conditional_headers(tmp_path):
+    cache = HTTPCache(tmp_path, max_size_mb=1)
+    page = cache.store("https://a.example/", "<html>首页</html>", {**HEADERS, "Last-Modified": "Wed, 21 Oct 2015 07:28:00 GMT"})
+    
+    cached = HTTPCache(tmp_path, max_size_mb=1).get("https://a.example/")
+    assert cached.text == "<html>首页</html>" and cached.body_hash == page.body_hash
+    assert cache.is_fresh(cached)
+    assert cache.conditional_headers(cached) == {
+        "If-None-Match": '"v1"', "If-Modified-Since": "Wed, 21 Oct 2015 07:28:00 GMT"
+    }
+    assert cache.get("https://b.example/") is None
+
+
+def test_no_store_and_no_cache(tmp_path):
+    cache = HTTPCache(tmp_path, max_size_mb=1)
+    cache.store("https://a.example/", "旧", HEADERS)
+    page = cache.store("https://a.example/", "新", {"Cache-Control": "no-store"})
+    assert page.text == "新"
+    assert cache.get("https://a.example/") is None
+    
+    page = cache.store("https://b.example/", "正文", {"Cache-Control": "no-cache"})
+    assert not cache.is_fresh(page)
+
+
+def test_revalidated_extends_expiry_and_updates_validators(tmp_path):
+    cache = HTTPCache(tmp_path, max_size_mb=1)
+    page = cache.store("https://a.example/", "正文", {"ETag": '"v1"', "Cache-Control": "max-age=0"})
+    assert not cache.is_fresh(page)
+    
+    cache.revalidated(page, {"ETag": '"v2"', "Cache-Control": "max-age=60"})
+    cached = HTTPCache(tmp_path, max_size_mb=1).get("https://a.example/")
+    assert cache.is_fresh(cached) and cached.meta["etag"] == '"v2"'
+
+
+def test_extracted_results_survive_unchanged_body_only(tmp_path):
+    cache = HTTPCache(tmp_path, max_size_mb=1)
+    page = cache.store("https://a.example/", "正文", HEADERS)
+    cache.put_extracted(page, "basic_info", {"name": "示例"})
+    
+    same = cache.store("https://a.example/", "正文", HEADERS)
+    assert cache.get_extracted(same, "basic_info") == {"name": "示例"}
+    changed = cache.store("https://a.example/", "改过的正文", HEADERS)
+    assert cache.get_extracted(changed, "basic_info") is None
+
+
+def test_size_accounting_follows_metadata_rewrites(tmp_path):
+    cache = HTTPCache(tmp_path, max_size_mb=1)
+    page = cache.store("https://a.example/", "正文", HEADERS)
+    cache.store("https://b.example/", "另一页", HEADERS)
+    cache.put_extracted(page, "site_home", {"links": ["https://a.example/about"] * 50})
+    cache.revalidated(page, {"ETag": '"a-much-longer-validator-value"', "Cache-Control": "max-age=60"})
+    
+    assert cache.stats()["size_bytes"] == _disk_bytes(cache)
+    # 重新扫描磁盘得到的大小与增量维护的一致
+    assert HTTPCache(tmp_path, max_size_mb=1).stats()["size_bytes"] == _disk_bytes(cache)
+
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = HTTPCache(tmp_path, max_size_mb=1)
+    cache.max_bytes = 4000
+    body = "x" * 900
+    for name in ("a", "b", "c"):
+        cache.store(f"https://{name}.example/", body, HEADERS)
+    cache.get("https://a.example/")
+    cache.store("https://d.example/", body, HEADERS)
+    
+    assert cache.get("https://b.example/") is None
+    assert cache.get("https://a.example/") is not None
+    assert cache.stats()["evictions"] >= 1
+    assert cache.stats()["size_bytes"] == _disk_bytes(cache) <= cache.max_bytes
+    
+    # 解析结果让元数据变大后同样会触发淘汰
+    page = cache.get("https://d.example/")
+    cache.put_extracted(page, "site_home", {"text": "y" * 2000})
+    assert cache.stats()["size_bytes"] == _disk_bytes(cache) <= cache.max_bytes
+
+
+def test_concurrent_use_from_threads(tmp_path):
+    cache = HTTPCache(tmp_path, max_size_mb=1)
+    
+    async def scenario():
+        urls = [f"https://example.com/{i}" for i in range(40)]
+        pages = await asyncio.gather(*(
+            asyncio.to_thread(cache.store, url, f"页面{url}" * 20, HEADERS) for url in urls
+        ))
+        await asyncio.gather(*(
+            asyncio.to_thread(cache.put_extracted, page, "site_home", {"n": i}) for i, page in enumerate(pages)
+        ))
+        return await asyncio.gather(*(asyncio.to_thread(cache.get, url) for url in urls))
+    
+    pages = asyncio.run(scenario())
+    assert [cache.get_extracted(page, "site_home") for page in pages] == [{"n": i} for i in range(40)]
+    assert cache.stats()["entries"] == 40
+    assert cache.stats()["size_bytes"] == _disk_bytes(cache)
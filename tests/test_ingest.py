@@ -0,0 +1,132 @@
+"""
+招聘数据导入的测试
+"""
+import csv
+import gzip
+import json
+
+import pytest
+
+from src.storage.database import Database
+from src.storage.ingest import FeedIngestor, iter_rows, map_row
+
+ROWS = [
+    {"company": "甲科技", "job_title": "Python工程师", "city": "北京", "salary": "20-30K", "description": "负责后端开发"},
+    {"company": "乙网络", "job_title": "前端工程师", "city": "上海", "salary": "15-25K", "description": "负责页面开发"},
+]
+
+
+def _write_jsonl(path, rows: list, opener=open):
+    with opener(path, "wt", encoding="utf-8") as f:
+        for row in rows:
+            f.write((row if isinstance(row, str) else json.dumps(row, ensure_ascii=False)) + "\n")
+
+
+def _write_csv(path, rows: list[dict], delimiter: str = ",", opener=open):
+    with opener(path, "wt", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]), delimiter=delimiter)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+@pytest.mark.parametrize("name, write", [
+    ("feed.jsonl", _write_jsonl),
+    ("feed.jsonl.gz", lambda path, rows: _write_jsonl(path, rows, gzip.open)),
+    ("feed.csv", _write_csv),
+    ("feed.csv.gz", lambda path, rows: _write_csv(path, rows, opener=gzip.open)),
+    ("feed.tsv", lambda path, rows: _write_csv(path, rows, "\t")),
+])
+def test_iter_rows_formats(tmp_path, name, write):
+    path = tmp_path / name
+    write(path, ROWS)
+    assert list(iter_rows(path)) == ROWS
+
+
+def test_iter_rows_bad_json_lines(tmp_path):
+    path = tmp_path / "feed.ndjson"
+    _write_jsonl(path, [ROWS[0], "{坏行", "", "[1, 2]", ROWS[1]])
+    # 无法解析或不是对象的行返回空字典，由调用方计为无效行
+    assert list(iter_rows(path)) == [ROWS[0], {}, {}, ROWS[1]]
+
+
+def test_iter_rows_csv_with_bom_and_multiline_field(tmp_path):
+    path = tmp_path / "feed.csv"
+    path.write_text('﻿公司,职位,任职要求\n甲科技,Python工程师,"1. 熟悉Python\n2. 熟悉MySQL"\n', encoding="utf-8")
+    assert list(iter_rows(path)) == [{"公司": "甲科技", "职位": "Python工程师", "任职要求": "1. 熟悉Python\n2. 熟悉MySQL"}]
+
+
+def test_map_row_aliases_and_lists():
+    position = map_row({
+        "公司名称": "甲科技", "职位名称": " Python工程师 ", "工作地点": "北京", "薪资": "20-30K",
+        "任职要求": "1. 熟悉Python 2. 熟悉MySQL", "岗位职责": "负责后端；参与设计",
+        "职位链接": "https://example.com/jobs/1"
+    })
+    assert position == {
+        "company_name": "甲科技",
+        "title": "Python工程师",
+        "location": "北京",
+        "salary": "20-30K",
+        "requirements": ["熟悉Python", "熟悉MySQL"],
+        "responsibilities": ["负责后端", "参与设计"],
+        "url": "https://example.com/jobs/1"
+    }
+    # 前面的别名为空时取下一个
+    assert map_row({"company_name": "", "company": "乙网络", "title": "测试"})["company_name"] == "乙网络"
+    assert map_row({"company": "甲科技"}) is None
+    assert map_row({"title": "Python工程师"}) is None
+
+
+def test_map_row_field_map_overrides_aliases():
+    row = {"corp": "甲科技", "company": "别名公司", "job_name": "算法工程师", "title": "别名职位"}
+    position = map_row(row, {"company_name": "corp", "title": "job_name"})
+    assert (position["company_name"], position["title"]) == ("甲科技", "算法工程师")
+    assert map_row(row, {"title": "missing"}) is None
+
+
+def test_map_row_nested_json_ld():
+    position = map_row({
+        "title": "数据工程师",
+        "hiringOrganization": "忽略",
+        "employer": {"@type": "Organization", "name": "丙数据"},
+        "jobLocation": {"@type": "Place", "address": {"@type": "PostalAddress", "addressLocality": "杭州"}},
+        "qualifications": ["熟悉Spark", " ", "熟悉Flink"],
+        "city": None
+    })
+    assert position["company_name"] == "丙数据"
+    assert position["location"] == "杭州"
+    assert position["requirements"] == ["熟悉Spark", "熟悉Flink"]
+    assert map_row({"company": "甲", "title": "乙", "location": ["北京", "", "上海"]})["location"] == "北京/上海"
+
+
+def test_feed_ingestor_run(tmp_path):
+    database = Database(f"sqlite:///{tmp_path / 'ingest.db'}")
+    jsonl = tmp_path / "feed.jsonl"
+    _write_jsonl(jsonl, [
+        *ROWS,
+        # 与第一行近似重复（同公司、只差标点），批内去重
+        {**ROWS[0], "description": "负责后端开发。"},
+        {"company": "甲科技", "job_title": "算法工程师", "city": "北京", "salary": "30-50K"},
+        {"job_title": "缺公司名"},
+        "{坏行",
+    ])
+    csv_path = tmp_path / "feed.csv"
+    _write_csv(csv_path, [
+        {"company": "乙网络", "job_title": "前端工程师", "city": "上海", "salary": "15-25K", "description": "负责页面开发"},
+        {"company": "丁智能", "job_title": "测试工程师", "city": "深圳", "salary": "12-18K", "description": "负责测试"},
+    ])
+    
+    try:
+        stats = FeedIngestor(database, batch_size=3, dedup=True).run([jsonl, csv_path])
+        assert (stats["read"], stats["invalid"], stats["duplicates"]) == (8, 2, 1)
+        # 乙网络的前端岗位在第二个文件中再次出现，按指纹合并为更新
+        assert (stats["inserted"], stats["updated"]) == (4, 1)
+        
+        rerun = FeedIngestor(database, batch_size=100, dedup=False).run([csv_path])
+        assert (rerun["inserted"], rerun["updated"]) == (0, 2)
+        
+        results = database.search_positions(title="python")
+        assert [(p["company_name"], p["location"], p["salary"]) for p in results] == [("甲科技", "北京", "20-30K")]
+        assert results[0]["responsibilities"] == ["负责后端开发"]
+        assert {p["title"] for p in database.search_positions(location="深圳")} == {"测试工程师"}
+    finally:
+        database.close()
@@ -0,0 +1,87 @@
+"""
+后台任务队列的测试
+"""
+import time
+import asyncio
+import threading
+
+import pytest
+
+from src.utils.async_runner import BackgroundLoop
+from src.utils.job_queue import Job, JobQueue
+
+
+@pytest.fixture
+def runner():
+    runner = BackgroundLoop(name="test-loop")
+    yield runner
+    
+    async def cancel_workers():
+        for task in asyncio.all_tasks() - {asyncio.current_task()}:
+            task.cancel()
+    runner.run(cancel_workers())
+    runner.stop()
+
+
+def _wait_for(condition, timeout: float = 5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "等待超时"
+        time.sleep(0.01)
+
+
+def test_position_counts_queued_jobs_submitted_earlier(runner):
+    release = threading.Event()
+    
+    async def handler(job: Job):
+        job.set_stage("echo", job.params["n"])
+        await asyncio.to_thread(release.wait, 5)
+    
+    queue = JobQueue(runner, handler, workers=1)
+    jobs = [queue.submit({"n": i}) for i in range(4)]
+    _wait_for(lambda: jobs[0].status == Job.RUNNING and queue.depth == 3)
+    
+    assert queue.running == 1
+    assert [queue.position(job.id) for job in jobs] == [0, 0, 1, 2]
+    assert queue.position("不存在") == 0
+    
+    release.set()
+    _wait_for(lambda: not any(job.active for job in jobs))
+    assert [job.stages["echo"] for job in jobs] == [0, 1, 2, 3]
+
+
+def test_finished_jobs_drop_params_and_keep_stages(runner):
+    async def handler(job: Job):
+        job.set_stage("report", f"{len(job.params['resume'])} bytes")
+        if job.params.get("fail"):
+            raise RuntimeError("分析失败")
+    
+    queue = JobQueue(runner, handler, workers=2)
+    done = queue.submit({"resume": b"x" * 1024})
+    failed = queue.submit({"resume": b"y", "fail": True})
+    _wait_for(lambda: not done.active and not failed.active)
+    
+    assert done.status == Job.DONE and done.stages == {"report": "1024 bytes"}
+    assert failed.status == Job.FAILED and failed.error == "分析失败"
+    assert done.params == {} and failed.params == {}
+    assert done.elapsed >= 0
+
+
+def test_history_keeps_active_jobs(runner):
+    release = threading.Event()
+    
+    async def handler(job: Job):
+        if job.params["block"]:
+            await asyncio.to_thread(release.wait, 5)
+    
+    queue = JobQueue(runner, handler, workers=1, max_history=2)
+    blocked = queue.submit({"block": True})
+    _wait_for(lambda: blocked.status == Job.RUNNING)
+    later = [queue.submit({"block": False}) for _ in range(3)]
+    
+    # 超出上限时只淘汰已结束的任务，排队和运行中的任务都保留
+    assert all(queue.get(job.id) is job for job in [blocked, *later])
+    release.set()
+    _wait_for(lambda: not any(job.active for job in later))
+    queue.submit({"block": False})
+    assert queue.get(blocked.id) is None
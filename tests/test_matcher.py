@@ -0,0 +1,88 @@
+"""
+匹配分析器批量预筛（prescreen_jobs）的测试
+"""
+import pytest
+
+from config import settings
+from src.ai.matcher import OfferMatcher
+
+RESUME = {"skills": ["Python", "MySQL", "Redis", "Docker"]}
+BACKEND_JD = (
+    "负责公司核心交易系统的后端开发与维护，参与系统架构设计和性能优化。"
+    "要求熟悉Python和MySQL，了解Redis缓存和Kafka消息队列，有高并发系统经验者优先。"
+)
+
+
+@pytest.fixture
+def matcher(monkeypatch):
+    monkeypatch.setattr(settings, "DEDUP_ENABLED", True)
+    return OfferMatcher()
+
+
+def test_scores_by_skill_coverage(matcher):
+    screens = matcher.prescreen_jobs(RESUME, [
+        {"job_description": BACKEND_JD},
+        {"job_description": "负责前端页面开发，要求熟悉React、Vue和JavaScript"},
+        {"job_description": "负责产品规划和用户调研"},
+    ])
+    
+    assert screens[0] == {
+        "prescreen_score": 0.75,
+        "matched_skills": ["Python", "MySQL", "Redis"],
+        "missing_skills": ["Kafka"]
+    }
+    assert screens[1]["prescreen_score"] == 0.0
+    assert screens[1]["missing_skills"] == ["JavaScript", "React", "Vue"]
+    # 没有可识别的技能时按中等分数排序
+    assert screens[2]["prescreen_score"] == 0.5
+    assert not any("excluded" in screen or "duplicate_of" in screen for screen in screens)
+
+
+def test_excludes_positions_not_matching_preferences(matcher):
+    jobs = [
+        {"job_description": BACKEND_JD, "position": {"salary": "20-30K", "location": "北京"}},
+        {"job_description": "负责数据平台开发，熟悉Python", "position": {"salary": "8-10K", "location": "北京"}},
+        {"job_description": "负责运维平台开发，熟悉Docker", "position": {"salary": "25-35K", "location": "成都"}},
+        # 用户直接提供的岗位描述没有薪资地点，不筛
+        {"job_description": "负责测试平台开发，熟悉Python"},
+    ]
+    screens = matcher.prescreen_jobs(RESUME, jobs, {"expected_salary": "25K", "location": "北京"})
+    assert ["excluded" in screen for screen in screens] == [False, True, True, False]
+    assert screens[1]["excluded"] == "薪资或地点不符合期望"
+    # 被筛掉的岗位照常打分，便于汇总展示
+    assert screens[2]["prescreen_score"] == 1.0
+
+
+def test_near_duplicates_reuse_first_job_within_company(matcher):
+    jobs = [
+        {"job_description": BACKEND_JD, "company_name": "示例科技有限公司"},
+        {"job_description": BACKEND_JD + "。", "company_name": "示例科技"},
+        {"job_description": BACKEND_JD, "company_name": "另一家公司"},
+        {"job_description": "负责前端页面开发，要求熟悉React和Vue", "company_name": "示例科技"},
+        {"job_description": BACKEND_JD},
+        {"job_description": BACKEND_JD},
+    ]
+    screens = matcher.prescreen_jobs(RESUME, jobs)
+    
+    assert screens[1]["duplicate_of"] == 0
+    # 不同公司的相同描述各自分析
+    assert "duplicate_of" not in screens[2]
+    assert "duplicate_of" not in screens[3]
+    assert "duplicate_of" not in screens[4]
+    assert screens[5]["duplicate_of"] == 4
+
+
+def test_excluded_jobs_are_not_dedup_targets(matcher):
+    jobs = [
+        {"job_description": BACKEND_JD, "position": {"salary": "5-6K", "location": "北京"}},
+        {"job_description": BACKEND_JD, "position": {"salary": "20-30K", "location": "北京"}},
+    ]
+    screens = matcher.prescreen_jobs(RESUME, jobs, {"expected_salary": "25K"})
+    assert "excluded" in screens[0]
+    assert "duplicate_of" not in screens[1]
+
+
+def test_dedup_disabled(monkeypatch):
+    monkeypatch.setattr(settings, "DEDUP_ENABLED", False)
+    screens = OfferMatcher().prescreen_jobs(RESUME, [{"job_description": BACKEND_JD}] * 2)
+    assert not any("duplicate_of" in screen for screen in screens)
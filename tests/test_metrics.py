@@ -0,0 +1,133 @@
+"""
+指标注册表与Prometheus文本输出的测试
+"""
+import asyncio
+import urllib.error
+import urllib.request
+
+import pytest
+
+from src.utils.metrics import (
+    Counter, Gauge, Histogram, MetricsRegistry, counter, registry, start_http_server, write_metrics
+)
+
+
+def test_counter_render_and_label_validation():
+    requests = Counter("t_requests_total", "请求数", ["tool", "status"])
+    requests.inc(tool="parse", status="ok")
+    requests.inc(2, tool="parse", status="ok")
+    requests.inc(tool='a"b\n', status="error")
+    
+    assert requests.value(tool="parse", status="ok") == 3
+    assert requests.render() == [
+        "# HELP t_requests_total 请求数",
+        "# TYPE t_requests_total counter",
+        't_requests_total{tool="a\\"b\\n",status="error"} 1',
+        't_requests_total{tool="parse",status="ok"} 3',
+    ]
+    with pytest.raises(ValueError):
+        requests.inc(tool="parse")
+    with pytest.raises(ValueError):
+        requests.inc(tool="parse", status="ok", extra="x")
+    with pytest.raises(ValueError):
+        requests.inc(-1, tool="parse", status="ok")
+
+
+def test_gauge_and_track_inprogress():
+    in_flight = Gauge("t_in_flight", "执行中")
+    in_flight.set(5)
+    in_flight.dec(2)
+    assert in_flight.value() == 3
+    
+    with in_flight.track_inprogress():
+        assert in_flight.value() == 4
+    assert in_flight.value() == 3
+    
+    @in_flight.track_inprogress()
+    async def work():
+        return in_flight.value()
+    
+    assert asyncio.run(work()) == 4
+    assert in_flight.value() == 3
+    assert in_flight.render()[-1] == "t_in_flight 3"
+
+
+def test_histogram_buckets_are_cumulative():
+    latency = Histogram("t_seconds", "耗时", ["stage"], buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.7, 3.0):
+        latency.observe(value, stage="parse")
+    
+    assert latency.count(stage="parse") == 4
+    assert latency.total(stage="parse") == pytest.approx(4.25)
+    assert latency.render()[2:] == [
+        't_seconds_bucket{stage="parse",le="0.1"} 1',
+        't_seconds_bucket{stage="parse",le="1"} 3',
+        't_seconds_bucket{stage="parse",le="+Inf"} 4',
+        't_seconds_sum{stage="parse"} 4.25',
+        't_seconds_count{stage="parse"} 4',
+    ]
+
+
+def test_histogram_time_records_on_error():
+    latency = Histogram("t_timer_seconds", "耗时")
+    with pytest.raises(RuntimeError):
+        with latency.time():
+            raise RuntimeError("失败")
+    
+    @latency.time()
+    def work():
+        return 1
+    
+    work()
+    assert latency.count() == 2
+    with pytest.raises(ValueError):
+        latency.time(stage="x")
+
+
+def test_registry_reuses_and_rejects_conflicting_registration():
+    metrics = MetricsRegistry()
+    first = metrics.register(Counter("t_total", "计数", ["a"]))
+    assert metrics.register(Counter("t_total", "计数", ["a"])) is first
+    with pytest.raises(ValueError):
+        metrics.register(Gauge("t_total", "计数", ["a"]))
+    with pytest.raises(ValueError):
+        metrics.register(Counter("t_total", "计数", ["b"]))
+
+
+def test_registry_runs_collectors_before_render():
+    metrics = MetricsRegistry()
+    depth = metrics.register(Gauge("t_queue_depth", "队列长度"))
+    queue = [1, 2, 3]
+    collect = lambda: depth.set(len(queue))
+    metrics.add_collector(collect)
+    metrics.add_collector(lambda: 1 / 0)
+    
+    assert "t_queue_depth 3\n" in metrics.render()
+    queue.pop()
+    assert "t_queue_depth 2\n" in metrics.render()
+    metrics.remove_collector(collect)
+    queue.pop()
+    assert "t_queue_depth 2\n" in metrics.render()
+
+
+def test_write_metrics_and_http_endpoint(tmp_path):
+    hits = counter("t_endpoint_hits_total", "测试计数")
+    hits.inc(7)
+    
+    path = tmp_path / "metrics" / "app.prom"
+    write_metrics(path)
+    assert "t_endpoint_hits_total 7" in path.read_text(encoding="utf-8")
+    
+    server = start_http_server(0)
+    try:
+        base = f"http://127.0.0.1:{server.server_address[1]}"
+        with urllib.request.urlopen(f"{base}/metrics", timeout=5) as response:
+            assert response.headers["Content-Type"].startswith("text/plain; version=0.0.4")
+            assert "t_endpoint_hits_total 7" in response.read().decode("utf-8")
+        with pytest.raises(urllib.error.HTTPError) as excinfo:
+            urllib.request.urlopen(f"{base}/other", timeout=5)
+        assert excinfo.value.code == 404
+    finally:
+        server.shutdown()
+        server.server_close()
+    assert registry.register(Counter("t_endpoint_hits_total", "测试计数")) is hits
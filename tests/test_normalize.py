@@ -0,0 +1,116 @@
+"""
+薪资、地点归一化与岗位索引的测试
+"""
+import math
+
+import pytest
+
+from src.ai.position_index import PositionIndex
+from src.utils.normalize import SalaryRange, normalize_location, normalize_locations, parse_salary
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("15-25K", SalaryRange(15.0, 25.0)),
+    ("15k~25k·14薪", SalaryRange(17.5, 29.17, 14)),
+    ("1.5-2.5万", SalaryRange(15.0, 25.0)),
+    ("15000-25000元/月", SalaryRange(15.0, 25.0)),
+    ("年薪30-50万", SalaryRange(25.0, 41.67)),
+    ("30-50万/年", SalaryRange(25.0, 41.67)),
+    ("200元/天", SalaryRange(4.35, 4.35)),
+    ("300/天", SalaryRange(6.52, 6.52)),
+    ("日薪200-300", SalaryRange(4.35, 6.52)),
+    ("25K×14", SalaryRange(29.17, 29.17, 14)),
+    ("20-30k*15", SalaryRange(25.0, 37.5, 15)),
+    ("月薪2万×13", SalaryRange(21.67, 21.67, 13)),
+    ("15-25k x 16薪", SalaryRange(20.0, 33.33, 16)),
+    ("25K以上", SalaryRange(25.0, math.inf)),
+    ("10K以下", SalaryRange(0.0, 10.0)),
+    ("1.5万-25000元", SalaryRange(15.0, 25.0)),
+    ("１５－２５Ｋ", SalaryRange(15.0, 25.0)),
+])
+def test_parse_salary_formats(text, expected):
+    assert parse_salary(text) == expected
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("3-5年 15-25K", SalaryRange(15.0, 25.0)),
+    ("经验3年 20K", SalaryRange(20.0, 20.0)),
+    ("经验3-5年 15000-25000", SalaryRange(15.0, 25.0)),
+    ("35岁以下 15-20k", SalaryRange(15.0, 20.0)),
+    ("团队20人 15-20", SalaryRange(15.0, 20.0)),
+    ("20K 5年以上", SalaryRange(20.0, 20.0)),
+    ("5年以上 20K以上", SalaryRange(20.0, math.inf)),
+])
+def test_parse_salary_skips_experience_age_and_headcount(text, expected):
+    assert parse_salary(text) == expected
+
+
+@pytest.mark.parametrize("text", [None, "", "面议", "薪资面议", "3-5年"])
+def test_parse_salary_unparseable(text):
+    assert parse_salary(text) is None
+
+
+def test_salary_overlaps():
+    assert SalaryRange(15, 25).overlaps(SalaryRange(25, 30))
+    assert not SalaryRange(15, 20).overlaps(SalaryRange(21, 30))
+    assert SalaryRange(25, math.inf).overlaps(SalaryRange(40, 50))
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("北京市海淀区", {"北京"}),
+    ("Shanghai / 杭州", {"上海", "杭州"}),
+    ("远程", {"远程"}),
+    ("全国", {"不限"}),
+    ("Hong Kong", {"香港"}),
+    ("", set()),
+])
+def test_normalize_locations(text, expected):
+    assert normalize_locations(text) == expected
+
+
+def test_normalize_location_takes_first_city():
+    assert normalize_location("深圳、北京") == "深圳"
+    assert normalize_location(None) == ""
+
+
+POSITIONS = [
+    {"title": "后端", "salary": "15-25K", "location": "北京"},
+    {"title": "前端", "salary": "30-40K", "location": "上海"},
+    {"title": "算法", "salary": "面议", "location": "北京"},
+    {"title": "测试", "salary": "3-5年 10-14K", "location": "远程"},
+    {"title": "运维", "salary": "20K以上", "location": ""},
+    {"title": "产品", "salary": "8-10K", "location": "杭州"},
+]
+
+
+def _titles(positions):
+    return [position["title"] for position in positions]
+
+
+def test_position_index_filter_by_salary():
+    index = PositionIndex(POSITIONS)
+    # 放宽10%后为 18-22K；"面议" 的岗位保留
+    assert _titles(index.filter(salary="20K")) == ["后端", "算法", "运维"]
+    # 经验年限不能被当作薪资筛掉岗位
+    assert _titles(index.filter(salary="12K", tolerance=0)) == ["算法", "测试"]
+
+
+def test_position_index_filter_by_location():
+    index = PositionIndex(POSITIONS)
+    # 远程、未写地点的岗位对任何城市都保留
+    assert _titles(index.filter(location="北京")) == ["后端", "算法", "测试", "运维"]
+    assert _titles(index.filter(location="不限")) == _titles(POSITIONS)
+
+
+def test_position_index_filter_combined_and_unparseable():
+    index = PositionIndex(POSITIONS)
+    assert _titles(index.filter(salary="25-35K", location="上海")) == ["前端", "运维"]
+    assert _titles(index.filter(salary="面议")) == _titles(POSITIONS)
+
+
+def test_position_index_salary_overlapping_matches_linear_scan():
+    positions = [{"salary": f"{low}-{low + width}K"} for low in range(5, 50, 3) for width in (0, 2, 7)]
+    index = PositionIndex(positions)
+    for expected in (SalaryRange(0, 4), SalaryRange(10, 12), SalaryRange(30, 60), SalaryRange(20, math.inf)):
+        linear = {i for i, salary in enumerate(index.salaries) if salary.overlaps(expected)}
+        assert index.salary_overlapping(expected) == linear
@@ -0,0 +1,51 @@
+"""
+MCP服务端对象存储的测试
+"""
+import time
+
+from src.utils.object_store import ObjectStore, dumps_compact
+
+
+def test_dumps_compact():
+    assert dumps_compact({"名称": "示例", "n": [1, 2]}) == '{"名称":"示例","n":[1,2]}'
+    assert dumps_compact({"t": {1}}) == '{"t":"{1}"}'
+
+
+def test_same_content_gets_same_id():
+    store = ObjectStore(ttl_seconds=60, max_entries=10)
+    first = store.put("resume", {"name": "张三", "skills": ["Python"]})
+    assert first.startswith("resume_") and len(first) == len("resume_") + ObjectStore.ID_LENGTH
+    assert store.put("resume", {"name": "张三", "skills": ["Python"]}) == first
+    assert store.put("resume", {"name": "李四"}) != first
+    assert len(store) == 2
+
+
+def test_get_checks_kind():
+    store = ObjectStore(ttl_seconds=60, max_entries=10)
+    object_id = store.put("company", {"name": "示例公司"})
+    assert store.get(object_id) == {"name": "示例公司"}
+    assert store.get(object_id, kind="company") == {"name": "示例公司"}
+    assert store.get(object_id, kind="resume") is None
+    assert store.get("company_000000000000") is None
+
+
+def test_entries_expire_and_get_refreshes_ttl():
+    store = ObjectStore(ttl_seconds=0.1, max_entries=10)
+    kept = store.put("match", {"score": 80})
+    dropped = store.put("match", {"score": 60})
+    time.sleep(0.06)
+    assert store.get(kept) is not None
+    time.sleep(0.06)
+    assert store.get(kept) is not None
+    assert store.get(dropped) is None
+    assert len(store) == 1
+
+
+def test_evicts_least_recently_used_beyond_capacity():
+    store = ObjectStore(ttl_seconds=60, max_entries=2)
+    a = store.put("resume", {"n": 1})
+    b = store.put("resume", {"n": 2})
+    store.get(a)
+    c = store.put("resume", {"n": 3})
+    assert store.get(b) is None
+    assert store.get(a) == {"n": 1} and store.get(c) == {"n": 3}
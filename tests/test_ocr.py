@@ -0,0 +1,106 @@
+"""
+OCR识别引擎的测试：按图像内容和语言缓存、识别失败时的降级
+"""
+import io
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from src.parsers import ocr
+from src.parsers.ocr import OCREngine
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = OCREngine(max_workers=2, page_timeout=5, languages="chi_sim+eng", cache_dir=tmp_path / "ocr")
+    yield engine
+    engine.shutdown()
+
+
+@pytest.fixture
+def fake_tesseract(engine, monkeypatch):
+    """用线程池和假的识别函数代替tesseract子进程，记录每次调用"""
+    calls = []
+    lock = threading.Lock()
+    
+    def fake_ocr(image_bytes: bytes, languages: str, timeout: int) -> str:
+        with lock:
+            calls.append((image_bytes, languages, timeout))
+        if image_bytes.startswith(b"bad"):
+            raise RuntimeError("无法识别的图片")
+        return f"  {image_bytes.decode()} 识别结果\n"
+    
+    monkeypatch.setattr(ocr, "_ocr_image", fake_ocr)
+    engine._executor = ThreadPoolExecutor(max_workers=2)
+    return calls
+
+
+def test_cache_key_depends_on_image_and_languages(engine, tmp_path):
+    path = engine._cache_path(b"page-1")
+    assert path == engine._cache_path(b"page-1")
+    assert path.parent.parent == tmp_path / "ocr" and path.parent.name == path.stem[:2]
+    assert engine._cache_path(b"page-2") != path
+    
+    english = OCREngine(languages="eng", cache_dir=tmp_path / "ocr")
+    assert english._cache_path(b"page-1") != path
+
+
+def test_miss_recognizes_and_caches(engine, fake_tesseract):
+    first = asyncio.run(engine.recognize_image(b"page-1"))
+    second = asyncio.run(engine.recognize_image(b"page-1"))
+    
+    assert first == second == "page-1 识别结果"
+    assert fake_tesseract == [(b"page-1", "chi_sim+eng", 5)]
+    assert engine._cache_path(b"page-1").read_text(encoding="utf-8") == "page-1 识别结果"
+
+
+def test_cache_hit_skips_recognition(engine, monkeypatch):
+    cache_path = engine._cache_path(b"page-1")
+    cache_path.parent.mkdir(parents=True)
+    cache_path.write_text("缓存的文本", encoding="utf-8")
+    
+    def no_executor():
+        raise AssertionError("命中缓存时不应启动进程池")
+    
+    monkeypatch.setattr(engine, "_get_executor", no_executor)
+    assert asyncio.run(engine.recognize_image(b"page-1")) == "缓存的文本"
+
+
+def test_languages_are_part_of_cache_key(engine, fake_tesseract, tmp_path):
+    asyncio.run(engine.recognize_image(b"page-1"))
+    english = OCREngine(languages="eng", cache_dir=tmp_path / "ocr")
+    english._executor = ThreadPoolExecutor(max_workers=1)
+    try:
+        asyncio.run(english.recognize_image(b"page-1"))
+    finally:
+        english.shutdown()
+    assert [languages for _, languages, _ in fake_tesseract] == ["chi_sim+eng", "eng"]
+
+
+def test_failures_return_empty_text_and_are_not_cached(engine, fake_tesseract):
+    pages = [b"page-1", b"bad-page", b"page-3"]
+    texts = asyncio.run(engine.recognize_pages(pages))
+    
+    assert texts == ["page-1 识别结果", "", "page-3 识别结果"]
+    assert not engine._cache_path(b"bad-page").exists()
+    # 失败的页面下次仍会重新识别
+    asyncio.run(engine.recognize_image(b"bad-page"))
+    assert [image for image, _, _ in fake_tesseract].count(b"bad-page") == 2
+
+
+def test_falls_back_when_tesseract_unavailable(engine, tmp_path, monkeypatch):
+    Image = pytest.importorskip("PIL.Image")
+    pytest.importorskip("pytesseract")
+    buffer = io.BytesIO()
+    Image.new("RGB", (32, 16), "white").save(buffer, format="PNG")
+    image_bytes = buffer.getvalue()
+    
+    # 子进程继承的PATH里没有tesseract，pytesseract抛出TesseractNotFoundError
+    empty_bin = tmp_path / "bin"
+    empty_bin.mkdir()
+    monkeypatch.setenv("PATH", str(empty_bin))
+    
+    assert asyncio.run(engine.recognize_image(image_bytes)) == ""
+    assert not engine._cache_path(image_bytes).exists()
@@ -0,0 +1,169 @@
+"""
+Ollama客户端的测试（对接本地模拟服务 FakeOllamaServer）
+"""
+import asyncio
+import json
+import math
+
+import pytest
+
+from src.ai.fake_ollama import FakeOllamaServer
+from src.ai.matcher import OfferMatcher
+from src.ai.ollama_client import OllamaClient
+
+
+def _run(scenario, **server_options):
+    """启动临时端口上的模拟服务，执行 scenario(server)，结束后关闭服务"""
+    async def main():
+        options = {"latency": 0, "tokens_per_second": 0, **server_options}
+        server = FakeOllamaServer(port=0, model="fake-model", **options)
+        await server.start()
+        try:
+            return await scenario(server)
+        finally:
+            await server.stop()
+    
+    return asyncio.run(main())
+
+
+def _client(server: FakeOllamaServer, **kwargs) -> OllamaClient:
+    return OllamaClient(base_url=server.base_url, model=server.model, **kwargs)
+
+
+def test_generate_stream_and_non_stream():
+    async def scenario(server):
+        client = _client(server, record_mode="off")
+        chunks = []
+        
+        async def on_token(text: str):
+            chunks.append(text)
+        
+        try:
+            assert await client.check_model()
+            plain = await client.generate("你好", system="系统")
+            streamed = await client.generate("你好", system="系统", on_token=on_token)
+            limited = await client.generate("你好", system="系统", max_tokens=3)
+        finally:
+            await client.close()
+        return server, plain, streamed, chunks, limited
+    
+    server, plain, streamed, chunks, limited = _run(scenario)
+    assert plain == streamed == server.reply_for("系统你好")
+    assert len(chunks) > 1 and "".join(chunks) == streamed
+    assert limited == plain[:3 * FakeOllamaServer.CHARS_PER_TOKEN]
+    assert server.stats()["requests"] == 4
+
+
+def test_chat_and_embeddings():
+    async def scenario(server):
+        client = _client(server, record_mode="off")
+        try:
+            reply = await client.chat([{"role": "system", "content": "甲"}, {"role": "user", "content": "乙"}])
+            vector = await client.embeddings("文本")
+        finally:
+            await client.close()
+        return server, reply, vector
+    
+    server, reply, vector = _run(scenario)
+    assert reply == server.reply_for("甲\n乙")
+    assert vector == server.embedding_for("文本")
+    assert len(vector) == FakeOllamaServer.EMBEDDING_DIM
+    assert math.isclose(sum(v * v for v in vector), 1.0)
+
+
+def test_server_errors_are_reported_not_raised():
+    async def scenario(server):
+        client = _client(server, record_mode="off")
+        try:
+            return server, await asyncio.gather(
+                client.generate("你好"),
+                client.generate("你好", stream=True),
+                client.chat([{"role": "user", "content": "你好"}]),
+                client.embeddings("你好")
+            )
+        finally:
+            await client.close()
+    
+    server, (generated, streamed, chat, vector) = _run(scenario, error_rate=1, parallel=4)
+    assert generated == streamed == chat == "错误: 500"
+    assert vector == []
+    assert server.stats()["errors"] == 4
+
+
+def test_record_then_replay(tmp_path):
+    async def record(server):
+        client = _client(server, record_mode="record", fixtures_dir=tmp_path)
+        recorded = []
+        
+        async def on_token(text: str):
+            recorded.append(text)
+        
+        try:
+            text = await client.generate("录制", on_token=on_token)
+            reply = await client.chat([{"role": "user", "content": "录制"}])
+            vector = await client.embeddings("录制")
+        finally:
+            await client.close()
+        return text, recorded, reply, vector
+    
+    text, recorded, reply, vector = _run(record)
+    fixtures = sorted(path.name.split("_")[0] for path in tmp_path.glob("*.json"))
+    assert fixtures == ["chat", "embeddings", "generate"]
+    
+    async def replay():
+        # 回放不访问网络：端口1上没有服务
+        client = OllamaClient(base_url="http://127.0.0.1:1", model="fake-model", record_mode="replay", fixtures_dir=tmp_path)
+        replayed = []
+        
+        async def on_token(chunk: str):
+            replayed.append(chunk)
+        
+        assert await client.check_model()
+        result = (
+            await client.generate("录制", on_token=on_token),
+            replayed,
+            await client.generate("录制", stream=True),
+            await client.chat([{"role": "user", "content": "录制"}]),
+            await client.embeddings("录制"),
+            await client.generate("没有录制")
+        )
+        await client.close()
+        return result
+    
+    replayed_text, chunks, streamed, replayed_reply, replayed_vector, missing = asyncio.run(replay())
+    assert replayed_text == streamed == text
+    assert chunks == recorded and len(chunks) > 1
+    assert replayed_reply == reply
+    assert replayed_vector == vector
+    assert missing.startswith("错误: 没有录制的响应")
+    
+    fixture = json.loads(next(tmp_path.glob("generate_*.json")).read_text(encoding="utf-8"))
+    assert fixture["chunks"] == recorded and "stream" not in fixture["request"]
+
+
+def test_invalid_record_mode():
+    with pytest.raises(ValueError):
+        OllamaClient(record_mode="rewind")
+
+
+def test_matcher_parses_fake_analysis():
+    resume = {"skills": ["Python", "SQL"], "work_experience": [], "education": []}
+    company = {"company_name": "示例科技", "basic_info": {"description": "做数据平台"}}
+    preferences = {"expected_salary": "25K", "location": "北京", "overtime_acceptable": False}
+    
+    async def scenario(server):
+        matcher = OfferMatcher()
+        matcher.ollama = _client(server, record_mode="off")
+        try:
+            return await matcher.analyze_match(resume, "Python后端开发", company, preferences)
+        finally:
+            await matcher.ollama.close()
+    
+    result = _run(scenario, max_tokens=1000)
+    assert "error" not in result
+    assert 40 <= result["overall_score"] <= 95
+    assert f"总分：{result['overall_score']}/100" in result["raw_analysis"]
+    assert result["strengths"] == ["技术栈与岗位要求高度重合", "有相关行业项目经验", "沟通协作能力较好"]
+    assert result["weaknesses"] == ["部分框架使用经验不足", "期望薪资与岗位范围存在差距"]
+    assert len(result["recommendations"]) == 3
+    assert result["decision"].split("，")[0] in ("推荐投递", "谨慎考虑", "不推荐")
@@ -0,0 +1,149 @@
+"""
+爬取调度（令牌桶、熔断器、重试）的测试
+"""
+import time
+import asyncio
+
+import aiohttp
+import pytest
+
+from src.scrapers.scheduler import (
+    CircuitBreaker, CircuitOpenError, CrawlScheduler, RetryableHTTPError, TokenBucket, parse_retry_after
+)
+
+URL = "https://example.com/about"
+
+
+def _scheduler(retries: int = 2) -> CrawlScheduler:
+    scheduler = CrawlScheduler(delay=0, retries=retries, max_concurrency=4)
+    scheduler.backoff_base = 0.001
+    scheduler.backoff_max = 0.05
+    return scheduler
+
+
+def _failing(errors: list):
+    calls = []
+    
+    async def request():
+        calls.append(time.monotonic())
+        if errors:
+            raise errors.pop(0)
+        return "ok"
+    return request, calls
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("120") == 120.0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("不是日期") is None
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+
+
+def test_token_bucket_spaces_requests():
+    async def scenario():
+        bucket = TokenBucket(rate=20)
+        started = time.monotonic()
+        for _ in range(4):
+            await bucket.acquire()
+        return time.monotonic() - started
+    
+    # 容量1：第一个令牌立即可用，之后每个间隔 1/rate 秒
+    assert asyncio.run(scenario()) >= 3 / 20 * 0.9
+
+
+def test_token_bucket_pause():
+    async def scenario():
+        bucket = TokenBucket(rate=1000)
+        bucket.pause(0.05)
+        started = time.monotonic()
+        await bucket.acquire()
+        return time.monotonic() - started
+    
+    assert asyncio.run(scenario()) >= 0.04
+
+
+def test_circuit_breaker_opens_half_opens_and_recovers():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN and not breaker.allow()
+    
+    time.sleep(0.06)
+    # 半开状态只放行一个试探请求
+    assert breaker.allow() and not breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED and breaker.failures == 0
+
+
+def test_circuit_breaker_trip_keeps_longest_deadline():
+    breaker = CircuitBreaker(failure_threshold=5, reset_timeout=0.01)
+    breaker.trip(30)
+    breaker.record_failure()
+    assert not breaker.allow()
+    assert breaker.retry_after() > 29
+
+
+def test_run_retries_then_succeeds():
+    scheduler = _scheduler(retries=2)
+    request, calls = _failing([aiohttp.ClientError(), RetryableHTTPError(503, retry_after=0.01)])
+    assert asyncio.run(scheduler.run(URL, request)) == "ok"
+    assert len(calls) == 3
+    assert scheduler._breaker("example.com").failures == 0
+
+
+def test_failed_run_counts_as_one_breaker_failure():
+    scheduler = _scheduler(retries=3)
+    breaker = scheduler._breaker("example.com")
+    breaker.failure_threshold = 2
+    
+    request, calls = _failing([aiohttp.ClientError()] * 4)
+    with pytest.raises(aiohttp.ClientError):
+        asyncio.run(scheduler.run(URL, request))
+    assert len(calls) == 4
+    assert breaker.failures == 1 and breaker.state == CircuitBreaker.CLOSED
+    
+    request, _ = _failing([aiohttp.ClientError()] * 4)
+    with pytest.raises(aiohttp.ClientError):
+        asyncio.run(scheduler.run(URL, request))
+    assert breaker.state == CircuitBreaker.OPEN
+    
+    request, calls = _failing([])
+    with pytest.raises(CircuitOpenError):
+        asyncio.run(scheduler.run(URL, request))
+    assert calls == []
+
+
+def test_retry_after_beyond_backoff_max_trips_breaker_instead_of_retrying_early():
+    scheduler = _scheduler(retries=3)
+    request, calls = _failing([RetryableHTTPError(429, retry_after=120)])
+    with pytest.raises(RetryableHTTPError):
+        asyncio.run(scheduler.run(URL, request))
+    assert len(calls) == 1
+    
+    breaker = scheduler._breaker("example.com")
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.retry_after() > 100
+    with pytest.raises(CircuitOpenError):
+        asyncio.run(scheduler.run(URL, request))
+
+
+def test_retry_after_within_backoff_max_is_honoured():
+    scheduler = _scheduler(retries=1)
+    request, calls = _failing([RetryableHTTPError(503, retry_after=0.04)])
+    assert asyncio.run(scheduler.run(URL, request)) == "ok"
+    assert calls[1] - calls[0] >= 0.035
+
+
+def test_non_network_errors_are_not_retried():
+    scheduler = _scheduler(retries=3)
+    request, calls = _failing([ValueError("解析失败")])
+    with pytest.raises(ValueError):
+        asyncio.run(scheduler.run(URL, request))
+    assert len(calls) == 1
+    assert scheduler._breaker("example.com").failures == 0
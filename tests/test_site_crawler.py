@@ -0,0 +1,206 @@
+"""
+官网多页爬取的测试（页面来自内存中的虚构站点和 FixtureServer 的页面）
+"""
+import asyncio
+import hashlib
+from typing import Optional
+
+import pytest
+
+from src.scrapers.fixture_server import FixtureServer
+from src.scrapers.http_cache import CachedPage, HTTPCache
+from src.scrapers.site_crawler import SiteCrawler
+
+ROOT = "https://www.example.com/"
+
+
+def _page(links: str = "", body: str = "") -> str:
+    return f"<html><head><meta charset='utf-8'></head><body><nav>{links}</nav>{body}</body></html>"
+
+
+def _job(title: str, city: str = "北京", salary: str = "20-30K") -> str:
+    return f'<li class="job"><h3>{title}</h3><span class="location">{city}</span><span class="salary">{salary}</span></li>'
+
+
+class FakeSite:
+    """按URL返回预置页面，记录请求顺序；未登记的URL返回None（404），errors中的URL抛出异常"""
+    
+    def __init__(self, pages: dict[str, str], errors: tuple[str, ...] = ()):
+        self.pages = pages
+        self.errors = errors
+        self.requested: list[str] = []
+        self._cached: dict[str, CachedPage] = {}
+    
+    async def fetch(self, url: str) -> Optional[CachedPage]:
+        self.requested.append(url)
+        await asyncio.sleep(0)
+        if url in self.errors:
+            raise ConnectionError("连接被重置")
+        if url not in self.pages:
+            return None
+        text = self.pages[url]
+        body_hash = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        page = self._cached.get(url)
+        if page is None or page.body_hash != body_hash:
+            # 与HTTPCache一样，同一URL返回同一条缓存记录，解析结果保存在其元数据中
+            page = self._cached[url] = CachedPage(url, {"url": url, "body_hash": body_hash}, text)
+        return page
+
+
+SITE_PAGES = {
+    ROOT: _page(
+        '<a href="/about-us">关于我们</a> <a href="/join?utm_source=home#top">加入我们</a>'
+        '<a href="/news">新闻</a> <a href="/brochure.pdf">招聘手册</a>'
+        '<a href="https://jobs.other.com/careers">外部招聘</a> <a href="mailto:hr@example.com">简历投递</a>'
+    ),
+    "https://www.example.com/about-us": _page(
+        '<a href="/">首页</a>', "<h2>使命</h2><p>让招聘更高效</p><h2>价值观</h2><ul><li>诚信</li><li>协作</li></ul>"
+    ),
+    "https://www.example.com/join": _page(
+        '<a href="/join/">社会招聘</a> <a href="/jobs/backend">岗位详情</a> <a href="/campus">校园招聘</a>',
+        f'<ul class="jobs">{_job("后端工程师")}{_job("前端工程师", "上海", "15-25K")}</ul>'
+    ),
+    "https://www.example.com/jobs/backend": _page(
+        '<a href="/jobs/backend/apply">申请职位</a>',
+        f'<ul class="jobs">{_job("后端工程师")}{_job("测试工程师", "深圳", "12-18K")}</ul>'
+    ),
+    "https://www.example.com/campus": _page("", f'<ul class="jobs">{_job("管培生", "杭州", "10-15K")}</ul>'),
+    "https://www.example.com/jobs/backend/apply": _page("", f'<ul class="jobs">{_job("深层岗位")}</ul>'),
+}
+
+
+def _crawl(site: FakeSite, root: str = ROOT, **kwargs) -> dict:
+    crawler = SiteCrawler(site.fetch, **kwargs)
+    return asyncio.run(crawler.crawl(root))
+
+
+def test_discovers_career_and_about_pages_breadth_first():
+    site = FakeSite(SITE_PAGES)
+    result = _crawl(site, max_pages=20, max_depth=2)
+    
+    assert result["pages"] == {
+        ROOT: "home",
+        "https://www.example.com/join": "careers",
+        "https://www.example.com/about-us": "about",
+        "https://www.example.com/jobs/backend": "careers",
+        "https://www.example.com/campus": "careers",
+    }
+    # 第1层招聘页优先；/join/ 与 /join 视为同一页面，第2层的链接不再展开
+    assert list(result["pages"])[1] == "https://www.example.com/join"
+    assert "https://www.example.com/jobs/backend/apply" not in site.requested
+    assert not any(url.endswith((".pdf", "/news")) or "other.com" in url for url in site.requested)
+    
+    titles = [(p["title"], p["url"]) for p in result["positions"]]
+    assert titles == [
+        ("后端工程师", "https://www.example.com/join"),
+        ("前端工程师", "https://www.example.com/join"),
+        ("测试工程师", "https://www.example.com/jobs/backend"),
+        ("管培生", "https://www.example.com/campus"),
+    ]
+    assert result["culture"] == {"values": ["诚信", "协作"], "mission": "让招聘更高效", "vision": ""}
+    # sitemap.xml 不存在也不影响爬取，也不计入页面
+    assert "https://www.example.com/sitemap.xml" in site.requested
+    assert result["stats"] == {"fetched": 5, "failed": 0, "extracted": 5, "unchanged": 0}
+
+
+@pytest.mark.parametrize("max_depth, expected", [
+    (0, [ROOT]),
+    (1, [ROOT, "https://www.example.com/join", "https://www.example.com/about-us"]),
+    (3, [
+        ROOT, "https://www.example.com/join", "https://www.example.com/about-us",
+        "https://www.example.com/jobs/backend", "https://www.example.com/campus",
+        "https://www.example.com/jobs/backend/apply"
+    ]),
+])
+def test_depth_limit(max_depth, expected):
+    result = _crawl(FakeSite(SITE_PAGES), max_pages=20, max_depth=max_depth)
+    assert list(result["pages"]) == expected
+
+
+def test_page_limit_keeps_career_pages_first():
+    site = FakeSite(SITE_PAGES)
+    result = _crawl(site, max_pages=2, max_depth=3)
+    assert list(result["pages"]) == [ROOT, "https://www.example.com/join"]
+    assert "https://www.example.com/about-us" not in site.requested
+
+
+def test_failed_pages_are_counted():
+    site = FakeSite(
+        {url: html for url, html in SITE_PAGES.items() if url != "https://www.example.com/campus"},
+        errors=("https://www.example.com/about-us",)
+    )
+    result = _crawl(site, max_pages=20, max_depth=2)
+    assert result["pages"]["https://www.example.com/campus"] == "careers"
+    assert result["stats"] == {"fetched": 3, "failed": 2, "extracted": 3, "unchanged": 0}
+    assert result["culture"] == {"values": [], "mission": "", "vision": ""}
+
+
+def test_sitemap_pages_join_first_level():
+    fixture = FixtureServer(host="127.0.0.1", port=8900, companies=1)
+    root = fixture.company_url(0)
+    site = FakeSite({
+        root: "<html><body><h1>没有导航链接的首页</h1></body></html>",
+        f"{root}sitemap.xml": fixture._sitemap(0),
+        f"{root}about": fixture._about_page(0),
+        f"{root}careers": fixture._careers_page(0),
+    })
+    result = _crawl(site, root, max_pages=20, max_depth=2)
+    
+    assert result["pages"] == {root: "home", f"{root}careers": "careers", f"{root}about": "about"}
+    assert len(result["positions"]) == fixture._careers_page(0).count('<li class="job">')
+    assert result["culture"]["values"] == ["客户第一", "坦诚协作", "持续学习"]
+
+
+def test_sitemap_index_expands_career_sitemaps_first():
+    site = FakeSite({
+        ROOT: _page(),
+        "https://www.example.com/sitemap.xml": (
+            "<sitemapindex><sitemap><loc>https://www.example.com/sitemap-news.xml</loc></sitemap>"
+            "<sitemap><loc>https://www.example.com/sitemap-jobs.xml</loc></sitemap></sitemapindex>"
+        ),
+        "https://www.example.com/sitemap-jobs.xml": (
+            "<urlset><url><loc>https://www.example.com/careers/campus</loc></url>"
+            "<url><loc>https://www.example.com/news/1</loc></url></urlset>"
+        ),
+        "https://www.example.com/careers/campus": SITE_PAGES["https://www.example.com/campus"],
+    })
+    result = _crawl(site, max_pages=20, max_depth=1)
+    assert site.requested.index("https://www.example.com/sitemap-jobs.xml") < site.requested.index(
+        "https://www.example.com/sitemap-news.xml"
+    )
+    # sitemap中只有招聘、关于我们类页面会被爬取
+    assert list(result["pages"]) == [ROOT, "https://www.example.com/careers/campus"]
+    assert [p["title"] for p in result["positions"]] == ["管培生"]
+
+
+def test_unchanged_pages_reuse_cached_extraction(tmp_path):
+    site = FakeSite(SITE_PAGES)
+    crawler = SiteCrawler(site.fetch, HTTPCache(root=tmp_path), max_pages=20, max_depth=2)
+    first = asyncio.run(crawler.crawl(ROOT))
+    
+    site.pages = {**SITE_PAGES, "https://www.example.com/campus": _page("", f'<ul class="jobs">{_job("实习生")}</ul>')}
+    second = asyncio.run(crawler.crawl(ROOT))
+    
+    assert first["stats"]["extracted"] == 5
+    assert second["stats"] == {"fetched": 5, "failed": 0, "extracted": 1, "unchanged": 4}
+    assert [p["title"] for p in second["positions"]][-1] == "实习生"
+
+
+@pytest.mark.parametrize("url, expected", [
+    ("HTTPS://WWW.Example.com/Jobs?utm_source=x&b=2&a=1#list", "https://www.example.com/Jobs?a=1&b=2"),
+    ("https://example.com", "https://example.com/"),
+])
+def test_normalize_url(url, expected):
+    assert SiteCrawler.normalize_url(url) == expected
+
+
+@pytest.mark.parametrize("url, text, expected", [
+    ("https://example.com/careers", "", "careers"),
+    ("https://example.com/page?id=3", "加入我们", "careers"),
+    ("https://example.com/company/about", "", "about"),
+    ("https://example.com/x", "企业文化", "about"),
+    ("https://example.com/jobs/list.pdf", "招聘简章", None),
+    ("https://example.com/news", "公司新闻", None),
+])
+def test_classify(url, text, expected):
+    assert SiteCrawler(lambda url: None).classify(url, text) == expected
@@ -0,0 +1,61 @@
+"""
+MCP工具进度通知（ToolProgress）的测试
+"""
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("mcp")
+
+from src.mcp_server import ToolProgress
+
+
+class FakeSession:
+    def __init__(self):
+        self.sent = []
+    
+    async def send_progress_notification(self, token, progress, total, message, related_request_id=None):
+        self.sent.append((token, progress, total, message, related_request_id))
+
+
+def _server(session: FakeSession, meta) -> SimpleNamespace:
+    return SimpleNamespace(request_context=SimpleNamespace(session=session, request_id=7, meta=meta))
+
+
+async def _exercise(progress: ToolProgress):
+    progress.stage("解析简历")
+    await progress.on_token("部分")
+    await progress.on_token("输出")
+    await progress.drain()
+
+
+@pytest.mark.parametrize("meta", [None, SimpleNamespace(progressToken=None)])
+def test_noop_without_progress_token(meta):
+    session = FakeSession()
+    progress = ToolProgress(_server(session, meta), total=3)
+    assert not progress.enabled
+    asyncio.run(_exercise(progress))
+    assert session.sent == []
+
+
+def test_noop_outside_request_context():
+    class NoContext:
+        @property
+        def request_context(self):
+            raise LookupError
+    
+    progress = ToolProgress(NoContext())
+    assert not progress.enabled
+    asyncio.run(_exercise(progress))
+
+
+def test_sends_stages_and_buffered_output_in_order():
+    session = FakeSession()
+    progress = ToolProgress(_server(session, SimpleNamespace(progressToken="tok")), total=3)
+    asyncio.run(_exercise(progress))
+    
+    assert [(token, total, request_id) for token, _, total, _, request_id in session.sent] == [("tok", 3, "7")] * 2
+    (_, first, _, stage_message, _), (_, second, _, output, _) = session.sent
+    assert (first, stage_message) == (1, "解析简历")
+    assert output == "部分输出" and 1 < second < 2
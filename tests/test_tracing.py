@@ -0,0 +1,173 @@
+"""
+链路追踪的测试
+"""
+import json
+import asyncio
+
+import pytest
+
+from src.utils import tracing
+from src.utils.tracing import NOOP_SPAN, Tracer, current_span, traced
+
+
+@pytest.fixture
+def tracer(tmp_path):
+    return Tracer(enabled=True, path=tmp_path / "traces.jsonl", export_format="jsonl")
+
+
+def _exported(tracer: Tracer) -> list[dict]:
+    assert tracer.flush(timeout=5)
+    if not tracer.path.exists():
+        return []
+    return [json.loads(line) for line in tracer.path.read_text(encoding="utf-8").splitlines()]
+
+
+def test_spans_nest_across_tasks_and_threads(tracer):
+    def blocking():
+        with tracer.span("thread.work"):
+            pass
+    
+    async def child(name: str):
+        with tracer.span(name):
+            await asyncio.sleep(0)
+    
+    async def scenario():
+        with tracer.span("root") as root:
+            with tracer.span("stage"):
+                await asyncio.gather(asyncio.create_task(child("task.a")), child("task.b"))
+                await asyncio.to_thread(blocking)
+        return root
+    
+    root = asyncio.run(scenario())
+    spans = {span["name"]: span for span in _exported(tracer)}
+    
+    assert set(spans) == {"root", "stage", "task.a", "task.b", "thread.work"}
+    assert {span["trace_id"] for span in spans.values()} == {root.trace_id}
+    assert spans["root"]["parent_id"] is None
+    assert spans["stage"]["parent_id"] == root.span_id
+    for name in ("task.a", "task.b", "thread.work"):
+        assert spans[name]["parent_id"] == spans["stage"]["span_id"]
+    assert current_span() is NOOP_SPAN
+
+
+def test_status_ok_error_cancelled(tracer):
+    async def scenario():
+        with tracer.span("root"):
+            with tracer.span("ok") as sp:
+                sp.set(cache="hit")
+            with pytest.raises(ValueError):
+                with tracer.span("error"):
+                    raise ValueError("坏数据")
+            with tracer.span("caught") as sp:
+                sp.record_error("超时")
+            
+            async def slow():
+                with tracer.span("cancelled"):
+                    await asyncio.sleep(10)
+            
+            task = asyncio.create_task(slow())
+            await asyncio.sleep(0)
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+    
+    asyncio.run(scenario())
+    spans = {span["name"]: span for span in _exported(tracer)}
+    
+    assert spans["root"]["status"] == "ok"
+    assert spans["ok"]["status"] == "ok" and spans["ok"]["attributes"] == {"cache": "hit"}
+    assert spans["error"]["status"] == "error" and spans["error"]["attributes"]["error"] == "坏数据"
+    assert spans["caught"]["status"] == "error" and spans["caught"]["attributes"]["error"] == "超时"
+    assert spans["cancelled"]["status"] == "cancelled"
+    assert all(span["duration_ms"] >= 0 for span in spans.values())
+
+
+def test_trace_exported_when_root_closes_and_late_children_separately(tracer):
+    async def scenario():
+        release = asyncio.Event()
+        
+        async def shared():
+            with tracer.span("late"):
+                await release.wait()
+        
+        with tracer.span("root"):
+            with tracer.span("early"):
+                pass
+            task = asyncio.create_task(shared())
+            await asyncio.sleep(0)
+            assert _exported(tracer) == []
+        
+        # 根span结束时整条链路写出，仍在运行的子span不在其中
+        assert [span["name"] for span in _exported(tracer)] == ["early", "root"]
+        release.set()
+        await task
+    
+    asyncio.run(scenario())
+    spans = _exported(tracer)
+    assert [span["name"] for span in spans] == ["early", "root", "late"]
+    assert spans[2]["parent_id"] == spans[1]["span_id"]
+
+
+def test_otlp_export_shape(tmp_path):
+    tracer = Tracer(enabled=True, path=tmp_path / "traces.otlp.jsonl", export_format="otlp")
+    with tracer.span("root", url="https://example.com") as root:
+        with tracer.span("child", bytes=10, ratio=0.5, cached=True):
+            pass
+    
+    (exported,) = _exported(tracer)
+    (resource,) = exported["resourceSpans"]
+    assert resource["resource"]["attributes"] == [{"key": "service.name", "value": {"stringValue": "offer-matcher"}}]
+    spans = {span["name"]: span for span in resource["scopeSpans"][0]["spans"]}
+    
+    assert spans["root"]["traceId"] == root.trace_id and len(root.trace_id) == 32
+    assert spans["root"]["parentSpanId"] == ""
+    assert spans["child"]["parentSpanId"] == root.span_id and len(root.span_id) == 16
+    assert spans["child"]["attributes"] == [
+        {"key": "bytes", "value": {"intValue": "10"}},
+        {"key": "ratio", "value": {"doubleValue": 0.5}},
+        {"key": "cached", "value": {"boolValue": True}},
+    ]
+    assert spans["root"]["attributes"] == [{"key": "url", "value": {"stringValue": "https://example.com"}}]
+    assert spans["child"]["status"] == {"code": 1, "message": ""}
+    assert int(spans["root"]["endTimeUnixNano"]) >= int(spans["root"]["startTimeUnixNano"])
+
+
+def test_unknown_export_format_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        Tracer(enabled=True, path=tmp_path / "t", export_format="xml")
+
+
+def test_disabled_tracer_returns_noop_span(tmp_path, monkeypatch):
+    disabled = Tracer(enabled=False, path=tmp_path / "traces.jsonl", export_format="jsonl")
+    monkeypatch.setattr(tracing, "tracer", disabled)
+    
+    with tracing.span("x", a=1) as sp:
+        assert sp is NOOP_SPAN
+        assert sp.set(b=2) is NOOP_SPAN
+        sp.record_error("忽略")
+        assert current_span() is NOOP_SPAN
+    
+    @traced("sync")
+    def sync_work():
+        return current_span()
+    
+    @traced("async")
+    async def async_work():
+        return current_span()
+    
+    assert sync_work() is NOOP_SPAN
+    assert asyncio.run(async_work()) is NOOP_SPAN
+    assert disabled.flush(timeout=1)
+    assert not disabled.path.exists()
+
+
+def test_traced_decorator_records_span(tracer, monkeypatch):
+    monkeypatch.setattr(tracing, "tracer", tracer)
+    
+    @traced("work")
+    async def work():
+        current_span().set(items=3)
+        return "done"
+    
+    assert asyncio.run(work()) == "done"
+    (exported,) = _exported(tracer)
+    assert exported["name"] == "work" and exported["attributes"] == {"items": 3}
@@ -0,0 +1,33 @@
+"""
+上传文件存储的测试
+"""
+import os
+
+from src.utils.upload_store import UploadStore
+
+
+def test_put_dedupes_by_content(tmp_path):
+    store = UploadStore(root=tmp_path, max_size_mb=1)
+    first = store.put(b"resume", "a.PDF")
+    second = store.put(memoryview(b"resume"), "b.pdf")
+    
+    assert first == second == store.path_for(UploadStore.digest(b"resume"), "pdf")
+    assert first.read_bytes() == b"resume"
+    assert len(list(tmp_path.glob("*/*"))) == 1
+
+
+def test_cleanup_evicts_oldest_but_keeps_new_entry(tmp_path):
+    store = UploadStore(root=tmp_path, max_size_mb=1)
+    old = store.put(b"a" * 400_000, "old.txt")
+    recent = store.put(b"b" * 400_000, "recent.txt")
+    os.utime(old, (1, 1))
+    os.utime(recent, (2, 2))
+    
+    newest = store.put(b"c" * 400_000, "new.txt")
+    assert not old.exists()
+    assert recent.exists() and newest.exists()
+    
+    # 单个文件就超过上限时，刚写入的文件也要保留给调用方使用
+    huge = store.put(b"d" * 2_000_000, "huge.txt")
+    assert huge.exists()
+    assert not recent.exists() and not newest.exists()